@@ -38,6 +38,20 @@ class CSJSONClient(TornadoClient):
             retVal["Value"]["data"] = b64decode(retVal["Value"]["data"])
         return retVal
 
+    def getCompressedDeltaIfNewer(self, sClientVersion):
+        """
+        Transmit request to service and get data in base64,
+        it decode base64 before returning.
+
+        :returns: Modifications since the client version or configuration data, if changed, compressed
+        """
+        retVal = self.executeRPC("getCompressedDeltaIfNewer", sClientVersion)
+        if retVal["OK"]:
+            for key in ("delta", "data"):
+                if key in retVal["Value"]:
+                    retVal["Value"][key] = b64decode(retVal["Value"][key])
+        return retVal
+
     def commitNewData(self, sData):
         """
         Transmit request to service by encoding data in base64.
@@ -40,6 +40,7 @@ from diraccfg import CFG
 from DIRAC import S_ERROR, S_OK
 from DIRAC.ConfigurationSystem.Client.ConfigurationData import gConfigurationData
 from DIRAC.ConfigurationSystem.Client.Helpers import CSGlobals, Registry
+from DIRAC.ConfigurationSystem.private.ConfigurationSnapshot import ConfigurationSnapshot
 from DIRAC.Core.Security.ProxyInfo import getVOfromProxyGroup
 from DIRAC.Core.Utilities import LockRing
 from DIRAC.Core.Utilities.DErrno import ESECTION
@@ -51,8 +52,7 @@ class Operations:
     The /Operations CFG section is maintained in a cache by an Operations object
     """
 
-    __cache = {}
-    __cacheVersion = 0
+    __cache = (None, {})
     __cacheLock = LockRing.LockRing().getLock()
 
     def __init__(self, vo=False, group=False, setup=False):
@@ -83,27 +83,34 @@ class Operations:
                 self.__vo = result["Value"]
 
     def __getCache(self):
+        # The cache is kept together with the merged configuration it was built from,
+        # so that the usual case of a cache hit can be checked without locking
+        cacheCFG, cache = Operations.__cache
+        cacheKey = (self.__vo,)
+        if cacheCFG is gConfigurationData.mergedCFG and cacheKey in cache:
+            return cache[cacheKey]
+
         Operations.__cacheLock.acquire()
         try:
-            currentVersion = gConfigurationData.getVersion()
-            if currentVersion != Operations.__cacheVersion:
-                Operations.__cache = {}
-                Operations.__cacheVersion = currentVersion
+            currentCFG = gConfigurationData.mergedCFG
+            cacheCFG, cache = Operations.__cache
+            if cacheCFG is not currentCFG:
+                cache = {}
+                Operations.__cache = (currentCFG, cache)
 
-            cacheKey = (self.__vo,)
-            if cacheKey in Operations.__cache:
-                return Operations.__cache[cacheKey]
+            if cacheKey in cache:
+                return cache[cacheKey]
 
             mergedCFG = CFG()
 
             for path in self.__getSearchPaths():
-                pathCFG = gConfigurationData.mergedCFG[path]
+                pathCFG = currentCFG[path]
                 if pathCFG:
                     mergedCFG = mergedCFG.mergeWith(pathCFG)
 
-            Operations.__cache[cacheKey] = mergedCFG
+            cache[cacheKey] = ConfigurationSnapshot(mergedCFG)
 
-            return Operations.__cache[cacheKey]
+            return cache[cacheKey]
         finally:
             try:
                 Operations.__cacheLock.release()
@@ -121,41 +128,35 @@ class Operations:
         return paths
 
     def getValue(self, optionPath, defaultValue=None):
-        return self.__getCache().getOption(optionPath, defaultValue)
-
-    def __getCFG(self, sectionPath):
-        cacheCFG = self.__getCache()
-        section = cacheCFG.getRecursive(sectionPath)
-        if not section:
-            return S_ERROR(ESECTION, f"{sectionPath} in Operations does not exist")
-        sectionCFG = section["value"]
-        if isinstance(sectionCFG, str):
+        return self.__getCache().getValue(optionPath, defaultValue)
+
+    def __checkSection(self, snapshot, sectionPath):
+        if snapshot.getOptions(sectionPath) is not None:
+            return S_OK()
+        if snapshot.getOption(sectionPath) is not None:
             return S_ERROR(f"{sectionPath} in Operations is not a section")
-        return S_OK(sectionCFG)
+        return S_ERROR(ESECTION, f"{sectionPath} in Operations does not exist")
 
     def getSections(self, sectionPath, listOrdered=False):
-        result = self.__getCFG(sectionPath)
+        snapshot = self.__getCache()
+        result = self.__checkSection(snapshot, sectionPath)
         if not result["OK"]:
             return result
-        sectionCFG = result["Value"]
-        return S_OK(sectionCFG.listSections(listOrdered))
+        return S_OK(snapshot.getSections(sectionPath))
 
     def getOptions(self, sectionPath, listOrdered=False):
-        result = self.__getCFG(sectionPath)
+        snapshot = self.__getCache()
+        result = self.__checkSection(snapshot, sectionPath)
         if not result["OK"]:
             return result
-        sectionCFG = result["Value"]
-        return S_OK(sectionCFG.listOptions(listOrdered))
+        return S_OK(snapshot.getOptions(sectionPath))
 
     def getOptionsDict(self, sectionPath):
-        result = self.__getCFG(sectionPath)
+        snapshot = self.__getCache()
+        result = self.__checkSection(snapshot, sectionPath)
         if not result["OK"]:
             return result
-        sectionCFG = result["Value"]
-        data = {}
-        for opName in sectionCFG.listOptions():
-            data[opName] = sectionCFG[opName]
-        return S_OK(data)
+        return S_OK(snapshot.getOptionsDict(sectionPath))
 
     def getMonitoringBackends(self, monitoringType=None):
         """
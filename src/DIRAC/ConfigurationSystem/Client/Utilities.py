@@ -431,6 +431,22 @@ def getDBParameters(fullname):
         dbPort = int(result["Value"])
     parameters["Port"] = dbPort
 
+    # Check optional parameters: MaxQueueSize, the maximum number of connections to the DB
+    result = gConfig.getOption(cs_path + "/MaxQueueSize")
+    if not result["OK"]:
+        result = gConfig.getOption("/Systems/Databases/MaxQueueSize")
+    if result["OK"]:
+        parameters["MaxQueueSize"] = int(result["Value"])
+
+    # Check optional parameters: ReadReplicas, the read only replicas of the DB, as "host[:port]",
+    # and MaxReplicationLag, the maximum lag in seconds of the replicas used
+    readReplicas = gConfig.getValue(cs_path + "/ReadReplicas", [])
+    if readReplicas:
+        parameters["ReadReplicas"] = readReplicas
+        result = gConfig.getOption(cs_path + "/MaxReplicationLag")
+        if result["OK"]:
+            parameters["MaxReplicationLag"] = int(result["Value"])
+
     return S_OK(parameters)
 
 
@@ -51,6 +51,12 @@ class ConfigurationHandler(RequestHandler):
             retDict["data"] = gServiceInterface.getCompressedConfigurationData()
         return S_OK(retDict)
 
+    types_getCompressedDeltaIfNewer = [str]
+
+    @classmethod
+    def export_getCompressedDeltaIfNewer(cls, sClientVersion):
+        return S_OK(gServiceInterface.getCompressedDeltaIfNewer(sClientVersion))
+
     types_publishSlaveServer = [str]
 
     @classmethod
@@ -57,6 +57,19 @@ class TornadoConfigurationHandler(TornadoService):
             retDict["data"] = b64encode(self.ServiceInterface.getCompressedConfigurationData()).decode()
         return S_OK(retDict)
 
+    def export_getCompressedDeltaIfNewer(self, sClientVersion):
+        """
+        Returns the modifications of the configuration since the client version if they are kept,
+        else the whole configuration if a newer configuration exists, if not just returns the version
+
+        :param sClientVersion: Version used by client
+        """
+        retDict = self.ServiceInterface.getCompressedDeltaIfNewer(sClientVersion)
+        for key in ("delta", "data"):
+            if key in retDict:
+                retDict[key] = b64encode(retDict[key]).decode()
+        return S_OK(retDict)
+
     def export_publishSlaveServer(self, sURL):
         """
         Used by slave server to register as a slave server.
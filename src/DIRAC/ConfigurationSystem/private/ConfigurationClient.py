@@ -220,11 +220,8 @@ class ConfigurationClient:
         :return: S_OK(dict)/S_ERROR()
         """
         gRefresher.refreshConfigurationIfNeeded()
-        optionsDict = {}
-        optionList = gConfigurationData.getOptionsFromCFG(sectionPath)
-        if isinstance(optionList, list):
-            for option in optionList:
-                optionsDict[option] = gConfigurationData.extractOptionFromCFG(f"{sectionPath}/{option}")
+        optionsDict = gConfigurationData.getOptionsDictFromCFG(sectionPath)
+        if isinstance(optionsDict, dict):
             return S_OK(optionsDict)
         else:
             return S_ERROR(f"Path {sectionPath} does not exist or it's not a section")
@@ -12,9 +12,10 @@ from diraccfg import CFG
 
 import DIRAC
 from DIRAC.Core.Utilities.File import mkDir
-from DIRAC.Core.Utilities import List
+from DIRAC.Core.Utilities import DEncode, List
 from DIRAC.Core.Utilities.ReturnValues import S_OK, S_ERROR
 from DIRAC.Core.Utilities.LockRing import LockRing
+from DIRAC.ConfigurationSystem.private.ConfigurationSnapshot import ConfigurationSnapshot
 from DIRAC.FrameworkSystem.Client.Logger import gLogger
 
 
@@ -30,12 +31,20 @@ class ConfigurationData:
             self.runningThreadsNumber = 0
 
         self.__compressedConfigurationData = None
+        self.__checksum = None
+        # Modifications between the last versions of the remote CFG, only kept by the services
+        self.__versionDeltas = []
+        self.__compressedDeltas = {}
+        self.__lastVersion = None
+        self.__lastVersionCFG = None
+        self.__deltasLock = LockRing().getLock()
         self.configurationPath = "/DIRAC/Configuration"
         self.backupsDir = os.path.join(DIRAC.rootPath, "etc", "csbackup")
         self._isService = False
         self.localCFG = CFG()
         self.remoteCFG = CFG()
         self.mergedCFG = CFG()
+        self.__snapshot = None
         self.remoteServerList = []
         if loadDefaultCFG:
             defaultCFGFile = os.path.join(DIRAC.rootPath, "etc", "dirac.cfg")
@@ -51,6 +60,7 @@ class ConfigurationData:
     def sync(self):
         gLogger.debug("Updating configuration internals")
         self.mergedCFG = self.remoteCFG.mergeWith(self.localCFG)
+        self.__snapshot = ConfigurationSnapshot(self.mergedCFG)
         self.remoteServerList = []
         localServers = self.extractOptionFromCFG(
             f"{self.configurationPath}/Servers", self.localCFG, disableDangerZones=True
@@ -64,6 +74,9 @@ class ConfigurationData:
             self.remoteServerList.extend(List.fromChar(remoteServers, ","))
         self.remoteServerList = List.uniqueElements(self.remoteServerList)
         self.__compressedConfigurationData = None
+        self.__checksum = None
+        if self._isService:
+            self.__recordVersionDelta()
 
     def loadFile(self, fileName):
         try:
@@ -98,6 +111,33 @@ class ConfigurationData:
         self.unlock()
         self.sync()
 
+    def loadRemoteCFGFromCompressedDelta(self, data, checksum):
+        """Update the remote CFG by applying the modifications sent by a configuration server
+
+        :param bytes data: compressed list of the modification lists between the versions
+        :param int checksum: checksum of the remote CFG once the modifications are applied
+
+        :return: S_OK()/S_ERROR() if the modifications do not give the expected CFG
+        """
+        if isinstance(data, str):
+            data = data.encode(errors="surrogateescape")
+        try:
+            modListChain = DEncode.decode(zlib.decompress(data))[0]
+        except Exception as e:
+            return S_ERROR(f"Cannot decode configuration delta: {repr(e)}")
+        newRemoteCFG = self.remoteCFG.clone()
+        for modList in modListChain:
+            result = newRemoteCFG.applyModifications(modList)
+            if not result["OK"]:
+                return result
+        if zlib.crc32(str(newRemoteCFG).encode()) != checksum:
+            return S_ERROR("Checksum mismatch after applying the configuration delta")
+        self.lock()
+        self.remoteCFG = newRemoteCFG
+        self.unlock()
+        self.sync()
+        return S_OK()
+
     def loadConfigurationData(self, fileName=False):
         name = self.getName()
         self.lock()
@@ -112,6 +152,19 @@ class ConfigurationData:
         self.unlock()
         self.sync()
 
+    def getSnapshot(self, cfg=False):
+        """Get the flattened view of the merged configuration, which can be read without locking
+
+        :param cfg: CFG the snapshot is wanted for, the merged one by default
+
+        :return: ConfigurationSnapshot or None if there is no up to date snapshot of this CFG
+        """
+        snapshot = self.__snapshot
+        # The merged CFG can be replaced without a sync, in which case the snapshot is outdated
+        if snapshot is None or snapshot.cfg is not self.mergedCFG or (cfg and cfg is not snapshot.cfg):
+            return None
+        return snapshot
+
     def getCommentFromCFG(self, path, cfg=False):
         if not cfg:
             cfg = self.mergedCFG
@@ -126,6 +179,9 @@ class ConfigurationData:
         return self.dangerZoneEnd(None)
 
     def getSectionsFromCFG(self, path, cfg=False, ordered=False):
+        snapshot = self.getSnapshot(cfg)
+        if snapshot is not None:
+            return snapshot.getSections(path)
         if not cfg:
             cfg = self.mergedCFG
         self.dangerZoneStart()
@@ -139,6 +195,9 @@ class ConfigurationData:
         return self.dangerZoneEnd(None)
 
     def getOptionsFromCFG(self, path, cfg=False, ordered=False):
+        snapshot = self.getSnapshot(cfg)
+        if snapshot is not None:
+            return snapshot.getOptions(path)
         if not cfg:
             cfg = self.mergedCFG
         self.dangerZoneStart()
@@ -151,7 +210,19 @@ class ConfigurationData:
             pass
         return self.dangerZoneEnd(None)
 
+    def getOptionsDictFromCFG(self, path, cfg=False):
+        snapshot = self.getSnapshot(cfg)
+        if snapshot is not None:
+            return snapshot.getOptionsDict(path)
+        optionList = self.getOptionsFromCFG(path, cfg)
+        if optionList is None:
+            return None
+        return {option: self.extractOptionFromCFG(f"{path}/{option}", cfg) for option in optionList}
+
     def extractOptionFromCFG(self, path, cfg=False, disableDangerZones=False):
+        snapshot = self.getSnapshot(cfg)
+        if snapshot is not None:
+            return snapshot.getOption(path)
         if not cfg:
             cfg = self.mergedCFG
         if not disableDangerZones:
@@ -241,6 +312,12 @@ class ConfigurationData:
         except Exception:
             return 600
 
+    def getMaxVersionDeltas(self):
+        try:
+            return int(self.extractOptionFromCFG(f"{self.configurationPath}/MaxVersionDeltas", self.mergedCFG))
+        except Exception:
+            return 20
+
     def mergingEnabled(self):
         try:
             val = self.extractOptionFromCFG(f"{self.configurationPath}/EnableAutoMerge", self.mergedCFG)
@@ -281,6 +358,53 @@ class ConfigurationData:
             self.__compressedConfigurationData = zlib.compress(str(self.remoteCFG).encode(), 9)
         return self.__compressedConfigurationData
 
+    def getChecksum(self):
+        if self.__checksum is None:
+            self.__checksum = zlib.crc32(str(self.remoteCFG).encode())
+        return self.__checksum
+
+    def __recordVersionDelta(self):
+        """Keep the modifications of the remote CFG since the last recorded version, if the version changed"""
+        version = self.extractOptionFromCFG(
+            f"{self.configurationPath}/Version", self.remoteCFG, disableDangerZones=True
+        )
+        with self.__deltasLock:
+            if self.__lastVersionCFG is not None and version == self.__lastVersion:
+                return
+            newCFG = self.remoteCFG.clone()
+            if self.__lastVersionCFG is not None:
+                modList = self.__lastVersionCFG.getModifications(newCFG)
+                self.__versionDeltas.append((self.__lastVersion, version, modList))
+                maxVersionDeltas = self.getMaxVersionDeltas()
+                if len(self.__versionDeltas) > maxVersionDeltas:
+                    del self.__versionDeltas[: len(self.__versionDeltas) - maxVersionDeltas]
+            self.__lastVersion = version
+            self.__lastVersionCFG = newCFG
+            self.__compressedDeltas = {}
+
+    def getCompressedDelta(self, fromVersion):
+        """Get the modifications of the remote CFG since a version, for a client to apply them
+        with loadRemoteCFGFromCompressedDelta
+
+        :param str fromVersion: version the client has
+
+        :return: compressed data, or None if the modifications since that version are not kept
+                 or are not smaller than the whole configuration
+        """
+        with self.__deltasLock:
+            if fromVersion in self.__compressedDeltas:
+                return self.__compressedDeltas[fromVersion]
+            for iPos, (deltaFromVersion, _deltaToVersion, _modList) in enumerate(self.__versionDeltas):
+                if deltaFromVersion == fromVersion:
+                    break
+            else:
+                return None
+            data = zlib.compress(DEncode.encode([modList for _, _, modList in self.__versionDeltas[iPos:]]), 9)
+            if len(data) >= len(self.getCompressedData()):
+                data = None
+            self.__compressedDeltas[fromVersion] = data
+            return data
+
     def isMaster(self):
         value = self.extractOptionFromCFG(f"{self.configurationPath}/Master", self.localCFG)
         return bool(value and value.lower() in ("yes", "true", "y"))
@@ -290,6 +414,7 @@ class ConfigurationData:
 
     def setAsService(self):
         self._isService = True
+        self.__recordVersionDelta()
 
     def isService(self):
         return self._isService
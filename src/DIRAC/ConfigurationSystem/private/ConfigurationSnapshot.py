@@ -0,0 +1,127 @@
+""" ConfigurationSnapshot is a flattened, read only, view of a CFG
+
+    The CFG is walked once when the snapshot is built and every option and section
+    is indexed by its full path. Looking up a path is then a dictionary access instead
+    of a walk of the tree, and since the snapshot is never modified once built it can
+    be read by any number of threads without locking. A new snapshot has to be built
+    whenever the CFG changes.
+"""
+from DIRAC.Core.Utilities import List
+
+
+def normalizePath(path):
+    """Get the path in the form used as key of the snapshot:
+    levels stripped, empty levels removed and a leading slash
+
+    :param str path: path to normalize
+
+    :return: str
+    """
+    return "/" + "/".join(level.strip() for level in path.split("/") if level.strip())
+
+
+class ConfigurationSnapshot:
+    """Flattened view of a CFG, indexed by full path"""
+
+    def __init__(self, cfg):
+        """C'or
+
+        :param CFG cfg: configuration to flatten. It must not be modified afterwards
+        """
+        self.cfg = cfg
+        self.__options = {}
+        self.__sections = {}
+        toWalk = [("/", cfg)]
+        while toWalk:
+            sectionPath, sectionCFG = toWalk.pop()
+            prefix = sectionPath.rstrip("/")
+            optionList = sectionCFG.listOptions(True)
+            sectionList = sectionCFG.listSections(True)
+            self.__sections[sectionPath] = (tuple(sectionList), tuple(optionList))
+            for option in optionList:
+                self.__options[f"{prefix}/{option}"] = sectionCFG[option]
+            for section in sectionList:
+                toWalk.append((f"{prefix}/{section}", sectionCFG[section]))
+
+    def __len__(self):
+        return len(self.__options) + len(self.__sections)
+
+    def __getSection(self, path):
+        section = self.__sections.get(path)
+        if section is None:
+            section = self.__sections.get(normalizePath(path))
+        return section
+
+    def getOption(self, path):
+        """Get the value of an option
+
+        :param str path: full path of the option
+
+        :return: str or None if the path does not exist or it is not an option
+        """
+        value = self.__options.get(path)
+        if value is None:
+            value = self.__options.get(normalizePath(path))
+        return value
+
+    def getSections(self, path):
+        """Get the ordered list of subsections of a section
+
+        :param str path: full path of the section
+
+        :return: list or None if the path does not exist or it is not a section
+        """
+        section = self.__getSection(path)
+        if section is None:
+            return None
+        return list(section[0])
+
+    def getOptions(self, path):
+        """Get the ordered list of options of a section
+
+        :param str path: full path of the section
+
+        :return: list or None if the path does not exist or it is not a section
+        """
+        section = self.__getSection(path)
+        if section is None:
+            return None
+        return list(section[1])
+
+    def getOptionsDict(self, path):
+        """Get the options of a section with their values
+
+        :param str path: full path of the section
+
+        :return: dict or None if the path does not exist or it is not a section
+        """
+        section = self.__getSection(path)
+        if section is None:
+            return None
+        prefix = normalizePath(path).rstrip("/")
+        return {option: self.__options[f"{prefix}/{option}"] for option in section[1]}
+
+    def getValue(self, path, defaultValue=None):
+        """Get the value of an option, casted to the type of the default value,
+        with the same conventions as CFG.getOption
+
+        :param str path: full path of the option
+        :param defaultValue: value returned if the option does not exist, and type of the returned value
+
+        :return: value of the option or defaultValue
+        """
+        optionValue = self.getOption(path)
+        if optionValue is None:
+            return defaultValue
+        if defaultValue is None or optionValue == defaultValue:
+            return optionValue
+
+        defaultType = defaultValue if isinstance(defaultValue, type) else type(defaultValue)
+        try:
+            if defaultType == list:
+                return List.fromChar(optionValue, ",")
+            if defaultType == bool:
+                return optionValue.lower() in ("y", "yes", "true", "1")
+            return defaultType(optionValue)
+        except Exception:
+            return defaultValue
@@ -1,3 +1,4 @@
+import errno
 import time
 import random
 
@@ -6,23 +7,51 @@ from DIRAC.ConfigurationSystem.Client.ConfigurationData import gConfigurationDat
 from DIRAC.ConfigurationSystem.Client.PathFinder import getGatewayURLs
 from DIRAC.FrameworkSystem.Client.Logger import gLogger
 from DIRAC.Core.Utilities import List
+from DIRAC.Core.Utilities.DErrno import cmpError
 from DIRAC.Core.Utilities.EventDispatcher import gEventDispatcher
 from DIRAC.Core.Utilities.ReturnValues import S_OK, S_ERROR
 
 
+# Servers which do not know about configuration deltas
+_serversWithoutDeltas = set()
+
+
+def _getCompressedDeltaIfNewer(serviceClient, localVersion):
+    """
+    Get the modifications since the local version, or the whole configuration
+    from servers not supporting deltas
+    """
+    if serviceClient.serverURL not in _serversWithoutDeltas:
+        retVal = serviceClient.getCompressedDeltaIfNewer(localVersion)
+        if retVal["OK"] or not (cmpError(retVal, errno.ENOSYS) or "Unknown method" in retVal["Message"]):
+            return retVal
+        gLogger.verbose("Server does not provide configuration deltas", serviceClient.serverURL)
+        _serversWithoutDeltas.add(serviceClient.serverURL)
+    return serviceClient.getCompressedDataIfNewer(localVersion)
+
+
 def _updateFromRemoteLocation(serviceClient):
     """
     Refresh the configuration
     """
     gLogger.debug("", f"Trying to refresh from {serviceClient.serverURL}")
     localVersion = gConfigurationData.getVersion()
-    retVal = serviceClient.getCompressedDataIfNewer(localVersion)
+    retVal = _getCompressedDeltaIfNewer(serviceClient, localVersion)
     if retVal["OK"]:
         dataDict = retVal["Value"]
         newestVersion = dataDict["newestVersion"]
         if localVersion < newestVersion:
             gLogger.debug("New version available", f"Updating to version {newestVersion}...")
-            gConfigurationData.loadRemoteCFGFromCompressedMem(dataDict["data"])
+            if "delta" in dataDict:
+                result = gConfigurationData.loadRemoteCFGFromCompressedDelta(dataDict["delta"], dataDict["checksum"])
+                if not result["OK"]:
+                    gLogger.warn("Cannot apply configuration delta, getting the whole configuration", result["Message"])
+                    result = serviceClient.getCompressedData()
+                    if not result["OK"]:
+                        return result
+                    dataDict["data"] = result["Value"]
+            if "data" in dataDict:
+                gConfigurationData.loadRemoteCFGFromCompressedMem(dataDict["data"])
             gLogger.debug(f"Updated to version {gConfigurationData.getVersion()}")
             gEventDispatcher.triggerEvent("CSNewVersion", newestVersion, threaded=True)
         return S_OK()
@@ -249,6 +249,26 @@ class ServiceInterfaceBase:
     def getVersion(self):
         return gConfigurationData.getVersion()
 
+    def getCompressedDeltaIfNewer(self, sClientVersion):
+        """
+        Get what a client needs to update its configuration: nothing if it is up to date,
+        the modifications since its version if they are kept, the whole configuration otherwise
+
+        :param str sClientVersion: version of the client configuration
+        :return: dict with the newest version, and the compressed "delta" with the "checksum" of the result,
+                 or the compressed "data"
+        """
+        sVersion = gConfigurationData.getVersion()
+        retDict = {"newestVersion": sVersion}
+        if sClientVersion < sVersion:
+            delta = gConfigurationData.getCompressedDelta(sClientVersion)
+            if delta is not None:
+                retDict["delta"] = delta
+                retDict["checksum"] = gConfigurationData.getChecksum()
+            else:
+                retDict["data"] = gConfigurationData.getCompressedData()
+        return retDict
+
     def getCommitHistory(self):
         files = self.__getCfgBackups(gConfigurationData.getBackupDir())
         backups = [".".join(fileName.split(".")[1:-1]).split("@") for fileName in files]
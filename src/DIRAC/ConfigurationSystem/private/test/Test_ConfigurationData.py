@@ -0,0 +1,138 @@
+""" Test the configuration deltas kept by the configuration servers and applied by the clients
+"""
+# pylint: disable=protected-access, missing-docstring, invalid-name
+
+import errno
+from unittest.mock import MagicMock
+
+import pytest
+from diraccfg import CFG
+
+from DIRAC import S_OK, S_ERROR
+from DIRAC.ConfigurationSystem.private import RefresherBase
+from DIRAC.ConfigurationSystem.private.ConfigurationData import ConfigurationData
+
+CFG_CONTENT = """
+DIRAC
+{
+  Configuration
+  {
+    Name = Test
+    Version = 2023-01-01 00:00:00
+  }
+}
+"""
+# Enough users for the deltas to be smaller than the whole configuration
+USERS_CFG = CFG().loadFromDict(
+    {"Registry": {"Users": {f"user{i}": {"DN": f"/C=ch/O=DIRAC/CN=user{i}"} for i in range(1, 100)}}}
+)
+
+
+def newVersion(confData, version, **options):
+    """Modify the remote configuration of a server as a commit would"""
+    remoteCFG = confData.getRemoteCFG().clone()
+    for path, value in options.items():
+        remoteCFG.setOption(path.replace("_", "/"), value)
+    confData.setRemoteCFG(remoteCFG)
+    confData.setVersion(version)
+
+
+@pytest.fixture
+def server():
+    confData = ConfigurationData(loadDefaultCFG=False)
+    confData.loadRemoteCFGFromMem(CFG_CONTENT)
+    confData.setRemoteCFG(confData.getRemoteCFG().mergeWith(USERS_CFG))
+    confData.setAsService()
+    return confData
+
+
+@pytest.fixture
+def client(server):
+    confData = ConfigurationData(loadDefaultCFG=False)
+    confData.loadRemoteCFGFromCompressedMem(server.getCompressedData())
+    return confData
+
+
+def test_delta(server, client):
+    oldVersion = client.getVersion()
+    assert server.getCompressedDelta(oldVersion) is None
+
+    newVersion(server, "2023-01-02 00:00:00", Registry_Users_user1_Email="user1@cern.ch")
+    newVersion(server, "2023-01-03 00:00:00", Registry_DefaultGroup="user")
+    assert server.getCompressedDelta("2023-01-03 00:00:00") is None
+    assert server.getCompressedDelta("unknown") is None
+
+    delta = server.getCompressedDelta(oldVersion)
+    assert delta is not None
+    assert len(delta) < len(server.getCompressedData())
+    assert client.loadRemoteCFGFromCompressedDelta(delta, server.getChecksum())["OK"]
+    assert client.getVersion() == "2023-01-03 00:00:00"
+    assert client.extractOptionFromCFG("/Registry/Users/user1/Email") == "user1@cern.ch"
+    assert str(client.getRemoteCFG()) == str(server.getRemoteCFG())
+
+
+def test_delta_maxVersionDeltas(server, client):
+    oldVersion = client.getVersion()
+    newVersion(server, "2023-01-02 00:00:00", DIRAC_Configuration_MaxVersionDeltas="1")
+    assert server.getCompressedDelta(oldVersion) is not None
+    newVersion(server, "2023-01-03 00:00:00", Registry_DefaultGroup="user")
+    assert server.getCompressedDelta(oldVersion) is None
+    assert server.getCompressedDelta("2023-01-02 00:00:00") is not None
+
+
+def test_delta_checksumMismatch(server, client):
+    oldVersion = client.getVersion()
+    newVersion(server, "2023-01-02 00:00:00", Registry_DefaultGroup="user")
+    delta = server.getCompressedDelta(oldVersion)
+
+    # The client configuration is left untouched
+    result = client.loadRemoteCFGFromCompressedDelta(delta, server.getChecksum() + 1)
+    assert not result["OK"]
+    assert client.getVersion() == oldVersion
+
+
+@pytest.mark.parametrize(
+    "deltaError, fallback",
+    [
+        (S_ERROR("Unknown method getCompressedDeltaIfNewer"), True),
+        (S_ERROR(errno.ENOSYS, "getCompressedDeltaIfNewer is not implemented"), True),
+        (S_ERROR("Connection refused"), False),
+    ],
+)
+def test_updateFromRemoteLocation_oldServer(mocker, server, client, deltaError, fallback):
+    mocker.patch.object(RefresherBase, "gConfigurationData", client)
+    mocker.patch.object(RefresherBase, "_serversWithoutDeltas", set())
+    mocker.patch.object(RefresherBase, "gEventDispatcher")
+    newVersion(server, "2023-01-02 00:00:00", Registry_DefaultGroup="user")
+
+    serviceClient = MagicMock(serverURL="dips://server:9135/Configuration/Server")
+    serviceClient.getCompressedDeltaIfNewer.return_value = deltaError
+    serviceClient.getCompressedDataIfNewer.return_value = S_OK(
+        {"newestVersion": server.getVersion(), "data": server.getCompressedData()}
+    )
+    assert RefresherBase._updateFromRemoteLocation(serviceClient)["OK"] == fallback
+    assert (client.getVersion() == server.getVersion()) == fallback
+    assert (serviceClient.serverURL in RefresherBase._serversWithoutDeltas) == fallback
+
+
+def test_updateFromRemoteLocation_delta(mocker, server, client):
+    mocker.patch.object(RefresherBase, "gConfigurationData", client)
+    mocker.patch.object(RefresherBase, "gEventDispatcher")
+    oldVersion = client.getVersion()
+    newVersion(server, "2023-01-02 00:00:00", Registry_DefaultGroup="user")
+
+    serviceClient = MagicMock(serverURL="dips://server:9135/Configuration/Server")
+    serviceClient.getCompressedDeltaIfNewer.return_value = S_OK(
+        {
+            "newestVersion": server.getVersion(),
+            "delta": server.getCompressedDelta(oldVersion),
+            "checksum": server.getChecksum() + 1,
+        }
+    )
+    serviceClient.getCompressedData.return_value = S_OK(server.getCompressedData())
+
+    # The delta does not give the expected configuration, the whole one is downloaded
+    assert RefresherBase._updateFromRemoteLocation(serviceClient)["OK"]
+    assert serviceClient.getCompressedData.called
+    assert client.getVersion() == server.getVersion()
+    assert client.extractOptionFromCFG("/Registry/DefaultGroup") == "user"
@@ -0,0 +1,147 @@
+""" Test the flattened view of the configuration against the walk of the CFG tree
+"""
+# pylint: disable=protected-access, missing-docstring, invalid-name
+
+import pytest
+from diraccfg import CFG
+
+from DIRAC.ConfigurationSystem.private.ConfigurationData import ConfigurationData
+from DIRAC.ConfigurationSystem.private.ConfigurationSnapshot import ConfigurationSnapshot
+
+CFG_CONTENT = """
+DIRAC
+{
+  Setup = MySetup
+  Configuration
+  {
+    Servers = dips://server:9135/Configuration/Server
+  }
+}
+Resources
+{
+  Sites
+  {
+    LCG
+    {
+      LCG.CERN.ch
+      {
+        CE = ce1.cern.ch, ce2.cern.ch
+        MaxTime = 3600
+        Enabled = yes
+      }
+      LCG.IN2P3.fr
+      {
+      }
+    }
+  }
+}
+"""
+
+
+@pytest.fixture
+def snapshot():
+    cfg = CFG()
+    cfg.loadFromBuffer(CFG_CONTENT)
+    return ConfigurationSnapshot(cfg)
+
+
+@pytest.fixture
+def configurationData():
+    confData = ConfigurationData(loadDefaultCFG=False)
+    cfg = CFG()
+    cfg.loadFromBuffer(CFG_CONTENT)
+    confData.mergeWithLocal(cfg)
+    return confData
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("/DIRAC/Setup", "MySetup"),
+        ("DIRAC/Setup", "MySetup"),
+        ("//DIRAC/ Setup /", "MySetup"),
+        ("/Resources/Sites/LCG/LCG.CERN.ch/MaxTime", "3600"),
+        ("/DIRAC/Configuration", None),
+        ("/DIRAC/Unknown", None),
+        ("/", None),
+    ],
+)
+def test_getOption(snapshot, path, expected):
+    assert snapshot.getOption(path) == expected
+
+
+@pytest.mark.parametrize(
+    "path, sections, options",
+    [
+        ("/", ["DIRAC", "Resources"], []),
+        ("", ["DIRAC", "Resources"], []),
+        ("/DIRAC", ["Configuration"], ["Setup"]),
+        ("/Resources/Sites/LCG/", ["LCG.CERN.ch", "LCG.IN2P3.fr"], []),
+        ("/Resources/Sites/LCG/LCG.IN2P3.fr", [], []),
+        ("/DIRAC/Setup", None, None),
+        ("/Unknown", None, None),
+    ],
+)
+def test_getSections(snapshot, path, sections, options):
+    assert snapshot.getSections(path) == sections
+    assert snapshot.getOptions(path) == options
+
+
+def test_getOptionsDict(snapshot):
+    assert snapshot.getOptionsDict("/Resources/Sites/LCG/LCG.CERN.ch") == {
+        "CE": "ce1.cern.ch, ce2.cern.ch",
+        "MaxTime": "3600",
+        "Enabled": "yes",
+    }
+    assert snapshot.getOptionsDict("/DIRAC/Setup") is None
+
+
+@pytest.mark.parametrize(
+    "path, defaultValue",
+    [
+        ("/Resources/Sites/LCG/LCG.CERN.ch/CE", None),
+        ("/Resources/Sites/LCG/LCG.CERN.ch/CE", []),
+        ("/Resources/Sites/LCG/LCG.CERN.ch/MaxTime", 0),
+        ("/Resources/Sites/LCG/LCG.CERN.ch/MaxTime", 0.0),
+        ("/Resources/Sites/LCG/LCG.CERN.ch/Enabled", False),
+        ("/Resources/Sites/LCG/LCG.CERN.ch/Enabled", 0),
+        ("/Resources/Sites/LCG/LCG.CERN.ch/Unknown", "default"),
+        ("/Resources/Sites/LCG/LCG.CERN.ch", "default"),
+        ("/DIRAC/Setup", "MySetup"),
+        ("/DIRAC/Setup", str),
+    ],
+)
+def test_getValue(snapshot, path, defaultValue):
+    """The casting follows the one of CFG.getOption"""
+    assert snapshot.getValue(path, defaultValue) == snapshot.cfg.getOption(path, defaultValue)
+
+
+def test_configurationData(configurationData):
+    assert configurationData.getSnapshot() is not None
+    assert configurationData.extractOptionFromCFG("/DIRAC/Setup") == "MySetup"
+    assert configurationData.getSectionsFromCFG("/Resources/Sites") == ["LCG"]
+    assert configurationData.getOptionsDictFromCFG("/DIRAC") == {"Setup": "MySetup"}
+    assert configurationData.getServers() == ["dips://server:9135/Configuration/Server"]
+
+    # A modification syncs, so the new value is visible at once
+    configurationData.setOptionInCFG("/DIRAC/Setup", "OtherSetup")
+    assert configurationData.extractOptionFromCFG("/DIRAC/Setup") == "OtherSetup"
+
+
+def test_configurationData_mergedCFGReplaced(configurationData):
+    """Replacing the merged CFG without a sync makes the snapshot unusable, not wrong"""
+    configurationData.mergedCFG = CFG()
+    assert configurationData.getSnapshot() is None
+    assert configurationData.extractOptionFromCFG("/DIRAC/Setup") is None
+    assert configurationData.getOptionsDictFromCFG("/DIRAC") is None
+
+    configurationData.sync()
+    assert configurationData.getSnapshot() is not None
+    assert configurationData.extractOptionFromCFG("/DIRAC/Setup") == "MySetup"
+
+
+def test_configurationData_otherCFG(configurationData):
+    """Reading another CFG than the merged one never uses the snapshot"""
+    remoteCFG = configurationData.remoteCFG
+    assert configurationData.getSnapshot(remoteCFG) is None
+    assert configurationData.extractOptionFromCFG("/DIRAC/Setup", remoteCFG) is None
@@ -2,7 +2,7 @@
     It uniforms the way the database objects are constructed
 """
 from DIRAC.Core.Base.DIRACDB import DIRACDB
-from DIRAC.Core.Utilities.MySQL import MySQL
+from DIRAC.Core.Utilities.MySQL import MySQL, MAXCONNECTIONS, MAX_REPLICATION_LAG
 from DIRAC.ConfigurationSystem.Client.Utilities import getDBParameters
 
 
@@ -30,6 +30,9 @@ class DB(DIRACDB, MySQL):
             dbName=self.dbName,
             port=self.dbPort,
             debug=debug,
+            maxConnections=dbParameters.get("MaxQueueSize", MAXCONNECTIONS),
+            readReplicas=dbParameters.get("ReadReplicas"),
+            maxReplicationLag=dbParameters.get("MaxReplicationLag", MAX_REPLICATION_LAG),
             parentLogger=parentLogger,
         )
 
@@ -42,4 +45,6 @@ class DB(DIRACDB, MySQL):
         self.log.info("Port:           " + str(self.dbPort))
         # self.log.info("Password:       "+ self.dbPass)
         self.log.info("DBName:         " + self.dbName)
+        if dbParameters.get("ReadReplicas"):
+            self.log.info("ReadReplicas:   " + ", ".join(dbParameters["ReadReplicas"]))
         self.log.info("==================================================")
@@ -12,7 +12,9 @@ from DIRAC.Core.Utilities.ExecutorDispatcher import ExecutorDispatcher, Executor
 class ExecutorMindHandler(RequestHandler):
     MSG_DEFINITIONS = {
         "ProcessTask": {"taskId": int, "taskStub": str, "eType": str},
+        "ProcessTasks": {"taskIds": (list, tuple), "taskStubs": (list, tuple), "eType": str},
         "TaskDone": {"taskId": int, "taskStub": str},
+        "TasksDone": {"taskIds": (list, tuple), "taskStubs": (list, tuple)},
         "TaskFreeze": {
             "taskId": (int, str),
             "taskStub": str,
@@ -28,18 +30,35 @@ class ExecutorMindHandler(RequestHandler):
     }
 
     class MindCallbacks(ExecutorDispatcherCallbacks):
-        def __init__(self, sendTaskCB, dispatchCB, disconnectCB, taskProcCB, taskFreezeCB, taskErrCB):
+        def __init__(
+            self,
+            sendTaskCB,
+            dispatchCB,
+            disconnectCB,
+            taskProcCB,
+            taskFreezeCB,
+            taskErrCB,
+            sendTasksCB=None,
+            tasksProcCB=None,
+        ):
             self.__sendTaskCB = sendTaskCB
             self.__dispatchCB = dispatchCB
             self.__disconnectCB = disconnectCB
             self.__taskProcDB = taskProcCB
             self.__taskFreezeCB = taskFreezeCB
             self.__taskErrCB = taskErrCB
+            self.__sendTasksCB = sendTasksCB
+            self.__tasksProcCB = tasksProcCB
             self.__allowedClients = []
 
         def cbSendTask(self, taskId, taskObj, eId, eType):
             return self.__sendTaskCB(taskId, taskObj, eId, eType)
 
+        def cbSendTasks(self, taskObjs, eId, eType):
+            if not self.__sendTasksCB:
+                return super().cbSendTasks(taskObjs, eId, eType)
+            return self.__sendTasksCB(taskObjs, eId, eType)
+
         def cbDispatch(self, taskId, taskObj, pathExecuted):
             return self.__dispatchCB(taskId, taskObj, pathExecuted)
 
@@ -52,6 +71,11 @@ class ExecutorMindHandler(RequestHandler):
         def cbTaskProcessed(self, taskId, taskObj, eType):
             return self.__taskProcDB(taskId, taskObj, eType)
 
+        def cbTasksProcessed(self, taskObjs, eType):
+            if not self.__tasksProcCB:
+                return super().cbTasksProcessed(taskObjs, eType)
+            return self.__tasksProcCB(taskObjs, eType)
+
         def cbTaskFreeze(self, taskId, taskObj, eType):
             return self.__taskFreezeCB(taskId, taskObj, eType)
 
@@ -70,6 +94,8 @@ class ExecutorMindHandler(RequestHandler):
             cls.exec_taskProcessed,
             cls.exec_taskFreeze,
             cls.exec_taskError,
+            sendTasksCB=cls.__sendTasks,
+            tasksProcCB=cls.exec_tasksProcessed,
         )
         cls.__eDispatch.setCallbacks(cls.__callbacks)
         cls.__allowedClients = []
@@ -118,6 +144,36 @@ class ExecutorMindHandler(RequestHandler):
         msgObj.eType = eType
         return self.srv_msgSend(eId, msgObj)
 
+    @classmethod
+    def __sendTasks(self, taskObjs, eId, eType):
+        taskStubs = []
+        for taskId, taskObj in taskObjs.items():
+            try:
+                result = self.exec_prepareToSend(taskId, taskObj, eId)
+                if not result["OK"]:
+                    return result
+            except Exception as excp:
+                gLogger.exception("Exception while executing prepareToSend:", taskId, lException=excp)
+                return S_ERROR("Cannot presend task")
+            try:
+                result = self.exec_serializeTask(taskObj)
+            except Exception as excp:
+                gLogger.exception("Exception while serializing task", taskId, lException=excp)
+                return S_ERROR(f"Cannot serialize task {taskId}: {str(excp)}")
+            if not isReturnStructure(result):
+                raise Exception("exec_serializeTask does not return a return structure")
+            if not result["OK"]:
+                return result
+            taskStubs.append(result["Value"])
+        result = self.srv_msgCreate("ProcessTasks")
+        if not result["OK"]:
+            return result
+        msgObj = result["Value"]
+        msgObj.taskIds = list(taskObjs)
+        msgObj.taskStubs = taskStubs
+        msgObj.eType = eType
+        return self.srv_msgSend(eId, msgObj)
+
     @classmethod
     def __execDisconnected(cls, trid):
         result = cls.srv_disconnectClient(trid)
@@ -145,7 +201,11 @@ class ExecutorMindHandler(RequestHandler):
             numTasks = max(1, int(kwargs["maxTasks"]))
         except Exception:
             numTasks = 1
-        self.__eDispatch.addExecutor(trid, kwargs["executorTypes"])
+        try:
+            batchSize = max(1, int(kwargs.get("batchSize", 1)))
+        except Exception:
+            batchSize = 1
+        self.__eDispatch.addExecutor(trid, kwargs["executorTypes"], batchSize=batchSize)
         return self.exec_executorConnected(trid, kwargs["executorTypes"])
 
     auth_conn_drop = ["all"]
@@ -174,6 +234,26 @@ class ExecutorMindHandler(RequestHandler):
             gLogger.error("There was a problem processing task", f"{taskId}: {result['Message']}")
         return S_OK()
 
+    auth_msg_TasksDone = ["all"]
+
+    def msg_TasksDone(self, msgObj):
+        taskObjs = {}
+        for taskId, taskStub in zip(msgObj.taskIds, msgObj.taskStubs):
+            try:
+                result = self.exec_deserializeTask(taskStub)
+            except Exception as excp:
+                gLogger.exception("Exception while deserializing task", taskId, lException=excp)
+                return S_ERROR(f"Cannot deserialize task {taskId}: {str(excp)}")
+            if not isReturnStructure(result):
+                raise Exception("exec_deserializeTask does not return a return structure")
+            if not result["OK"]:
+                return result
+            taskObjs[taskId] = result["Value"]
+        result = self.__eDispatch.tasksProcessed(self.srv_getTransportID(), taskObjs)
+        if not result["OK"]:
+            gLogger.error("There was a problem processing tasks", result["Message"])
+        return S_OK()
+
     auth_msg_TaskFreeze = ["all"]
 
     def msg_TaskFreeze(self, msgObj):
@@ -273,6 +353,15 @@ class ExecutorMindHandler(RequestHandler):
     def executeTask(cls, taskId, taskObj):
         return cls.__eDispatch.addTask(taskId, taskObj)
 
+    @classmethod
+    def executeTasks(cls, taskObjs):
+        """Add several tasks at once
+
+        :param dict taskObjs: { taskId: taskObj }
+        :return: S_OK({"Successful": [taskIds], "Failed": {taskId: errorMessage}})
+        """
+        return cls.__eDispatch.addTasks(taskObjs)
+
     @classmethod
     def forgetTask(cls, taskId):
         return cls.__eDispatch.removeTask(taskId)
@@ -301,6 +390,23 @@ class ExecutorMindHandler(RequestHandler):
     def exec_taskProcessed(cls, taskId, taskObj, eType):
         raise Exception("No exec_taskProcessed defined or it is not a classmethod!!")
 
+    @classmethod
+    def exec_tasksProcessed(cls, taskObjs, eType):
+        """Called for the tasks processed in a batch by an executor. Can be overwritten
+        to handle them together, by default exec_taskProcessed is called for each of them
+
+        :param dict taskObjs: { taskId: taskObj }
+        :return: S_OK({"Successful": [taskIds], "Failed": {taskId: errorMessage}})
+        """
+        processed = {"Successful": [], "Failed": {}}
+        for taskId, taskObj in taskObjs.items():
+            result = cls.exec_taskProcessed(taskId, taskObj, eType)
+            if result["OK"]:
+                processed["Successful"].append(taskId)
+            else:
+                processed["Failed"][taskId] = result["Message"]
+        return S_OK(processed)
+
     @classmethod
     def exec_taskFreeze(cls, taskId, taskObj, eType):
         return S_OK()
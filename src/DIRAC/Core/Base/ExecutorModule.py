@@ -123,8 +123,6 @@ class ExecutorModule:
 
     def _ex_processTask(self, taskId, taskStub):
         self.__properties["shifterProxy"] = self.ex_getOption("shifterProxy")
-        self.__freezeTime = 0
-        self.__fastTrackEnabled = True
         self.log.verbose(f"Task {str(taskId)}: Received")
         result = self.__deserialize(taskId, taskStub)
         if not result["OK"]:
@@ -135,6 +133,46 @@ class ExecutorModule:
         result = self.__installShifterProxy()
         if not result["OK"]:
             return result
+        return self.__executeTask(taskId, taskObj)
+
+    def _ex_processTasks(self, taskStubs):
+        """Process a batch of tasks. beginBatch is called with all the tasks before processing them
+        one by one, so that the executor can prepare them together
+
+        :param dict taskStubs: { taskId: taskStub }
+        :return: S_OK({ taskId: result }) with the result of processing each task as done by _ex_processTask
+        """
+        self.__properties["shifterProxy"] = self.ex_getOption("shifterProxy")
+        self.log.verbose(f"Tasks {list(taskStubs)}: Received")
+        results = {}
+        taskObjs = {}
+        for taskId, taskStub in taskStubs.items():
+            result = self.__deserialize(taskId, taskStub)
+            if not result["OK"]:
+                self.log.error("Can not deserialize task", f"Task {str(taskId)}: {result['Message']}")
+                results[taskId] = result
+            else:
+                taskObjs[taskId] = result["Value"]
+        # Shifter proxy?
+        result = self.__installShifterProxy()
+        if not result["OK"]:
+            return result
+        result = self.beginBatch(taskObjs)
+        if not isReturnStructure(result):
+            raise Exception("beginBatch does not return a return structure")
+        if not result["OK"]:
+            # The tasks can still be processed one by one
+            self.log.warn("Can not prepare the batch of tasks", result["Message"])
+        try:
+            for taskId, taskObj in taskObjs.items():
+                results[taskId] = self.__executeTask(taskId, taskObj)
+        finally:
+            self.endBatch()
+        return S_OK(results)
+
+    def __executeTask(self, taskId, taskObj):
+        self.__freezeTime = 0
+        self.__fastTrackEnabled = True
         # Execute!
         result = self.processTask(taskId, taskObj)
         if not isReturnStructure(result):
@@ -182,6 +220,21 @@ class ExecutorModule:
     def fastTrackDispatch(self, taskId, taskObj):
         return S_OK()
 
+    ###
+    #  Batches of tasks
+    ###
+
+    def beginBatch(self, taskObjs):
+        """Called with all the tasks of a batch before processing them
+
+        :param dict taskObjs: { taskId: taskObj }
+        """
+        return S_OK()
+
+    def endBatch(self):
+        """Called once all the tasks of a batch are processed"""
+        pass
+
     ####
     # Need to overwrite this functions
     ####
@@ -58,6 +58,7 @@ class ExecutorReactor:
             self.__mindName = mindName
             self.__modules = {}
             self.__maxTasks = 1
+            self.__batchSize = 1
             self.__reconnectSleep = 1
             self.__reconnectRetries = 10
             self.__extraArgs = {}
@@ -71,6 +72,7 @@ class ExecutorReactor:
         def addModule(self, name, exeClass):
             self.__modules[name] = exeClass
             self.__maxTasks = max(self.__maxTasks, exeClass.ex_getOption("MaxTasks", 0))
+            self.__batchSize = max(self.__batchSize, exeClass.ex_getOption("BatchSize", 1))
             self.__reconnectSleep = max(self.__reconnectSleep, exeClass.ex_getOption("ReconnectSleep", 0))
             self.__reconnectRetries = max(self.__reconnectRetries, exeClass.ex_getOption("ReconnectRetries", 0))
             self.__extraArgs[name] = exeClass.ex_getExtraArguments()
@@ -78,9 +80,13 @@ class ExecutorReactor:
         def connect(self):
             self.__msgClient = MessageClient(self.__mindName)
             self.__msgClient.subscribeToMessage("ProcessTask", self.__processTask)
+            self.__msgClient.subscribeToMessage("ProcessTasks", self.__processTasks)
             self.__msgClient.subscribeToDisconnect(self.__disconnected)
             result = self.__msgClient.connect(
-                executorTypes=list(self.__modules), maxTasks=self.__maxTasks, extraArgs=self.__extraArgs
+                executorTypes=list(self.__modules),
+                maxTasks=self.__maxTasks,
+                batchSize=self.__batchSize,
+                extraArgs=self.__extraArgs,
             )
             if result["OK"]:
                 self.__aliveLock.alive()
@@ -92,7 +98,10 @@ class ExecutorReactor:
             while True:
                 gLogger.notice(f"Trying to reconnect to {self.__mindName}")
                 result = self.__msgClient.connect(
-                    executorTypes=list(self.__modules), maxTasks=self.__maxTasks, extraArgs=self.__extraArgs
+                    executorTypes=list(self.__modules),
+                    maxTasks=self.__maxTasks,
+                    batchSize=self.__batchSize,
+                    extraArgs=self.__extraArgs,
                 )
 
                 if result["OK"]:
@@ -151,7 +160,41 @@ class ExecutorReactor:
             if not result["OK"]:
                 return self.__sendExecutorError(eType, taskId, result["Message"])
             msgName, taskStub, extra = result["Value"]
+            return self.__sendTaskResult(eType, taskId, msgName, taskStub, extra)
 
+        def __processTasks(self, msgObj):
+            eType = msgObj.eType
+            taskStubs = dict(zip(msgObj.taskIds, msgObj.taskStubs))
+
+            result = self.__moduleProcessBatch(eType, taskStubs)
+            if not result["OK"]:
+                return self.__sendExecutorError(eType, msgObj.taskIds[0], result["Message"])
+            taskResults = result["Value"]
+
+            # The done tasks go back together, so that the mind handles them together
+            done = {taskId: taskStub for taskId, (msgName, taskStub, _) in taskResults.items() if msgName == "TaskDone"}
+            if done:
+                result = self.__msgClient.createMessage("TasksDone")
+                if not result["OK"]:
+                    return self.__sendExecutorError(
+                        eType, msgObj.taskIds[0], f"Can't generate TasksDone message: {result['Message']}"
+                    )
+                gLogger.verbose(f"Tasks {list(done)}: Sending TasksDone")
+                doneMsgObj = result["Value"]
+                doneMsgObj.taskIds = list(done)
+                doneMsgObj.taskStubs = list(done.values())
+                result = self.__msgClient.sendMessage(doneMsgObj)
+                if not result["OK"]:
+                    return result
+            for taskId, (msgName, taskStub, extra) in taskResults.items():
+                if msgName == "TaskDone":
+                    continue
+                result = self.__sendTaskResult(eType, taskId, msgName, taskStub, extra)
+                if not result["OK"]:
+                    return result
+            return S_OK()
+
+        def __sendTaskResult(self, eType, taskId, msgName, taskStub, extra):
             result = self.__msgClient.createMessage(msgName)
             if not result["OK"]:
                 return self.__sendExecutorError(eType, taskId, f"Can't generate {msgName} message: {result['Message']}")
@@ -193,6 +236,52 @@ class ExecutorReactor:
 
             return S_OK(("TaskDone", taskStub, True))
 
+        def __moduleProcessBatch(self, eType, taskStubs, fastTrackLevel=0):
+            result = self.__getInstance(eType)
+            if not result["OK"]:
+                return result
+            modInstance = result["Value"]
+            try:
+                result = modInstance._ex_processTasks(taskStubs)
+            except Exception as excp:
+                gLogger.exception(f"Error while processing tasks {list(taskStubs)}", lException=excp)
+                return S_ERROR(f"Error processing tasks {list(taskStubs)}: {excp}")
+
+            self.__storeInstance(eType, modInstance)
+
+            if not result["OK"]:
+                return S_OK(
+                    {
+                        taskId: ("TaskError", taskStub, f"Error: {result['Message']}")
+                        for taskId, taskStub in taskStubs.items()
+                    }
+                )
+            taskResults = {}
+            fastTracked = {}
+            for taskId, result in result["Value"].items():
+                if not result["OK"]:
+                    taskResults[taskId] = ("TaskError", taskStubs[taskId], f"Error: {result['Message']}")
+                    continue
+                taskStub, freezeTime, fastTrackType = result["Value"]
+                if freezeTime:
+                    taskResults[taskId] = ("TaskFreeze", taskStub, freezeTime)
+                    continue
+                if fastTrackType:
+                    if fastTrackLevel < 10 and fastTrackType in self.__modules:
+                        fastTracked.setdefault(fastTrackType, {})[taskId] = taskStub
+                        continue
+                    gLogger.notice(f"Stopping {taskId} fast track. Sending back to the mind")
+                taskResults[taskId] = ("TaskDone", taskStub, True)
+
+            # The tasks going to the same executor are fast tracked together
+            for fastTrackType, fastTrackStubs in fastTracked.items():
+                gLogger.notice(f"Fast tracking {len(fastTrackStubs)} tasks to {fastTrackType}")
+                result = self.__moduleProcessBatch(fastTrackType, fastTrackStubs, fastTrackLevel + 1)
+                if not result["OK"]:
+                    return result
+                taskResults.update(result["Value"])
+            return S_OK(taskResults)
+
     #####
     # Start of ExecutorReactor
     #####
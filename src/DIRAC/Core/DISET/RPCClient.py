@@ -81,6 +81,18 @@ class RPCClient:
         """
         return self.__innerRPCClient.executeRPC(sFunctionName, args, **kwargs)
 
+    def executeStreamRPC(self, functionName, *args):
+        """
+        Execute a streamed RPC action, see
+        :py:meth:`~DIRAC.Core.DISET.private.InnerRPCClient.InnerRPCClient.executeStreamRPC`
+
+        :param functionName: name of the remote function
+        :param args: arguments to pass to the function
+
+        :return: generator of S_OK/S_ERROR chunks
+        """
+        return self.__innerRPCClient.executeStreamRPC(functionName, args)
+
     def __getattr__(self, attrName):
         """Function for emulating the existence of functions.
 
@@ -6,6 +6,7 @@ import psutil
 
 import DIRAC
 
+from DIRAC.Core.DISET import STREAM_CHUNK_KEY
 from DIRAC.Core.DISET.private.FileHelper import FileHelper
 from DIRAC.Core.Utilities.ReturnValues import S_OK, S_ERROR, isReturnStructure
 from DIRAC.ConfigurationSystem.Client.Config import gConfig
@@ -118,6 +119,8 @@ class RequestHandler:
         try:
             if actionType == "RPC":
                 retVal = self.__doRPC(actionTuple[1])
+            elif actionType == "StreamRPC":
+                retVal = self.__doStreamRPC(actionTuple[1])
             elif actionType == "FileTransfer":
                 retVal = self.__doFileTransfer(actionTuple[1])
             elif actionType == "Connection":
@@ -301,6 +304,70 @@ class RequestHandler:
             gLogger.exception("Uncaught exception when serving RPC", f"Function {method}", lException=e)
             return S_ERROR(f"Server error while serving {method}: {str(e)}")
 
+    #####
+    #
+    # Streamed RPC Methods
+    #
+    #####
+
+    def __doStreamRPC(self, method):
+        """
+        Execute a streamed RPC action.
+        The handler method ``stream_<method>`` is a generator yielding S_OK/S_ERROR chunks,
+        which are sent one by one to the client. It shares the ``types_<method>``
+        and ``auth_<method>`` definitions with ``export_<method>``.
+
+        :type method: string
+        :param method: Method to execute
+        :return: S_OK/S_ERROR, sent as the last message of the stream
+        """
+        retVal = self.__trPool.receive(self.__trid)
+        if not retVal["OK"]:
+            raise ConnectionError(
+                "Error while receiving arguments {} {}".format(
+                    self.srv_getFormattedRemoteCredentials(), retVal["Message"]
+                )
+            )
+        args = retVal["Value"]
+        self.__logRemoteQuery(f"StreamRPC/{method}", args)
+
+        realMethod = f"stream_{method}"
+        gLogger.debug(f"Streamed RPC to {realMethod}")
+        try:
+            oMethod = getattr(self, realMethod)
+        except Exception:
+            return S_ERROR(f"Unknown streamed method {method}")
+        dRetVal = self.__checkExpectedArgumentTypes(method, args)
+        if not dRetVal["OK"]:
+            return dRetVal
+        self.__lockManager.lock(f"StreamRPC/{method}")
+        try:
+            nChunks = 0
+            for chunk in oMethod(*args):
+                if not isReturnStructure(chunk):
+                    retVal = S_ERROR(f"Streamed method {method} yields something else than S_OK/S_ERROR")
+                    break
+                chunk = {key: value for key, value in chunk.items() if key not in ("ExecInfo", "CallStack")}
+                chunk[STREAM_CHUNK_KEY] = True
+                result = self.__trPool.send(self.__trid, chunk)
+                if not result["OK"]:
+                    raise ConnectionError(
+                        "Error while streaming {} to {}: {}".format(
+                            method, self.srv_getFormattedRemoteCredentials(), result["Message"]
+                        )
+                    )
+                nChunks += 1
+            retVal = S_OK(nChunks)
+        except ConnectionError:
+            raise
+        except Exception as e:
+            gLogger.exception("Uncaught exception when serving streamed RPC", f"Function {method}", lException=e)
+            retVal = S_ERROR(f"Server error while serving {method}: {str(e)}")
+        finally:
+            self.__lockManager.unlock(f"StreamRPC/{method}")
+        retVal[STREAM_CHUNK_KEY] = False
+        return retVal
+
     def __checkExpectedArgumentTypes(self, method, args):
         """
         Check that the arguments received match the ones expected
@@ -5,6 +5,11 @@ DEFAULT_RPC_TIMEOUT = 600
 #: Default timeout to establish a connection
 DEFAULT_CONNECTION_TIMEOUT = 10
 
+#: Key flagging the messages of a streamed RPC call: True for the chunks of the result,
+#: False for the last message, which is the final S_OK/S_ERROR of the call.
+#: A message without this key comes from a server which does not stream the result.
+STREAM_CHUNK_KEY = "StreamChunk"
+
 #: Default SSL Ciher accepted. Current default is for pyGSI/M2crypto compatibility
 #: Can be changed with DIRAC_M2CRYPTO_SSL_CIPHERS
 #: Recommandation (incompatible with pyGSI)
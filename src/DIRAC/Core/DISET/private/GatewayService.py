@@ -24,6 +24,7 @@ from DIRAC import gLogger, S_OK, S_ERROR
 from DIRAC.Core.Utilities.LockRing import LockRing
 from DIRAC.Core.Utilities.DictCache import DictCache
 from DIRAC.ConfigurationSystem.Client.ConfigurationData import gConfigurationData
+from DIRAC.Core.DISET import STREAM_CHUNK_KEY
 from DIRAC.Core.DISET.private.FileHelper import FileHelper
 from DIRAC.Core.DISET.private.MessageBroker import MessageBroker, getGlobalMessageBroker
 from DIRAC.Core.DISET.MessageClient import MessageClient
@@ -225,6 +226,11 @@ class GatewayService(Service):
         elif actionType == "RPC":
             gLogger.info(f"Forwarding {actionType}/{actionMethod} action to {targetService} for {idString}")
             retVal = self.__forwardRPCCall(targetService, clientInitArgs, actionMethod, retVal["Value"])
+        elif actionType == "StreamRPC":
+            gLogger.info(f"Forwarding {actionType}/{actionMethod} action to {targetService} for {idString}")
+            retVal = self.__forwardStreamRPCCall(
+                targetService, clientInitArgs, actionMethod, retVal["Value"], clientTransport
+            )
         elif actionType == "Connection" and actionMethod == "new":
             gLogger.info(f"Initiating a messaging connection to {targetService} for {idString}")
             retVal = self._msgForwarder.addClient(trid, targetService, clientInitArgs, retVal["Value"])
@@ -252,6 +258,26 @@ class GatewayService(Service):
         methodObj = getattr(rpcClient, method)
         return methodObj(*params)
 
+    def __forwardStreamRPCCall(self, targetService, clientInitArgs, method, params, clientTransport):
+        """Relay the chunks of a streamed RPC one by one, and return the status of the call"""
+        rpcClient = RPCClient(targetService, **clientInitArgs)
+        stream = rpcClient.executeStreamRPC(method, *params)
+        retVal = S_OK()
+        try:
+            for chunk in stream:
+                # Only the final error of the call carries the stub, chunks never do
+                if "rpcStub" in chunk:
+                    retVal = chunk
+                    break
+                chunk[STREAM_CHUNK_KEY] = True
+                result = clientTransport.sendData(chunk)
+                if not result["OK"]:
+                    return result
+        finally:
+            stream.close()
+        retVal[STREAM_CHUNK_KEY] = False
+        return retVal
+
     def __forwardFileTransferCall(self, targetService, clientInitArgs, method, params, clientTransport):
         transferRelay = TransferRelay(targetService, **clientInitArgs)
         transferRelay.setTransferLimit(self.__transferBytesLimit)
@@ -1,5 +1,6 @@
 """ This module hosts the logic for executing an RPC call.
 """
+from DIRAC.Core.DISET import STREAM_CHUNK_KEY
 from DIRAC.Core.DISET.private.BaseClient import BaseClient
 from DIRAC.Core.Utilities.ReturnValues import S_OK
 from DIRAC.Core.Utilities.DErrno import cmpError, ENOAUTH
@@ -74,3 +75,54 @@ class InnerRPCClient(BaseClient):
             return receivedData
         finally:
             self._disconnect(trid)
+
+    def executeStreamRPC(self, functionName, args):
+        """Perform a streamed RPC call. The connection is kept open while
+        the server sends the chunks of the result, and closed when the stream
+        is exhausted or the generator is closed.
+
+        :param functionName: name of the function
+        :param args: arguments to the function
+
+        :return: generator of the S_OK/S_ERROR chunks sent by the server.
+                 If the call itself fails, the last item is the S_ERROR of the call,
+                 with the connection stub added to it.
+        """
+        retVal = self._connect()
+
+        # Generate the stub which contains all the connection and call options
+        stub = [self._getBaseStub(), functionName, list(args)]
+        if not retVal["OK"]:
+            retVal["rpcStub"] = stub
+            yield retVal
+            return
+        trid, transport = retVal["Value"]
+        try:
+            retVal = self._proposeAction(transport, ("StreamRPC", functionName))
+            if not retVal["OK"]:
+                retVal["rpcStub"] = stub
+                yield retVal
+                return
+
+            retVal = transport.sendData(S_OK(list(args)))
+            if not retVal["OK"]:
+                retVal["rpcStub"] = stub
+                yield retVal
+                return
+
+            # Chunks are flagged, the last message is the status of the whole call
+            while True:
+                receivedData = transport.receiveData()
+                isChunk = receivedData.pop(STREAM_CHUNK_KEY, None)
+                if isChunk:
+                    yield receivedData
+                    continue
+                if not receivedData["OK"]:
+                    receivedData["rpcStub"] = stub
+                    yield receivedData
+                elif isChunk is None:
+                    # Not a streamed answer: the whole result comes at once
+                    yield receivedData
+                return
+        finally:
+            self._disconnect(trid)
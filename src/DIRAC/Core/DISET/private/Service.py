@@ -9,6 +9,7 @@
 # __searchInitFunctions gives RuntimeError: maximum recursion depth exceeded
 
 import os
+import sys
 import time
 import datetime
 import threading
@@ -33,7 +34,13 @@ from DIRAC.FrameworkSystem.Client.SecurityLogClient import SecurityLogClient
 
 
 class Service:
-    SVC_VALID_ACTIONS = {"RPC": "export", "FileTransfer": "transfer", "Message": "msg", "Connection": "Message"}
+    SVC_VALID_ACTIONS = {
+        "RPC": "export",
+        "StreamRPC": "stream",
+        "FileTransfer": "transfer",
+        "Message": "msg",
+        "Connection": "Message",
+    }
     SVC_SECLOG_CLIENT = SecurityLogClient()
 
     def __init__(self, serviceData):
@@ -208,7 +215,8 @@ class Service:
                     f"{actionType}/{exportedName}", self._cfg.getMaxThreadsForMethod(actionType, exportedName)
                 )
                 # Look for type and auth rules
-                if actionType == "RPC":
+                # Streamed RPC share the rules of the RPC of the same name
+                if actionType in ("RPC", "StreamRPC"):
                     typeAttr = f"types_{exportedName}"
                     authAttr = f"auth_{exportedName}"
                 else:
@@ -242,20 +250,24 @@ class Service:
         pendingQueries = self._threadPool._work_queue.qsize()
         activeQuereies = len(self._threadPool._threads)
         percentage = self.__endReportToMonitoring(initialWallTime, initialCPUTime)
-        self.activityMonitoringReporter.addRecord(
-            {
-                "timestamp": int(TimeUtilities.toEpochMilliSeconds()),
-                "Host": Network.getFQDN(),
-                "ServiceName": "_".join(self._name.split("/")),
-                "Location": self._cfg.getURL(),
-                "MemoryUsage": mem,
-                "CpuPercentage": percentage,
-                "PendingQueries": pendingQueries,
-                "ActiveQueries": activeQuereies,
-                "RunningThreads": threading.active_count(),
-                "MaxFD": self.__maxFD,
-            }
-        )
+        record = {
+            "timestamp": int(TimeUtilities.toEpochMilliSeconds()),
+            "Host": Network.getFQDN(),
+            "ServiceName": "_".join(self._name.split("/")),
+            "Location": self._cfg.getURL(),
+            "MemoryUsage": mem,
+            "CpuPercentage": percentage,
+            "PendingQueries": pendingQueries,
+            "ActiveQueries": activeQuereies,
+            "RunningThreads": threading.active_count(),
+            "MaxFD": self.__maxFD,
+        }
+        # Only the services using MySQL have connection pools to report
+        if "DIRAC.Core.Utilities.MySQL" in sys.modules:
+            from DIRAC.Core.Utilities.MySQL import getConnectionPoolsMetrics
+
+            record.update(getConnectionPoolsMetrics())
+        self.activityMonitoringReporter.addRecord(record)
         self.__maxFD = 0
 
     def getConfig(self):
@@ -422,7 +434,7 @@ class Service:
             csAuthPath = f"{actionTuple[0]}/Default"
             hardcodedMethodAuth = self._actions["auth"][actionTuple[0]]
         else:
-            if actionTuple[0] == "RPC":
+            if actionTuple[0] in ("RPC", "StreamRPC"):
                 csAuthPath = actionTuple[1]
             else:
                 csAuthPath = "/".join(actionTuple)
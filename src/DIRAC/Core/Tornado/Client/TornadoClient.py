@@ -64,6 +64,22 @@ class TornadoClient(TornadoBaseClient):
         retVal["rpcStub"] = (self._getBaseStub(), method, list(args))
         return retVal
 
+    def executeStreamRPC(self, method, *args):
+        """
+        Calls a remote service, whose result is streamed in chunks.
+        Equivalent of :py:meth:`~DIRAC.Core.DISET.RPCClient.RPCClient.executeStreamRPC`
+
+        :param str method: remote procedure name
+        :param args: list of arguments
+        :returns: generator of the S_OK/S_ERROR chunks sent by the server. If the call
+                  itself fails, the last item is its S_ERROR, with the rpcStub added
+        """
+        rpcCall = {"method": method, "args": encode(args)}
+        for isChunk, retVal in self._streamRequest(**rpcCall):
+            if not isChunk:
+                retVal["rpcStub"] = (self._getBaseStub(), method, list(args))
+            yield retVal
+
     def receiveFile(self, destFile, *args):
         """
         Equivalent of :py:meth:`~DIRAC.Core.DISET.TransferClient.TransferClient.receiveFile`
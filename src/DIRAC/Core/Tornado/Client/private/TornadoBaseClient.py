@@ -40,6 +40,7 @@ from DIRAC.ConfigurationSystem.Client.Helpers.CSGlobals import skipCACheck
 from DIRAC.ConfigurationSystem.Client.Helpers.Registry import findDefaultGroupForDN
 from DIRAC.ConfigurationSystem.Client.PathFinder import getServiceURLs, getGatewayURLs
 
+from DIRAC.Core.DISET import STREAM_CHUNK_KEY
 from DIRAC.Core.DISET.ThreadConfig import ThreadConfig
 from DIRAC.Core.Security import Locations
 from DIRAC.Core.Utilities import Network
@@ -477,25 +478,13 @@ class TornadoBaseClient:
             del newKwargs["useCertificates"]
         return (self._destinationSrv, newKwargs)
 
-    def _request(self, retry=0, outputFile=None, **kwargs):
-        """
-        Sends the request to server
-
-        :param retry: internal parameters for recursive call. TODO: remove ?
-        :param outputFile: (default None) can be the path to a file, or the file itself where to store the received data.
-                          If set, the server response will be streamed for optimization
-                          purposes, and the response data will not go through the
-                          JDecode process
-        :param **kwargs: Any argument there is used as a post parameter. They are detailed bellow.
-        :param method: (mandatory) name of the distant method
-        :param args: (mandatory) json serialized list of argument for the procedure
-
+    def __prepareRequest(self, kwargs):
+        """Add the common post parameters to kwargs, and find the URL and credentials to use
 
+        :param dict kwargs: post parameters of the request, modified in place
 
-        :returns: The received data. If outputFile is set, return always S_OK
-
+        :returns: S_OK((url, auth)) where auth are the authentication arguments for requests
         """
-
         # Adding some informations to send
         if self.__extraCredentials:
             kwargs[self.KW_EXTRA_CREDENTIALS] = encode(self.__extraCredentials)
@@ -551,12 +540,39 @@ class TornadoBaseClient:
             fp = os.fdopen(tmpHandle, "w")
             fp.write(self.kwargs[self.KW_PROXY_STRING])
             fp.close()
+            auth = {"cert": cert}
         else:
             auth = {"cert": Locations.getProxyLocation()}
             if not auth["cert"]:
                 gLogger.error("No proxy found")
                 return S_ERROR("No proxy found")
 
+        return S_OK((url, auth))
+
+    def _request(self, retry=0, outputFile=None, **kwargs):
+        """
+        Sends the request to server
+
+        :param retry: internal parameters for recursive call. TODO: remove ?
+        :param outputFile: (default None) can be the path to a file, or the file itself where to store the received data.
+                          If set, the server response will be streamed for optimization
+                          purposes, and the response data will not go through the
+                          JDecode process
+        :param **kwargs: Any argument there is used as a post parameter. They are detailed bellow.
+        :param method: (mandatory) name of the distant method
+        :param args: (mandatory) json serialized list of argument for the procedure
+
+
+
+        :returns: The received data. If outputFile is set, return always S_OK
+
+        """
+
+        result = self.__prepareRequest(kwargs)
+        if not result["OK"]:
+            return result
+        url, auth = result["Value"]
+
         # We have a try/except for all the exceptions
         # whose default behavior is to try again,
         # maybe to different server
@@ -628,6 +644,53 @@ class TornadoBaseClient:
             errStr = f"{str(e)}: {rawText}"
             return S_ERROR(errStr)
 
+    def _streamRequest(self, **kwargs):
+        """
+        Sends a streamed request to the server, and reads the response line by line
+        as the server produces it. See :py:class:`~DIRAC.Core.Tornado.Server.TornadoService.TornadoService`
+
+        Contrary to :py:meth:`_request`, there is no retry on another URL,
+        since part of the result may already have been consumed.
+
+        :param **kwargs: Any argument there is used as a post parameter, like for :py:meth:`_request`
+
+        :returns: generator of tuples (isChunk, S_OK/S_ERROR). Only the last item can have isChunk False,
+                  in which case it is the S_ERROR of the whole call.
+        """
+        kwargs["stream"] = True
+        result = self.__prepareRequest(kwargs)
+        if not result["OK"]:
+            yield (False, result)
+            return
+        url, auth = result["Value"]
+
+        try:
+            with self.__session.post(url, data=kwargs, timeout=self.timeout, stream=True, **auth) as r:
+                if r.status_code == HTTPStatus.NOT_IMPLEMENTED:
+                    yield (False, S_ERROR(errno.ENOSYS, f"{kwargs.get('method')} is not implemented"))
+                    return
+                if r.status_code in (HTTPStatus.FORBIDDEN, HTTPStatus.UNAUTHORIZED):
+                    yield (False, S_ERROR(errno.EACCES, f"No access to {url}"))
+                    return
+                r.raise_for_status()
+                for line in r.iter_lines():
+                    if not line:
+                        continue
+                    retVal = decode(line)[0]
+                    isChunk = retVal.pop(STREAM_CHUNK_KEY, None)
+                    if isChunk:
+                        yield (True, retVal)
+                        continue
+                    if not retVal["OK"]:
+                        yield (False, retVal)
+                    elif isChunk is None:
+                        # The server does not stream: the whole result comes at once
+                        yield (True, retVal)
+                    return
+            yield (False, S_ERROR(errno.EIO, f"Stream from {url} ended without a final status"))
+        except Exception as e:
+            yield (False, S_ERROR(f"Error while streaming from {url}: {repr(e)}"))
+
 
 # --- TODO ----
 # Rewrite this method if needed:
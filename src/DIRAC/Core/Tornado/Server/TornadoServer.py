@@ -5,6 +5,7 @@ It may work better with TornadoClient but as it accepts HTTPS you can create you
 
 import time
 import os
+import sys
 import asyncio
 import psutil
 
@@ -240,16 +241,20 @@ class TornadoServer:
 
         # Calculate CPU usage by comparing realtime and cpu time since last report
         percentage = self.__endReportToMonitoringLoop(self.__report[0], self.__report[1])
+        record = {
+            "timestamp": int(TimeUtilities.toEpochMilliSeconds()),
+            "Host": Network.getFQDN(),
+            "ServiceName": "Tornado",
+            "MemoryUsage": self.__report[2],
+            "CpuPercentage": percentage,
+        }
+        # Only the services using MySQL have connection pools to report
+        if "DIRAC.Core.Utilities.MySQL" in sys.modules:
+            from DIRAC.Core.Utilities.MySQL import getConnectionPoolsMetrics
+
+            record.update(getConnectionPoolsMetrics())
         # Send record to Monitoring
-        self.activityMonitoringReporter.addRecord(
-            {
-                "timestamp": int(TimeUtilities.toEpochMilliSeconds()),
-                "Host": Network.getFQDN(),
-                "ServiceName": "Tornado",
-                "MemoryUsage": self.__report[2],
-                "CpuPercentage": percentage,
-            }
-        )
+        self.activityMonitoringReporter.addRecord(record)
         self.activityMonitoringReporter.commit()
         # Save memory usage and save realtime/CPU time for next call
         self.__report = self.__startReportToMonitoringLoop()
@@ -84,6 +84,9 @@ class TornadoService(BaseRequestHandler):  # pylint: disable=abstract-method
     * ``extraCredentials``: (optional) Extra informations to authenticate client
     * ``rawContent``: (optionnal, default False) If set to True, return the raw output
         of the method called.
+    * ``stream``: (optionnal, default False) If set to True, call the ``stream_`` generator
+        instead of the ``export_`` method, and send each S_OK/S_ERROR chunk it yields
+        as one JSON line, as soon as it is produced. The last line is the status of the call.
 
     If ``rawContent`` was requested by the client, the ``Content-Type``
     is ``application/octet-stream``, otherwise we set it to ``application/json``
@@ -163,6 +166,10 @@ class TornadoService(BaseRequestHandler):  # pylint: disable=abstract-method
 
     def _getMethod(self) -> str:
         """Get target function name"""
+        # Streamed calls target the ``stream_`` generator, which shares the ``auth_`` rules
+        # of the ``export_`` method of the same name
+        if self.get_argument("stream", default=False):
+            return f"stream_{self.get_argument('method')}"
         # Get method object using prefix and method name from request
         return f"{self.METHOD_PREFIX}{self.get_argument('method')}"
 
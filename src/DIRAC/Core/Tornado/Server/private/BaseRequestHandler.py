@@ -16,10 +16,12 @@ from functools import partial
 import jwt
 from tornado.web import RequestHandler, HTTPError
 from tornado.ioloop import IOLoop
+from tornado.iostream import StreamClosedError
 
 from DIRAC import gConfig, gLogger, S_OK, S_ERROR
 from DIRAC.ConfigurationSystem.Client.Helpers.Operations import Operations
 from DIRAC.Core.Utilities import DErrno
+from DIRAC.Core.DISET import STREAM_CHUNK_KEY
 from DIRAC.Core.DISET.AuthManager import AuthManager
 from DIRAC.Core.Utilities.JEncode import decode, encode
 from DIRAC.Core.Utilities import Network, TimeUtilities
@@ -948,6 +950,10 @@ class BaseRequestHandler(RequestHandler):
         if isinstance(self.__result, TornadoResponse):
             self.__result._runActions(self)
 
+        # The method is a generator of S_OK/S_ERROR chunks (streamed RPC)
+        elif inspect.isgenerator(self.__result):
+            await self.__streamResult(self.__result)
+
         # If you need to end the method using tornado methods, outside the thread,
         # you need to define the finish_<methodName> method.
         # This method will be started after _executeMethod is completed.
@@ -975,6 +981,44 @@ class BaseRequestHandler(RequestHandler):
             self.set_header("Content-Type", "application/json")
             self.finish(self.encode(self.__result))
 
+    async def __streamResult(self, chunks):
+        """Send the chunks of a streamed RPC as they are produced, one JSON document per line.
+        The chunks are flagged with ``STREAM_CHUNK_KEY``, and the last line is the status of the call.
+
+        Like the methods themselves, the generator is advanced in the executor,
+        while writing to the client happens here, in the IOLoop.
+
+        :param chunks: generator returned by the ``stream_`` method
+        """
+        ioloop = IOLoop.current()
+        self.set_header("Content-Type", "application/json")
+        nChunks = 0
+        try:
+            while True:
+                try:
+                    chunk = await ioloop.run_in_executor(None, next, chunks, None)
+                except Exception as e:  # pylint: disable=broad-except
+                    self.log.exception("Exception while streaming", f"{e}:{e!r}")
+                    self.__result = S_ERROR(f"Server error while streaming: {e}")
+                    break
+                if chunk is None:
+                    self.__result = S_OK(nChunks)
+                    break
+                if not isReturnStructure(chunk):
+                    self.__result = S_ERROR("Streamed method yields something else than S_OK/S_ERROR")
+                    break
+                chunk = {key: value for key, value in chunk.items() if key not in ("ExecInfo", "CallStack")}
+                chunk[STREAM_CHUNK_KEY] = True
+                self.write(self.encode(chunk) + "\n")
+                await self.flush()
+                nChunks += 1
+        except StreamClosedError:
+            self.__result = S_ERROR("Client closed the connection while streaming")
+            return
+        finally:
+            await ioloop.run_in_executor(None, chunks.close)
+        self.finish(self.encode(dict(self.__result, **{STREAM_CHUNK_KEY: False})))
+
     # Make a coroutine, see https://www.tornadoweb.org/en/branch5.1/guide/coroutines.html#coroutines for details
     async def get(self, *args, **kwargs):  # pylint: disable=arguments-differ
         """Method to handle incoming ``GET`` requests.
@@ -1,93 +1,134 @@
 """ ClassAd Class - a light purely Python representation of the
     Condor ClassAd library.
+
+    The JDL strings are parsed in one pass by parseJDL into an immutable representation,
+    which is cached: the same JDL is parsed again and again by the services, the optimizers and the job wrapper.
+    The JDLs longer than MAX_CACHED_JDL_LENGTH are not cached, so that the cache stays small.
 """
+import functools
+import re
+from typing import NamedTuple, Optional
+
+# Characters delimiting the attributes, the values and the sub JDLs, outside the string literals
+_JDL_DELIMITERS = re.compile(r'["\[\];=]')
+# Number of JDLs kept in the cache of parseJDL
+JDL_CACHE_SIZE = 512
+# Length of the longest JDLs kept in the cache, bounding its memory use to a few tens of MB
+MAX_CACHED_JDL_LENGTH = 16 * 1024
+
+
+class JDLAttribute(NamedTuple):
+    """One attribute of a parsed JDL"""
+
+    #: name of the attribute
+    name: str
+    #: expression of the value, as written in the JDL
+    value: str
+    #: attributes of the value if it is a sub JDL, None otherwise
+    attributes: Optional[tuple] = None
+
+
+def _parseAttributes(jdl, pos):
+    """Parse the attributes of a [] enclosure, from the position following its opening bracket
+
+    :return: tuple (tuple of JDLAttribute, position of the closing bracket or length of the JDL)
+    :raise ValueError: if the JDL is invalid
+    """
+    attributes = []
+    nameStart = pos
+    name = None
+    valueStart = None
+    subJDL = None
+    while True:
+        match = _JDL_DELIMITERS.search(jdl, pos)
+        if not match:
+            pos = len(jdl)
+            char = None
+        else:
+            pos = match.start()
+            char = match.group()
+
+        if char == '"':
+            pos = jdl.find('"', pos + 1)
+            if pos < 0:
+                raise ValueError("String literal is not closed")
+            pos += 1
+        elif char == "=":
+            if name is None:
+                name = jdl[nameStart:pos].strip()
+                valueStart = pos + 1
+            pos += 1
+        elif char == "[":
+            if name is None or not name:
+                raise ValueError("Invalid key in JDL")
+            if subJDL is not None or jdl[valueStart:pos].strip():
+                raise ValueError(f"Key {name} seems to have a value and open a sub JDL at the same time")
+            subJDL, pos = _parseAttributes(jdl, pos + 1)
+            if pos == len(jdl):
+                raise ValueError(f"Sub JDL of key {name} is not closed")
+            pos += 1
+        else:
+            # End of the attribute: ";", "]" or end of the JDL
+            if name is None:
+                if jdl[nameStart:pos].strip():
+                    raise ValueError(f"No value for key {jdl[nameStart:pos].strip()}")
+            else:
+                value = jdl[valueStart:pos].strip()
+                if not name:
+                    raise ValueError("Invalid key name")
+                if not value:
+                    raise ValueError(f"No value for key {name}")
+                if subJDL is not None and not value.endswith("]"):
+                    raise ValueError(f"Key {name} seems to have a value and open a sub JDL at the same time")
+                attributes.append(JDLAttribute(name, value, subJDL))
+            if char != ";":
+                return tuple(attributes), pos
+            pos += 1
+            nameStart = pos
+            name = None
+            subJDL = None
+
+
+def parseJDL(jdl):
+    """Parse a JDL string, in a time linear with its length
+
+    The result is cached, keyed by the content of the JDL, so parsing again the same JDL is free,
+    unless the JDL is longer than MAX_CACHED_JDL_LENGTH.
+    It is immutable, and must be copied by the callers wanting to modify it.
+
+    :param str jdl: JDL string, enclosed in []
+    :return: tuple of JDLAttribute, in the order of the JDL
+    :raise ValueError: if the JDL is invalid
+    """
+    if len(jdl) > MAX_CACHED_JDL_LENGTH:
+        return _parseJDL(jdl)
+    return _cachedParseJDL(jdl)
+
+
+def _parseJDL(jdl):
+    """Parse a JDL string, without the cache, see parseJDL"""
+    jdl = jdl.strip()
+    if not jdl.startswith("[") or not jdl.endswith("]"):
+        raise ValueError("it should start with [ and end with ]")
+    attributes, pos = _parseAttributes(jdl, 1)
+    if pos != len(jdl) - 1:
+        raise ValueError("it should start with [ and end with ]")
+    return attributes
+
+
+_cachedParseJDL = functools.lru_cache(maxsize=JDL_CACHE_SIZE)(_parseJDL)
 
 
 class ClassAd:
     def __init__(self, jdl):
         """ClassAd constructor from a JDL string"""
         self.contents = {}
-        result = self.__analyse_jdl(jdl)
-        if result:
-            self.contents = result
-
-    def __analyse_jdl(self, jdl, index=0):
-        """Analyse one [] jdl enclosure"""
-
-        jdl = jdl.strip()
-
-        # Strip all the blanks first
-        # temp = jdl.replace(' ','').replace('\n','')
-        temp = jdl
-
-        result = {}
-
-        if temp[0] != "[" or temp[-1] != "]":
-            print("Invalid JDL: it should start with [ and end with ]")
-            return result
-
-        # Parse the jdl string now
-        body = temp[1:-1]
-        index = 0
-        namemode = 1
-        valuemode = 0
-        while index < len(body):
-            if namemode:
-                ind = body.find("=", index)
-                if ind != -1:
-                    name = body[index:ind]
-                    index = ind + 1
-                    valuemode = 1
-                    namemode = 0
-                else:
-                    break
-            elif valuemode:
-                ind1 = body.find("[", index)
-                ind2 = body.find(";", index)
-                if ind1 != -1 and ind1 < ind2:
-                    value, newind = self.__find_subjdl(body, ind1)
-                elif ind1 == -1 and ind2 == -1:
-                    value = body[index:]
-                    newind = len(body)
-                else:
-                    if index == ind2:
-                        return {}
-                    else:
-                        value = body[index:ind2]
-                        newind = ind2 + 1
-
-                result[name.strip()] = value.strip().replace("\n", "")
-                index = newind
-                valuemode = 0
-                namemode = 1
-
-        return result
-
-    def __find_subjdl(self, body, index):
-        """Find a full [] enclosure starting from index"""
-        result = ""
-        if body[index] != "[":
-            return (result, 0)
-
-        depth = 0
-        ind = index
-        while depth < 10:
-            ind1 = body.find("]", ind + 1)
-            ind2 = body.find("[", ind + 1)
-            if ind2 != -1 and ind2 < ind1:
-                depth += 1
-                ind = ind2
-            else:
-                if depth > 0:
-                    depth -= 1
-                    ind = ind1
-                else:
-                    result = body[index : ind1 + 1]
-                    if body[ind1 + 1] == ";":
-                        return (result, ind1 + 2)
-                    return result, 0
-
-        return result, 0
+        try:
+            attributes = parseJDL(jdl)
+        except ValueError as e:
+            print(f"Invalid JDL: {e}")
+            return
+        self.contents = {attribute.name: attribute.value.replace("\n", "") for attribute in attributes}
 
     def insertAttributeInt(self, name, attribute):
         """Insert a named integer attribute"""
@@ -172,28 +213,34 @@ class ClassAd:
                     return []
                 return tempString.split(",")
 
+        # Scan the items with an index rather than slicing the string, to stay linear with its length
         resultList = []
-        while tempString:
-            if tempString.find("{") == 0:
-                end = tempString.find("}")
-                resultList.append(tempString[: end + 1])
-                tempString = tempString[end + 1 :]
-                if tempString.startswith(","):
-                    tempString = tempString[1:]
-            elif tempString.find('"') == 0:
-                end = tempString[1:].find('"')
-                resultList.append(tempString[1 : end + 1])
-                tempString = tempString[end + 2 :]
-                if tempString.startswith(","):
-                    tempString = tempString[1:]
+        index = 0
+        while index < len(tempString):
+            if tempString[index] == "{":
+                end = tempString.find("}", index)
+                if end < 0:
+                    end = len(tempString) - 1
+                resultList.append(tempString[index : end + 1])
+                index = end + 1
+            elif tempString[index] == '"':
+                end = tempString.find('"', index + 1)
+                if end < 0:
+                    resultList.append("")
+                    index += 1
+                else:
+                    resultList.append(tempString[index + 1 : end])
+                    index = end + 1
             else:
-                end = tempString.find(",")
+                end = tempString.find(",", index)
                 if end < 0:
-                    resultList.append(tempString.replace('"', "").replace(" ", ""))
+                    resultList.append(tempString[index:].replace('"', ""))
                     break
-                else:
-                    resultList.append(tempString[:end].replace('"', "").replace(" ", ""))
-                    tempString = tempString[end + 1 :]
+                resultList.append(tempString[index:end].replace('"', ""))
+                index = end + 1
+                continue
+            if tempString.startswith(",", index):
+                index += 1
 
         return resultList
 
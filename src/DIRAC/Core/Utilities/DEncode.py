@@ -16,6 +16,7 @@ import os
 
 import functools
 import inspect
+import itertools
 import traceback
 
 from collections import defaultdict
@@ -508,16 +509,16 @@ g_dDecodeFunctions[_ord("d")] = decodeDict
 
 
 # Encode function
-def encode(uObject):
-    """Generic encoding function"""
+def legacyEncode(uObject):
+    """Generic encoding function, using the recursive per-type functions"""
     eList = []
     # print("ENCODE FUNCTION : %s" % g_dEncodeFunctions[ type( uObject ) ])
     g_dEncodeFunctions[type(uObject)](uObject, eList)
     return b"".join(eList)
 
 
-def decode(data):
-    """Generic decoding function"""
+def legacyDecode(data):
+    """Generic decoding function, using the recursive per-type functions"""
     if not data:
         return data
     # print("DECODE FUNCTION : %s" % g_dDecodeFunctions[ sStream [ iIndex ] ])
@@ -526,6 +527,282 @@ def decode(data):
     return g_dDecodeFunctions[data[0]](data, 0)
 
 
+#################################################################################
+# Fast engine
+#
+# It produces exactly the same bytes as the legacy functions above, but
+# * the encoder walks nested containers iteratively with a stack of iterators,
+#   and the scalars are converted with a single type dispatch table lookup
+# * the decoder is a single loop with an explicit stack of containers, and decodes
+#   long strings straight from a memoryview of the data, without slicing
+#   intermediate bytes objects. Short strings are still sliced, because creating
+#   the memoryview slice costs more than copying a few bytes.
+# The legacy path is used if DIRAC_USE_LEGACY_DENCODE is set, or if the debug
+# call stack (DIRAC_DEBUG_DENCODE_CALLSTACK) is requested, since the hooks live there.
+#################################################################################
+
+DIRAC_USE_LEGACY_DENCODE = os.environ.get("DIRAC_USE_LEGACY_DENCODE", "no").lower() in (
+    "y",
+    "yes",
+    "t",
+    "true",
+    "on",
+    "1",
+)
+
+
+# Strings at least that long are decoded from a memoryview instead of a bytes slice
+_FAST_DECODE_VIEW_THRESHOLD = 4096
+
+
+def _fastEncodeStr(sValue):
+    """Encoding str"""
+    sValue = sValue.encode()
+    return b"s%d:%s" % (len(sValue), sValue)
+
+
+def _fastEncodeBytes(sValue):
+    """Encoding bytes"""
+    return b"s%d:%s" % (len(sValue), sValue)
+
+
+def _fastEncodeInt(iValue):
+    """Encoding ints"""
+    return b"i%de" % iValue
+
+
+def _fastEncodeFloat(fValue):
+    """Encoding floats"""
+    return b"f%se" % str(fValue).encode()
+
+
+def _fastEncodeBool(bValue):
+    """Encoding booleans"""
+    return b"b1" if bValue else b"b0"
+
+
+def _fastEncodeNone(_oValue):
+    """Encoding None"""
+    return b"n"
+
+
+def _fastEncodeTzInfo(tzInfo):
+    """Encoding the tzinfo of a datetime or time: only None is supported, like in the legacy path"""
+    if tzInfo is not None:
+        raise KeyError(type(tzInfo))
+    return b"n"
+
+
+def _fastEncodeDateTime(oValue):
+    """Encoding datetime"""
+    return b"zati%dei%dei%dei%dei%dei%dei%de%se" % (
+        oValue.year,
+        oValue.month,
+        oValue.day,
+        oValue.hour,
+        oValue.minute,
+        oValue.second,
+        oValue.microsecond,
+        _fastEncodeTzInfo(oValue.tzinfo),
+    )
+
+
+def _fastEncodeDate(oValue):
+    """Encoding date"""
+    return b"zdti%dei%dei%dee" % (oValue.year, oValue.month, oValue.day)
+
+
+def _fastEncodeTime(oValue):
+    """Encoding time"""
+    return b"ztti%dei%dei%dei%de%se" % (
+        oValue.hour,
+        oValue.minute,
+        oValue.second,
+        oValue.microsecond,
+        _fastEncodeTzInfo(oValue.tzinfo),
+    )
+
+
+# Like for the legacy path, the dispatch is done on the exact type
+g_fastScalarEncoders = {
+    types.StringType: _fastEncodeStr,
+    bytes: _fastEncodeBytes,
+    types.IntType: _fastEncodeInt,
+    types.FloatType: _fastEncodeFloat,
+    types.BooleanType: _fastEncodeBool,
+    types.NoneType: _fastEncodeNone,
+    _dateTimeType: _fastEncodeDateTime,
+    _dateType: _fastEncodeDate,
+    _timeType: _fastEncodeTime,
+}
+
+g_fastContainerTags = {
+    types.ListType: b"l",
+    types.TupleType: b"t",
+    types.DictType: b"d",
+}
+
+
+def fastEncode(uObject):
+    """Iterative encoding function, producing the same output as legacyEncode"""
+    eList = []
+    append = eList.append
+    scalarEncoders = g_fastScalarEncoders
+    containerTags = g_fastContainerTags
+    # Iterators of the containers being encoded
+    stack = []
+    current = iter((uObject,))
+    while True:
+        for obj in current:
+            objType = type(obj)
+            scalarEncoder = scalarEncoders.get(objType)
+            if scalarEncoder is not None:
+                append(scalarEncoder(obj))
+                continue
+            # Raises KeyError for unsupported types, like the legacy path
+            append(containerTags[objType])
+            stack.append(current)
+            if objType is dict:
+                current = itertools.chain.from_iterable(obj.items())
+            else:
+                current = iter(obj)
+            break
+        else:
+            if not stack:
+                break
+            append(b"e")
+            current = stack.pop()
+    return b"".join(eList)
+
+
+def _fastDecodeFloat(data, i):
+    """Decoding floats, handling the exponent exactly like decodeFloat"""
+    i += 1
+    end = data.index(b"e", i)
+    if end + 1 < len(data) and data[end + 1] in (_ord("+"), _ord("-")):
+        eI = end
+        end = data.index(b"e", end + 1)
+        value = float(data[i:eI]) * 10 ** int(data[eI + 1 : end])
+    else:
+        value = float(data[i:end])
+    return (value, end + 1)
+
+
+def _fastDecodeDateTime(data, i):
+    """Decoding datetime, date and time, whose content is a flat tuple of ints and None"""
+    dataType = data[i + 1]
+    i += 3
+    fields = []
+    while data[i] != 101:  # e
+        if data[i] == 110:  # n
+            fields.append(None)
+            i += 1
+        else:
+            end = data.index(b"e", i + 1)
+            fields.append(int(data[i + 1 : end]))
+            i = end + 1
+    if dataType == 97:  # a
+        return (datetime.datetime(*fields), i + 1)
+    if dataType == 100:  # d
+        return (datetime.date(*fields), i + 1)
+    if dataType == 116:  # t
+        return (datetime.time(*fields), i + 1)
+    raise Exception(f"Unexpected type {dataType} while decoding a datetime object")
+
+
+def _fastDecodeValue(data, view, i):
+    """Decode the value starting at position i of data
+
+    :param bytes data: encoded data
+    :param memoryview view: memoryview on data
+    :param int i: position of the value in data
+
+    :returns: (value, position after the value)
+    """
+    index = data.index
+    noKey = _fastDecodeValue
+    # Frames of the enclosing containers (container, inDict, isTuple, pendingKey)
+    stack = []
+    container = None
+    inDict = isTuple = False
+    key = noKey
+    while True:
+        tag = data[i]
+        if tag == 115 or tag == 117:  # s, u
+            colon = index(b":", i + 1)
+            length = int(data[i + 1 : colon])
+            colon += 1
+            i = colon + length
+            if length < _FAST_DECODE_VIEW_THRESHOLD:
+                value = data[colon:i].decode("utf-8", "surrogateescape")
+            else:
+                value = str(view[colon:i], "utf-8", "surrogateescape")
+        elif tag == 101 and stack:  # e, end of a container
+            value = tuple(container) if isTuple else container
+            container, inDict, isTuple, key = stack.pop()
+            i += 1
+        elif tag == 100 or tag == 108 or tag == 116:  # d, l, t
+            stack.append((container, inDict, isTuple, key))
+            inDict = tag == 100
+            isTuple = tag == 116
+            container = {} if inDict else []
+            key = noKey
+            i += 1
+            continue
+        elif tag == 105 or tag == 73:  # i, I
+            end = index(b"e", i + 1)
+            value = int(data[i + 1 : end])
+            i = end + 1
+        elif tag == 98:  # b
+            value = data[i + 1] != 48
+            i += 2
+        elif tag == 110:  # n
+            value = None
+            i += 1
+        elif tag == 102:  # f
+            value, i = _fastDecodeFloat(data, i)
+        elif tag == 122 and data[i + 2] == 116:  # z
+            value, i = _fastDecodeDateTime(data, i)
+        elif tag == 122:  # z, with a content which is not a tuple
+            value, i = decodeDateTime(data, i)
+        else:
+            raise KeyError(tag)
+
+        if container is None:
+            return (value, i)
+        if inDict:
+            if key is noKey:
+                key = value
+            else:
+                container[key] = value
+                key = noKey
+        else:
+            container.append(value)
+
+
+def fastDecode(data):
+    """Iterative decoding function, returning the same output as legacyDecode"""
+    if not data:
+        return data
+    if not isinstance(data, bytes):
+        raise NotImplementedError("This should never happen")
+    return _fastDecodeValue(data, memoryview(data), 0)
+
+
+def encode(uObject):
+    """Generic encoding function"""
+    if DIRAC_USE_LEGACY_DENCODE or DIRAC_DEBUG_DENCODE_CALLSTACK:
+        return legacyEncode(uObject)
+    return fastEncode(uObject)
+
+
+def decode(data):
+    """Generic decoding function"""
+    if DIRAC_USE_LEGACY_DENCODE or DIRAC_DEBUG_DENCODE_CALLSTACK:
+        return legacyDecode(data)
+    return fastDecode(data)
+
+
 if __name__ == "__main__":
     gObject = {2: "3", True: (3, None), 2.0 * 10**20: 2.0 * 10**-10}
     print(f"Initial: {gObject}")
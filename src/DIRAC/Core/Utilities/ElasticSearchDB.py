@@ -552,6 +552,29 @@ class ElasticSearchDB:
         else:
             return S_ERROR(res)
 
+    @ifConnected
+    def bulk_update(self, docs):
+        """Update or create many documents at once with partial documents
+
+        :param list docs: tuples (index name, document ID, partial document)
+
+        :returns: S_OK(number of documents updated or created)/S_ERROR
+        """
+        sLog.verbose("Bulk updating", f"{len(docs)} documents")
+        actions = (
+            {"_op_type": "update", "_index": index, "_id": docID, "doc": doc, "doc_as_upsert": True}
+            for index, docID, doc in docs
+        )
+        try:
+            res = bulk(client=self.client, actions=actions)
+        except (BulkIndexError, RequestError) as e:
+            sLog.exception()
+            return S_ERROR(f"Failed to update by bulk {e!r}")
+
+        if res[0] == len(docs):
+            return S_OK(len(docs))
+        return S_ERROR(res)
+
     @ifConnected
     def getUniqueValue(self, indexName, key, orderBy=False):
         """
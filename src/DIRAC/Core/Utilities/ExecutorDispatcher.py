@@ -18,6 +18,7 @@ class ExecutorState:
         self.__lock = threading.Lock()
         self.__typeToId = {}
         self.__maxTasks = {}
+        self.__batchSize = {}
         self.__execTasks = {}
         self.__taskInExec = {}
 
@@ -25,15 +26,18 @@ class ExecutorState:
         return {
             "type2id": dict(self.__typeToId),
             "maxTasks": dict(self.__maxTasks),
+            "batchSize": dict(self.__batchSize),
             "execTasks": dict(self.__execTasks),
             "tasksInExec": dict(self.__taskInExec),
             "locked": self.__lock.locked(),  # pylint: disable=no-member
         }
 
-    def addExecutor(self, eId, eTypes, maxTasks=1):
+    def addExecutor(self, eId, eTypes, maxTasks=1, batchSize=1):
         self.__lock.acquire()
         try:
-            self.__maxTasks[eId] = max(1, maxTasks)
+            # An executor processing batches of tasks needs a slot for each task of the batch
+            self.__batchSize[eId] = max(1, batchSize)
+            self.__maxTasks[eId] = max(1, maxTasks, batchSize)
             if eId not in self.__execTasks:
                 self.__execTasks[eId] = set()
             if not isinstance(eTypes, (list, tuple)):
@@ -57,6 +61,7 @@ class ExecutorState:
                 tasks.append(taskId)
             self.__execTasks.pop(eId)
             self.__maxTasks.pop(eId)
+            self.__batchSize.pop(eId)
             return tasks
         finally:
             self.__lock.release()
@@ -79,6 +84,9 @@ class ExecutorState:
         except KeyError:
             return 0
 
+    def batchSize(self, eId):
+        return self.__batchSize.get(eId, 1)
+
     def getFreeExecutors(self, eType):
         execs = {}
         try:
@@ -208,6 +216,27 @@ class ExecutorQueues:
         # Not found. release and return None
         return None
 
+    def popTasks(self, eTypes, maxTasks):
+        """Pop up to maxTasks tasks waiting for the first of the eTypes having some
+
+        :return: (list of taskIds, eType) or None
+        """
+        if not isinstance(eTypes, (list, tuple)):
+            eTypes = [eTypes]
+        with self.__lock:
+            for eType in eTypes:
+                queue = self.__queues.get(eType)
+                if not queue:
+                    continue
+                taskIds = queue[:maxTasks]
+                del queue[:maxTasks]
+                for taskId in taskIds:
+                    del self.__taskInQueue[taskId]
+                self.__lastUse[eType] = time.time()
+                self.__log.verbose(f"Popped tasks {taskIds} from executor {eType} waiting queue")
+                return (taskIds, eType)
+        return None
+
     def getState(self):
         self.__lock.acquire()
         try:
@@ -255,6 +284,9 @@ class ExecutorDispatcherCallbacks:
     def cbSendTask(self, taskId, taskObj, eId, eType):
         return S_ERROR("No send task callback defined")
 
+    def cbSendTasks(self, taskObjs, eId, eType):
+        return S_ERROR("No send tasks callback defined")
+
     def cbDisconectExecutor(self, eId):
         return S_ERROR("No disconnect callback defined")
 
@@ -264,6 +296,21 @@ class ExecutorDispatcherCallbacks:
     def cbTaskProcessed(self, taskId, taskObj, eType):
         return S_OK()
 
+    def cbTasksProcessed(self, taskObjs, eType):
+        """Called for a batch of tasks processed by an executor, by default task per task
+
+        :param dict taskObjs: { taskId: taskObj }
+        :return: S_OK({"Successful": [taskIds], "Failed": {taskId: errorMessage}})
+        """
+        processed = {"Successful": [], "Failed": {}}
+        for taskId, taskObj in taskObjs.items():
+            result = self.cbTaskProcessed(taskId, taskObj, eType)
+            if result["OK"]:
+                processed["Successful"].append(taskId)
+            else:
+                processed["Failed"][taskId] = result["Message"]
+        return S_OK(processed)
+
     def cbTaskFreeze(self, taskId, taskObj, eType):
         return S_OK()
 
@@ -357,7 +404,7 @@ class ExecutorDispatcher:
             return
         eTypes = self.__execTypes
 
-    def addExecutor(self, eId, eTypes, maxTasks=1):
+    def addExecutor(self, eId, eTypes, maxTasks=1, batchSize=1):
         self.__log.verbose("Adding new executor to the pool", f"{eId}: {', '.join(eTypes)}")
         self.__executorsLock.acquire()
         try:
@@ -366,7 +413,7 @@ class ExecutorDispatcher:
             if not isinstance(eTypes, (list, tuple)):
                 eTypes = [eTypes]
             self.__idMap[eId] = list(eTypes)
-            self.__states.addExecutor(eId, eTypes, maxTasks)
+            self.__states.addExecutor(eId, eTypes, maxTasks, batchSize)
             for eType in eTypes:
                 if eType not in self.__execTypes:
                     self.__execTypes[eType] = 0
@@ -501,7 +548,7 @@ class ExecutorDispatcher:
         except KeyError:
             return None
 
-    def __dispatchTask(self, taskId, defrozeIfNeeded=True):
+    def __dispatchTask(self, taskId, defrozeIfNeeded=True, fill=True):
         self.__log.verbose(f"Dispatching task {taskId}")
         # If task already in executor skip
         if self.__states.getExecutorOfTask(taskId):
@@ -536,7 +583,8 @@ class ExecutorDispatcher:
             return self.removeTask(taskId)
 
         self.__queues.pushTask(eType, taskId)
-        self.__fillExecutors(eType, defrozeIfNeeded=defrozeIfNeeded)
+        if fill:
+            self.__fillExecutors(eType, defrozeIfNeeded=defrozeIfNeeded)
         return S_OK()
 
     def __taskProcessedCallback(self, taskId, taskObj, eType):
@@ -553,6 +601,20 @@ class ExecutorDispatcher:
 
         return result
 
+    def __tasksProcessedCallback(self, taskObjs, eType):
+        try:
+            result = self.__cbHolder.cbTasksProcessed(taskObjs, eType)
+        except Exception:
+            self.__log.exception("Exception while calling tasksDone callback")
+            return S_ERROR("Exception while calling tasksDone callback")
+
+        if not isReturnStructure(result):
+            errMsg = "tasksDone callback did not return a S_OK/S_ERROR structure"
+            self.__log.fatal(errMsg)
+            return S_ERROR(errMsg)
+
+        return result
+
     def __taskFreezeCallback(self, taskId, taskObj, eType):
         try:
             result = self.__cbHolder.cbTaskFreeze(taskId, taskObj, eType)
@@ -603,6 +665,30 @@ class ExecutorDispatcher:
             return S_OK()
         return self.__dispatchTask(taskId)
 
+    def addTasks(self, taskObjs):
+        """Add several tasks, the executors are filled once all of them are queued so that
+        the executors processing batches of tasks receive full batches
+
+        :param dict taskObjs: { taskId: taskObj }
+        :return: S_OK({"Successful": [taskIds], "Failed": {taskId: errorMessage}})
+        """
+        added = {"Successful": [], "Failed": {}}
+        alreadyKnown = False
+        for taskId, taskObj in taskObjs.items():
+            if not self.__addTaskIfNew(taskId, taskObj):
+                alreadyKnown = True
+                continue
+            result = self.__dispatchTask(taskId, fill=False)
+            if result["OK"]:
+                added["Successful"].append(taskId)
+            else:
+                added["Failed"][taskId] = result["Message"]
+        if alreadyKnown:
+            self.__unfreezeTasks()
+        for eType in list(self.__execTypes):
+            self.__fillExecutors(eType, defrozeIfNeeded=False)
+        return S_OK(added)
+
     def removeTask(self, taskId):
         try:
             self.__tasks.pop(taskId)
@@ -706,6 +792,58 @@ class ExecutorDispatcher:
         self.__sendTaskToExecutor(eId, eType)
         return result
 
+    def tasksProcessed(self, eId, taskObjs):
+        """Handle a batch of tasks processed by an executor: the processed callback is called once
+        for all the tasks executed by the same type of executor, and the tasks are dispatched to the
+        next executors before filling them
+
+        :param eId: executor ID
+        :param dict taskObjs: { taskId: taskObj or False }
+        """
+        received = {}
+        for taskId, taskObj in taskObjs.items():
+            result = self.__taskReceived(taskId, eId)
+            if not result["OK"]:
+                continue
+            eType = result["Value"]
+            # Executor didn't have the task.
+            if not eType:
+                continue
+            if not taskObj:
+                taskObj = self.__tasks[taskId].taskObj
+            received.setdefault(eType, {})[taskId] = taskObj
+
+        nextTypes = set()
+        for eType, eTypeTasks in received.items():
+            result = self.__tasksProcessedCallback(eTypeTasks, eType)
+            if result["OK"]:
+                failed = result["Value"]["Failed"]
+            else:
+                failed = dict.fromkeys(eTypeTasks, result["Message"])
+            for taskId, taskObj in eTypeTasks.items():
+                if taskId in failed:
+                    self.__log.error("There was a problem processing task", f"{taskId}: {failed[taskId]}")
+                    self.removeTask(taskId)
+                    continue
+                # Up until here it's an executor error. From now on it can be a task error
+                try:
+                    self.__tasks[taskId].taskObj = taskObj
+                    self.__tasks[taskId].pathExecuted.append(eType)
+                except KeyError:
+                    self.__log.error("Task seems to have been removed while being processed!", f"{taskId}")
+                    continue
+                self.__log.verbose(f"Executor {eId} processed task {taskId}")
+                self.__dispatchTask(taskId, fill=False)
+                eTask = self.__tasks.get(taskId)
+                if eTask and eTask.eType:
+                    nextTypes.add(eTask.eType)
+
+        self.__sendTaskToExecutor(eId, list(received))
+        for eType in nextTypes:
+            if eType in self.__execTypes:
+                self.__fillExecutors(eType, defrozeIfNeeded=False)
+        return S_OK()
+
     def retryTask(self, eId, taskId):
         if taskId not in self.__tasks:
             errMsg = f"Task {taskId} is not known"
@@ -758,6 +896,9 @@ class ExecutorDispatcher:
                 except ValueError:
                     pass
                 searchTypes.append(eType)
+        batchSize = self.__states.batchSize(eId)
+        if batchSize > 1:
+            return self.__sendTasksToExecutor(eId, searchTypes, min(batchSize, max(1, self.__states.freeSlots(eId))))
         pData = self.__queues.popTask(searchTypes)
         if pData is None:
             self.__log.verbose(f"No more tasks for {eTypes}")
@@ -775,6 +916,26 @@ class ExecutorDispatcher:
             return S_ERROR("Exception while sending task to executor")
         return S_OK(taskId)
 
+    def __sendTasksToExecutor(self, eId, searchTypes, maxTasks):
+        pData = self.__queues.popTasks(searchTypes, maxTasks)
+        if pData is None:
+            self.__log.verbose(f"No more tasks for {searchTypes}")
+            return S_OK()
+        taskIds, eType = pData
+        self.__log.verbose(f"Sending {len(taskIds)} tasks to {eType}={eId}")
+        for taskId in taskIds:
+            self.__states.addTask(eId, taskId)
+        try:
+            self.__msgTasksToExecutor(taskIds, eId, eType)
+        except Exception:
+            self.__log.exception("Exception while sending tasks to executor")
+            for taskId in taskIds:
+                if taskId in self.__tasks:
+                    self.__queues.pushTask(eType, taskId, ahead=False)
+                self.__states.removeTask(taskId)
+            return S_ERROR("Exception while sending tasks to executor")
+        return S_OK(taskIds)
+
     def __msgTaskToExecutor(self, taskId, eId, eType):
         self.__tasks[taskId].sendTime = time.time()
         result = self.__cbHolder.cbSendTask(taskId, self.__tasks[taskId].taskObj, eId, eType)
@@ -785,3 +946,17 @@ class ExecutorDispatcher:
         if not result["OK"]:
             self.__log.error("Failed to cbSendTask", f"{result!r}")
             raise RuntimeError(result)
+
+    def __msgTasksToExecutor(self, taskIds, eId, eType):
+        taskObjs = {}
+        for taskId in taskIds:
+            self.__tasks[taskId].sendTime = time.time()
+            taskObjs[taskId] = self.__tasks[taskId].taskObj
+        result = self.__cbHolder.cbSendTasks(taskObjs, eId, eType)
+        if not isReturnStructure(result):
+            errMsg = "Send tasks callback did not send back an S_OK/S_ERROR structure"
+            self.__log.fatal(errMsg)
+            raise ValueError(errMsg)
+        if not result["OK"]:
+            self.__log.error("Failed to cbSendTasks", f"{result!r}")
+            raise RuntimeError(result)
@@ -5,7 +5,7 @@ from pydantic import ValidationError
 
 from DIRAC import S_OK, S_ERROR
 from DIRAC.Core.Utilities import List
-from DIRAC.Core.Utilities.ClassAd.ClassAdLight import ClassAd
+from DIRAC.Core.Utilities.ClassAd.ClassAdLight import ClassAd, parseJDL
 from DIRAC.WorkloadManagementSystem.Utilities.JobModel import BaseJobDescriptionModel
 
 ARGUMENTS = "Arguments"
@@ -46,33 +46,29 @@ CREDENTIALS_FIELDS = {OWNER, OWNER_GROUP, VO}
 def loadJDLAsCFG(jdl):
     """
     Load a JDL as CFG
+
+    The JDL is parsed by parseJDL, which caches the result
+
+    :return: S_OK((CFG, position of the closing bracket))
     """
 
     def cleanValue(value):
         value = value.strip()
         if value[0] == '"':
+            # Quoted strings separated by commas, looked up with find rather than char by char
             entries = []
             iPos = 1
-            current = ""
-            state = "in"
-            while iPos < len(value):
-                if value[iPos] == '"':
-                    if state == "in":
-                        entries.append(current)
-                        current = ""
-                        state = "out"
-                    elif state == "out":
-                        current = current.strip()
-                        if current not in (",",):
-                            return S_ERROR("value seems a list but is not separated in commas")
-                        current = ""
-                        state = "in"
-                else:
-                    current += value[iPos]
+            while True:
+                end = value.find('"', iPos)
+                if end < 0:
+                    return S_ERROR('value is opened with " but is not closed')
+                entries.append(value[iPos:end])
+                iPos = value.find('"', end + 1)
+                if iPos < 0:
+                    return S_OK(", ".join(entries))
+                if value[end + 1 : iPos].strip() != ",":
+                    return S_ERROR("value seems a list but is not separated in commas")
                 iPos += 1
-            if state == "in":
-                return S_ERROR('value is opened with " but is not closed')
-            return S_OK(", ".join(entries))
         else:
             return S_OK(value.replace('"', ""))
 
@@ -106,64 +102,31 @@ def loadJDLAsCFG(jdl):
         cfg.setOption(key, value)
         return S_OK()
 
-    if jdl[0] == "[":
-        iPos = 1
-    else:
-        iPos = 0
-    key = ""
-    value = ""
-    action = "key"
-    insideLiteral = False
-    cfg = CFG()
-    while iPos < len(jdl):
-        char = jdl[iPos]
-        if char == ";" and not insideLiteral:
-            if key.strip():
-                result = assignValue(key, value, cfg)
+    def attributesAsCFG(attributes):
+        cfg = CFG()
+        for attribute in attributes:
+            if attribute.attributes is not None:
+                result = attributesAsCFG(attribute.attributes)
                 if not result["OK"]:
                     return result
-            key = ""
-            value = ""
-            action = "key"
-        elif char == "[" and not insideLiteral:
-            key = key.strip()
-            if not key:
-                return S_ERROR("Invalid key in JDL")
-            if value.strip():
-                return S_ERROR(f"Key {key} seems to have a value and open a sub JDL at the same time")
-            result = loadJDLAsCFG(jdl[iPos:])
-            if not result["OK"]:
-                return result
-            subCfg, subPos = result["Value"]
-            cfg.createNewSection(key, contents=subCfg)
-            key = ""
-            value = ""
-            action = "key"
-            insideLiteral = False
-            iPos += subPos
-        elif char == "=" and not insideLiteral:
-            if action == "key":
-                action = "value"
-                insideLiteral = False
+                cfg.createNewSection(attribute.name, contents=result["Value"])
             else:
-                value += char
-        elif char == "]" and not insideLiteral:
-            key = key.strip()
-            if len(key) > 0:
-                result = assignValue(key, value, cfg)
+                result = assignValue(attribute.name, attribute.value, cfg)
                 if not result["OK"]:
                     return result
-            return S_OK((cfg, iPos))
-        else:
-            if action == "key":
-                key += char
-            else:
-                value += char
-                if char == '"':
-                    insideLiteral = not insideLiteral
-        iPos += 1
+        return S_OK(cfg)
 
-    return S_OK((cfg, iPos))
+    jdl = jdl.strip()
+    if not jdl.startswith("["):
+        jdl = f"[{jdl}]"
+    try:
+        attributes = parseJDL(jdl)
+    except ValueError as e:
+        return S_ERROR(f"Invalid JDL: {e}")
+    result = attributesAsCFG(attributes)
+    if not result["OK"]:
+        return result
+    return S_OK((result["Value"], len(jdl) - 1))
 
 
 def dumpCFGAsJDL(cfg, level=1, tab="  "):
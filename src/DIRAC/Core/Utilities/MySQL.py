@@ -5,14 +5,12 @@
     These are the coded methods:
 
 
-    __init__( host, user, passwd, name, [maxConnsInQueue=10] )
+    __init__( host, user, passwd, name, [maxConnections=10] )
 
-    Initializes the Queue and tries to connect to the DB server,
+    Initializes the connection pool of the DB and tries to connect to the DB server,
     using the _connect method.
-    "maxConnsInQueue" defines the size of the Queue of open connections
-    that are kept for reuse. It also defined the maximum number of open
-    connections available from the object.
-    maxConnsInQueue = 0 means unlimited and it is not supported.
+    "maxConnections" defines the maximum number of open connections to the DB
+    kept in the pool, shared by all the objects of the process using the same DB.
 
 
     _except( methodName, exception, errorMessage )
@@ -49,6 +47,14 @@
     Returns S_OK with number of updated registers in Value or S_ERROR upon failure.
 
 
+    _iterQuery( cmd, [batchSize=STREAM_BATCH_SIZE] )
+
+    Executes SQL command "cmd" with an unbuffered server side cursor.
+    Returns a generator of S_OK with at most batchSize rows in Value, ending with S_ERROR upon failure.
+    The query has its own connection of the pool until all the rows are read,
+    so that the rows never have to be all in memory.
+
+
     _createTables( tableDict )
 
     Create a new Table in the DB
@@ -58,8 +64,25 @@
 
     Gets a connection from the Queue (or open a new one if none is available)
     Returns S_OK with connection in Value or S_ERROR
-    the calling method is responsible for closing this connection once it is no
-    longer needed.
+    the connection goes back to the Queue when its release() method is called,
+    or at the latest once it is not referenced anymore,
+    in the meantime all the queries of the thread use it.
+
+
+    _readFromReplicas( [since=0] )
+
+    Context manager routing the queries of the thread to one of the read only replicas
+    of the DB given as readReplicas to __init__, if one of them is reachable and up to date:
+    its replication lag must be below maxReplicationLag, and it must have replicated everything
+    written before the "since" time stamp. Otherwise the queries go to the master.
+    The writes (_update, executeStoredProcedure with write=True) always go to the master, as well as all the queries
+    of the context following a write, and the queries of the threads in a transaction.
+
+
+    _readFromMaster()
+
+    Context manager routing the queries of the thread to the master, even inside a read section,
+    for the reads whose results are kept, e.g. in a cache, and must not be older than the last writes.
 
 
 
@@ -147,11 +170,13 @@
 
 """
 import collections
+import contextlib
 import functools
 import json
 import os
 import time
 import threading
+import weakref
 import MySQLdb
 
 from DIRAC import gLogger
@@ -162,6 +187,27 @@ from DIRAC.Core.Utilities import DErrno
 gInstancesCount = 0
 MAXCONNECTRETRY = 10
 RETRY_SLEEP_DURATION = 5
+# Default maximum number of connections per database
+MAXCONNECTIONS = 10
+# Number of rows read at once by the unbuffered cursors
+STREAM_BATCH_SIZE = 10000
+# Maximum time to wait for a connection when they are all in use
+POOL_WAIT_TIMEOUT = 60
+# Connections idle for longer are pinged before being used
+PING_INTERVAL = 30
+# Interval between the checks for connections held by dead threads
+CLEAN_INTERVAL = 60
+# Default maximum replication lag, in seconds, of the read replicas used
+MAX_REPLICATION_LAG = 30
+# Interval between the checks of the replication lag of a read replica
+LAG_CHECK_INTERVAL = 5
+# Time during which an unreachable read replica, or one whose replication is stopped, is not used
+REPLICA_RETRY_INTERVAL = 60
+# Client errors telling that the server cannot be reached, or that the connection was lost:
+# CR_CONNECTION_ERROR, CR_CONN_HOST_ERROR, CR_SERVER_GONE_ERROR, CR_SERVER_LOST
+CONNECTION_ERRORS = (2002, 2003, 2006, 2013)
+# Connection pools of the process, one per database
+gConnectionPools = {}
 
 
 def _checkFields(inFields, inValues):
@@ -282,6 +328,7 @@ def captureOptimizerTraces(meth):
             queryTraces = cursor.fetchall()
         else:
             queryTraces = ()
+        connection.release()
 
         # Generate a filename stored in DIRAC_MYSQL_OPTIMIZER_TRACES_PATH
         methHash = hash(f"{args},{kwargs}")
@@ -326,137 +373,323 @@ def captureOptimizerTraces(meth):
         return meth
 
 
+class PooledConnection:
+    """
+    Connection checked out of a :py:class:`ConnectionPool`.
+    It behaves like the MySQLdb connection it wraps, and is given back to the pool by :py:meth:`release`,
+    or at the end of the "with" block using it.
+    A connection which is not released is given back once it is not referenced anymore, but only
+    when the garbage collector gets to it, which can be long after, e.g. if a traceback references it.
+    """
+
+    def __init__(self, conn, release, pool):
+        self.__conn = conn
+        self.__release = release
+        # Pool the connection comes from
+        self.pool = pool
+        self.__finalizer = weakref.finalize(self, pool.deferRelease, release)
+
+    def __getattr__(self, name):
+        return getattr(self.__conn, name)
+
+    def release(self):
+        """Give the connection back to the pool, it must not be used anymore. Calling it again does nothing"""
+        if self.__finalizer.detach():
+            self.__release()
+
+    def discard(self):
+        """Close the connection instead of giving it back to the pool, for the connections of getUnshared"""
+        if self.__finalizer.detach():
+            self.pool.discard(self.__conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
 class ConnectionPool:
     """
-    Management of connections per thread
+    Bounded pool of connections to a database
+
+    A connection is checked out of the pool by :py:meth:`get`, and checked in as soon as the returned
+    :py:class:`PooledConnection` is not referenced anymore, typically at the end of the method doing the query.
+    While a thread holds a connection, or is in a transaction, all its queries use that same connection.
+    At most maxConnections are open: when they are all in use, get waits for one to be checked in.
+    Connections are only pinged when they have been idle for more than PING_INTERVAL seconds.
     """
 
-    def __init__(self, host, user, passwd, port=3306):
+    def __init__(self, host, user, passwd, port=3306, dbName="", maxConnections=MAXCONNECTIONS, readOnly=False):
+        # The pool is for a read only replica of the database
+        self.readOnly = readOnly
         self.__host = host
         self.__user = user
         self.__passwd = passwd
         self.__port = port
-        self.__spares = collections.deque()
-        self.__maxSpares = 10
-        self.__lastClean = 0
+        self.__dbName = dbName
+        self.__maxConnections = max(1, maxConnections)
+        # Reentrant, since the connections released while the lock is held are checked in with it
+        self.__cond = threading.Condition(threading.RLock())
+        # Releases of the connections collected by the garbage collector, which can run at any time, even while
+        # the lock is held: they are only done the next time the pool is used
+        self.__deferredReleases = collections.deque()
+        # Open connections which are not in use, with the time they were last used
+        self.__idle = collections.deque()
+        # Connections in use: thread -> [conn, number of references]
         self.__assigned = {}
+        # Connections held by the threads in a transaction
+        self.__transactions = {}
+        self.__nConnections = 0
+        self.__lastClean = time.time()
+        self.__metrics = collections.Counter()
 
     @property
     def __thid(self):
         return threading.current_thread()
 
+    @property
+    def host(self):
+        return self.__host
+
+    def isHeld(self):
+        """Tell whether the current thread holds a connection of the pool, or is in a transaction"""
+        with self.__cond:
+            self.__doDeferredReleases()
+            return self.__thid in self.__assigned or self.__thid in self.__transactions
+
     def __newConn(self):
-        conn = MySQLdb.connect(host=self.__host, port=self.__port, user=self.__user, passwd=self.__passwd)
+        if self.__dbName:
+            conn = MySQLdb.connect(
+                host=self.__host, port=self.__port, user=self.__user, passwd=self.__passwd, db=self.__dbName
+            )
+        else:
+            conn = MySQLdb.connect(host=self.__host, port=self.__port, user=self.__user, passwd=self.__passwd)
 
         self.__execute(conn, "SET AUTOCOMMIT=1")
         return conn
 
-    def __execute(self, conn, cmd):
+    def __execute(self, conn, cmd, commit=True):
         cursor = conn.cursor()
         res = cursor.execute(cmd)
-        conn.commit()
+        if commit:
+            conn.commit()
         cursor.close()
         return res
 
-    def get(self, dbName, retries=10):
+    def deferRelease(self, release):
+        """Called by the garbage collector for a connection which was not released"""
+        self.__deferredReleases.append(release)
+
+    def __doDeferredReleases(self):
+        """Release the connections collected by the garbage collector. Must be called with the lock held."""
+        while self.__deferredReleases:
+            self.__deferredReleases.popleft()()
+
+    def get(self, dbName=None, retries=10):
+        """Check out a connection, or the one already held by the current thread
+
+        :param str dbName: unused, the pool is for a single database
+        :param int retries: number of attempts to open a new connection
+
+        :return: S_OK(PooledConnection)/S_ERROR
+        """
         retries = max(0, min(MAXCONNECTRETRY, retries))
-        self.clean()
-        return self.__getWithRetry(dbName, retries, retries)
+        thid = self.__thid
+        with self.__cond:
+            self.__doDeferredReleases()
+            if time.time() - self.__lastClean > CLEAN_INTERVAL:
+                self.clean()
+            # The thread already holds a connection
+            data = self.__assigned.get(thid)
+            if data:
+                data[1] += 1
+                return S_OK(PooledConnection(data[0], functools.partial(self.__release, thid), self))
+
+            result = self.__checkout()
+            if not result["OK"]:
+                return result
+            conn, lastUse = result["Value"]
+
+        conn = self.__prepare(conn, lastUse, retries)
+        if not conn:
+            with self.__cond:
+                self.__nConnections -= 1
+                self.__cond.notify()
+            return S_ERROR(DErrno.EMYSQL, "Could not connect")
 
-    def __getWithRetry(self, dbName, totalRetries, retriesLeft):
-        sleepTime = RETRY_SLEEP_DURATION * (totalRetries - retriesLeft)
-        if sleepTime > 0:
-            time.sleep(sleepTime)
-        try:
-            conn, lastName, thid = self.__innerGet()
-        except MySQLdb.MySQLError as excp:
-            if retriesLeft > 0:
-                return self.__getWithRetry(dbName, totalRetries, retriesLeft - 1)
-            return S_ERROR(DErrno.EMYSQL, f"Could not connect: {excp}")
+        with self.__cond:
+            self.__assigned[thid] = [conn, 1]
+        return S_OK(PooledConnection(conn, functools.partial(self.__release, thid), self))
 
-        if not self.__ping(conn):
-            try:
-                self.__assigned.pop(thid)
-            except KeyError:
-                pass
-            if retriesLeft > 0:
-                return self.__getWithRetry(dbName, totalRetries, retriesLeft)
+    def getUnshared(self, retries=10):
+        """Check out a connection for the exclusive use of the caller, which is not used by
+        the other queries of the thread. It is needed by the unbuffered cursors,
+        which block their connection until all the rows are read.
+
+        :param int retries: number of attempts to open a new connection
+
+        :return: S_OK(PooledConnection)/S_ERROR
+        """
+        retries = max(0, min(MAXCONNECTRETRY, retries))
+        with self.__cond:
+            self.__doDeferredReleases()
+            if time.time() - self.__lastClean > CLEAN_INTERVAL:
+                self.clean()
+            result = self.__checkout()
+            if not result["OK"]:
+                return result
+            conn, lastUse = result["Value"]
+
+        conn = self.__prepare(conn, lastUse, retries)
+        if not conn:
+            with self.__cond:
+                self.__nConnections -= 1
+                self.__cond.notify()
             return S_ERROR(DErrno.EMYSQL, "Could not connect")
+        return S_OK(PooledConnection(conn, functools.partial(self.__checkin, conn), self))
+
+    def __checkout(self):
+        """Take an idle connection, or the right to open a new one, waiting if all of them are in use.
+        Must be called with the lock held.
 
-        if lastName != dbName:
+        :return: S_OK((conn, lastUse)), where conn is None if a new connection should be opened
+        """
+        self.__metrics["Checkouts"] += 1
+        if not self.__idle and self.__nConnections >= self.__maxConnections:
+            self.__metrics["Exhausted"] += 1
+            start = time.time()
+            deadline = start + POOL_WAIT_TIMEOUT
+            while not self.__idle and self.__nConnections >= self.__maxConnections:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    self.__metrics["WaitTime"] += time.time() - start
+                    return S_ERROR(
+                        DErrno.EMYSQL, f"All {self.__maxConnections} connections to {self.__dbName} are in use"
+                    )
+                # The deferred releases do not notify
+                self.__cond.wait(min(remaining, 1))
+                self.__doDeferredReleases()
+            self.__metrics["WaitTime"] += time.time() - start
+        if self.__idle:
+            # The most recently used connection is the least likely to need a ping
+            return S_OK(self.__idle.pop())
+        self.__nConnections += 1
+        return S_OK((None, 0))
+
+    def __prepare(self, conn, lastUse, retries):
+        """Make sure the connection checked out is usable: open it if needed,
+        and ping it if it has been idle for long
+
+        :return: the usable connection, or None
+        """
+        if conn and time.time() - lastUse > PING_INTERVAL and not self.__ping(conn):
+            self.__close(conn)
+            self.__metrics["Reconnects"] += 1
+            conn = None
+        for attempt in range(retries + 1):
+            if conn:
+                return conn
+            time.sleep(RETRY_SLEEP_DURATION * attempt)
             try:
-                conn.select_db(dbName)
+                conn = self.__newConn()
             except MySQLdb.MySQLError as excp:
-                if retriesLeft > 0:
-                    return self.__getWithRetry(dbName, totalRetries, retriesLeft - 1)
-                return S_ERROR(DErrno.EMYSQL, f"Could not select db {dbName}: {excp}")
-            try:
-                self.__assigned[thid][1] = dbName
-            except KeyError:
-                if retriesLeft > 0:
-                    return self.__getWithRetry(dbName, totalRetries, retriesLeft - 1)
-                return S_ERROR(DErrno.EMYSQL, "Could not connect")
-        return S_OK(conn)
+                gLogger.warn("Could not connect", f"to {self.__dbName}: {excp}")
+        return conn
+
+    def __release(self, thid):
+        """Called when a PooledConnection is released: check in the connection
+        if the thread does not use it anymore"""
+        with self.__cond:
+            data = self.__assigned.get(thid)
+            if not data:
+                return
+            data[1] -= 1
+            if data[1] > 0:
+                return
+            self.__assigned.pop(thid)
+            self.__checkin(data[0])
+
+    def __checkin(self, conn):
+        """Give back a connection which is not used anymore to the pool"""
+        with self.__cond:
+            self.__idle.append((conn, time.time()))
+            self.__cond.notify()
+
+    def discard(self, conn):
+        """Close a connection checked out by getUnshared, which cannot be reused, and let another one be opened"""
+        self.__close(conn)
+        with self.__cond:
+            self.__nConnections -= 1
+            self.__cond.notify()
 
     def __ping(self, conn):
         try:
-            conn.ping(True)
+            conn.ping()
             return True
         except Exception:
             return False
 
-    def __innerGet(self):
-        thid = self.__thid
-        now = time.time()
-        if thid in self.__assigned:
-            data = self.__assigned[thid]
-            conn = data[0]
-            data[2] = now
-            return data[0], data[1], thid
-        # Not cached
-        try:
-            conn, dbName = self.__spares.pop()
-        except IndexError:
-            conn = self.__newConn()
-            dbName = ""
-
-        self.__assigned[thid] = [conn, dbName, now]
-        return conn, dbName, thid
-
-    def __pop(self, thid):
+    def __close(self, conn):
         try:
-            data = self.__assigned.pop(thid)
-            if len(self.__spares) < self.__maxSpares:
-                self.__spares.append((data[0], data[1]))
-            else:
-                try:
-                    data[0].close()
-                except MySQLdb.ProgrammingError as exc:
-                    gLogger.warn(f"ProgrammingError exception while closing MySQL connection: {exc}")
-                except Exception as exc:
-                    gLogger.warn(f"Exception while closing MySQL connection: {exc}")
-        except KeyError:
-            pass
+            conn.close()
+        except MySQLdb.ProgrammingError as exc:
+            gLogger.warn(f"ProgrammingError exception while closing MySQL connection: {exc}")
+        except Exception as exc:
+            gLogger.warn(f"Exception while closing MySQL connection: {exc}")
 
     def clean(self, now=False):
+        """Give back to the pool the connections held by threads which are not alive anymore"""
         if not now:
             now = time.time()
-        self.__lastClean = now
-        for thid in list(self.__assigned):
-            if not thid.is_alive():
-                self.__pop(thid)
-
-    def transactionStart(self, dbName):
+        with self.__cond:
+            self.__doDeferredReleases()
+            self.__lastClean = now
+            for thid in list(self.__transactions):
+                if not thid.is_alive():
+                    self.__transactions.pop(thid)
+            for thid in list(self.__assigned):
+                if not thid.is_alive():
+                    conn, _refs = self.__assigned.pop(thid)
+                    self.__idle.append((conn, now))
+                    self.__cond.notify()
+
+    def getMetrics(self):
+        """Get the activity of the pool since the previous call
+
+        :return: dict with the number of open Connections, and the number of Checkouts, WaitTime (in seconds),
+                 Reconnects and Exhausted (number of checkouts which had to wait for a connection)
+        """
+        with self.__cond:
+            self.__doDeferredReleases()
+            metrics = dict(self.__metrics)
+            self.__metrics.clear()
+            metrics["Connections"] = self.__nConnections
+        return metrics
+
+    def transactionStart(self, dbName=None):
         result = self.get(dbName)
         if not result["OK"]:
             return result
         conn = result["Value"]
         try:
-            return S_OK(self.__execute(conn, "START TRANSACTION WITH CONSISTENT SNAPSHOT"))
+            # Committing here would end the transaction right away
+            result = S_OK(self.__execute(conn, "START TRANSACTION WITH CONSISTENT SNAPSHOT", commit=False))
         except MySQLdb.MySQLError as excp:
+            conn.release()
             return S_ERROR(DErrno.EMYSQL, f"Could not begin transaction: {excp}")
-
-    def transactionCommit(self, dbName):
+        # Keep the connection until the end of the transaction
+        self.__transactions[self.__thid] = conn
+        return result
+
+    def __transactionEnd(self, conn):
+        """Release the connection used to end a transaction, and the one held during the transaction"""
+        conn.release()
+        transactionConn = self.__transactions.pop(self.__thid, None)
+        if transactionConn:
+            transactionConn.release()
+
+    def transactionCommit(self, dbName=None):
         result = self.get(dbName)
         if not result["OK"]:
             return result
@@ -466,8 +699,10 @@ class ConnectionPool:
             return S_OK(result)
         except MySQLdb.MySQLError as excp:
             return S_ERROR(DErrno.EMYSQL, f"Could not commit transaction: {excp}")
+        finally:
+            self.__transactionEnd(conn)
 
-    def transactionRollback(self, dbName):
+    def transactionRollback(self, dbName=None):
         result = self.get(dbName)
         if not result["OK"]:
             return result
@@ -477,6 +712,145 @@ class ConnectionPool:
             return S_OK(result)
         except MySQLdb.MySQLError as excp:
             return S_ERROR(DErrno.EMYSQL, f"Could not rollback transaction: {excp}")
+        finally:
+            self.__transactionEnd(conn)
+
+
+class ReadReplicas:
+    """
+    Read only replicas of a database, which serve the queries of the read sections of :py:class:`MySQL`
+
+    A replica is only used if it can be connected to, and if it is up to date enough: its replication lag
+    is checked at most every LAG_CHECK_INTERVAL seconds, which tells up to when the writes done on the master
+    are visible on the replica. A replica which cannot be connected to, or whose replication is stopped,
+    is not used for REPLICA_RETRY_INTERVAL seconds. The replicas are used in turn, but a thread keeps using
+    the replica it holds a connection of, so that its queries see consistent data.
+    """
+
+    def __init__(self, hosts, user, passwd, port=3306, dbName="", maxConnections=MAXCONNECTIONS):
+        """C'tor
+
+        :param list hosts: replica hosts, as "host" or "host:port"
+        :param int port: port of the replicas given without one
+        """
+        self.__lock = threading.Lock()
+        self.__replicas = []
+        for host in hosts:
+            host, _, hostPort = host.partition(":")
+            key = (host, user, passwd, int(hostPort) if hostPort else port, dbName)
+            if key not in gConnectionPools:
+                gConnectionPools[key] = ConnectionPool(*key, maxConnections=maxConnections, readOnly=True)
+            # SyncTime: everything written on the master before that time is visible on the replica
+            self.__replicas.append({"Pool": gConnectionPools[key], "SyncTime": 0.0, "CheckTime": 0.0, "RetryTime": 0.0})
+        self.__next = 0
+
+    def __len__(self):
+        return len(self.__replicas)
+
+    def getConnection(self, since, unshared=False):
+        """Get a connection to a replica which has replicated everything written before since
+
+        :param float since: time stamp
+        :param bool unshared: get a connection for the exclusive use of the caller, see ConnectionPool.getUnshared
+
+        :return: S_OK(PooledConnection)/S_ERROR if no replica can be used
+        """
+        with self.__lock:
+            start = self.__next
+            self.__next = (start + 1) % len(self.__replicas)
+        replicas = self.__replicas[start:] + self.__replicas[:start]
+        # The replica already used by the thread comes first
+        replicas.sort(key=lambda replica: not replica["Pool"].isHeld())
+
+        for replica in replicas:
+            now = time.time()
+            if replica["RetryTime"] > now:
+                continue
+            # Not up to date when it was last checked, and not worth checking again yet
+            if replica["SyncTime"] < since and now - replica["CheckTime"] < LAG_CHECK_INTERVAL:
+                continue
+            pool = replica["Pool"]
+            result = pool.getUnshared(retries=0) if unshared else pool.get(retries=0)
+            if not result["OK"]:
+                self.__disable(replica, result["Message"])
+                continue
+            conn = result["Value"]
+            if now - replica["CheckTime"] >= LAG_CHECK_INTERVAL:
+                self.__checkLag(replica, conn)
+            if replica["RetryTime"] <= now and replica["SyncTime"] >= since:
+                return S_OK(conn)
+            conn.release()
+        return S_ERROR(DErrno.EMYSQL, "No read replica is available and up to date")
+
+    def disable(self, pool, reason):
+        """Stop using the replica of a pool for a while, because it failed"""
+        for replica in self.__replicas:
+            if replica["Pool"] is pool:
+                self.__disable(replica, reason)
+
+    def __disable(self, replica, reason):
+        gLogger.warn("Read replica not used", f"for {REPLICA_RETRY_INTERVAL} s: {replica['Pool'].host}: {reason}")
+        with self.__lock:
+            replica["RetryTime"] = time.time() + REPLICA_RETRY_INTERVAL
+            replica["CheckTime"] = 0.0
+
+    def __checkLag(self, replica, conn):
+        """Update the time up to when the writes on the master are visible on the replica"""
+        checkTime = time.time()
+        rows = ()
+        try:
+            cursor = conn.cursor(MySQLdb.cursors.DictCursor)
+            try:
+                cursor.execute("SHOW REPLICA STATUS")
+            except MySQLdb.MySQLError:
+                # Before MySQL 8.0.22 and MariaDB 10.5.1
+                cursor.execute("SHOW SLAVE STATUS")
+            rows = cursor.fetchall()
+            cursor.close()
+        except Exception as excp:
+            self.__disable(replica, f"cannot get the replication status: {excp}")
+            return
+        lag = rows[0].get("Seconds_Behind_Source", rows[0].get("Seconds_Behind_Master")) if rows else None
+        if lag is None:
+            self.__disable(replica, "the replication is not running")
+            return
+        with self.__lock:
+            replica["CheckTime"] = checkTime
+            # The lag is rounded down to the second
+            replica["SyncTime"] = checkTime - int(lag) - 1
+
+    def getStatus(self):
+        """Get the state of the replicas
+
+        :return: dict { host : { "Available": bool, "Lag": seconds behind the master when last checked } }
+        """
+        now = time.time()
+        with self.__lock:
+            return {
+                replica["Pool"].host: {
+                    "Available": replica["RetryTime"] <= now,
+                    "Lag": max(0.0, replica["CheckTime"] - replica["SyncTime"] - 1) if replica["CheckTime"] else None,
+                }
+                for replica in self.__replicas
+            }
+
+
+def getConnectionPoolsMetrics():
+    """Get the activity of all the connection pools of the process since the previous call,
+    see :py:meth:`ConnectionPool.getMetrics`, as fields of the ServiceMonitoring type
+
+    :return: dict with DBConnections, DBCheckouts, DBWaitTime (in milliseconds), DBReconnects and DBPoolExhausted
+    """
+    metrics = collections.Counter()
+    for pool in list(gConnectionPools.values()):
+        metrics.update(pool.getMetrics())
+    return {
+        "DBConnections": metrics["Connections"],
+        "DBCheckouts": metrics["Checkouts"],
+        "DBWaitTime": int(metrics["WaitTime"] * 1000),
+        "DBReconnects": metrics["Reconnects"],
+        "DBPoolExhausted": metrics["Exhausted"],
+    }
 
 
 class MySQL:
@@ -486,13 +860,27 @@ class MySQL:
 
     __initialized = False
 
-    __connectionPools = {}
-
-    def __init__(self, hostName="localhost", userName="dirac", passwd="dirac", dbName="", port=3306, debug=False):
+    def __init__(
+        self,
+        hostName="localhost",
+        userName="dirac",
+        passwd="dirac",
+        dbName="",
+        port=3306,
+        debug=False,
+        maxConnections=MAXCONNECTIONS,
+        readReplicas=None,
+        maxReplicationLag=MAX_REPLICATION_LAG,
+    ):
         """
         set MySQL connection parameters and try to connect
 
         :param debug: unused
+        :param int maxConnections: maximum number of connections to the DB,
+                                   for the first instance connecting to it in the process
+        :param list readReplicas: hosts of read only replicas of the DB, as "host" or "host:port",
+                                  used by the read sections, see _readFromReplicas
+        :param int maxReplicationLag: maximum replication lag in seconds of the replicas used
         """
         global gInstancesCount
         gInstancesCount += 1
@@ -512,10 +900,19 @@ class MySQL:
         self.__passwd = str(passwd)
         self.__dbName = str(dbName)
         self.__port = port
-        cKey = (self.__hostName, self.__userName, self.__passwd, self.__port)
-        if cKey not in MySQL.__connectionPools:
-            MySQL.__connectionPools[cKey] = ConnectionPool(*cKey)
-        self.__connectionPool = MySQL.__connectionPools[cKey]
+        cKey = (self.__hostName, self.__userName, self.__passwd, self.__port, self.__dbName)
+        if cKey not in gConnectionPools:
+            gConnectionPools[cKey] = ConnectionPool(*cKey, maxConnections=maxConnections)
+        self.__connectionPool = gConnectionPools[cKey]
+
+        self.__readReplicas = None
+        if readReplicas:
+            self.__readReplicas = ReadReplicas(
+                readReplicas, self.__userName, self.__passwd, self.__port, self.__dbName, maxConnections
+            )
+        self.maxReplicationLag = maxReplicationLag
+        # Read section of each thread: the writes it must see, and whether it must use the master
+        self.__readSection = threading.local()
 
         self.__initialized = True
         result = self._connect()
@@ -568,7 +965,8 @@ class MySQL:
             retDict = self._getConnection()
             if not retDict["OK"]:
                 return retDict
-            connection = retDict["Value"]
+            with retDict["Value"] as connection:
+                return self.__escapeString(myString, connection)
 
         if isinstance(myString, bytes):
             myString = myString.decode()
@@ -645,8 +1043,10 @@ class MySQL:
         retDict = self._getConnection()
         if not retDict["OK"]:
             return retDict
-        connection = retDict["Value"]
+        with retDict["Value"] as connection:
+            return self.__escapeValues(inValues, connection)
 
+    def __escapeValues(self, inValues, connection):
         inEscapeValues = []
 
         if not inValues:
@@ -700,6 +1100,7 @@ class MySQL:
         retDict = self._getConnection()
         if not retDict["OK"]:
             return retDict
+        retDict["Value"].release()
         self._connected = True
         return S_OK()
 
@@ -740,16 +1141,83 @@ class MySQL:
             #  self.log.debug('_query: %s ...' % str(res[:10]))
 
             retDict = S_OK(res)
+        except MySQLdb.OperationalError as x:
+            pool = getattr(connection, "pool", None)
+            errorCode = x.args[0] if x.args else None
+            # Only the connection errors are worth retrying on the master, not e.g. a lock wait timeout
+            if conn or not getattr(pool, "readOnly", False) or errorCode not in CONNECTION_ERRORS:
+                retDict = self._except("_query", x, "Execution failed.", cmd, debug)
+            else:
+                # The read replica failed: stop using it, and send the queries of the section to the master
+                self.__readReplicas.disable(pool, repr(x))
+                self.__readSection.master = True
+                retDict = None
         except Exception as x:
             # self.log.debug('_query: %s' % self._safeCmd(cmd))
             retDict = self._except("_query", x, "Execution failed.", cmd, debug)
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+            self.__releaseConnection(connection, conn)
+
+        if retDict is None:
+            return self._query(cmd, debug=debug)
+        return retDict
+
+    def _iterQuery(self, cmd, batchSize=STREAM_BATCH_SIZE, *, debug=True):
+        """execute MySQL query command with an unbuffered server side cursor
 
+        The rows are read batchSize at a time, instead of being all loaded in memory,
+        on a connection of the pool that no other query uses until the generator is exhausted or closed.
+        Closing the generator before the end closes the connection, rather than reading the rows left.
+
+        :param int batchSize: maximum number of rows in each result
+        :param debug:  print or not the errors
+
+        return generator of S_OK structures with a tuple of rows,
+        the last one is S_ERROR upon error
+        """
+        self.log.debug(f"_iterQuery: {self._safeCmd(cmd)}")
+        yield from self.__iterRows("_iterQuery", cmd, batchSize, debug)
+
+    def __iterRows(self, methodName, cmd, batchSize, debug=True):
+        """Execute cmd with an SSCursor on an unshared connection, and yield its rows by batches"""
+        if not self.__initialized:
+            error = "DB not properly initialized"
+            gLogger.error(error)
+            yield S_ERROR(DErrno.EMYSQL, error)
+            return
+
+        retDict = self.__getReplicaConnection(unshared=True)
+        if not retDict["OK"]:
+            retDict = self.__connectionPool.getUnshared(MAXCONNECTRETRY)
+        if not retDict["OK"]:
+            yield retDict
+            return
+        connection = retDict["Value"]
+
+        allRead = False
         try:
+            cursor = connection.cursor(MySQLdb.cursors.SSCursor)
+            cursor.execute(cmd)
+            while True:
+                rows = cursor.fetchmany(batchSize)
+                if not rows:
+                    break
+                yield S_OK(tuple(rows))
             cursor.close()
-        except Exception:
-            pass
-
-        return retDict
+            allRead = True
+        except Exception as x:
+            yield self._except(methodName, x, "Execution failed.", cmd, debug)
+        finally:
+            if allRead:
+                connection.release()
+            else:
+                # The generator was closed or failed before the end: the connection could only be reused
+                # after reading all the rows left, closing it is faster
+                connection.discard()
 
     @captureOptimizerTraces
     def _update(self, cmd, *, conn=None, debug=True):
@@ -762,13 +1230,10 @@ class MySQL:
         """
 
         self.log.debug(f"_update: {self._safeCmd(cmd)}")
-        if conn:
-            connection = conn
-        else:
-            retDict = self._getConnection()
-            if not retDict["OK"]:
-                return retDict
-            connection = retDict["Value"]
+        retDict = self.__getWriteConnection(conn)
+        if not retDict["OK"]:
+            return retDict
+        connection = retDict["Value"]
 
         try:
             cursor = connection.cursor()
@@ -778,11 +1243,12 @@ class MySQL:
                 retDict["lastRowId"] = cursor.lastrowid
         except Exception as x:
             retDict = self._except("_update", x, "Execution failed.", cmd, debug)
-
-        try:
-            cursor.close()
-        except Exception:
-            pass
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+            self.__releaseConnection(connection, conn)
 
         return retDict
 
@@ -799,12 +1265,10 @@ class MySQL:
             return S_ERROR(DErrno.EMYSQL, f"_transaction: wrong type ({type(cmdList)}) for cmdList")
 
         # # get connection
-        connection = conn
-        if not connection:
-            retDict = self._getConnection()
-            if not retDict["OK"]:
-                return retDict
-            connection = retDict["Value"]
+        retDict = self.__getWriteConnection(conn)
+        if not retDict["OK"]:
+            return retDict
+        connection = retDict["Value"]
 
         # # list with cmds and their results
         cmdRet = []
@@ -813,13 +1277,16 @@ class MySQL:
             for cmd in cmdList:
                 cmdRet.append((cmd, cursor.execute(cmd)))
             connection.commit()
+            # # close cursor
+            cursor.close()
         except Exception as error:
             self.logger.exception(error)
-            # # rollback, put back connection to the pool
+            # # rollback
             connection.rollback()
             return S_ERROR(DErrno.EMYSQL, error)
-        # # close cursor, put back connection to the pool
-        cursor.close()
+        finally:
+            # # put back connection to the pool
+            self.__releaseConnection(connection, conn)
         return S_OK(cmdRet)
 
     def _createViews(self, viewsDict, force=False):
@@ -1032,11 +1499,12 @@ class MySQL:
         return str(param[0])
 
     def _getConnection(self, retries=MAXCONNECTRETRY):
-        """Return  a new connection to the DB,
+        """Return a connection to the DB, checked out of the pool
 
-        Try the Queue, if it is empty add a newConnection to the Queue and retry
+        Take an idle connection from the pool, or open a new one if the pool is not full,
         it will retry MAXCONNECTRETRY to open a new connection and will return
-        an error if it fails.
+        an error if it fails. The connection goes back to the pool when its release() method is called,
+        or at the end of the "with" block using it.
 
         :param int retries: Number of time it will retry to open a connection
         """
@@ -1047,8 +1515,92 @@ class MySQL:
             gLogger.error(error)
             return S_ERROR(DErrno.EMYSQL, error)
 
+        result = self.__getReplicaConnection()
+        if result["OK"]:
+            return result
         return self.__connectionPool.get(self.__dbName, retries)
 
+    @staticmethod
+    def __releaseConnection(connection, conn):
+        """Give back to the pool a connection checked out by a method, unless it is the one given by the caller"""
+        if connection is not conn:
+            connection.release()
+
+    def __getWriteConnection(self, conn=None):
+        """Get the connection to use for a write: the one given, unless it is to a read replica,
+        or a connection to the master. The next queries of the read section go to the master."""
+        if getattr(self.__readSection, "since", None) is not None:
+            self.__readSection.master = True
+        if conn and not getattr(getattr(conn, "pool", None), "readOnly", False):
+            return S_OK(conn)
+        if not self.__initialized:
+            error = "DB not properly initialized"
+            gLogger.error(error)
+            return S_ERROR(DErrno.EMYSQL, error)
+        return self.__connectionPool.get(self.__dbName, MAXCONNECTRETRY)
+
+    def __getReplicaConnection(self, unshared=False):
+        """Get a connection to a read replica, if the thread is in a read section
+        and a replica can serve it, see _readFromReplicas
+
+        :return: S_OK(PooledConnection)/S_ERROR if the master must be used
+        """
+        section = self.__readSection
+        since = getattr(section, "since", None)
+        if not self.__readReplicas or since is None or section.master:
+            return S_ERROR(DErrno.EMYSQL, "Not a read section")
+        # The thread is in a transaction or already uses the master in another method
+        if self.__connectionPool.isHeld():
+            return S_ERROR(DErrno.EMYSQL, "The master is in use")
+        since = max(since, time.time() - self.maxReplicationLag)
+        if since > time.time():
+            return S_ERROR(DErrno.EMYSQL, "Too recent writes to read")
+        return self.__readReplicas.getConnection(since, unshared=unshared)
+
+    @contextlib.contextmanager
+    def _readFromReplicas(self, since=0):
+        """Context manager sending the queries of the thread to a read replica of the DB
+        if one is available and up to date, see the module documentation
+
+        :param float since: time stamp of the last write the queries must see
+        """
+        if not self.__readReplicas:
+            yield
+            return
+        section = self.__readSection
+        outerSince = getattr(section, "since", None)
+        outerMaster = getattr(section, "master", False)
+        section.since = since if outerSince is None else max(since, outerSince)
+        section.master = outerMaster
+        try:
+            yield
+        finally:
+            # The queries of the outer section following a write go to the master as well
+            section.master = outerMaster or section.master
+            section.since = outerSince
+            if outerSince is None:
+                section.master = False
+
+    @contextlib.contextmanager
+    def _readFromMaster(self):
+        """Context manager sending the queries of the thread to the master, also inside a read section,
+        so that what they read is not older than the last writes, see the module documentation
+        """
+        # No replica has replicated the writes to come
+        with self._readFromReplicas(since=float("inf")):
+            yield
+
+    def hasReadReplicas(self):
+        """Tell whether the DB has read replicas"""
+        return self.__readReplicas is not None
+
+    def getReadReplicasStatus(self):
+        """Get the state of the read replicas of the DB
+
+        :return: S_OK(dict), see ReadReplicas.getStatus
+        """
+        return S_OK(self.__readReplicas.getStatus() if self.__readReplicas else {})
+
     ########################################################################################
     #
     #  Transaction functions
@@ -1603,17 +2155,27 @@ class MySQL:
         return self._update(f"INSERT INTO {table} {inFieldString} VALUES {inValueString}", conn=conn)
 
     @captureOptimizerTraces
-    def executeStoredProcedure(self, packageName, parameters, outputIds, *, conn=None):
-        if conn:
-            connection = conn
+    def executeStoredProcedure(self, packageName, parameters, outputIds, *, conn=None, write=False):
+        """Call a stored procedure and get the values of its output parameters
+
+        :param str packageName: name of the procedure
+        :param parameters: values of its parameters, including the placeholders of the output parameters
+        :param list outputIds: indices of the output parameters
+        :param bool write: the procedure writes, it must be executed on the master
+
+        :return: S_OK(list of the output values)/S_ERROR
+        """
+        if write:
+            conDict = self.__getWriteConnection(conn)
+        elif conn:
+            conDict = S_OK(conn)
         else:
             conDict = self._getConnection()
-            if not conDict["OK"]:
-                return conDict
-
-            connection = conDict["Value"]
-        cursor = connection.cursor()
+        if not conDict["OK"]:
+            return conDict
+        connection = conDict["Value"]
         try:
+            cursor = connection.cursor()
             cursor.callproc(packageName, parameters)
             row = []
             for oId in outputIds:
@@ -1624,11 +2186,12 @@ class MySQL:
         except Exception as x:
             retDict = self._except("_query", x, "Execution failed.", packageName)
             connection.rollback()
-
-        try:
-            cursor.close()
-        except Exception:
-            pass
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+            self.__releaseConnection(connection, conn)
         return retDict
 
     # For the procedures that execute a select without storing the result
@@ -1643,8 +2206,8 @@ class MySQL:
 
             connection = conDict["Value"]
 
-        cursor = connection.cursor()
         try:
+            cursor = connection.cursor()
             #       execStr = "call %s(%s);" % ( packageName, ",".join( map( str, parameters ) ) )
             execStr = "call {}({});".format(
                 packageName,
@@ -1656,9 +2219,23 @@ class MySQL:
         except Exception as x:
             retDict = self._except("_query", x, "Execution failed.", packageName)
             connection.rollback()
-        try:
-            cursor.close()
-        except Exception:
-            pass
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+            self.__releaseConnection(connection, conn)
 
         return retDict
+
+    def iterStoredProcedure(self, packageName, parameters, batchSize=STREAM_BATCH_SIZE):
+        """Same as executeStoredProcedureWithCursor, but with an unbuffered server side cursor,
+        see :py:meth:`_iterQuery`
+
+        :return: generator of S_OK(tuple of at most batchSize rows), the last one is S_ERROR upon error
+        """
+        execStr = "call {}({});".format(
+            packageName,
+            ",".join(['"%s"' % param if isinstance(param, str) else str(param) for param in parameters]),
+        )
+        yield from self.__iterRows("iterStoredProcedure", execStr, batchSize)
@@ -11,6 +11,7 @@ import datetime
 import sys
 
 from DIRAC.Core.Utilities.DEncode import encode as disetEncode, decode as disetDecode, g_dEncodeFunctions
+from DIRAC.Core.Utilities.DEncode import legacyEncode, legacyDecode, fastEncode, fastDecode
 from DIRAC.Core.Utilities.JEncode import encode as jsonEncode, decode as jsonDecode, JSerializable
 from DIRAC.Core.Utilities.MixedEncode import encode as mixEncode, decode as mixDecode
 
@@ -45,20 +46,29 @@ else:
 # function, and add the tuple here
 
 disetTuple = (disetEncode, disetDecode)
+legacyDisetTuple = (legacyEncode, legacyDecode)
 jsonTuple = (jsonEncode, jsonDecode)
 mixTuple = (mixEncode, mixDecode)
 
-enc_dec_imp = (disetTuple, jsonTuple, (mixTuple, "No", "No"), (mixTuple, "Yes", "No"), (mixTuple, "Yes", "Yes"))
+enc_dec_imp = (
+    disetTuple,
+    legacyDisetTuple,
+    jsonTuple,
+    (mixTuple, "No", "No"),
+    (mixTuple, "Yes", "No"),
+    (mixTuple, "Yes", "Yes"),
+)
 enc_dec_ids = (
     "disetTuple",
+    "legacyDisetTuple",
     "jsonTuple",
     "mixTuple",
     "mixTuple (DIRAC_USE_JSON_DECODE=Yes)",
     "mixTuple (DIRAC_USE_JSON_ENCODE=Yes)",
 )
 
-enc_dec_imp_without_json = (disetTuple, (mixTuple, "No", "No"), (mixTuple, "Yes", "No"))
-enc_dec_ids_without_json = ("disetTuple", "mixTuple", "mixTuple (DIRAC_USE_JSON_DECODE=Yes)")
+enc_dec_imp_without_json = (disetTuple, legacyDisetTuple, (mixTuple, "No", "No"), (mixTuple, "Yes", "No"))
+enc_dec_ids_without_json = ("disetTuple", "legacyDisetTuple", "mixTuple", "mixTuple (DIRAC_USE_JSON_DECODE=Yes)")
 
 
 def myDates():
@@ -270,6 +280,36 @@ def test_nestedStructure(enc_dec_without_json, data):
     agnosticTestFunction(enc_dec_without_json, data)
 
 
+@mark.slow
+@settings(suppress_health_check=function_scoped)
+@given(data=nestedStrategy | floats() | binary())
+def test_fastAndLegacyDEncodeAreIdentical(data):
+    """Test that the fast DEncode engine produces exactly the bytes of the legacy one,
+    and that both decode them to the same object
+    """
+    encodedData = legacyEncode(data)
+    assert fastEncode(data) == encodedData
+    # repr to compare nan
+    assert repr(fastDecode(encodedData)) == repr(legacyDecode(encodedData))
+
+
+@parametrize(
+    "data",
+    [
+        datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc),
+        datetime.time(10, 0, tzinfo=datetime.timezone.utc),
+        {"a": set()},
+        [1, 2, {3: object()}],
+    ],
+)
+def test_fastDEncodeUnsupportedTypes(data):
+    """Test that the fast DEncode engine refuses what the legacy one refuses"""
+    with raises(KeyError):
+        legacyEncode(data)
+    with raises(KeyError):
+        fastEncode(data)
+
+
 # DEncode raises KeyError.....
 # Others raise TypeError
 # @parametrize('enc_dec', enc_dec_imp)
@@ -1,7 +1,10 @@
 """ py.test test of ExecutorDispatcher
 """
 # pylint: disable=protected-access
+from DIRAC import S_ERROR, S_OK
 from DIRAC.Core.Utilities.ExecutorDispatcher import (
+    ExecutorDispatcher,
+    ExecutorDispatcherCallbacks,
     ExecutorState,
     ExecutorQueues,
 )
@@ -94,3 +97,67 @@ def test_execQueues():
     assert res_internals["taskInQueue"] == {}
 
     assert not eQ.deleteTask("t00")
+
+
+def test_batchQueues():
+    """test of the queues and states of executors processing batches of tasks"""
+    queues = ExecutorQueues()
+    for i in range(5):
+        queues.pushTask("type0", f"t{i}")
+    queues.pushTask("type1", "t5")
+    assert queues.popTasks(["type2", "type0"], 3) == (["t0", "t1", "t2"], "type0")
+    assert queues.popTasks("type0", 3) == (["t3", "t4"], "type0")
+    assert queues.popTasks(["type0", "type1"], 3) == (["t5"], "type1")
+    assert queues.popTasks(["type0", "type1"], 3) is None
+    assert queues._internals()["taskInQueue"] == {}
+
+    state = ExecutorState()
+    state.addExecutor(1, "type0", maxTasks=1, batchSize=10)
+    assert state.batchSize(1) == 10
+    assert state.freeSlots(1) == 10
+    assert state.batchSize(2) == 1
+
+
+class BatchCallbacks(ExecutorDispatcherCallbacks):
+    """Tasks going through the executors of type A then B, the task 3 fails being processed"""
+
+    def __init__(self):
+        self.sent = []
+        self.processed = []
+
+    def cbDispatch(self, taskId, taskObj, pathExecuted):
+        return S_OK(["A", "B", None][len(pathExecuted)])
+
+    def cbSendTasks(self, taskObjs, eId, eType):
+        self.sent.append((eType, list(taskObjs)))
+        return S_OK()
+
+    def cbTaskProcessed(self, taskId, taskObj, eType):
+        self.processed.append((eType, taskId, taskObj))
+        return S_OK() if taskId != 3 else S_ERROR("Failed")
+
+
+def test_batchDispatch():
+    """test of the dispatch of batches of tasks"""
+    dispatcher = ExecutorDispatcher()
+    callbacks = BatchCallbacks()
+    dispatcher.setCallbacks(callbacks)
+    dispatcher.addExecutor("e1", ["A", "B"], batchSize=4)
+
+    # The executor receives a full batch
+    result = dispatcher.addTasks({taskId: f"obj{taskId}" for taskId in range(6)})
+    assert result["OK"]
+    assert result["Value"] == {"Successful": list(range(6)), "Failed": {}}
+    assert callbacks.sent == [("A", [0, 1, 2, 3])]
+
+    # The processed tasks go to the next executor together, the failed one is forgotten
+    assert dispatcher.tasksProcessed("e1", {0: "new0", 1: False, 2: "new2", 3: "new3"})["OK"]
+    assert callbacks.processed == [("A", 0, "new0"), ("A", 1, "obj1"), ("A", 2, "new2"), ("A", 3, "new3")]
+    assert callbacks.sent[1] == ("B", [0, 1, 2])
+    assert 3 not in dispatcher.getTaskIds()
+    assert dispatcher.getTask(0) == "new0"
+
+    # The tasks done with the last executor are removed
+    assert dispatcher.tasksProcessed("e1", {0: False, 1: False, 2: False})["OK"]
+    assert 0 not in dispatcher.getTaskIds()
+    assert dispatcher._internals()["queues"]["queues"]["A"] == []
@@ -8,8 +8,8 @@ from unittest.mock import patch
 import pytest
 
 from DIRAC import S_OK
-from DIRAC.Core.Utilities.ClassAd.ClassAdLight import ClassAd
-from DIRAC.Core.Utilities.JDL import jdlToBaseJobDescriptionModel
+from DIRAC.Core.Utilities.ClassAd.ClassAdLight import MAX_CACHED_JDL_LENGTH, ClassAd, JDLAttribute, parseJDL
+from DIRAC.Core.Utilities.JDL import jdlToBaseJobDescriptionModel, loadJDLAsCFG
 from DIRAC.Interfaces.API.Job import Job
 from DIRAC.WorkloadManagementSystem.Utilities.JobModel import JobDescriptionModel
 
@@ -100,3 +100,95 @@ def test_jdlToBaseJobDescriptionModel_invalid(jdl, jdl_monkey_business):
 
     # Assert
     assert not res["OK"], res["Value"]
+
+
+def test_parseJDL():
+    jdl = """[
+        Executable = "my.sh";
+        Arguments = "a;b [c]";
+        InputData = {"/vo/data/1",
+                     "/vo/data/2"};
+        Requirements = other.Site == "Site1";
+        JobRequirements = [ OwnerGroup = "vo_user"; Nested = [ A = 1 ]; ];
+        Last = 3
+    ]"""
+    attributes = parseJDL(jdl)
+    assert [attribute.name for attribute in attributes] == [
+        "Executable",
+        "Arguments",
+        "InputData",
+        "Requirements",
+        "JobRequirements",
+        "Last",
+    ]
+    assert attributes[1] == JDLAttribute("Arguments", '"a;b [c]"')
+    assert attributes[3].value == 'other.Site == "Site1"'
+    assert attributes[4].value == '[ OwnerGroup = "vo_user"; Nested = [ A = 1 ]; ]'
+    assert attributes[4].attributes == (
+        JDLAttribute("OwnerGroup", '"vo_user"'),
+        JDLAttribute("Nested", "[ A = 1 ]", (JDLAttribute("A", "1"),)),
+    )
+    # Parsed once
+    assert parseJDL(jdl) is attributes
+
+    classAd = ClassAd(jdl)
+    assert classAd.getAttributeString("Arguments") == "a;b [c]"
+    assert classAd.getListFromExpression("InputData") == ["/vo/data/1", "/vo/data/2"]
+    assert classAd.getAttributeInt("Last") == 3
+    # The ClassAd can be modified without modifying the cached result
+    classAd.insertAttributeInt("Last", 4)
+    assert ClassAd(jdl).getAttributeInt("Last") == 3
+
+    result = loadJDLAsCFG(jdl)
+    assert result["OK"], result["Message"]
+    cfg = result["Value"][0]
+    assert cfg["Arguments"] == "a;b [c]"
+    assert cfg["InputData"] == "/vo/data/1, /vo/data/2"
+    assert cfg["JobRequirements"]["Nested"]["A"] == "1"
+
+
+def test_parseJDL_long():
+    """The long JDLs are parsed every time, rather than kept in the cache"""
+    lfns = ", ".join(f'"/vo/data/{i:06}"' for i in range(MAX_CACHED_JDL_LENGTH // 10))
+    jdl = f'[ Executable = "my.sh"; InputData = {{ {lfns} }}; ]'
+    assert len(jdl) > MAX_CACHED_JDL_LENGTH
+    attributes = parseJDL(jdl)
+    assert attributes[1].value == f"{{ {lfns} }}"
+    assert parseJDL(jdl) == attributes
+    assert parseJDL(jdl) is not attributes
+
+
+@pytest.mark.parametrize(
+    "jdl",
+    [
+        """Executable = "my.sh";""",  # Missing brackets
+        """[Executable = "my.sh";""",  # Not closed
+        """[Executable = "my.sh;]""",  # String literal not closed
+        """[Executable = ;]""",  # No value
+        """[Executable = "my.sh"; Junk]""",  # No value
+        """[ = "my.sh";]""",  # No name
+        """[Sub = value [ A = 1 ];]""",  # Value and sub JDL
+        """[Sub = [ A = 1 ;]""",  # Sub JDL not closed
+    ],
+)
+def test_parseJDL_invalid(jdl):
+    with pytest.raises(ValueError):
+        parseJDL(jdl)
+    assert not ClassAd(jdl).isOK()
+
+
+@pytest.mark.parametrize(
+    "expression, expected",
+    [
+        ('"a"', ["a"]),
+        ('"a,b"', ["a", "b"]),
+        ('""', []),
+        ('{"a", "b" ,"c"}', ["a", "b", "c"]),
+        ("{1, 2, 3}", ["1", "2", "3"]),
+        ('{"a", b, "c"}', ["a", "b", "c"]),
+        ('{{"a", "b"}, {"c"}}', ['{"a","b"}', '{"c"}']),
+    ],
+)
+def test_getListFromExpression(expression, expected):
+    classAd = ClassAd(f"[ Value = {expression}; ]")
+    assert classAd.getListFromExpression("Value") == expected
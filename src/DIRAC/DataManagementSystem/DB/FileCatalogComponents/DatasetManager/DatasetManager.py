@@ -1,10 +1,25 @@
 """ DIRAC FileCatalog plug-in class to manage dynamic datasets defined by a metadata query
+
+    The FileIDs of the frozen datasets are kept as compressed arrays in FC_MetaDatasetSnapshots,
+    so that their size, the membership of files and the combination of datasets are computed
+    without going through the file tables, which are only used to resolve the LFNs.
+    The array of a dataset is split in chunks of SNAPSHOT_CHUNK_SIZE FileIDs, one per row,
+    so that the statements and the rows stay below the max_allowed_packet of the server.
 """
 import hashlib
+import itertools
 import os
 
 from DIRAC import S_OK, S_ERROR, gLogger
 from DIRAC.Core.Utilities.List import stringListToString
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DatasetManager.FileIDArray import (
+    decodeFileIDs,
+    encodeFileIDs,
+)
+
+DATASET_OPERATIONS = ("union", "intersection", "difference")
+# Number of FileIDs per row of FC_MetaDatasetSnapshots: about 400 kB at most, even if they do not compress
+SNAPSHOT_CHUNK_SIZE = 100000
 
 
 class DatasetManager:
@@ -35,6 +50,11 @@ class DatasetManager:
         },
         "UniqueIndexes": {"DatasetID_FileID": ["DatasetID", "FileID"]},
     }
+    # Replaces FC_MetaDatasetFiles, which is only read for the datasets frozen before
+    _tables["FC_MetaDatasetSnapshots"] = {
+        "Fields": {"DatasetID": "INT NOT NULL", "Chunk": "INT NOT NULL DEFAULT 0", "FileIDs": "LONGBLOB NOT NULL"},
+        "PrimaryKey": ["DatasetID", "Chunk"],
+    }
     _tables["FC_DatasetAnnotations"] = {
         "Fields": {"DatasetID": "INT NOT NULL", "Annotation": "VARCHAR(512)"},
         "PrimaryKey": "DatasetID",
@@ -371,7 +391,7 @@ class DatasetManager:
             return S_OK(f"Dataset {datasetName} does not exist")
         datasetID = result["Value"][0][0]
 
-        for table in ["FC_MetaDatasetFiles", "FC_MetaDatasets", "FC_DatasetAnnotations"]:
+        for table in ["FC_MetaDatasetFiles", "FC_MetaDatasetSnapshots", "FC_MetaDatasets", "FC_DatasetAnnotations"]:
             req = f"DELETE FROM {table} WHERE DatasetID={datasetID}"
             result = self.db._update(req)
 
@@ -717,36 +737,78 @@ class DatasetManager:
         finalResult["FileIDList"] = result["Value"]["LFNIDList"]
         return finalResult
 
-    def __getFrozenDatasetFiles(self, datasetID, credDict):
-        """Get dataset lfns from a frozen snapshot"""
+    def __getFrozenDatasetFileIDs(self, datasetID):
+        """Get the sorted FileIDs of a frozen dataset from its snapshot"""
+        req = "SELECT FileIDs FROM FC_MetaDatasetSnapshots WHERE DatasetID=%d ORDER BY Chunk" % datasetID
+        result = self.db._query(req)
+        if not result["OK"]:
+            return result
+        if result["Value"]:
+            return S_OK(list(itertools.chain.from_iterable(decodeFileIDs(row[0]) for row in result["Value"])))
 
-        req = "SELECT FileID FROM FC_MetaDatasetFiles WHERE DatasetID=%d" % datasetID
+        # Dataset frozen before the snapshots
+        req = "SELECT FileID FROM FC_MetaDatasetFiles WHERE DatasetID=%d ORDER BY FileID" % datasetID
         result = self.db._query(req)
         if not result["OK"]:
             return result
+        return S_OK([row[0] for row in result["Value"]])
+
+    def __getFrozenDatasetFiles(self, datasetID, credDict, offset=0, limit=0):
+        """Get dataset lfns from a frozen snapshot, in the order of their FileIDs"""
+        result = self.__getFrozenDatasetFileIDs(datasetID)
+        if not result["OK"]:
+            return result
+        return self.__getFileLFNsPage(result["Value"], offset, limit)
+
+    def __getFileLFNsPage(self, fileIDList, offset=0, limit=0):
+        """Resolve the LFNs of a page of a sorted list of FileIDs
+
+        :param list fileIDList: sorted FileIDs
+        :param int offset: index of the first file of the page
+        :param int limit: maximum number of files of the page, 0 for all the files after offset
 
-        fileIDList = [row[0] for row in result["Value"]]
+        :return: S_OK(list of LFNs) with the FileIDList of the page and the NumberOfFiles of the whole list
+        """
+        numberOfFiles = len(fileIDList)
+        fileIDList = fileIDList[offset : offset + limit] if limit else fileIDList[offset:]
         result = self.db.fileManager._getFileLFNs(fileIDList)
         if not result["OK"]:
             return result
 
         lfnDict = result["Value"]["Successful"]
-        fileIDList = list(lfnDict)
+        fileIDList = [fileID for fileID in fileIDList if fileID in lfnDict]
         result = S_OK([lfnDict[i] for i in fileIDList])
         result["FileIDList"] = fileIDList
+        result["NumberOfFiles"] = numberOfFiles
         return result
 
-    def getDatasetFiles(self, datasets, credDict):
+    def __getDatasetFileIDs(self, datasetName, credDict):
+        """Get the sorted FileIDs of a dataset, without the file tables if it is frozen"""
+        result = self.__getDatasetParameters(datasetName, credDict)
+        if not result["OK"]:
+            return result
+        status = result["Value"]["Status"]
+        datasetID = result["Value"]["DatasetID"]
+        if status in ["Frozen", "Static"]:
+            return self.__getFrozenDatasetFileIDs(datasetID)
+        result = self.__getDynamicDatasetFiles(datasetID, credDict)
+        if not result["OK"]:
+            return result
+        return S_OK(sorted(result["FileIDList"]))
+
+    def getDatasetFiles(self, datasets, credDict, offset=0, limit=0):
         """Get dataset file contents
 
         :param dict datasets: dictionary describing dataset definitions
         :param credDict:  dictionary of the caller credentials
+        :param int offset: if paging, index of the first file to return, the files being sorted by FileID
+        :param int limit: if not 0, return a page of at most limit files
         :return: S_OK/S_ERROR bulk return structure
         """
         failed = dict()
         successful = dict()
         for datasetName in datasets:
-            result = self.__getDatasetFiles(datasetName, credDict)
+            result = self.__getDatasetFiles(datasetName, credDict, offset, limit)
             if result["OK"]:
                 successful[datasetName] = result["Value"]
             else:
@@ -754,17 +816,73 @@ class DatasetManager:
 
         return S_OK({"Successful": successful, "Failed": failed})
 
-    def __getDatasetFiles(self, datasetName, credDict):
+    def __getDatasetFiles(self, datasetName, credDict, offset=0, limit=0):
         """Get dataset files"""
+        paging = offset or limit
         result = self.__getDatasetParameters(datasetName, credDict)
         if not result["OK"]:
             return result
         status = result["Value"]["Status"]
         datasetID = result["Value"]["DatasetID"]
         if status in ["Frozen", "Static"]:
-            return self.__getFrozenDatasetFiles(datasetID, credDict)
-        else:
-            return self.__getDynamicDatasetFiles(datasetID, credDict)
+            return self.__getFrozenDatasetFiles(datasetID, credDict, offset, limit)
+        result = self.__getDynamicDatasetFiles(datasetID, credDict)
+        if not result["OK"] or not paging:
+            return result
+        return self.__getFileLFNsPage(sorted(result["FileIDList"]), offset, limit)
+
+    def getDatasetFileMembership(self, datasetName, lfns, credDict):
+        """Check which files belong to a dataset
+
+        :param str datasetName: dataset name
+        :param list lfns: LFNs to check
+        :param credDict:  dictionary of the caller credentials
+        :return: S_OK with Successful dict {lfn: True/False}, and Failed for the files which do not exist
+        """
+        result = self.__getDatasetFileIDs(datasetName, credDict)
+        if not result["OK"]:
+            return result
+        datasetFileIDs = set(result["Value"])
+
+        result = self.db.fileManager._findFileIDs(list(lfns))
+        if not result["OK"]:
+            return result
+        successful = {lfn: fileID in datasetFileIDs for lfn, fileID in result["Value"]["Successful"].items()}
+        return S_OK({"Successful": successful, "Failed": result["Value"]["Failed"]})
+
+    def combineDatasets(self, datasetNames, operation, credDict, offset=0, limit=0):
+        """Get the files of the union, intersection or difference of datasets
+
+        :param list datasetNames: dataset names, the difference being the files of the first one not in the others
+        :param str operation: one of DATASET_OPERATIONS
+        :param credDict:  dictionary of the caller credentials
+        :param int offset: index of the first file to return, the files being sorted by FileID
+        :param int limit: if not 0, return a page of at most limit files
+        :return: S_OK with a dict with the LFNs and the NumberOfFiles of the whole combination
+        """
+        if operation not in DATASET_OPERATIONS:
+            return S_ERROR(f"Unknown dataset operation {operation}, should be one of {', '.join(DATASET_OPERATIONS)}")
+        if not datasetNames:
+            return S_ERROR("No dataset given")
+
+        fileIDs = None
+        for datasetName in datasetNames:
+            result = self.__getDatasetFileIDs(datasetName, credDict)
+            if not result["OK"]:
+                return S_ERROR(f"{datasetName}: {result['Message']}")
+            if fileIDs is None:
+                fileIDs = set(result["Value"])
+            elif operation == "union":
+                fileIDs.update(result["Value"])
+            elif operation == "intersection":
+                fileIDs.intersection_update(result["Value"])
+            else:
+                fileIDs.difference_update(result["Value"])
+
+        result = self.__getFileLFNsPage(sorted(fileIDs), offset, limit)
+        if not result["OK"]:
+            return result
+        return S_OK({"LFNs": result["Value"], "NumberOfFiles": result["NumberOfFiles"]})
 
     def freezeDataset(self, datasets, credDict):
         """Freeze the contents of datasets
@@ -801,19 +919,31 @@ class DatasetManager:
 
         if not result["OK"]:
             return result
-        fileIDList = result["FileIDList"]
-        valueList = []
-        for fileID in fileIDList:
-            valueList.append("(%d,%d)" % (datasetID, fileID))
-        valueString = ",".join(valueList)
-        req = f"INSERT INTO FC_MetaDatasetFiles (DatasetID,FileID) VALUES {valueString}"
-        result = self.db._update(req)
+        fileIDList = sorted(set(result["FileIDList"]))
+        result = self.__removeSnapshot(datasetID)
         if not result["OK"]:
             return result
+        # An empty dataset has an empty chunk
+        for chunk, start in enumerate(range(0, max(len(fileIDList), 1), SNAPSHOT_CHUNK_SIZE)):
+            fileIDBlob = encodeFileIDs(fileIDList[start : start + SNAPSHOT_CHUNK_SIZE])
+            req = "INSERT INTO FC_MetaDatasetSnapshots (DatasetID,Chunk,FileIDs) VALUES (%d,%d,X'%s')" % (
+                datasetID,
+                chunk,
+                fileIDBlob.hex(),
+            )
+            result = self.db._update(req)
+            if not result["OK"]:
+                # The dataset stays dynamic, without a partial snapshot
+                self.__removeSnapshot(datasetID)
+                return result
 
         result = self.setDatasetStatus(datasetName, "Frozen")
         return result
 
+    def __removeSnapshot(self, datasetID):
+        """Remove the chunks of the snapshot of a dataset"""
+        return self.db._update("DELETE FROM FC_MetaDatasetSnapshots WHERE DatasetID=%d" % datasetID)
+
     def releaseDataset(self, datasets, credDict):
         """Unfreeze datasets
 
@@ -842,8 +972,9 @@ class DatasetManager:
             return S_OK()
 
         datasetID = result["Value"]["DatasetID"]
-        req = "DELETE FROM FC_MetaDatasetFiles WHERE DatasetID=%d" % datasetID
-        result = self.db._update(req)
+        for table in ["FC_MetaDatasetFiles", "FC_MetaDatasetSnapshots"]:
+            req = f"DELETE FROM {table} WHERE DatasetID={datasetID}"
+            result = self.db._update(req)
 
         result = self.setDatasetStatus(datasetName, "Dynamic")
         return result
@@ -0,0 +1,47 @@
+""" Compact storage of the FileIDs of the frozen datasets
+
+    The FileIDs of a dataset snapshot are sorted, replaced by the differences between consecutive
+    IDs, which are small numbers for files registered together, and the array of these 32 bits
+    deltas is compressed with zlib. Encoding and decoding are done by the array, itertools and
+    zlib modules, without looping over the files in python.
+"""
+import itertools
+import sys
+import zlib
+from array import array
+
+
+def _newArray(values=()):
+    """Array of 32 bits unsigned integers"""
+    for typeCode in ("I", "L"):
+        if array(typeCode).itemsize == 4:
+            return array(typeCode, values)
+    raise TypeError("No array type of 32 bits integers")
+
+
+def encodeFileIDs(fileIDs):
+    """Get the compressed blob of a set of FileIDs
+
+    :param fileIDs: iterable of FileIDs, duplicates are ignored
+
+    :return: bytes
+    """
+    sortedIDs = sorted(set(fileIDs))
+    deltas = _newArray(b - a for a, b in zip(itertools.chain([0], sortedIDs), sortedIDs))
+    if sys.byteorder == "big":
+        deltas.byteswap()
+    return zlib.compress(deltas.tobytes())
+
+
+def decodeFileIDs(blob):
+    """Get the FileIDs stored in a blob made by encodeFileIDs
+
+    :param bytes blob: compressed FileIDs
+
+    :return: sorted list of FileIDs
+    """
+    deltas = _newArray()
+    deltas.frombytes(zlib.decompress(blob))
+    if sys.byteorder == "big":
+        deltas.byteswap()
+    return list(itertools.accumulate(deltas))
@@ -0,0 +1,126 @@
+""" DIRAC FileCatalog cache of the directory IDs and permission parameters
+
+    Resolving the directory of each LFN, and checking the permissions on it and on its parents,
+    are the most frequent queries of the catalog. The DirectoryCache keeps the result of these
+    queries, indexed by the normalized path of the directory, so that they are done only once
+    for the directories used over and over.
+
+    The cache is bounded, the least recently used directories being dropped first, and its
+    entries expire after a lifetime, so that the changes done by other instances of the service
+    are eventually seen. Only existing directories are cached: creating a directory never has
+    to invalidate anything, removing it or changing its owner, group or mode does.
+
+    What is cached is always read from the master database: a read replica might not have
+    replicated a change yet, and would put back in the cache what its invalidation dropped.
+"""
+import os
+import threading
+
+import cachetools
+
+
+class DirectoryCache:
+    """Thread safe LRU cache of directory parameters, indexed by path"""
+
+    def __init__(self, maxSize=10000, lifetime=300):
+        """C'tor
+
+        :param int maxSize: maximum number of directories in the cache, 0 to disable it
+        :param int lifetime: number of seconds a directory stays in the cache
+        """
+        self.__cache = cachetools.TTLCache(maxSize, lifetime) if maxSize > 0 else None
+        self.__lock = threading.Lock()
+        # Incremented by each invalidation, to not cache what was read before it
+        self.__generation = 0
+        self.stats = {"Hits": 0, "Misses": 0, "Invalidations": 0}
+
+    @staticmethod
+    def normalizePath(path):
+        """Get the key of a directory in the cache"""
+        return os.path.normpath(path)
+
+    def getGeneration(self):
+        """Get the generation to give to update(), taken before reading the directory parameters"""
+        return self.__generation
+
+    def get(self, path, keys):
+        """Get the parameters of a directory, if all the requested ones are cached
+
+        :param str path: directory path
+        :param tuple keys: parameters needed
+
+        :return: dict or None
+        """
+        if self.__cache is None:
+            return None
+        path = self.normalizePath(path)
+        with self.__lock:
+            entry = self.__cache.get(path)
+            if entry is None or any(key not in entry for key in keys):
+                self.stats["Misses"] += 1
+                return None
+            self.stats["Hits"] += 1
+            return dict(entry)
+
+    def update(self, path, parameters, generation):
+        """Add parameters of an existing directory
+
+        :param str path: directory path
+        :param dict parameters: parameters of the directory
+        :param int generation: generation got before reading the parameters. If the cache was
+                               invalidated in the meantime, they might be outdated and are dropped
+        """
+        if self.__cache is None:
+            return
+        path = self.normalizePath(path)
+        with self.__lock:
+            if generation != self.__generation:
+                return
+            entry = self.__cache.get(path)
+            # A directory recreated with another ID has nothing in common with the cached one
+            if (
+                entry is not None
+                and "DirID" in parameters
+                and entry.get("DirID", parameters["DirID"]) != parameters["DirID"]
+            ):
+                entry = None
+            self.__cache[path] = dict(entry or {}, **parameters)
+
+    def invalidate(self, path, recursive=False):
+        """Drop a directory from the cache
+
+        :param str path: directory path
+        :param bool recursive: drop all its subdirectories as well
+        """
+        if self.__cache is None:
+            return
+        path = self.normalizePath(path)
+        prefix = path.rstrip("/") + "/"
+        with self.__lock:
+            self.__generation += 1
+            self.stats["Invalidations"] += 1
+            self.__cache.pop(path, None)
+            if recursive:
+                for cachedPath in [cachedPath for cachedPath in self.__cache if cachedPath.startswith(prefix)]:
+                    self.__cache.pop(cachedPath, None)
+
+    def clear(self):
+        """Drop all the directories from the cache"""
+        if self.__cache is None:
+            return
+        with self.__lock:
+            self.__generation += 1
+            self.stats["Invalidations"] += 1
+            self.__cache.clear()
+
+    def getStatistics(self):
+        """Get the usage of the cache
+
+        :return: dict with the number of Hits, Misses, Invalidations, Entries and the HitRate in percent
+        """
+        with self.__lock:
+            statistics = dict(self.stats)
+            statistics["Entries"] = len(self.__cache) if self.__cache is not None else 0
+        lookups = statistics["Hits"] + statistics["Misses"]
+        statistics["HitRate"] = round(100.0 * statistics["Hits"] / lookups, 1) if lookups else 0.0
+        return statistics
@@ -10,7 +10,7 @@
 import errno
 import os
 
-from DIRAC import S_OK, S_ERROR
+from DIRAC import S_OK, S_ERROR, gLogger
 from DIRAC.Core.Utilities.List import intListToString, stringListToString
 from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryManager.DirectoryTreeBase import DirectoryTreeBase
 
@@ -37,6 +37,13 @@ class DirectoryClosure(DirectoryTreeBase):
         """
 
         dpath = os.path.normpath(path)
+        cached = self.dirCache.get(dpath, ("DirID", "Level"))
+        if cached:
+            res = S_OK(cached["DirID"])
+            res["Level"] = cached["Level"]
+            return res
+
+        generation = self.dirCache.getGeneration()
         result = self.db.executeStoredProcedure("ps_find_dir", (dpath, "ret1", "ret2"), outputIds=[1, 2])
         if not result["OK"]:
             return result
@@ -46,6 +53,8 @@ class DirectoryClosure(DirectoryTreeBase):
 
         res = S_OK(result["Value"][0])
         res["Level"] = result["Value"][1]
+        if res["Value"]:
+            self.dirCache.update(dpath, {"DirID": res["Value"], "Level": res["Level"]}, generation)
         return res
 
     def findDirs(self, paths, connection=False):
@@ -57,14 +66,25 @@ class DirectoryClosure(DirectoryTreeBase):
         """
 
         dirDict = {}
-        if not paths:
+        toFind = []
+        for path in paths:
+            dpath = os.path.normpath(path)
+            cached = self.dirCache.get(dpath, ("DirID",))
+            if cached:
+                dirDict[dpath] = cached["DirID"]
+            else:
+                toFind.append(dpath)
+        if not toFind:
             return S_OK(dirDict)
-        dpaths = stringListToString([os.path.normpath(path) for path in paths])
-        result = self.db.executeStoredProcedureWithCursor("ps_find_dirs", (dpaths,))
+
+        generation = self.dirCache.getGeneration()
+        with self.db._readFromMaster():
+            result = self.db.executeStoredProcedureWithCursor("ps_find_dirs", (stringListToString(toFind),))
         if not result["OK"]:
             return result
         for dirName, dirID in result["Value"]:
             dirDict[dirName] = dirID
+            self.dirCache.update(dirName, {"DirID": dirID}, generation)
 
         return S_OK(dirDict)
 
@@ -90,7 +110,7 @@ class DirectoryClosure(DirectoryTreeBase):
             return res
 
         dirId = result["Value"]
-        result = self.db.executeStoredProcedure("ps_remove_dir", (dirId,), outputIds=[])
+        result = self.db.executeStoredProcedure("ps_remove_dir", (dirId,), outputIds=[], write=True)
         if not result["OK"]:
             return result
 
@@ -638,6 +658,13 @@ class DirectoryClosure(DirectoryTreeBase):
             lfns, "ps_calculate_dir_physical_size", recursiveSum=recursiveSum, connection=None
         )
 
+    def _rebuildDirectoryUsage(self):
+        """Recompute the usage of each directory and the recursive usage of the directory trees
+        from the file tables. Otherwise, both are maintained by the triggers of the DB"""
+        result = self.db.executeStoredProcedure("ps_rebuild_directory_usage", (), outputIds=[], write=True)
+        gLogger.verbose("Finished rebuilding Directory Usage")
+        return result
+
     def _changeDirectoryParameter(self, paths, directoryFunction, _fileFunction, recursive=False):
         """Bulk setting of the directory parameter with recursion for all the subdirectories and files
 
@@ -652,6 +679,7 @@ class DirectoryClosure(DirectoryTreeBase):
         failed = {}
         for path, attribute in arguments.items():
             result = directoryFunction(path, attribute, recursive=recursive)
+            self.dirCache.invalidate(path, recursive=recursive)
             if not result["OK"]:
                 failed[path] = result["Message"]
             else:
@@ -659,36 +687,43 @@ class DirectoryClosure(DirectoryTreeBase):
 
         return S_OK({"Successful": successful, "Failed": failed})
 
-    def _getDirectoryDump(self, path):
-        """Recursively dump all the content of a directory
+    def _iterDirectoryDump(self, path, chunkSize=None):
+        """Recursively dump all the content of a directory, by chunks
 
         :param str path: directory to dump
+        :param int chunkSize: approximate number of entries per chunk. If not set, everything in one chunk
 
-        :returns: dictionary with `Files` and `SubDirs` as keys
+        :returns: generator of S_OK dictionaries with `Files` and `SubDirs` as keys
                     `Files` is a dict containing files metadata.
                     `SubDirs` is a list of directory
         """
 
         result = self.findDir(path)
         if not result["OK"]:
-            return result
+            yield result
+            return
         dirID = result["Value"]
         if not dirID:
-            return S_ERROR(errno.ENOENT, f"{path} does not exist")
-
-        result = self.db.executeStoredProcedureWithCursor("ps_get_directory_dump", (dirID,))
+            yield S_ERROR(errno.ENOENT, f"{path} does not exist")
+            return
 
-        if not result["OK"]:
-            return result
-
-        rows = result["Value"]
         files = {}
         subDirs = []
 
-        for lfn, size, creationDate in rows:
-            if size is None:
-                subDirs.append(lfn)
-            else:
-                files[lfn] = {"Size": int(size), "CreationDate": creationDate}
+        # The rows are read from the DB by batches, so that they are never all in memory
+        for result in self.db.iterStoredProcedure("ps_get_directory_dump", (dirID,)):
+            if not result["OK"]:
+                yield result
+                return
+
+            for lfn, size, creationDate in result["Value"]:
+                if size is None:
+                    subDirs.append(lfn)
+                else:
+                    files[lfn] = {"Size": int(size), "CreationDate": creationDate}
+                if chunkSize and len(files) + len(subDirs) >= chunkSize:
+                    yield S_OK({"Files": files, "SubDirs": subDirs})
+                    files = {}
+                    subDirs = []
 
-        return S_OK({"Files": files, "SubDirs": subDirs})
+        yield S_OK({"Files": files, "SubDirs": subDirs})
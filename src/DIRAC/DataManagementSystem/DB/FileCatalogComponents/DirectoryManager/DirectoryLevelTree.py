@@ -24,12 +24,21 @@ class DirectoryLevelTree(DirectoryTreeBase):
     def findDir(self, path, connection=False):
         """Find directory ID for the given path"""
 
-        dpath = self.db._escapeString(os.path.normpath(path))
+        normPath = os.path.normpath(path)
+        cached = self.dirCache.get(normPath, ("DirID", "Level"))
+        if cached:
+            res = S_OK(cached["DirID"])
+            res["Level"] = cached["Level"]
+            return res
+
+        dpath = self.db._escapeString(normPath)
         if not dpath["OK"]:
             return dpath
         dpath = dpath["Value"]
+        generation = self.dirCache.getGeneration()
         req = f"SELECT DirID,Level from FC_DirectoryLevelTree WHERE DirName={dpath}"
-        result = self.db._query(req, conn=connection)
+        with self.db._readFromMaster():
+            result = self.db._query(req, conn=connection)
         if not result["OK"]:
             return result
 
@@ -38,24 +47,36 @@ class DirectoryLevelTree(DirectoryTreeBase):
 
         res = S_OK(result["Value"][0][0])
         res["Level"] = result["Value"][0][1]
+        self.dirCache.update(normPath, {"DirID": res["Value"], "Level": res["Level"]}, generation)
         return res
 
     def findDirs(self, paths, connection=False):
         """Find DirIDs for the given path list"""
+        dirDict = {}
         dpathList = []
         for path in paths:
-            dpath = self.db._escapeString(os.path.normpath(path))
+            normPath = os.path.normpath(path)
+            cached = self.dirCache.get(normPath, ("DirID",))
+            if cached:
+                dirDict[normPath] = cached["DirID"]
+                continue
+            dpath = self.db._escapeString(normPath)
             if not dpath["OK"]:
                 return dpath
             dpathList.append(dpath["Value"])
+        if not dpathList:
+            return S_OK(dirDict)
+
         dpaths = ",".join(dpathList)
+        generation = self.dirCache.getGeneration()
         req = f"SELECT DirName,DirID from FC_DirectoryLevelTree WHERE DirName in ({dpaths})"
-        result = self.db._query(req, conn=connection)
+        with self.db._readFromMaster():
+            result = self.db._query(req, conn=connection)
         if not result["OK"]:
             return result
-        dirDict = {}
         for dirName, dirID in result["Value"]:
             dirDict[dirName] = dirID
+            self.dirCache.update(dirName, {"DirID": dirID}, generation)
 
         return S_OK(dirDict)
 
@@ -3,13 +3,17 @@ import errno
 import time
 import threading
 import os
-import stat
 
 from DIRAC import S_OK, S_ERROR, gLogger
-from DIRAC.DataManagementSystem.DB.FileCatalogComponents.Utilities import getIDSelectString
+from DIRAC.Core.Utilities.List import intListToString
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryManager.DirectoryCache import DirectoryCache
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.Utilities import getIDSelectString, getModePermissions
 
 DEBUG = 0
 
+# Parameters of the directories needed to check the permissions, kept in the directory cache
+PERMISSION_PARAMETERS = ("DirID", "UID", "Owner", "GID", "OwnerGroup", "Mode")
+
 #############################################################################
 
 
@@ -18,6 +22,9 @@ class DirectoryTreeBase:
         self.db = database
         self.lock = threading.Lock()
         self.treeTable = ""
+        self.dirCache = DirectoryCache(
+            getattr(database, "directoryCacheSize", 10000), getattr(database, "directoryCacheLifetime", 300)
+        )
 
     ############################################################################
     #
@@ -110,11 +117,20 @@ class DirectoryTreeBase:
                 resGet = self.getDirectoryParameters(dirID)
                 if resGet["OK"]:
                     dirDict = resGet["Value"]
+            if dirDict and self.db.metadataIndex:
+                # The new directory inherits the metadata of its parent
+                result = self.findDir(os.path.dirname(path))
+                if result["OK"]:
+                    result = self.db.dmeta.indexNewDirectory(dirID, result["Value"], credDict)
+                if not result["OK"]:
+                    gLogger.error("Failed to index the metadata of the new directory", result["Message"])
+                    dirDict = {}
         else:
             return S_OK(dirID)
 
         if not dirDict:
             self.removeDir(path)
+            self.dirCache.invalidate(path)
             return S_ERROR(f"Failed to create directory {path}")
         return S_OK(dirID)
 
@@ -261,6 +277,7 @@ class DirectoryTreeBase:
                 failed[dir] = "Failed to remove non-empty directory"
                 continue
             result = self.removeDir(dir)
+            self.dirCache.invalidate(dir)
             if not result["OK"]:
                 failed[dir] = result["Message"]
             else:
@@ -322,6 +339,90 @@ class DirectoryTreeBase:
 
         return S_OK(dirDict)
 
+    #####################################################################
+    def getDirectoryPermissionParameters(self, path):
+        """Get the parameters of the given directory needed to check the permissions
+        (DirID, UID, Owner, GID, OwnerGroup and Mode), from the directory cache if possible
+
+        :param path: directory path, or directory ID which is never cached
+        """
+        if not isinstance(path, str):
+            return self.getDirectoryParameters(path)
+
+        parameters = self.dirCache.get(path, PERMISSION_PARAMETERS)
+        if parameters is not None:
+            return S_OK(parameters)
+
+        generation = self.dirCache.getGeneration()
+        with self.db._readFromMaster():
+            result = self.getDirectoryParameters(path)
+        if not result["OK"]:
+            return result
+        parameters = {key: result["Value"][key] for key in PERMISSION_PARAMETERS}
+        self.dirCache.update(path, parameters, generation)
+        return S_OK(parameters)
+
+    #####################################################################
+    def getDirectoriesPermissionParameters(self, paths):
+        """Bulk version of getDirectoryPermissionParameters: the directories not in the
+        directory cache are looked up with one query, and their parameters with another one
+
+        :param paths: list of directory paths
+
+        :returns: S_OK with a dictionary { path : parameters } of the existing directories
+        """
+        parametersDict = {}
+        toFind = []
+        for path in paths:
+            parameters = self.dirCache.get(path, PERMISSION_PARAMETERS)
+            if parameters is not None:
+                parametersDict[path] = parameters
+            else:
+                toFind.append(path)
+        if not toFind:
+            return S_OK(parametersDict)
+
+        generation = self.dirCache.getGeneration()
+        result = self.findDirs(toFind)
+        if not result["OK"]:
+            return result
+        pathIDs = {}
+        for path in toFind:
+            dirID = result["Value"].get(os.path.normpath(path))
+            if dirID:
+                pathIDs.setdefault(dirID, []).append(path)
+        if not pathIDs:
+            return S_OK(parametersDict)
+
+        req = f"SELECT DirID, UID, GID, Mode FROM FC_DirectoryInfo WHERE DirID IN ({intListToString(pathIDs)})"
+        with self.db._readFromMaster():
+            result = self.db._query(req)
+        if not result["OK"]:
+            return result
+        rows = result["Value"]
+        result = self.db.ugManager.getUserNames([row[1] for row in rows])
+        if not result["OK"]:
+            return result
+        owners = result["Value"]
+        result = self.db.ugManager.getGroupNames([row[2] for row in rows])
+        if not result["OK"]:
+            return result
+        groups = result["Value"]
+
+        for (dirID, uid, gid, mode), owner, group in zip(rows, owners, groups):
+            parameters = {
+                "DirID": int(dirID),
+                "UID": int(uid),
+                "Owner": owner or "unknown",
+                "GID": int(gid),
+                "OwnerGroup": group or "unknown",
+                "Mode": int(mode),
+            }
+            for path in pathIDs[dirID]:
+                parametersDict[path] = parameters
+                self.dirCache.update(path, parameters, generation)
+        return S_OK(parametersDict)
+
     #####################################################################
     def _setDirectoryParameter(self, path, pname, pvalue):
         """Set a numerical directory parameter
@@ -435,6 +536,7 @@ class DirectoryTreeBase:
         failed = {}
         for path, attribute in arguments.items():
             result = directoryFunction(path, attribute)
+            self.dirCache.invalidate(path, recursive=recursive)
             if not result["OK"]:
                 failed[path] = result["Message"]
                 continue
@@ -496,7 +598,7 @@ class DirectoryTreeBase:
             return result
         uid, gid = result["Value"]
 
-        result = self.getDirectoryParameters(path)
+        result = self.getDirectoryPermissionParameters(path)
         if not result["OK"]:
             if "not found" in result["Message"] or "not exist" in result["Message"]:
                 # If the directory does not exist, check the nearest parent for the permissions
@@ -524,24 +626,9 @@ class DirectoryTreeBase:
         dGid = result["Value"]["GID"]
         mode = result["Value"]["Mode"]
 
-        owner = uid == dUid
-        group = gid == dGid
-
-        resultDict = {}
+        resultDict = getModePermissions(mode, uid == dUid, gid == dGid)
         if self.db.globalReadAccess:
             resultDict["Read"] = True
-        else:
-            resultDict["Read"] = (
-                (owner and mode & stat.S_IRUSR > 0) or (group and mode & stat.S_IRGRP > 0) or mode & stat.S_IROTH > 0
-            )
-
-        resultDict["Write"] = (
-            (owner and mode & stat.S_IWUSR > 0) or (group and mode & stat.S_IWGRP > 0) or mode & stat.S_IWOTH > 0
-        )
-
-        resultDict["Execute"] = (
-            (owner and mode & stat.S_IXUSR > 0) or (group and mode & stat.S_IXGRP > 0) or mode & stat.S_IXOTH > 0
-        )
 
         return S_OK(resultDict)
 
@@ -592,11 +679,12 @@ class DirectoryTreeBase:
         lfnList = [x[0] for x in result["Value"]]
         return S_OK(lfnList)
 
-    def getFileLFNsInDirectoryByDirectory(self, dirIDList, credDict):
+    def getFileLFNsInDirectoryByDirectory(self, dirIDList, credDict, since=None):
         """Get file LFNs and IDs for the given directory or directory list
 
         :param list dirIDList: List of directory IDs
         :param dict credDict: dictionary of user credentials
+        :param int since: if set, only the files with a greater FileID
 
         :return: S_OK/S_ERROR with Value dictionary {"DirLFNDict": dirLfnDict, "IDLFNDict": idLfnDict}
                  where dirLfnDict has the structure <directory_name>:<list of contained file names>,
@@ -610,6 +698,8 @@ class DirectoryTreeBase:
         treeTable = self.getTreeTable()
         req = "SELECT D.DirName,F.FileName,F.FileID FROM FC_Files as F, %s as D WHERE D.DirID IN ( %s ) and D.DirID=F.DirID"
         req = req % (treeTable, dirListString)
+        if since:
+            req += " AND F.FileID > %d" % since
         result = self.db._query(req)
         if not result["OK"]:
             return result
@@ -688,6 +778,17 @@ class DirectoryTreeBase:
 
         return S_OK({"Successful": successful, "Failed": failed})
 
+    def iterDirectoryDump(self, path, chunkSize=None):
+        """Recursively dump all the content of a directory, by chunks
+
+        :param str path: directory to dump
+        :param int chunkSize: approximate number of files per chunk. If not set, everything in one chunk
+
+        :returns: generator of S_OK/S_ERROR. The S_OK values are dictionaries with `Files` and `SubDirs` as keys,
+                  like for :py:meth:`_getDirectoryDump`. An S_ERROR is always the last item.
+        """
+        return self._iterDirectoryDump(path, chunkSize)
+
     def _getDirectoryDump(self, path):
         """
         Recursively dump all the content of a directory
@@ -698,17 +799,32 @@ class DirectoryTreeBase:
                   `Files` is a dict containing files metadata.
                   `SubDirs` is a list of directory
         """
+        files = {}
+        directories = []
+        for result in self._iterDirectoryDump(path):
+            if not result["OK"]:
+                return result
+            files.update(result["Value"]["Files"])
+            directories.extend(result["Value"]["SubDirs"])
+
+        return S_OK({"Files": files, "SubDirs": directories})
+
+    def _iterDirectoryDump(self, path, chunkSize=None):
+        """Generator doing the work of :py:meth:`iterDirectoryDump`"""
         result = self.findDir(path)
         if not result["OK"]:
-            return result
+            yield result
+            return
         directoryID = result["Value"]
         if not directoryID:
-            return S_ERROR(errno.ENOENT, f"{path} does not exist")
+            yield S_ERROR(errno.ENOENT, f"{path} does not exist")
+            return
         directories = []
 
         result = self.db.fileManager.getFilesInDirectory(directoryID)
         if not result["OK"]:
-            return result
+            yield result
+            return
 
         filesInDir = result["Value"]
         files = {
@@ -725,19 +841,22 @@ class DirectoryTreeBase:
             curDirID = dirIDList.pop()
             result = self.getChildren(curDirID)
             if not result["OK"]:
-                return result
+                yield result
+                return
             newDirIDList = result["Value"]
             for dirID in newDirIDList:
                 result = self.getDirectoryPath(dirID)
                 if not result["OK"]:
-                    return result
+                    yield result
+                    return
                 dirName = result["Value"]
 
                 directories.append(dirName)
 
                 result = self.db.fileManager.getFilesInDirectory(dirID)
                 if not result["OK"]:
-                    return result
+                    yield result
+                    return
 
                 filesInDir = result["Value"]
 
@@ -751,12 +870,15 @@ class DirectoryTreeBase:
                     }
                 )
 
+                if chunkSize and len(files) >= chunkSize:
+                    yield S_OK({"Files": files, "SubDirs": directories})
+                    files = {}
+                    directories = []
+
             # Add to this list to get subdirectories of these directories
             dirIDList.extend(newDirIDList)
 
-        pathDict = {"Files": files, "SubDirs": directories}
-
-        return S_OK(pathDict)
+        yield S_OK({"Files": files, "SubDirs": directories})
 
     def getDirectoryReplicas(self, lfns, allStatus=False):
         """Get replicas for files in the given directories"""
@@ -835,6 +957,52 @@ class DirectoryTreeBase:
 
         return S_OK(resultDict)
 
+    def checkDirectoryUsage(self, lfns):
+        """Compare the recursive usage of the directories kept up to date in the usage tables
+        with the one computed from the file tables, as a rebuild of the usage would do.
+        Nothing is locked: a directory being modified during the check may show a difference
+        which is gone when checking it again.
+
+        :param lfns: list of directory paths
+
+        :return: S_OK with Successful/Failed dicts. The successful values are the differences,
+                 indexed by "Logical" or by SE name, as {"Usage": {"Size", "Files"}, "FileTables": {"Size", "Files"}}.
+                 An empty dictionary means that the usage of the directory is consistent
+        """
+        result = self.getDirectorySize(lfns, longOutput=True, rawFileTables=False)
+        if not result["OK"]:
+            return result
+        fromUsage = result["Value"]["Successful"]
+        failed = result["Value"]["Failed"]
+        result = self.getDirectorySize(list(fromUsage), longOutput=True, rawFileTables=True)
+        if not result["OK"]:
+            return result
+        failed.update(result["Value"]["Failed"])
+
+        def getUsage(sizeDict):
+            usage = {"Logical": {"Size": sizeDict["LogicalSize"], "Files": sizeDict["LogicalFiles"]}}
+            for seName, seDict in sizeDict.get("PhysicalSize", {}).items():
+                if not seName.startswith("Total"):
+                    usage[seName] = {"Size": int(seDict["Size"]), "Files": int(seDict["Files"])}
+            return usage
+
+        successful = {}
+        for path, sizeDict in result["Value"]["Successful"].items():
+            usage = getUsage(fromUsage[path])
+            fileTablesUsage = getUsage(sizeDict)
+            successful[path] = {}
+            for key in set(usage) | set(fileTablesUsage):
+                empty = {"Size": 0, "Files": 0}
+                if usage.get(key, empty) != fileTablesUsage.get(key, empty):
+                    successful[path][key] = {
+                        "Usage": usage.get(key, empty),
+                        "FileTables": fileTablesUsage.get(key, empty),
+                    }
+            if successful[path]:
+                gLogger.warn("Inconsistent directory usage", f"{path}: {successful[path]}")
+
+        return S_OK({"Successful": successful, "Failed": failed})
+
     def _getDirectoryLogicalSizeFromUsage(self, lfns, recursiveSum=True, connection=None):
         """Get the total "logical" size of the requested directories
 
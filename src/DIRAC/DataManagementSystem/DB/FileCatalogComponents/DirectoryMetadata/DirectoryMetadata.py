@@ -8,7 +8,36 @@ from DIRAC import S_OK, S_ERROR
 from DIRAC.Core.Utilities.TimeUtilities import queryTime
 
 
+def _getValueType(pType):
+    """Get the MySQL type of the values of a metadata field
+
+    :param str pType: metadata type, as given to addMetadataField
+
+    :return: MySQL column type
+    """
+    valueType = pType
+    if pType.lower()[:3] == "int":
+        valueType = "INT"
+    elif pType.lower() == "string":
+        valueType = "VARCHAR(128)"
+    elif pType.lower() == "float":
+        valueType = "FLOAT"
+    elif pType.lower() == "date":
+        valueType = "DATETIME"
+    elif pType == "MetaSet":
+        valueType = "VARCHAR(64)"
+    return valueType
+
+
 class DirectoryMetadata:
+    """Directory metadata manager
+
+    The indexed metadata of a directory are stored in one FC_Meta_<name> table per metadata field,
+    and are inherited by all its subdirectories.
+    If the MetadataIndex option of the catalog is set, the inherited values are also stored for each directory
+    in one FC_MetaIndex_<name> table per field, so that finding the directories matching a query is a single join.
+    """
+
     def __init__(self, database=None):
         self.db = database
 
@@ -43,17 +72,7 @@ class DirectoryMetadata:
                 return S_OK("Already exists")
             return S_ERROR(f"Attempt to add an existing metadata with different type: {pType}/{result['Value'][pName]}")
 
-        valueType = pType
-        if pType.lower()[:3] == "int":
-            valueType = "INT"
-        elif pType.lower() == "string":
-            valueType = "VARCHAR(128)"
-        elif pType.lower() == "float":
-            valueType = "FLOAT"
-        elif pType.lower() == "date":
-            valueType = "DATETIME"
-        elif pType == "MetaSet":
-            valueType = "VARCHAR(64)"
+        valueType = _getValueType(pType)
 
         req = "CREATE TABLE FC_Meta_{} ( DirID INTEGER NOT NULL, Value {}, PRIMARY KEY (DirID), INDEX (Value) )".format(
             pName,
@@ -63,6 +82,11 @@ class DirectoryMetadata:
         if not result["OK"]:
             return result
 
+        if self.db.metadataIndex:
+            result = self.__createMetadataIndex(pName, valueType)
+            if not result["OK"]:
+                return result
+
         result = self.db.insertFields("FC_MetaFields", ["MetaName", "MetaType"], [pName, pType])
         if not result["OK"]:
             return result
@@ -93,7 +117,10 @@ class DirectoryMetadata:
         if not result["OK"]:
             if error:
                 result["Message"] = error + "; " + result["Message"]
-        return result
+            return result
+
+        # The index may exist even if it is not used anymore
+        return self.db._update(f"DROP TABLE IF EXISTS FC_MetaIndex_{pName}")
 
     def getMetadataFields(self, credDict):
         """Get all the defined metadata fields
@@ -246,6 +273,10 @@ class DirectoryMetadata:
                         return result
                 else:
                     return result
+            if self.db.metadataIndex:
+                result = self.__indexMetadata(metaName, dirID)
+                if not result["OK"]:
+                    return result
 
         return S_OK()
 
@@ -276,6 +307,9 @@ class DirectoryMetadata:
                 # Indexed meta case
                 req = "DELETE FROM FC_Meta_%s WHERE DirID=%d" % (meta, dirID)
                 result = self.db._update(req)
+                if result["OK"] and self.db.metadataIndex:
+                    req = "DELETE FROM FC_MetaIndex_%s WHERE MetaDirID=%d" % (meta, dirID)
+                    result = self.db._update(req)
                 if not result["OK"]:
                     failedMeta[meta] = result["Value"]
             else:
@@ -459,10 +493,145 @@ class DirectoryMetadata:
         if not result["OK"]:
             return result
 
+        if self.db.metadataIndex:
+            for dirID in dirList:
+                result = self.__indexMetadata(metaName, dirID)
+                if not result["OK"]:
+                    return result
+
         req = f"DELETE FROM FC_DirMeta WHERE MetaKey='{metaName}'"
         result = self.db._update(req)
         return result
 
+    ############################################################################################
+    #
+    # Index of the metadata inherited by each directory
+    #
+
+    def __createMetadataIndex(self, metaName, valueType):
+        """Create the table giving for each directory the values of a metadata field it inherits.
+        There is one row per directory defining a value for itself or one of its parents, MetaDirID
+
+        :param str metaName: metadata name
+        :param str valueType: MySQL type of the metadata values
+
+        :return: S_OK/S_ERROR
+        """
+        req = (
+            f"CREATE TABLE IF NOT EXISTS FC_MetaIndex_{metaName} ( DirID INTEGER NOT NULL, "
+            f"MetaDirID INTEGER NOT NULL, Value {valueType}, PRIMARY KEY (DirID, MetaDirID), "
+            "INDEX (MetaDirID), INDEX (Value, DirID) )"
+        )
+        return self.db._update(req)
+
+    def __indexMetadata(self, metaName, dirID):
+        """Give the value of a metadata defined for a directory to the directory and all its subdirectories
+
+        :param str metaName: metadata name
+        :param int dirID: ID of the directory defining the metadata
+
+        :return: S_OK/S_ERROR
+        """
+        result = self.db.dtree.getSubdirectoriesByID(dirID, includeParent=True, requestString=True)
+        if not result["OK"]:
+            return result
+        subdirSelection = result["Value"]
+
+        req = "REPLACE INTO FC_MetaIndex_%s (DirID,MetaDirID,Value) " % metaName
+        req += "SELECT S.*, M.DirID, M.Value FROM ( %s ) AS S, FC_Meta_%s AS M WHERE M.DirID=%d" % (
+            subdirSelection,
+            metaName,
+            dirID,
+        )
+        return self.db._update(req)
+
+    def indexNewDirectory(self, dirID, parentID, credDict):
+        """Give to a new directory the metadata inherited by its parent
+
+        :param int dirID: ID of the new directory
+        :param int parentID: ID of its parent directory
+        :param dict credDict: client credential dictionary
+
+        :return: S_OK/S_ERROR
+        """
+        if not self.db.metadataIndex or not parentID:
+            return S_OK()
+
+        result = self._getMetadataFields(credDict)
+        if not result["OK"]:
+            return result
+
+        for meta in result["Value"]:
+            req = "INSERT INTO FC_MetaIndex_%s (DirID,MetaDirID,Value) " % meta
+            req += "SELECT %d, MetaDirID, Value FROM FC_MetaIndex_%s WHERE DirID=%d" % (dirID, meta, parentID)
+            result = self.db._update(req)
+            if not result["OK"]:
+                return result
+        return S_OK()
+
+    def rebuildMetadataIndex(self, credDict):
+        """Fill the index of the inherited metadata from scratch, from the metadata defined for each directory.
+        It is needed when the MetadataIndex option is set for an existing catalog.
+
+        :param dict credDict: client credential dictionary
+
+        :return: S_OK/S_ERROR, Value number of directories defining metadata
+        """
+        result = self._getMetadataFields(credDict)
+        if not result["OK"]:
+            return result
+
+        nbDirs = 0
+        for meta, metaType in result["Value"].items():
+            result = self.__createMetadataIndex(meta, _getValueType(metaType))
+            if not result["OK"]:
+                return result
+            result = self.db._update(f"DELETE FROM FC_MetaIndex_{meta}")
+            if not result["OK"]:
+                return result
+            result = self.db._query(f"SELECT DirID FROM FC_Meta_{meta}")
+            if not result["OK"]:
+                return result
+            for (dirID,) in result["Value"]:
+                result = self.__indexMetadata(meta, dirID)
+                if not result["OK"]:
+                    return result
+                nbDirs += 1
+
+        return S_OK(nbDirs)
+
+    def __findDirIDsInIndex(self, metaDict, pathSelection=""):
+        """Find the directories inheriting the given metadata with one query on the index
+
+        :param dict metaDict: dictionary with selection instructions suitable for the database search
+        :param str pathSelection: directory path selection string
+
+        :return: S_OK/S_ERROR, Value list of directory IDs
+        """
+        tables = []
+        conditions = []
+        for count, (meta, value) in enumerate(metaDict.items()):
+            table = "I%d" % count
+            result = self.__createMetaSelection(value, f"{table}.")
+            if not result["OK"]:
+                return result
+            if count:
+                tables.append(f"JOIN FC_MetaIndex_{meta} AS {table} ON {table}.DirID=I0.DirID")
+            else:
+                tables.append(f"FC_MetaIndex_{meta} AS {table}")
+            if result["Value"]:
+                conditions.append(result["Value"])
+        if pathSelection:
+            conditions.append(f"I0.DirID IN ( {pathSelection} )")
+
+        req = f"SELECT DISTINCT I0.DirID FROM {' '.join(tables)}"
+        if conditions:
+            req += f" WHERE {' AND '.join(conditions)}"
+        result = self.db._query(req)
+        if not result["OK"]:
+            return result
+        return S_OK([row[0] for row in result["Value"]])
+
     ############################################################################################
     #
     # Find directories corresponding to the metadata
@@ -708,23 +877,30 @@ class DirectoryMetadata:
                 pathSelection = result["Value"]
             dirList = []
             first = True
-            for meta, value in finalMetaDict.items():
-                if value == "Missing":
-                    result = self.__findSubdirMissingMeta(meta, pathSelection)
-                else:
-                    result = self.__findSubdirByMeta(meta, value, pathSelection)
+            # The index does not tell which directories miss a metadata
+            if self.db.metadataIndex and "Missing" not in finalMetaDict.values():
+                result = self.__findDirIDsInIndex(finalMetaDict, pathSelection)
                 if not result["OK"]:
                     return result
-                mList = result["Value"]
-                if first:
-                    dirList = mList
-                    first = False
-                else:
-                    newList = []
-                    for d in dirList:
-                        if d in mList:
-                            newList.append(d)
-                    dirList = newList
+                dirList = result["Value"]
+            else:
+                for meta, value in finalMetaDict.items():
+                    if value == "Missing":
+                        result = self.__findSubdirMissingMeta(meta, pathSelection)
+                    else:
+                        result = self.__findSubdirByMeta(meta, value, pathSelection)
+                    if not result["OK"]:
+                        return result
+                    mList = result["Value"]
+                    if first:
+                        dirList = mList
+                        first = False
+                    else:
+                        newList = []
+                        for d in dirList:
+                            if d in mList:
+                                newList.append(d)
+                        dirList = newList
         else:
             if pathDirID:
                 result = self.db.dtree.getSubdirectoriesByID(pathDirID, includeParent=True)
@@ -1003,6 +1179,10 @@ class DirectoryMetadata:
         for meta in metaFields:
             req = f"DELETE FROM FC_Meta_{meta} WHERE DirID in ( {dirListString} )"
             result = self.db._query(req)
+            if result["OK"] and self.db.metadataIndex:
+                req = f"DELETE FROM FC_MetaIndex_{meta} WHERE DirID in ( {dirListString} )"
+                req += f" OR MetaDirID in ( {dirListString} )"
+                result = self.db._update(req)
             if not result["OK"]:
                 failed[meta] = result["Message"]
             else:
@@ -134,9 +134,17 @@ class FileManager(FileManagerBase):
             return S_OK(filesDict)
         # Otherwise get the additionally requested metadata from the FC_FileInfo table
         files = {}
-        userDict = {}
-        groupDict = {}
-        for fileName, dirID, fileID, size, uid, gid, status in fileNameIDs:
+        # The owners and groups of all the files are translated at once
+        owners = groups = [None] * len(fileNameIDs)
+        if "UID" in metadata:
+            result = self.db.ugManager.getUserNames([row[4] for row in fileNameIDs])
+            if result["OK"]:
+                owners = result["Value"]
+        if "GID" in metadata:
+            result = self.db.ugManager.getGroupNames([row[5] for row in fileNameIDs])
+            if result["OK"]:
+                groups = result["Value"]
+        for (fileName, dirID, fileID, size, uid, gid, status), owner, group in zip(fileNameIDs, owners, groups):
             filesDict[fileID] = fileName
             files[fileName] = {}
             if "Size" in metadata:
@@ -145,26 +153,10 @@ class FileManager(FileManagerBase):
                 files[fileName]["DirID"] = dirID
             if "UID" in metadata:
                 files[fileName]["UID"] = uid
-                if uid in userDict:
-                    owner = userDict[uid]
-                else:
-                    owner = "unknown"
-                    result = self.db.ugManager.getUserName(uid)
-                    if result["OK"]:
-                        owner = result["Value"]
-                    userDict[uid] = owner
-                files[fileName]["Owner"] = owner
+                files[fileName]["Owner"] = owner if owner is not None else "unknown"
             if "GID" in metadata:
                 files[fileName]["GID"] = gid
-                if gid in groupDict:
-                    group = groupDict[gid]
-                else:
-                    group = "unknown"
-                    result = self.db.ugManager.getGroupName(gid)
-                    if result["OK"]:
-                        group = result["Value"]
-                    groupDict[gid] = group
-                files[fileName]["OwnerGroup"] = group
+                files[fileName]["OwnerGroup"] = group if group is not None else "unknown"
             if "Status" in metadata:
                 files[fileName]["Status"] = self._getIntStatus(status).get("Value", status)
         for element in ["FileID", "Size", "DirID", "UID", "GID", "Status"]:
@@ -248,6 +240,8 @@ class FileManager(FileManagerBase):
             statusID = res["Value"]
 
         directorySESizeDict = {}
+        # The files of a bulk registration usually all have the same owner
+        ownerIDs = {}
         for lfn in lfns.keys():
             dirID = lfns[lfn]["DirID"]
             fileName = os.path.basename(lfn)
@@ -256,9 +250,11 @@ class FileManager(FileManagerBase):
             s_uid = uid
             s_gid = gid
             if ownerDict:
-                result = self.db.ugManager.getUserAndGroupID(ownerDict)
-                if result["OK"]:
-                    s_uid, s_gid = result["Value"]
+                ownerKey = tuple(sorted(ownerDict.items()))
+                if ownerKey not in ownerIDs:
+                    result = self.db.ugManager.getUserAndGroupID(ownerDict)
+                    ownerIDs[ownerKey] = result["Value"] if result["OK"] else (uid, gid)
+                s_uid, s_gid = ownerIDs[ownerKey]
             insertTuples.append("(%d,%d,%d,%d,%d,'%s')" % (dirID, size, s_uid, s_gid, statusID, fileName))
             directorySESizeDict.setdefault(dirID, {})
             directorySESizeDict[dirID].setdefault(0, {"Files": 0, "Size": 0})
@@ -269,8 +265,8 @@ class FileManager(FileManagerBase):
         res = self.db._update(req, conn=connection)
         if not res["OK"]:
             return res
-        # Get the fileIDs for the inserted files
-        res = self._findFiles(list(lfns), ["FileID"], connection=connection)
+        # Get the fileIDs for the inserted files, with one query for many directories
+        res = self._findFileIDs(list(lfns), connection=connection)
         if not res["OK"]:
             for lfn in list(lfns):
                 failed[lfn] = "Failed post insert check"
@@ -279,8 +275,8 @@ class FileManager(FileManagerBase):
             failed.update(res["Value"]["Failed"])
             for lfn in res["Value"]["Failed"]:
                 lfns.pop(lfn)
-            for lfn, fileDict in res["Value"]["Successful"].items():
-                lfns[lfn]["FileID"] = fileDict["FileID"]
+            for lfn, fileID in res["Value"]["Successful"].items():
+                lfns[lfn]["FileID"] = fileID
         insertTuples = []
         toDelete = []
         for lfn in lfns:
@@ -298,7 +294,7 @@ class FileManager(FileManagerBase):
         if insertTuples:
             fields = "FileID,GUID,Checksum,ChecksumType,CreationDate,ModificationDate,Mode"
             req = f"INSERT INTO FC_FileInfo ({fields}) VALUES {','.join(insertTuples)}"
-            res = self.db._update(req)
+            res = self.db._update(req, conn=connection)
             if not res["OK"]:
                 self._deleteFiles(toDelete, connection=connection)
                 for lfn in list(lfns):
@@ -621,14 +617,31 @@ class FileManager(FileManagerBase):
         if not res["OK"]:
             return res
         newSE = res["Value"]
-        res = self.__getRepIDForReplica(fileID, se, connection=connection)
+        res = self.db.seManager.findSE(se)
+        if not res["OK"]:
+            return res
+        oldSE = res["Value"]
+        res = self.__getRepIDForReplica(fileID, oldSE, connection=connection)
         if not res["OK"]:
             return res
         if not res["Value"]:
             return res
         repID = res["Value"]
         req = "UPDATE FC_Replicas SET SEID=%d WHERE RepID = %d;" % (newSE, repID)
-        return self.db._update(req, conn=connection)
+        result = self.db._update(req, conn=connection)
+        if not result["OK"] or oldSE == newSE:
+            return result
+
+        # Move the usage of the replica to the new SE
+        req = "SELECT DirID, Size FROM FC_Files WHERE FileID=%d" % fileID
+        res = self.db._query(req, conn=connection)
+        if not res["OK"]:
+            return res
+        if res["Value"]:
+            dirID, size = res["Value"][0]
+            self._updateDirectoryUsage({dirID: {oldSE: {"Files": 1, "Size": size}}}, "-", connection=connection)
+            self._updateDirectoryUsage({dirID: {newSE: {"Files": 1, "Size": size}}}, "+", connection=connection)
+        return result
 
     def _setReplicaParameter(self, fileID, se, paramName, paramValue, connection=False):
         connection = self._getConnection(connection)
@@ -742,17 +755,14 @@ class FileManager(FileManagerBase):
                     if not res["OK"]:
                         continue
                     repIDDict[repID] = {"Status": res["Value"]}
-        seDict = {}
         replicas = {}
-        for repID in fileIDDict.keys():
-            fileID, seID, statusID = fileIDDict[repID]
+        res = self.db.seManager.getSENames(seID for _fileID, seID, _statusID in fileIDDict.values())
+        if not res["OK"]:
+            return res
+        for (repID, (fileID, seID, statusID)), seName in zip(fileIDDict.items(), res["Value"]):
             replicas.setdefault(fileID, {})
-            if seID not in seDict:
-                res = self.db.seManager.getSEName(seID)
-                if not res["OK"]:
-                    continue
-                seDict[seID] = res["Value"]
-            seName = seDict[seID]
+            if seName is None:
+                continue
             replicas[fileID][seName] = repIDDict.get(repID, {})
 
         if len(replicas) != len(fileIDs):
@@ -3,19 +3,27 @@
 # pylint: disable=protected-access
 
 import os
-import stat
+import threading
+import time
 
 from DIRAC import S_OK, S_ERROR, gLogger
-from DIRAC.Core.Utilities.List import intListToString
+from DIRAC.Core.Utilities.List import breakListIntoChunks, intListToString
+from DIRAC.Core.Utilities.MySQL import STREAM_BATCH_SIZE
 from DIRAC.Core.Utilities.Pfn import pfnunparse
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.Utilities import getModePermissions
 
 
 class FileManagerBase:
     """Base class for all the specific File Managers"""
 
+    # Whether the files and replicas can be added in the transactions of _addInBulk
+    supportsBulkTransactions = True
+
     def __init__(self, database=None):
         self.db = database
         self.statusDict = {}
+        # Directory usage changes of the bulk insertion in progress in the thread, see _addInBulk
+        self._bulkUsage = threading.local()
 
     def _getConnection(self, connection):
         if connection:
@@ -209,7 +217,10 @@ class FileManagerBase:
             if not res["OK"]:
                 failed[lfn] = res["Message"]
                 lfns.pop(lfn)
-        res = self._addFiles(lfns, credDict, connection=connection)
+        if lfns and self.db.bulkInsertChunkSize and self.supportsBulkTransactions:
+            res = self._addInBulk("addFile", self._addFiles, lfns, credDict)
+        else:
+            res = self._addFiles(lfns, credDict, connection=connection)
         if not res["OK"]:
             for lfn in lfns.keys():
                 failed[lfn] = res["Message"]
@@ -365,31 +376,107 @@ class FileManagerBase:
 
         return S_OK({"Successful": successful, "Failed": failed})
 
+    def _addInBulk(self, operation, addMethod, lfns, *args):
+        """Add files or replicas by chunks of bulkInsertChunkSize LFNs, each chunk in its own transaction.
+        The LFNs of a directory are kept together, and the usage of the directories is updated once per chunk.
+
+        :param str operation: name of the operation, for the logs
+        :param addMethod: method adding a dict of LFNs, _addFiles or _addReplicas
+        :param dict lfns: LFNs to add
+        :param args: other arguments of addMethod
+
+        :return: S_OK with Successful/Failed dicts
+        """
+        successful = {}
+        failed = {}
+        start = time.time()
+        sortedLfns = sorted(lfns, key=lambda lfn: (os.path.dirname(lfn), lfn))
+        for chunk in breakListIntoChunks(sortedLfns, self.db.bulkInsertChunkSize):
+            res = self.__addInTransaction(addMethod, {lfn: lfns[lfn] for lfn in chunk}, *args)
+            if not res["OK"]:
+                failed.update(dict.fromkeys(chunk, res["Message"]))
+                continue
+            successful.update(res["Value"]["Successful"])
+            failed.update(res["Value"]["Failed"])
+        elapsed = max(time.time() - start, 1e-6)
+        gLogger.info(
+            f"{operation} in bulk",
+            f"{len(successful)} done, {len(failed)} failed in {elapsed:.2f} s ({len(successful) / elapsed:.1f} files/s)",
+        )
+        return S_OK({"Successful": successful, "Failed": failed})
+
+    def __addInTransaction(self, addMethod, lfns, *args):
+        """Add a chunk of files or replicas, all or nothing being written to the DB"""
+        res = self.db.transactionStart()
+        if not res["OK"]:
+            return res
+        self._bulkUsage.usage = {"+": {}, "-": {}}
+        self._bulkUsage.pathIDs = {}
+        try:
+            res = addMethod(lfns, *args)
+            if res["OK"]:
+                for change, usage in self._bulkUsage.usage.items():
+                    result = self.__writeDirectoryUsage(usage, change)
+                    if not result["OK"]:
+                        res = result
+                        break
+        finally:
+            del self._bulkUsage.usage
+            del self._bulkUsage.pathIDs
+        if res["OK"]:
+            result = self.db.transactionCommit()
+            if result["OK"]:
+                return res
+            res = result
+        self.db.transactionRollback()
+        # The directories created in the transaction are gone
+        self.db.dtree.dirCache.clear()
+        return res
+
     def _updateDirectoryUsage(self, directorySEDict, change, connection=False):
         connection = self._getConnection(connection)
-        for directoryID in directorySEDict.keys():
-            result = self.db.dtree.getPathIDsByID(directoryID)
-            if not result["OK"]:
-                return result
-            parentIDs = result["Value"]
-            dirDict = directorySEDict[directoryID]
-            for seID in dirDict.keys():
-                seDict = dirDict[seID]
-                files = seDict["Files"]
-                size = seDict["Size"]
-                insertTuples = []
-                for dirID in parentIDs:
-                    insertTuples.append("(%d,%d,%d,%d,UTC_TIMESTAMP())" % (dirID, seID, size, files))
-
-                req = "INSERT INTO FC_DirectoryUsage (DirID,SEID,SESize,SEFiles,LastUpdate) "
-                req += f"VALUES {','.join(insertTuples)}"
-                req += (
-                    " ON DUPLICATE KEY UPDATE SESize=SESize%s%d, SEFiles=SEFiles%s%d, LastUpdate=UTC_TIMESTAMP() "
-                    % (change, size, change, files)
-                )
-                res = self.db._update(req)
-                if not res["OK"]:
-                    gLogger.warn("Failed to update FC_DirectoryUsage", res["Message"])
+        # During a bulk insertion, the changes are only summed, they are written at the end of the chunk
+        bulkUsage = getattr(self._bulkUsage, "usage", None)
+        usage = bulkUsage[change] if bulkUsage is not None else {}
+        pathIDs = getattr(self._bulkUsage, "pathIDs", {})
+        for directoryID, dirDict in directorySEDict.items():
+            if directoryID not in pathIDs:
+                result = self.db.dtree.getPathIDsByID(directoryID)
+                if not result["OK"]:
+                    return result
+                pathIDs[directoryID] = result["Value"]
+            for dirID in pathIDs[directoryID]:
+                for seID, seDict in dirDict.items():
+                    dirUsage = usage.setdefault((dirID, seID), {"Files": 0, "Size": 0})
+                    dirUsage["Files"] += seDict["Files"]
+                    dirUsage["Size"] += seDict["Size"]
+        if bulkUsage is None:
+            res = self.__writeDirectoryUsage(usage, change, connection=connection)
+            if not res["OK"]:
+                gLogger.warn("Failed to update FC_DirectoryUsage", res["Message"])
+        return S_OK()
+
+    def __writeDirectoryUsage(self, usage, change, connection=False):
+        """Apply the changes of the usage of the directories, with a few multi-row statements
+
+        :param dict usage: {(DirID, SEID): {"Files": number of files, "Size": size}}
+        :param str change: "+" or "-"
+        """
+        # Always updating the rows in the same order avoids deadlocks between concurrent insertions
+        for usageChunk in breakListIntoChunks(sorted(usage.items()), 1000):
+            insertTuples = [
+                "(%d,%d,%d,%d,UTC_TIMESTAMP())" % (dirID, seID, dirUsage["Size"], dirUsage["Files"])
+                for (dirID, seID), dirUsage in usageChunk
+            ]
+            req = "INSERT INTO FC_DirectoryUsage (DirID,SEID,SESize,SEFiles,LastUpdate) "
+            req += f"VALUES {','.join(insertTuples)}"
+            req += (
+                " ON DUPLICATE KEY UPDATE SESize=SESize%sVALUES(SESize), SEFiles=SEFiles%sVALUES(SEFiles),"
+                " LastUpdate=UTC_TIMESTAMP() " % (change, change)
+            )
+            res = self.db._update(req, conn=connection)
+            if not res["OK"]:
+                return res
         return S_OK()
 
     def _populateFileAncestors(self, lfns, connection=False):
@@ -728,7 +815,10 @@ class FileManagerBase:
             if not res["OK"]:
                 failed[lfn] = res["Message"]
                 lfns.pop(lfn)
-        res = self._addReplicas(lfns, connection=connection)
+        if lfns and self.db.bulkInsertChunkSize and self.supportsBulkTransactions:
+            res = self._addInBulk("addReplica", self._addReplicas, lfns)
+        else:
+            res = self._addReplicas(lfns, connection=connection)
         if not res["OK"]:
             for lfn in lfns:
                 failed[lfn] = res["Message"]
@@ -939,22 +1029,9 @@ class FileManagerBase:
             return res
         successful = {}
         for dirName, dirDict in res["Value"]["Successful"].items():
-            mode = dirDict["Mode"]
-            p_uid = dirDict["UID"]
-            p_gid = dirDict["GID"]
-            successful[dirName] = {}
-            if p_uid == uid:
-                successful[dirName]["Read"] = mode & stat.S_IRUSR
-                successful[dirName]["Write"] = mode & stat.S_IWUSR
-                successful[dirName]["Execute"] = mode & stat.S_IXUSR
-            elif p_gid == gid:
-                successful[dirName]["Read"] = mode & stat.S_IRGRP
-                successful[dirName]["Write"] = mode & stat.S_IWGRP
-                successful[dirName]["Execute"] = mode & stat.S_IXGRP
-            else:
-                successful[dirName]["Read"] = mode & stat.S_IROTH
-                successful[dirName]["Write"] = mode & stat.S_IWOTH
-                successful[dirName]["Execute"] = mode & stat.S_IXOTH
+            successful[dirName] = getModePermissions(
+                dirDict["Mode"], dirDict["UID"] == uid, dirDict["GID"] == gid, firstClassOnly=True
+            )
         return S_OK({"Successful": successful, "Failed": res["Value"]["Failed"]})
 
     ######################################################
@@ -1158,17 +1235,12 @@ class FileManagerBase:
             return result
 
         resultDict = {}
-        seDict = {}
-        for fileName, fileID, seID, pfn in result["Value"]:
+        res = self.db.seManager.getSENames(row[2] for row in result["Value"])
+        if not res["OK"]:
+            return res
+        for (fileName, fileID, seID, pfn), se in zip(result["Value"], res["Value"]):
             resultDict.setdefault(fileName, {})
-            if seID not in seDict:
-                res = self.db.seManager.getSEName(seID)
-                if not res["OK"]:
-                    seDict[seID] = "Unknown"
-                else:
-                    seDict[seID] = res["Value"]
-            se = seDict[seID]
-            resultDict[fileName][se] = pfn
+            resultDict[fileName][se if se is not None else "Unknown"] = pfn
 
         return S_OK(resultDict)
 
@@ -1340,3 +1412,15 @@ class FileManagerBase:
         :returns: S_OK with list of tuples (SEName, lfn, checksum, size)
         """
         return S_ERROR("To be implemented on derived class")
+
+    def iterSEDump(self, seNames, batchSize=STREAM_BATCH_SIZE):
+        """
+         Return all the files at a given SE by batches, see :py:meth:`getSEDump`
+
+        :param seNames: list of storageElement names
+        :param int batchSize: maximum number of files per batch
+
+        :returns: generator of S_OK with tuples of (SEName, lfn, checksum, size).
+                  The last item is an S_ERROR in case of error
+        """
+        yield self.getSEDump(seNames)
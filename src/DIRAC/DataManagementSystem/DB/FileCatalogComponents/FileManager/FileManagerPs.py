@@ -3,17 +3,24 @@
 import os
 import datetime
 
-from DIRAC import S_OK, S_ERROR
+from DIRAC import S_OK, S_ERROR, gLogger
 from DIRAC.DataManagementSystem.DB.FileCatalogComponents.FileManager.FileManagerBase import FileManagerBase
 from DIRAC.Core.Utilities.List import stringListToString, intListToString, breakListIntoChunks
+from DIRAC.Core.Utilities.MySQL import STREAM_BATCH_SIZE
 
 # The logic of some methods is basically a copy/paste from the FileManager class,
 # so I could have inherited from it. However, I did not want to depend on it
 
 
 class FileManagerPs(FileManagerBase):
+    # The stored procedures inserting the files and the replicas commit their own transactions,
+    # which would commit the transaction of a whole chunk
+    supportsBulkTransactions = False
+
     def __init__(self, database=None):
         super().__init__(database)
+        if getattr(database, "bulkInsertChunkSize", 0):
+            gLogger.warn("BulkInsertChunkSize is ignored", "the FileManagerPs cannot add the files in transactions")
 
     ######################################################
     #
@@ -931,3 +938,26 @@ class FileManagerPs(FileManagerBase):
         formatedSEIds = intListToString(seIDs)
 
         return self.db.executeStoredProcedureWithCursor("ps_get_se_dump", (formatedSEIds,))
+
+    def iterSEDump(self, seNames, batchSize=STREAM_BATCH_SIZE):
+        """
+         Same as getSEDump, but the files are read from the DB by batches,
+         with a server side cursor, instead of being all loaded in memory
+
+        :param seNames: list of StorageElement names
+        :param int batchSize: maximum number of files per batch
+
+        :returns: generator of S_OK with tuples of (SEName, lfn, checksum, size).
+                  The last item is an S_ERROR in case of error
+        """
+
+        seIDs = []
+
+        for seName in seNames:
+            res = self.db.seManager.findSE(seName)
+            if not res["OK"]:
+                yield res
+                return
+            seIDs.append(res["Value"])
+
+        yield from self.db.iterStoredProcedure("ps_get_se_dump", (intListToString(seIDs),), batchSize)
@@ -592,12 +592,13 @@ class FileMetadata:
 
         return S_OK(resultList)
 
-    def __findFilesByMetadata(self, metaDict, dirList, credDict):
+    def __findFilesByMetadata(self, metaDict, dirList, credDict, since=None):
         """Find a list of file IDs meeting the metaDict requirements and belonging
         to directories in dirList
 
         :param dict metaDict: dictionary with the file metadata
         :param list dirList: list of directories to look into
+        :param int since: if set, only the files with a greater FileID
 
         :return: S_OK/S_ERROR, Value - list of IDs of found files
         """
@@ -646,6 +647,8 @@ class FileMetadata:
         if dirList:
             dirString = intListToString(dirList)
             conditions.append(f"F.DirID in ({dirString})")
+        if since:
+            conditions.append("F.FileID > %d" % since)
 
         counter = 0
         for table, condition in tablesAndConditions:
@@ -683,18 +686,33 @@ class FileMetadata:
         return S_OK(fileList)
 
     @queryTime
-    def findFilesByMetadata(self, metaDict, path, credDict):
+    def findFilesByMetadata(self, metaDict, path, credDict, since=None):
         """Find Files satisfying the given metadata
 
+        The FileIDs are used as watermark for incremental queries: with since, only the files with a greater
+        FileID are returned, and the result contains a Watermark, the greatest FileID before the query.
+        The FileIDs are allocated when the files are inserted, not when they are committed, so a file with
+        a lower FileID than a Watermark may only become visible after the query which returned it. To not miss
+        such files, the next queries must overlap, e.g. by giving as since the Watermark of the query before
+        the last one, and tolerate getting some files twice.
+
         :param dict metaDict: dictionary with the metaquery parameters
         :param str path: Path to search into
         :param dict credDict: Dictionary with the user credentials
+        :param int since: if not None, only the files with a greater FileID
 
         :return: S_OK/S_ERROR, Value ID:LFN dictionary of selected files
         """
         if not path:
             path = "/"
 
+        watermark = None
+        if since is not None:
+            result = self.db._query("SELECT MAX(FileID) FROM FC_Files")
+            if not result["OK"]:
+                return result
+            watermark = max(since, result["Value"][0][0] or 0)
+
         # 1.- Get Directories matching the metadata query
         result = self.db.dmeta.findDirIDsByMetadata(metaDict, path, credDict)
         if not result["OK"]:
@@ -721,16 +739,16 @@ class FileMetadata:
 
             if fileMetaDict:
                 # 3.- Do search in File Metadata
-                result = self.__findFilesByMetadata(fileMetaDict, dirList, credDict)
+                result = self.__findFilesByMetadata(fileMetaDict, dirList, credDict, since)
                 if not result["OK"]:
                     return result
                 fileList = result["Value"]
             elif dirList:
                 # 4.- if not File Metadata, return the list of files in given directories
-                result = self.db.dtree.getFileLFNsInDirectoryByDirectory(dirList, credDict)
+                result = self.db.dtree.getFileLFNsInDirectoryByDirectory(dirList, credDict, since)
                 if not result["OK"]:
                     return result
-                return S_OK(result["Value"]["IDLFNDict"])
+                idLfnDict = result["Value"]["IDLFNDict"]
             else:
                 # if there is no File Metadata and no Dir Metadata, return an empty list
                 idLfnDict = {}
@@ -742,4 +760,7 @@ class FileMetadata:
                 return result
             idLfnDict = result["Value"]["Successful"]
 
-        return S_OK(idLfnDict)
+        result = S_OK(idLfnDict)
+        if watermark is not None:
+            result["Watermark"] = watermark
+        return result
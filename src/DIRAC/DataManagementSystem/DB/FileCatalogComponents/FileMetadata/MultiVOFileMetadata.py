@@ -117,15 +117,16 @@ class MultiVOFileMetadata(FileMetadata):
         result["Value"] = _stripSuffix(result["Value"], credDict)
         return result
 
-    def findFilesByMetadata(self, metaDict, path, credDict):
+    def findFilesByMetadata(self, metaDict, path, credDict, since=None):
         """Find Files satisfying the given metadata
 
         :param dict metaDict: dictionary with the metaquery parameters
         :param str path: Path to search into
         :param dict credDict: Dictionary with the user credentials
+        :param int since: if not None, only the files with a greater FileID, see FileMetadata.findFilesByMetadata
 
         :return: S_OK/S_ERROR, Value ID:LFN dictionary of selected files
         """
 
         fMetaDict = _getMetaNameDict(metaDict, credDict)
-        return super().findFilesByMetadata(fMetaDict, path, credDict)
+        return super().findFilesByMetadata(fMetaDict, path, credDict, since)
@@ -0,0 +1,169 @@
+""" DIRAC FileCatalog in memory map between the IDs and the names of the SEs, users and groups
+
+    The catalog tables only store the IDs of the storage elements, users and groups, which are
+    translated to names for every replica or file returned. The IDNameMap keeps these few names
+    in memory for all the threads of the service: the names are in a list indexed by ID, as the
+    IDs are small auto-incremented integers, and the IDs in a dictionary indexed by name.
+    The list and the dictionary are never modified once in use: each change is done on copies,
+    which replace them at once, so that the threads reading the map without lock always see
+    a consistent state. The map is used as is in place of the name to ID dictionaries of the DB,
+    seNames, users and groups.
+
+    The map has a version, incremented by each change, so that its users can notice changes.
+    The content of the table is identified by its number of rows and its highest ID: if they did
+    not change, there is nothing to reload, and rows added by other instances of the service are
+    read by querying only the IDs above the highest known one. The table is only reloaded
+    entirely when rows were removed.
+"""
+import threading
+
+from DIRAC import S_OK
+
+
+class IDNameMap:
+    """Thread safe two-way map between the IDs and the names of the rows of a table"""
+
+    def __init__(self, table, idColumn, nameColumn):
+        """C'tor
+
+        :param str table: table holding the IDs and names
+        :param str idColumn: auto-incremented ID column
+        :param str nameColumn: unique name column
+        """
+        self.table = table
+        self.idColumn = idColumn
+        self.nameColumn = nameColumn
+        self.lock = threading.Lock()
+        # Names indexed by ID, None for the unused IDs
+        self.names = []
+        # IDs indexed by name
+        self.ids = {}
+        # Incremented by each change of the map
+        self.version = 0
+        # Number of rows and highest ID of the table when the map was last synchronized with it
+        self.tableVersion = (0, 0)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def set(self, id_, name):
+        """Add or update an entry of the map"""
+        with self.lock:
+            names, ids = list(self.names), dict(self.ids)
+            self.__set(names, ids, id_, name)
+            self.names, self.ids = names, ids
+            self.version += 1
+
+    @staticmethod
+    def __set(names, ids, id_, name):
+        """Set an entry in copies of the list of names and of the dictionary of IDs"""
+        if id_ >= len(names):
+            names.extend([None] * (id_ + 1 - len(names)))
+        oldName = names[id_]
+        if oldName is not None and ids.get(oldName) == id_:
+            del ids[oldName]
+        names[id_] = name
+        ids[name] = id_
+
+    def remove(self, name):
+        """Remove the entry of a name from the map"""
+        with self.lock:
+            id_ = self.ids.get(name)
+            if id_ is not None:
+                names, ids = list(self.names), dict(self.ids)
+                names[id_] = None
+                del ids[name]
+                self.names, self.ids = names, ids
+                self.version += 1
+
+    def clear(self):
+        """Empty the map"""
+        with self.lock:
+            self.names, self.ids = [], {}
+            self.tableVersion = (0, 0)
+            self.version += 1
+
+    def getName(self, id_, default=None):
+        """Get the name of an ID, or default if it is unknown"""
+        names = self.names
+        if isinstance(id_, int) and 0 <= id_ < len(names) and names[id_] is not None:
+            return names[id_]
+        return default
+
+    def getID(self, name, default=None):
+        """Get the ID of a name, or default if it is unknown"""
+        return self.ids.get(name, default)
+
+    # To be used like the dictionary of IDs indexed by name
+    get = getID
+
+    def getNames(self, ids, default=None):
+        """Translate a whole column of IDs to names
+
+        :param ids: iterable of IDs
+        :param default: name given to the unknown IDs
+
+        :return: list of names, in the same order as the IDs
+        """
+        names = self.names
+        nbNames = len(names)
+        return [
+            names[id_] if isinstance(id_, int) and 0 <= id_ < nbNames and names[id_] is not None else default
+            for id_ in ids
+        ]
+
+    def getIDs(self, names, default=None):
+        """Translate a whole column of names to IDs
+
+        :param names: iterable of names
+        :param default: ID given to the unknown names
+
+        :return: list of IDs, in the same order as the names
+        """
+        ids = self.ids
+        return [ids.get(name, default) for name in names]
+
+    def getUnknownIDs(self, ids):
+        """Get the IDs of a column which are not in the map"""
+        return {id_ for id_, name in zip(ids, self.getNames(ids)) if name is None}
+
+    def refresh(self, db, connection=False):
+        """Synchronize the map with the table if it changed since the last time
+
+        :param db: database holding the table
+        :param connection: connection to use
+
+        :return: S_OK(bool) telling whether the map was changed
+        """
+        req = f"SELECT COUNT(*), COALESCE(MAX({self.idColumn}), 0) FROM {self.table}"
+        res = db._query(req, conn=connection)
+        if not res["OK"]:
+            return res
+        tableVersion = tuple(int(value) for value in res["Value"][0])
+
+        with self.lock:
+            if tableVersion == self.tableVersion:
+                return S_OK(False)
+            req = f"SELECT {self.idColumn}, {self.nameColumn} FROM {self.table}"
+            # Rows were only added, most likely: only read the new ones
+            incremental = (
+                self.tableVersion is not None
+                and tableVersion[0] >= self.tableVersion[0]
+                and tableVersion[1] > self.tableVersion[1]
+            )
+            if incremental:
+                req += f" WHERE {self.idColumn} > {self.tableVersion[1]}"
+            res = db._query(req, conn=connection)
+            if not res["OK"]:
+                return res
+            names, ids = (list(self.names), dict(self.ids)) if incremental else ([], {})
+            for id_, name in res["Value"]:
+                self.__set(names, ids, id_, name)
+            self.names, self.ids = names, ids
+            self.version += 1
+            # If some rows were also removed, everything is reloaded next time
+            self.tableVersion = tableVersion if len(self.ids) == tableVersion[0] else None
+        return S_OK(True)
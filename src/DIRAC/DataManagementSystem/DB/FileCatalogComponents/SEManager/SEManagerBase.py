@@ -2,6 +2,7 @@
 import threading
 
 from DIRAC import S_ERROR
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.IDNameMap import IDNameMap
 
 
 class SEManagerBase:
@@ -12,9 +13,10 @@ class SEManagerBase:
 
     def __init__(self, database=None):
         self.db = database
+        # Map between the SE IDs and names, shared by all the threads
+        self.seMap = IDNameMap("FC_StorageElements", "SEID", "SEName")
         if self.db:
-            self.db.seNames = {}
-            self.db.seids = {}
+            self.db.seNames = self.seMap
         self.lock = threading.Lock()
         self.seUpdatePeriod = 600
 
@@ -27,6 +29,6 @@ class SEManagerBase:
 
     def setDatabase(self, database):
         self.db = database
-        self.db.seNames = {}
-        self.db.seids = {}
+        self.seMap.clear()
+        self.db.seNames = self.seMap
         self._refreshSEs()
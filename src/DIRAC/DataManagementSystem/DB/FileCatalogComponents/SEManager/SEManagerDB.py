@@ -9,40 +9,13 @@ from DIRAC.DataManagementSystem.DB.FileCatalogComponents.SEManager.SEManagerBase
 
 class SEManagerDB(SEManagerBase):
     def _refreshSEs(self, connection=False):
-        req = "SELECT SEID,SEName FROM FC_StorageElements;"
-        res = self.db._query(req)
+        """Read the SEs added or removed since the last refresh"""
+        res = self.seMap.refresh(self.db, connection=connection)
         if not res["OK"]:
             return res
-        seNames = {se[1] for se in res["Value"]}
-
-        # If there are no changes between the DB and the cache
-        # and we updated the cache recently enough, just return
-        if seNames == set(self.db.seNames) and ((time.time() - self.lastUpdate) < self.seUpdatePeriod):
-            return S_OK()
-
-        startTime = time.time()
-        self.lock.acquire()
-        waitTime = time.time()
-        gLogger.debug(f"SEManager RefreshSEs lock created. Waited {waitTime - startTime:.3f} seconds.")
-
-        # Check once more the lastUpdate because it could have been updated while we were waiting for the lock
-        if (time.time() - self.lastUpdate) < self.seUpdatePeriod:
-            self.lock.release()
-            return S_OK()
-
-        for seName, seId in list(self.db.seNames.items()):
-            if seName not in seNames:
-                del self.db.seNames[seName]
-                del self.db.seids[seId]
-
-        for seid, seName in res["Value"]:
-            self.db.seNames[seName] = seid
-            self.db.seids[seid] = seName
-        gLogger.debug(f"SEManager RefreshSEs lock released. Used {time.time() - waitTime:.3f} seconds.")
-
-        # Update the lastUpdate time
+        if res["Value"]:
+            gLogger.debug("SEManager RefreshSEs", f"{len(self.seMap)} SEs, version {self.seMap.version}")
         self.lastUpdate = time.time()
-        self.lock.release()
         return S_OK()
 
     def _getConnection(self, connection):
@@ -59,8 +32,8 @@ class SEManagerDB(SEManagerBase):
         self.lock.acquire()
         waitTime = time.time()
         gLogger.debug(f"SEManager AddSE lock created. Waited {waitTime - startTime:.3f} seconds. {seName}")
-        if seName in self.db.seNames.keys():
-            seid = self.db.seNames[seName]
+        seid = self.seMap.getID(seName)
+        if seid is not None:
             gLogger.debug(f"SEManager AddSE lock released. Used {time.time() - waitTime:.3f} seconds. {seName}")
             self.lock.release()
             return S_OK(seid)
@@ -73,13 +46,12 @@ class SEManagerDB(SEManagerBase):
                 result = self._refreshSEs(connection)
                 if not result["OK"]:
                     return result
-                if seName in self.db.seNames.keys():
-                    seid = self.db.seNames[seName]
+                seid = self.seMap.getID(seName)
+                if seid is not None:
                     return S_OK(seid)
             return res
         seid = res["lastRowId"]
-        self.db.seids[seid] = seName
-        self.db.seNames[seName] = seid
+        self.seMap.set(seid, seName)
         gLogger.debug(f"SEManager AddSE lock released. Used {time.time() - waitTime:.3f} seconds. {seName}")
         self.lock.release()
         return S_OK(seid)
@@ -90,16 +62,13 @@ class SEManagerDB(SEManagerBase):
         self.lock.acquire()
         waitTime = time.time()
         gLogger.debug(f"SEManager RemoveSE lock created. Waited {waitTime - startTime:.3f} seconds. {seName}")
-        seid = self.db.seNames.get(seName, "Missing")
         req = f"DELETE FROM FC_StorageElements WHERE SEName='{seName}'"
         res = self.db._update(req, conn=connection)
         if not res["OK"]:
             gLogger.debug(f"SEManager RemoveSE lock released. Used {time.time() - waitTime:.3f} seconds. {seName}")
             self.lock.release()
             return res
-        if seid != "Missing":
-            self.db.seNames.pop(seName)
-            self.db.seids.pop(seid)
+        self.seMap.remove(seName)
         gLogger.debug(f"SEManager RemoveSE lock released. Used {time.time() - waitTime:.3f} seconds. {seName}")
         self.lock.release()
         return S_OK()
@@ -111,8 +80,9 @@ class SEManagerDB(SEManagerBase):
         """Get ID for a SE specified by its name"""
         if isinstance(seName, int):
             return S_OK(seName)
-        if seName in self.db.seNames.keys():
-            return S_OK(self.db.seNames[seName])
+        seid = self.seMap.getID(seName)
+        if seid is not None:
+            return S_OK(seid)
         return self.__addSE(seName)
 
     def addSE(self, seName):
@@ -126,18 +96,38 @@ class SEManagerDB(SEManagerBase):
         :param int seID: ID of a storage element
         :return: S_OK/S_ERROR
         """
-        if seID in self.db.seids:
-            return S_OK(self.db.seids[seID])
+        seName = self.seMap.getName(seID)
+        if seName is not None:
+            return S_OK(seName)
         gLogger.info("getSEName: seID not found, refreshing", f"ID: {seID}")
         result = self._refreshSEs(connection=False)
         if not result["OK"]:
             gLogger.error("getSEName: refreshing failed", result["Message"])
             return result
-        if seID in self.db.seids:
-            return S_OK(self.db.seids[seID])
+        seName = self.seMap.getName(seID)
+        if seName is not None:
+            return S_OK(seName)
         gLogger.error("getSEName: seID not found after refreshing", f"ID: {seID}")
         return S_ERROR("SE id %d not found" % seID)
 
+    def getSENames(self, seIDs):
+        """Translate a column of SE IDs to names at once.
+
+        The SEs are refreshed once if some IDs are unknown, an SE might have been added by a different FileCatalog instance.
+
+        :param seIDs: iterable of SE IDs
+        :return: S_OK with the list of names, None for the IDs not found
+        """
+        seIDs = list(seIDs)
+        unknown = self.seMap.getUnknownIDs(seIDs)
+        if unknown:
+            gLogger.info("getSENames: seIDs not found, refreshing", f"IDs: {sorted(unknown, key=str)}")
+            result = self._refreshSEs(connection=False)
+            if not result["OK"]:
+                gLogger.error("getSENames: refreshing failed", result["Message"])
+                return result
+        return S_OK(self.seMap.getNames(seIDs))
+
     def deleteSE(self, seName, force=True):
         # ToDo: Check first if there are replicas using this SE
         if not force:
@@ -10,6 +10,7 @@ from DIRAC.DataManagementSystem.DB.FileCatalogComponents.SecurityManager.Securit
     _readMethods,
     _writeMethods,
 )
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.Utilities import getModePermissions
 from DIRAC.Core.Utilities.ReturnValues import returnSingleResult
 
 
@@ -30,6 +31,9 @@ class VOMSSecurityManager(SecurityManagerBase):
         self.CACHE_TIME = datetime.timedelta(seconds=600)
         self.__buildRolesAndGroups()
 
+        # Evaluate the permissions of all the paths of a request at once rather than path per path
+        self.bulkPermissions = True
+
     def __buildRolesAndGroups(self):
         """Rebuild the cache dictionary for VOMS roles and DIRAC Groups"""
 
@@ -146,6 +150,11 @@ class VOMSSecurityManager(SecurityManagerBase):
         :returns: Successful dictionary with True of False, and Failed.
         """
 
+        if self.bulkPermissions:
+            return self.__selectPermission(
+                self.__getFilesPermissions(paths, credDict, noExistStrategy=noExistStrategy), permission
+            )
+
         successful = {}
         failed = {}
 
@@ -180,7 +189,7 @@ class VOMSSecurityManager(SecurityManagerBase):
             return S_ERROR("Empty path")
 
         # We check what is the group stored in the DB for the given path
-        res = self.db.dtree.getDirectoryParameters(path)
+        res = self.db.dtree.getDirectoryPermissionParameters(path)
         if not res["OK"]:
             # If the error is not due to the directory not existing, we return
 
@@ -234,6 +243,12 @@ class VOMSSecurityManager(SecurityManagerBase):
         :returns: Successful dictionary with True of False, and Failed.
         """
 
+        if self.bulkPermissions:
+            return self.__selectPermission(
+                self.__getDirectoriesPermissions(paths, credDict, recursive=recursive, noExistStrategy=noExistStrategy),
+                permission,
+            )
+
         successful = {}
         failed = {}
 
@@ -336,6 +351,14 @@ class VOMSSecurityManager(SecurityManagerBase):
         :returns: Successful dictionary with True of False, and Failed.
         """
 
+        if self.bulkPermissions:
+            return self.__selectPermission(
+                self.__getFilesOrDirectoriesPermissions(
+                    paths, credDict, recursive=recursive, noExistStrategy=noExistStrategy
+                ),
+                permission,
+            )
+
         successful = {}
         failed = {}
 
@@ -350,6 +373,181 @@ class VOMSSecurityManager(SecurityManagerBase):
 
         return S_OK({"Successful": successful, "Failed": failed})
 
+    def __getModePermissions(self, parameters, credDict, isFile=False):
+        """Evaluates in memory the POSIX permissions of a file or directory using the VOMS roles.
+        That is, if the owner group of the path shares the same vomsRole as the requesting user,
+        the user is considered as a member of the owner group.
+
+        :param parameters : dictionary with the Owner, OwnerGroup and Mode of the path
+        :param credDict : credential of the user
+        :param isFile : the path is a file, for which only the bits of the first class
+                        the user belongs to (owner, group or others) are considered
+
+        :returns dictionary ( Read/Write/Execute : True/False)
+        """
+        group = credDict.get("group", "anon")
+        origGrp = parameters.get("OwnerGroup", "unknown")
+        isOwner = parameters.get("Owner") == credDict.get("username", "anon")
+        isGroup = origGrp == group or bool(self.__shareVomsRole(group, origGrp))
+
+        permissions = getModePermissions(parameters["Mode"], isOwner, isGroup, firstClassOnly=isFile)
+        if not isFile and self.db.globalReadAccess:
+            permissions["Read"] = True
+        return permissions
+
+    def __getFilesPermissions(self, paths, credDict, noExistStrategy=None):
+        """Bulk version of __getFilePermission: the metadata of all the files are fetched at once
+        and the permissions are evaluated in memory
+
+        :param paths : list/dict of file paths
+        :param credDict : credential of the user
+        :param noExistStrategy : If the file does not exist, we can
+                                 * True : allow the access
+                                 * False : forbid the access
+                                 * None : return the error as is
+
+        :returns: Successful dictionary with the ( Read/Write/Execute : True/False) dictionaries, and Failed.
+        """
+
+        successful = {}
+        failed = {}
+
+        lfns = []
+        for path in paths:
+            if path:
+                lfns.append(path)
+            else:
+                failed[path] = "Empty path"
+        if not lfns:
+            return S_OK({"Successful": successful, "Failed": failed})
+
+        res = self.db.fileManager.getFileMetadata(lfns)
+        if not res["OK"]:
+            return res
+
+        for path, error in res["Value"]["Failed"].items():
+            if noExistStrategy is not None and self.__isNotExistError(error):
+                successful[path] = dict.fromkeys(["Read", "Write", "Execute"], noExistStrategy)
+            else:
+                failed[path] = error
+
+        for path, metadata in res["Value"]["Successful"].items():
+            successful[path] = self.__getModePermissions(metadata, credDict, isFile=True)
+
+        return S_OK({"Successful": successful, "Failed": failed})
+
+    def __getDirectoriesPermissions(self, paths, credDict, recursive=True, noExistStrategy=None):
+        """Bulk version of __getDirectoryPermission: the parameters of all the distinct directories
+        are fetched at once, then those of the parents of the non existing ones, level by level,
+        and the permissions are evaluated in memory
+
+        :param paths : list/dict of directory paths
+        :param credDict : credential of the user
+        :param recursive : if a directory does not exist, checks the parent one
+        :param noExistStrategy : If the directory does not exist, we can
+                                 * True : allow the access
+                                 * False : forbid the access
+                                 * None : return the error as is
+
+               noExistStrategy makes sense only if recursive is False
+
+        :returns: Successful dictionary with the ( Read/Write/Execute : True/False) dictionaries, and Failed.
+        """
+
+        successful = {}
+        failed = {}
+
+        # Directory whose permissions apply to each path: itself, or its nearest existing parent
+        toCheck = {}
+        for path in paths:
+            if path:
+                toCheck[path] = path
+            else:
+                failed[path] = "Empty path"
+
+        while toCheck:
+            res = self.db.dtree.getDirectoriesPermissionParameters(list(set(toCheck.values())))
+            if not res["OK"]:
+                return res
+            parametersDict = res["Value"]
+
+            parentsToCheck = {}
+            for path, dirName in toCheck.items():
+                if dirName in parametersDict:
+                    successful[path] = self.__getModePermissions(parametersDict[dirName], credDict)
+                # Very special case to allow creation of very first entry
+                elif dirName == "/":
+                    successful[path] = dict.fromkeys(["Read", "Write", "Execute"], True)
+                elif recursive:
+                    parentDir = os.path.dirname(dirName)
+                    if not parentDir:
+                        failed[path] = "Empty path"
+                    elif parentDir == dirName:
+                        failed[path] = "Bad Path (double /?)"
+                    else:
+                        parentsToCheck[path] = parentDir
+                elif noExistStrategy is None:
+                    failed[path] = "Directory not found"
+                else:
+                    successful[path] = dict.fromkeys(["Read", "Write", "Execute"], noExistStrategy)
+            toCheck = parentsToCheck
+
+        return S_OK({"Successful": successful, "Failed": failed})
+
+    def __getFilesOrDirectoriesPermissions(self, paths, credDict, recursive=False, noExistStrategy=None):
+        """Bulk version of __getFileOrDirectoryPermission: the paths are first considered as files,
+        and those which do not exist as directories
+
+        :param paths : list/dict of directory or file paths
+        :param credDict : credential of the user
+        :param recursive : if that directory does not exist, checks the parent one
+        :param noExistStrategy : If the directory does not exist, we can
+                                 * True : allow the access
+                                 * False : forbid the access
+                                 * None : return the error as is
+
+               noExistStrategy makes sense only if recursive is False
+
+        :returns: Successful dictionary with the ( Read/Write/Execute : True/False) dictionaries, and Failed.
+        """
+        # We want to know which files do not exist, so we force noExistStrategy to None
+        res = self.__getFilesPermissions(paths, credDict, noExistStrategy=None)
+        if not res["OK"]:
+            return res
+        successful = res["Value"]["Successful"]
+        failed = {}
+        notFiles = []
+        for path, error in res["Value"]["Failed"].items():
+            if self.__isNotExistError(error):
+                notFiles.append(path)
+            else:
+                failed[path] = error
+
+        # The noExistStrategy is applied by __getDirectoriesPermissions
+        res = self.__getDirectoriesPermissions(notFiles, credDict, recursive=recursive, noExistStrategy=noExistStrategy)
+        if not res["OK"]:
+            return res
+        successful.update(res["Value"]["Successful"])
+        failed.update(res["Value"]["Failed"])
+
+        return S_OK({"Successful": successful, "Failed": failed})
+
+    @staticmethod
+    def __selectPermission(res, permission):
+        """Keeps only the given permission from the result of a bulk permission evaluation
+
+        :param res : S_OK structure with Successful dictionary of ( Read/Write/Execute : True/False) dictionaries
+        :param permission : Read/Write/Execute string
+
+        :returns: Successful dictionary with True of False, and Failed.
+        """
+        if not res["OK"]:
+            return res
+        successful = {
+            path: permissions.get(permission, False) for path, permissions in res["Value"]["Successful"].items()
+        }
+        return S_OK({"Successful": successful, "Failed": res["Value"]["Failed"]})
+
     def __policyRemoveDirectory(self, paths, credDict):
         """Tests whether the remove operation on directories
         is permitted.
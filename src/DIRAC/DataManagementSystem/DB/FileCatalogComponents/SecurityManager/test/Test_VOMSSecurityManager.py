@@ -8,6 +8,11 @@ import stat
 from unittest import mock
 from DIRAC import S_OK, S_ERROR
 import DIRAC.DataManagementSystem.DB.FileCatalogComponents.SecurityManager.VOMSSecurityManager
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.SecurityManager.SecurityManagerBase import (
+    _readMethods,
+    _writeMethods,
+)
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.Utilities import getModePermissions
 
 # This just defines a few groups with their VOMSRole
 diracGrps = {
@@ -104,9 +109,22 @@ class mock_DirectoryManager:
     def exists(self, lfns):
         return S_OK({"Successful": {lfn: lfn in directoryTree for lfn in lfns}, "Failed": {}})
 
-    def getDirectoryParameters(self, path):
+    def getDirectoryPermissionParameters(self, path):
         return S_OK(directoryTree[path]) if path in directoryTree else S_ERROR("Directory not found")
 
+    def getDirectoriesPermissionParameters(self, paths):
+        return S_OK(
+            {
+                path: {
+                    "Owner": directoryTree[path]["owner"],
+                    "OwnerGroup": directoryTree[path]["OwnerGroup"],
+                    "Mode": directoryTree[path]["mode"],
+                }
+                for path in paths
+                if path in directoryTree
+            }
+        )
+
     def getDirectoryPermissions(self, path, credDict):
         if path not in directoryTree:
             return S_ERROR("Directory not found")
@@ -190,21 +208,8 @@ class mock_FileManager:
             group = credDict["group"] == fileTree[filename]["OwnerGroup"]
             mode = fileTree[filename]["mode"]
 
-            resultDict = {}
-
-            resultDict["Read"] = (
-                (owner and mode & stat.S_IRUSR > 0) or (group and mode & stat.S_IRGRP > 0) or mode & stat.S_IROTH > 0
-            )
-
-            resultDict["Write"] = (
-                (owner and mode & stat.S_IWUSR > 0) or (group and mode & stat.S_IWGRP > 0) or mode & stat.S_IWOTH > 0
-            )
-
-            resultDict["Execute"] = (
-                (owner and mode & stat.S_IXUSR > 0) or (group and mode & stat.S_IXGRP > 0) or mode & stat.S_IXOTH > 0
-            )
-
-            successful[filename] = resultDict
+            # As in the FileManager, only the bits of the first class the user belongs to count
+            successful[filename] = getModePermissions(mode, owner, group, firstClassOnly=True)
 
         return S_OK({"Successful": successful, "Failed": failed})
 
@@ -393,6 +398,18 @@ class BaseCaseMixin:
         self.callForFiles("addReplica")
         self.compareResult()
 
+    def test_bulkPermissions(self):
+        """The bulk evaluation of the permissions gives the same result as the path per path one"""
+
+        paths = list(directoryTree) + nonExistingDirectories + list(fileTree) + nonExistingFiles
+        for methodName in _readMethods + _writeMethods:
+            self.securityManager.bulkPermissions = True
+            bulkRet = self.securityManager.hasAccess(methodName, paths, self.credDict)
+            self.securityManager.bulkPermissions = False
+            perPathRet = self.securityManager.hasAccess(methodName, paths, self.credDict)
+            self.assertEqual(bulkRet["OK"], perPathRet["OK"], methodName)
+            self.assertEqual(bulkRet.get("Value"), perPathRet.get("Value"), methodName)
+
 
 class TestNonExistingUser(BaseCaseMixin, unittest.TestCase):
     """As anonymous user and no group"""
@@ -1295,7 +1312,7 @@ class TestDataGrpUsr1User(BaseCaseMixin, unittest.TestCase):
         existingDic = {
             "/atTheRoot.txt": True,
             "/realData/run1/run1_data.txt": True,
-            "/realData/run2/run2_data.txt": True,
+            "/realData/run2/run2_data.txt": False,  # Group has 0, the bits of others do not apply to the group
             "/realData/run3/run3_data.txt": True,
             "/users/usr1/usr1_file.txt": True,
             "/users/usr1/sub1/usr1_secret.txt": True,  # usr1_secret.txt is 700
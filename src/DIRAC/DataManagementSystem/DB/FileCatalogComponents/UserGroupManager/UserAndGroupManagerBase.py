@@ -30,3 +30,21 @@ class UserAndGroupManagerBase:
         if Properties.FC_MANAGEMENT in credDict["properties"]:
             return S_OK(True)
         return S_OK(False)
+
+    def getUserNames(self, uids):
+        """Translate a column of user ids to names, None for the ids not found"""
+        uids = list(uids)
+        names = {}
+        for uid in set(uids):
+            result = self.getUserName(uid)
+            names[uid] = result["Value"] if result["OK"] else None
+        return S_OK([names[uid] for uid in uids])
+
+    def getGroupNames(self, gids):
+        """Translate a column of group ids to names, None for the ids not found"""
+        gids = list(gids)
+        names = {}
+        for gid in set(gids):
+            result = self.getGroupName(gid)
+            names[gid] = result["Value"] if result["OK"] else None
+        return S_OK([names[gid] for gid in gids])
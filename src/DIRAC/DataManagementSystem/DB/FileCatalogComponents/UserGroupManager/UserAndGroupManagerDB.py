@@ -4,12 +4,31 @@ import time
 import threading
 
 from DIRAC import S_OK, S_ERROR, gConfig, gLogger
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.IDNameMap import IDNameMap
 from DIRAC.DataManagementSystem.DB.FileCatalogComponents.UserGroupManager.UserAndGroupManagerBase import (
     UserAndGroupManagerBase,
 )
 
 
 class UserAndGroupManagerDB(UserAndGroupManagerBase):
+    def __init__(self, database=None):
+        # Maps between the user and group IDs and names, shared by all the threads
+        self.userMap = IDNameMap("FC_Users", "UID", "UserName")
+        self.groupMap = IDNameMap("FC_Groups", "GID", "GroupName")
+        if database:
+            database.users = self.userMap
+            database.groups = self.groupMap
+        super().__init__(database)
+
+    def setDatabase(self, database):
+        super().setDatabase(database)
+        self.userMap.clear()
+        self.groupMap.clear()
+        self.db.users = self.userMap
+        self.db.groups = self.groupMap
+        self._refreshUsers()
+        self._refreshGroups()
+
     def getUserAndGroupID(self, credDict):
         """Get a uid, gid tuple for the given Credentials"""
         # Get the user
@@ -36,8 +55,9 @@ class UserAndGroupManagerDB(UserAndGroupManagerBase):
         """Get ID for a user specified by its name"""
         if isinstance(user, int):
             return S_OK(user)
-        if user in self.db.users.keys():
-            return S_OK(self.db.users[user])
+        uid = self.userMap.getID(user)
+        if uid is not None:
+            return S_OK(uid)
         return self.__addUser(user)
 
     def addUser(self, uname):
@@ -46,17 +66,36 @@ class UserAndGroupManagerDB(UserAndGroupManagerBase):
 
     def getUsers(self):
         # self.__refreshUsers()
-        return S_OK(self.db.users)
+        return S_OK(dict(self.userMap.ids))
 
     def findUser(self, user):
         return self.getUserID(user)
 
     def getUserName(self, uid):
-        """Get user name for the given id"""
-        if uid in self.db.uids.keys():
-            return S_OK(self.db.uids[uid])
+        """Get user name for the given id, refreshing the users if it is not known yet"""
+        uname = self.userMap.getName(uid)
+        if uname is None:
+            result = self._refreshUsers()
+            if not result["OK"]:
+                return result
+            uname = self.userMap.getName(uid)
+        if uname is not None:
+            return S_OK(uname)
         return S_ERROR("User id %d not found" % uid)
 
+    def getUserNames(self, uids):
+        """Translate a column of user ids to names at once
+
+        :param uids: iterable of user ids
+        :return: S_OK with the list of names, None for the ids not found
+        """
+        uids = list(uids)
+        if self.userMap.getUnknownIDs(uids):
+            result = self._refreshUsers()
+            if not result["OK"]:
+                return result
+        return S_OK(self.userMap.getNames(uids))
+
     def deleteUser(self, uname, force=True):
         """Delete a user specified by its name"""
         # ToDo: Check first if there are files belonging to the user
@@ -69,8 +108,8 @@ class UserAndGroupManagerDB(UserAndGroupManagerBase):
         self.lock.acquire()
         waitTime = time.time()
         gLogger.debug(f"UserGroupManager AddUser lock created. Waited {waitTime - startTime:.3f} seconds. {uname}")
-        if uname in self.db.users.keys():
-            uid = self.db.users[uname]
+        uid = self.userMap.getID(uname)
+        if uid is not None:
             gLogger.debug(f"UserGroupManager AddUser lock released. Used {time.time() - waitTime:.3f} seconds. {uname}")
             self.lock.release()
             return S_OK(uid)
@@ -82,13 +121,12 @@ class UserAndGroupManagerDB(UserAndGroupManagerBase):
                 result = self._refreshUsers()
                 if not result["OK"]:
                     return result
-                if uname in self.db.users.keys():
-                    uid = self.db.users[uname]
+                uid = self.userMap.getID(uname)
+                if uid is not None:
                     return S_OK(uid)
             return res
         uid = res["lastRowId"]
-        self.db.uids[uid] = uname
-        self.db.users[uname] = uid
+        self.userMap.set(uid, uname)
         gLogger.debug(f"UserGroupManager AddUser lock released. Used {time.time() - waitTime:.3f} seconds. {uname}")
         self.lock.release()
         return S_OK(uid)
@@ -98,7 +136,6 @@ class UserAndGroupManagerDB(UserAndGroupManagerBase):
         self.lock.acquire()
         waitTime = time.time()
         gLogger.debug(f"UserGroupManager RemoveUser lock created. Waited {waitTime - startTime:.3f} seconds. {uname}")
-        uid = self.db.users.get(uname, "Missing")
         req = f"DELETE FROM FC_Users WHERE UserName='{uname}'"
         res = self.db._update(req)
         if not res["OK"]:
@@ -107,32 +144,18 @@ class UserAndGroupManagerDB(UserAndGroupManagerBase):
             )
             self.lock.release()
             return res
-        if uid != "Missing":
-            self.db.users.pop(uname)
-            self.db.uids.pop(uid)
+        self.userMap.remove(uname)
         gLogger.debug(f"UserGroupManager RemoveUser lock released. Used {time.time() - waitTime:.3f} seconds. {uname}")
         self.lock.release()
         return S_OK()
 
     def _refreshUsers(self):
-        """Get the current user IDs and names"""
-        startTime = time.time()
-        self.lock.acquire()
-        waitTime = time.time()
-        gLogger.debug(f"UserGroupManager RefreshUsers lock created. Waited {waitTime - startTime:.3f} seconds.")
-        req = "SELECT UID,UserName from FC_Users"
-        res = self.db._query(req)
+        """Read the users added or removed since the last refresh"""
+        res = self.userMap.refresh(self.db)
         if not res["OK"]:
-            gLogger.debug(f"UserGroupManager RefreshUsers lock released. Used {time.time() - waitTime:.3f} seconds.")
-            self.lock.release()
             return res
-        self.db.users = {}
-        self.db.uids = {}
-        for uid, uname in res["Value"]:
-            self.db.users[uname] = uid
-            self.db.uids[uid] = uname
-        gLogger.debug(f"UserGroupManager RefreshUsers lock released. Used {time.time() - waitTime:.3f} seconds.")
-        self.lock.release()
+        if res["Value"]:
+            gLogger.debug("UserGroupManager RefreshUsers", f"{len(self.userMap)} users, version {self.userMap.version}")
         return S_OK()
 
     #####################################################################
@@ -144,8 +167,9 @@ class UserAndGroupManagerDB(UserAndGroupManagerBase):
         """Get ID for a group specified by its name"""
         if isinstance(group, int):
             return S_OK(group)
-        if group in self.db.groups.keys():
-            return S_OK(self.db.groups[group])
+        gid = self.groupMap.getID(group)
+        if gid is not None:
+            return S_OK(gid)
         return self.__addGroup(group)
 
     def addGroup(self, gname):
@@ -154,17 +178,36 @@ class UserAndGroupManagerDB(UserAndGroupManagerBase):
 
     def getGroups(self):
         # self.__refreshGroups()
-        return S_OK(self.db.groups)
+        return S_OK(dict(self.groupMap.ids))
 
     def findGroup(self, group):
         return self.getGroupID(group)
 
     def getGroupName(self, gid):
-        """Get group name for the given id"""
-        if gid in self.db.gids.keys():
-            return S_OK(self.db.gids[gid])
+        """Get group name for the given id, refreshing the groups if it is not known yet"""
+        gname = self.groupMap.getName(gid)
+        if gname is None:
+            result = self._refreshGroups()
+            if not result["OK"]:
+                return result
+            gname = self.groupMap.getName(gid)
+        if gname is not None:
+            return S_OK(gname)
         return S_ERROR("Group id %d not found" % gid)
 
+    def getGroupNames(self, gids):
+        """Translate a column of group ids to names at once
+
+        :param gids: iterable of group ids
+        :return: S_OK with the list of names, None for the ids not found
+        """
+        gids = list(gids)
+        if self.groupMap.getUnknownIDs(gids):
+            result = self._refreshGroups()
+            if not result["OK"]:
+                return result
+        return S_OK(self.groupMap.getNames(gids))
+
     def deleteGroup(self, gname, force=True):
         """Delete a group specified by its name"""
         if not force:
@@ -177,8 +220,8 @@ class UserAndGroupManagerDB(UserAndGroupManagerBase):
         self.lock.acquire()
         waitTime = time.time()
         gLogger.debug(f"UserGroupManager AddGroup lock created. Waited {waitTime - startTime:.3f} seconds. {group}")
-        if group in self.db.groups.keys():
-            gid = self.db.groups[group]
+        gid = self.groupMap.getID(group)
+        if gid is not None:
             gLogger.debug(
                 f"UserGroupManager AddGroup lock released. Used {time.time() - waitTime:.3f} seconds. {group}"
             )
@@ -194,13 +237,12 @@ class UserAndGroupManagerDB(UserAndGroupManagerBase):
                 result = self._refreshGroups()
                 if not result["OK"]:
                     return result
-                if group in self.db.groups.keys():
-                    gid = self.db.groups[group]
+                gid = self.groupMap.getID(group)
+                if gid is not None:
                     return S_OK(gid)
             return res
         gid = res["lastRowId"]
-        self.db.gids[gid] = group
-        self.db.groups[group] = gid
+        self.groupMap.set(gid, group)
         gLogger.debug(f"UserGroupManager AddGroup lock released. Used {time.time() - waitTime:.3f} seconds. {group}")
         self.lock.release()
         return S_OK(gid)
@@ -210,7 +252,6 @@ class UserAndGroupManagerDB(UserAndGroupManagerBase):
         self.lock.acquire()
         waitTime = time.time()
         gLogger.debug(f"UserGroupManager RemoveGroup lock created. Waited {waitTime - startTime:.3f} seconds. {group}")
-        gid = self.db.groups.get(group, "Missing")
         req = f"DELETE FROM FC_Groups WHERE GroupName='{group}'"
         res = self.db._update(req)
         if not res["OK"]:
@@ -219,30 +260,18 @@ class UserAndGroupManagerDB(UserAndGroupManagerBase):
             )
             self.lock.release()
             return res
-        if gid != "Missing":
-            self.db.groups.pop(group)
-            self.db.gids.pop(gid)
+        self.groupMap.remove(group)
         gLogger.debug(f"UserGroupManager RemoveGroup lock released. Used {time.time() - waitTime:.3f} seconds. {group}")
         self.lock.release()
         return S_OK()
 
     def _refreshGroups(self):
-        """Get the current group IDs and names"""
-        req = "SELECT GID,GroupName from FC_Groups"
-        startTime = time.time()
-        self.lock.acquire()
-        waitTime = time.time()
-        gLogger.debug(f"UserGroupManager RefreshGroups lock created. Waited {waitTime - startTime:.3f} seconds.")
-        res = self.db._query(req)
+        """Read the groups added or removed since the last refresh"""
+        res = self.groupMap.refresh(self.db)
         if not res["OK"]:
-            gLogger.debug(f"UserGroupManager RefreshGroups lock released. Used {time.time() - waitTime:.3f} seconds.")
-            self.lock.release()
             return res
-        self.db.groups = {}
-        self.db.gids = {}
-        for gid, gname in res["Value"]:
-            self.db.groups[gname] = gid
-            self.db.gids[gid] = gname
-        gLogger.debug(f"UserGroupManager RefreshGroups lock released. Used {time.time() - waitTime:.3f} seconds.")
-        self.lock.release()
+        if res["Value"]:
+            gLogger.debug(
+                "UserGroupManager RefreshGroups", f"{len(self.groupMap)} groups, version {self.groupMap.version}"
+            )
         return S_OK()
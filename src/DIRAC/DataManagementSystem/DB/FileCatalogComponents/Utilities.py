@@ -1,5 +1,7 @@
 """ DIRAC FileCatalog utilities
 """
+import stat
+
 from DIRAC import S_OK, S_ERROR
 from DIRAC.Core.Utilities.List import intListToString
 
@@ -19,3 +21,32 @@ def getIDSelectString(ids):
         return S_ERROR("Illegal fileID")
 
     return S_OK(idString)
+
+
+# Mode bits granting the Read, Write and Execute permissions to the owner, the group and the others
+_PERMISSION_BITS = {
+    "Owner": {"Read": stat.S_IRUSR, "Write": stat.S_IWUSR, "Execute": stat.S_IXUSR},
+    "Group": {"Read": stat.S_IRGRP, "Write": stat.S_IWGRP, "Execute": stat.S_IXGRP},
+    "Others": {"Read": stat.S_IROTH, "Write": stat.S_IWOTH, "Execute": stat.S_IXOTH},
+}
+
+
+def getModePermissions(mode, isOwner, isGroup, firstClassOnly=False):
+    """Evaluate the POSIX mode of a file or directory for a user
+
+    :param int mode: mode of the file or directory
+    :param bool isOwner: the user is the owner of the path
+    :param bool isGroup: the user is in the owner group of the path
+    :param bool firstClassOnly: only consider the bits of the first class the user belongs to (owner, group
+                                or others), as for the files. Otherwise any class of the user granting a
+                                permission is enough, as for the directories
+
+    :return: dictionary ( Read/Write/Execute : True/False )
+    """
+    classes = [cls for cls, member in (("Owner", isOwner), ("Group", isGroup), ("Others", True)) if member]
+    if firstClassOnly:
+        classes = classes[:1]
+    return {
+        permission: any(mode & _PERMISSION_BITS[cls][permission] for cls in classes)
+        for permission in ("Read", "Write", "Execute")
+    }
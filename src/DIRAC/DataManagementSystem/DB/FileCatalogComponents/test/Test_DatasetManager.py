@@ -0,0 +1,117 @@
+""" Test the frozen datasets stored as compressed arrays of FileIDs
+"""
+# pylint: disable=protected-access
+
+from unittest.mock import MagicMock
+
+import pytest
+
+import DIRAC.DataManagementSystem.DB.FileCatalogComponents.DatasetManager.DatasetManager as DatasetManagerModule
+from DIRAC import S_ERROR, S_OK
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DatasetManager.DatasetManager import DatasetManager
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DatasetManager.FileIDArray import (
+    decodeFileIDs,
+    encodeFileIDs,
+)
+
+credDict = {"username": "user", "group": "group"}
+
+
+@pytest.mark.parametrize(
+    "fileIDs", [[], [1], [7, 3, 3, 2**31 - 1, 5], list(range(1, 100000, 3)) + list(range(10**6, 10**6 + 50000))]
+)
+def test_encodeFileIDs(fileIDs):
+    assert decodeFileIDs(encodeFileIDs(fileIDs)) == sorted(set(fileIDs))
+
+
+def test_encodeFileIDsCompact():
+    """Consecutive FileIDs take a few bits each"""
+    assert len(encodeFileIDs(range(10**6, 2 * 10**6))) < 10000
+
+
+@pytest.fixture
+def dbMock():
+    """Catalog with the frozen datasets /vo/ds1 (FileIDs 1 to 4, in two chunks) and /vo/ds2 (FileIDs 3 to 6)"""
+    db = MagicMock()
+    snapshots = {1: [encodeFileIDs([1, 2]), encodeFileIDs([3, 4])], 2: [encodeFileIDs([3, 4, 5, 6])]}
+
+    def query(req, conn=None):
+        if req.startswith("SHOW TABLES"):
+            return S_OK([])
+        if req.startswith("SELECT DatasetName,DirID,DatasetID"):
+            return S_OK([("ds1", 2, 1), ("ds2", 2, 2)])
+        if req.startswith("SELECT DatasetID,MetaQuery"):
+            datasetID = 1 if "ds1" in req else 2
+            return S_OK([(datasetID, "{}", 2, 0, 4, 1, 1, 1, None, None, "", 0o775)])
+        if req.startswith("SELECT FileIDs FROM FC_MetaDatasetSnapshots"):
+            return S_OK([(blob,) for blob in snapshots[int(req.split("DatasetID=")[1].split()[0])]])
+        raise AssertionError(f"Unexpected query {req}")
+
+    db._query.side_effect = query
+    db.dtree.findDirs.return_value = S_OK({"/vo": 2})
+    db.fileManager._getIntStatus.return_value = S_OK("Frozen")
+    db.fileManager._getFileLFNs.side_effect = lambda fileIDs: S_OK(
+        {"Successful": {fileID: f"/vo/file{fileID}" for fileID in fileIDs}, "Failed": {}}
+    )
+    return db
+
+
+def test_getDatasetFilesPaged(dbMock):
+    datasetManager = DatasetManager(dbMock)
+    result = datasetManager.getDatasetFiles(["/vo/ds1"], credDict, offset=1, limit=2)
+    assert result["OK"]
+    assert result["Value"]["Successful"] == {"/vo/ds1": ["/vo/file2", "/vo/file3"]}
+    dbMock.fileManager._getFileLFNs.assert_called_once_with([2, 3])
+
+
+@pytest.mark.parametrize(
+    "operation, expected",
+    [("union", [1, 2, 3, 4, 5, 6]), ("intersection", [3, 4]), ("difference", [1, 2])],
+)
+def test_combineDatasets(dbMock, operation, expected):
+    """The datasets are combined without the file tables, which are only used for the LFNs of the page"""
+    datasetManager = DatasetManager(dbMock)
+    result = datasetManager.combineDatasets(["/vo/ds1", "/vo/ds2"], operation, credDict, limit=2)
+    assert result["OK"]
+    assert result["Value"] == {"LFNs": [f"/vo/file{fileID}" for fileID in expected[:2]], "NumberOfFiles": len(expected)}
+    assert not any("FC_Files" in call.args[0] for call in dbMock._query.call_args_list)
+
+    assert not datasetManager.combineDatasets(["/vo/ds1"], "xor", credDict)["OK"]
+
+
+def test_getDatasetFileMembership(dbMock):
+    dbMock.fileManager._findFileIDs.return_value = S_OK(
+        {"Successful": {"/vo/file1": 1, "/vo/file5": 5}, "Failed": {"/vo/nofile": "No such file or directory"}}
+    )
+    datasetManager = DatasetManager(dbMock)
+    result = datasetManager.getDatasetFileMembership("/vo/ds1", ["/vo/file1", "/vo/file5", "/vo/nofile"], credDict)
+    assert result["OK"]
+    assert result["Value"]["Successful"] == {"/vo/file1": True, "/vo/file5": False}
+    assert list(result["Value"]["Failed"]) == ["/vo/nofile"]
+
+
+def test_freezeDataset(dbMock, monkeypatch):
+    """The snapshot is written by chunks, and removed if one of them fails"""
+    monkeypatch.setattr(DatasetManagerModule, "SNAPSHOT_CHUNK_SIZE", 3)
+    datasetManager = DatasetManager(dbMock)
+    monkeypatch.setattr(
+        datasetManager, "_DatasetManager__getDatasetParameters", lambda *_: S_OK({"Status": "Dynamic", "DatasetID": 7})
+    )
+    result = S_OK()
+    result["FileIDList"] = [8, 1, 2, 3, 5, 4, 6, 7]
+    monkeypatch.setattr(datasetManager, "_DatasetManager__getDynamicDatasetFiles", lambda *_: result)
+    dbMock.fileManager._getStatusInt.return_value = S_OK(2)
+
+    dbMock._update.return_value = S_OK()
+    assert datasetManager.freezeDataset(["/vo/ds7"], credDict)["Value"]["Successful"] == {"/vo/ds7": True}
+    inserts = [call.args[0] for call in dbMock._update.call_args_list if call.args[0].startswith("INSERT")]
+    chunks = [bytes.fromhex(req.split("X'")[1][:-2]) for req in inserts]
+    assert [decodeFileIDs(chunk) for chunk in chunks] == [[1, 2, 3], [4, 5, 6], [7, 8]]
+    assert [req.split("VALUES (")[1].split(",")[:2] for req in inserts] == [["7", "0"], ["7", "1"], ["7", "2"]]
+
+    dbMock._update.reset_mock()
+    dbMock._update.side_effect = lambda req: S_ERROR("Packet too large") if ",1,X'" in req else S_OK()
+    assert datasetManager.freezeDataset(["/vo/ds7"], credDict)["Value"]["Failed"] == {"/vo/ds7": "Packet too large"}
+    requests = [call.args[0] for call in dbMock._update.call_args_list]
+    assert requests[-1] == "DELETE FROM FC_MetaDatasetSnapshots WHERE DatasetID=7"
+    assert not any(req.startswith("UPDATE FC_MetaDatasets") for req in requests)
@@ -0,0 +1,155 @@
+""" Test the cache of the directory IDs and permissions of the DFC directory managers
+"""
+# pylint: disable=protected-access
+
+import contextlib
+from unittest.mock import MagicMock
+
+from DIRAC import S_OK
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryManager.DirectoryCache import DirectoryCache
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryManager.DirectoryLevelTree import DirectoryLevelTree
+
+
+def test_getAndUpdate():
+    cache = DirectoryCache(maxSize=2)
+    assert cache.get("/vo/dir", ("DirID",)) is None
+
+    cache.update("/vo/dir/", {"DirID": 2}, cache.getGeneration())
+    assert cache.get("/vo//dir", ("DirID",)) == {"DirID": 2}
+    # Parameters which are not cached are a miss
+    assert cache.get("/vo/dir", ("DirID", "Mode")) is None
+    cache.update("/vo/dir", {"Mode": 0o775}, cache.getGeneration())
+    assert cache.get("/vo/dir", ("DirID", "Mode")) == {"DirID": 2, "Mode": 0o775}
+
+    # The least recently used directory is dropped
+    cache.update("/vo", {"DirID": 1}, cache.getGeneration())
+    cache.get("/vo/dir", ("DirID",))
+    cache.update("/vo/other", {"DirID": 3}, cache.getGeneration())
+    assert cache.get("/vo", ("DirID",)) is None
+    assert cache.get("/vo/dir", ("DirID",)) is not None
+
+    assert cache.getStatistics() == {"Hits": 4, "Misses": 3, "Invalidations": 0, "Entries": 2, "HitRate": 57.1}
+
+
+def test_invalidate():
+    cache = DirectoryCache()
+    for dirID, path in enumerate(["/vo", "/vo/dir", "/vo/dir/sub", "/vo/dir2"]):
+        cache.update(path, {"DirID": dirID}, cache.getGeneration())
+
+    cache.invalidate("/vo/dir", recursive=True)
+    assert [cache.get(path, ("DirID",)) is not None for path in ["/vo", "/vo/dir", "/vo/dir/sub", "/vo/dir2"]] == [
+        True,
+        False,
+        False,
+        True,
+    ]
+    cache.clear()
+    assert cache.get("/vo", ("DirID",)) is None
+
+
+def test_invalidatedWhileReading():
+    """What was read before an invalidation is not cached"""
+    cache = DirectoryCache()
+    generation = cache.getGeneration()
+    cache.invalidate("/vo/dir")
+    cache.update("/vo/dir", {"DirID": 2, "Mode": 0o775}, generation)
+    assert cache.get("/vo/dir", ("DirID",)) is None
+
+
+def test_disabled():
+    cache = DirectoryCache(maxSize=0)
+    cache.update("/vo", {"DirID": 1}, cache.getGeneration())
+    assert cache.get("/vo", ("DirID",)) is None
+    assert cache.getStatistics()["Entries"] == 0
+
+
+def test_levelTree():
+    """The directory IDs and permissions are read once until the directory is changed"""
+    dbMock = MagicMock()
+    dbMock._escapeString.side_effect = lambda path: S_OK(f"'{path}'")
+    dbMock._query.side_effect = lambda req, conn=False: (
+        S_OK(((2, 2),)) if "FC_DirectoryLevelTree" in req else S_OK(((2, 1, 1, 0, 0o775, None, None),))
+    )
+    dbMock._update.return_value = S_OK()
+    dbMock.ugManager.getUserName.return_value = S_OK("user")
+    dbMock.ugManager.getGroupName.return_value = S_OK("group")
+    dbMock.ugManager.getUserAndGroupID.return_value = S_OK((1, 1))
+    dbMock.ugManager.findUser.return_value = S_OK(2)
+    dbMock.globalReadAccess = False
+    dbMock.directoryCacheSize = 100
+    dbMock.directoryCacheLifetime = 300
+    dlt = DirectoryLevelTree(dbMock)
+
+    for _ in range(3):
+        assert dlt.findDir("/vo/dir")["Value"] == 2
+        assert dlt.findDirs(["/vo/dir"])["Value"] == {"/vo/dir": 2}
+        assert dlt.getDirectoryPermissions("/vo/dir", {})["Value"]["Write"]
+    assert dbMock._query.call_count == 2
+
+    # The subdirectories are read again after a recursive change
+    assert dlt.changeDirectoryOwner({"/vo": "other"}, recursive=True)["OK"]
+    nbQueries = dbMock._query.call_count
+    assert dlt.getDirectoryPermissions("/vo/dir", {})["OK"]
+    assert dbMock._query.call_count == nbQueries + 2
+
+
+def test_levelTreeBulkPermissionParameters():
+    """The permission parameters of several directories are read with two queries, then from the cache"""
+    dbMock = MagicMock()
+    dbMock._escapeString.side_effect = lambda path: S_OK(f"'{path}'")
+    dbMock._query.side_effect = lambda req, conn=False: (
+        S_OK((("/vo/dir", 2), ("/vo/dir2", 3)))
+        if "FC_DirectoryLevelTree" in req
+        else S_OK(((2, 1, 1, 0o775), (3, 2, 1, 0o755)))
+    )
+    dbMock.ugManager.getUserNames.side_effect = lambda uids: S_OK([{1: "user"}.get(uid) for uid in uids])
+    dbMock.ugManager.getGroupNames.side_effect = lambda gids: S_OK(["group" for _gid in gids])
+    dbMock.directoryCacheSize = 100
+    dbMock.directoryCacheLifetime = 300
+    dlt = DirectoryLevelTree(dbMock)
+
+    for _ in range(2):
+        result = dlt.getDirectoriesPermissionParameters(["/vo/dir", "/vo/dir2", "/vo/missing"])
+        assert result["OK"]
+        assert result["Value"] == {
+            "/vo/dir": {"DirID": 2, "UID": 1, "Owner": "user", "GID": 1, "OwnerGroup": "group", "Mode": 0o775},
+            "/vo/dir2": {"DirID": 3, "UID": 2, "Owner": "unknown", "GID": 1, "OwnerGroup": "group", "Mode": 0o755},
+        }
+    # The missing directory is looked for again, but not the parameters of the others
+    assert dbMock._query.call_count == 3
+
+
+def test_levelTreeStaleReplica():
+    """A read replica which did not replicate a change yet does not put back in the cache what it invalidated"""
+    modes = {"Master": 0o775, "Replica": 0o775}
+    onMaster = []
+
+    @contextlib.contextmanager
+    def readFromMaster():
+        onMaster.append(True)
+        try:
+            yield
+        finally:
+            onMaster.pop()
+
+    dbMock = MagicMock()
+    dbMock._readFromMaster.side_effect = readFromMaster
+    dbMock._escapeString.side_effect = lambda path: S_OK(f"'{path}'")
+    dbMock._query.side_effect = lambda req, conn=False: (
+        S_OK(((2, 2),))
+        if "FC_DirectoryLevelTree" in req
+        else S_OK(((2, 1, 1, 0, modes["Master" if onMaster else "Replica"], None, None),))
+    )
+    dbMock._update.return_value = S_OK()
+    dbMock.ugManager.getUserName.return_value = S_OK("user")
+    dbMock.ugManager.getGroupName.return_value = S_OK("group")
+    dbMock.directoryCacheSize = 100
+    dbMock.directoryCacheLifetime = 300
+    dlt = DirectoryLevelTree(dbMock)
+
+    assert dlt.getDirectoryPermissionParameters("/vo/dir")["Value"]["Mode"] == 0o775
+    # chmod on the master, not replicated yet
+    assert dlt.changeDirectoryMode({"/vo/dir": 0o700})["Value"]["Successful"]
+    modes["Master"] = 0o700
+    for _ in range(2):
+        assert dlt.getDirectoryPermissionParameters("/vo/dir")["Value"]["Mode"] == 0o700
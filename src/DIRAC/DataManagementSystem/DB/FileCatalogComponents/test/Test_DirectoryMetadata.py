@@ -0,0 +1,96 @@
+""" Test the index of the metadata inherited by the directories
+"""
+# pylint: disable=protected-access
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from DIRAC import S_OK
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryMetadata import DirectoryMetadata as moduleTested
+
+credDict = {"username": "user", "group": "group"}
+
+
+@pytest.fixture
+def dbMock():
+    """Catalog with the indexed metadata Run (int) and Type (string), defined for no directory"""
+    db = MagicMock()
+    db.metadataIndex = True
+
+    def query(req, conn=None):
+        if req.startswith("SELECT MetaName,MetaType"):
+            return S_OK((("Run", "INT"), ("Type", "String")))
+        if "FC_MetaIndex" in req:
+            return S_OK(((3,), (4,)))
+        return S_OK(())
+
+    db._query.side_effect = query
+    db._update.return_value = S_OK(1)
+    db.insertFields.return_value = S_OK()
+    db.dtree.findDir.return_value = S_OK(2)
+    db.dtree.getPathIDs.return_value = S_OK([1, 2])
+    db.dtree.getSubdirectoriesByID.return_value = S_OK("SELECT DirID FROM FC_DirectoryLevelTree WHERE Level >= 2")
+    return db
+
+
+def queries(db, pattern):
+    """SQL requests done on the database containing pattern"""
+    calls = db._query.call_args_list + db._update.call_args_list
+    return [call.args[0] for call in calls if pattern in call.args[0]]
+
+
+def test_findDirIDsByMetadata(dbMock):
+    """The directories matching all the metadata are found with a single query on the index"""
+    dmeta = moduleTested.DirectoryMetadata(dbMock)
+    result = dmeta.findDirIDsByMetadata({"Run": {">": 100}, "Type": ["RAW", "DST"]}, "/vo", credDict)
+    assert result["OK"]
+    assert result["Value"] == [3, 4]
+    assert result["Selection"] == "Done"
+
+    (req,) = queries(dbMock, "FC_MetaIndex")
+    assert "FROM FC_MetaIndex_Run AS I0 JOIN FC_MetaIndex_Type AS I1 ON I1.DirID=I0.DirID" in req
+    assert "I0.Value>100" in req
+    assert "I1.Value in ('RAW','DST')" in req
+    assert "I0.DirID IN ( SELECT DirID FROM FC_DirectoryLevelTree" in req
+    assert not dbMock.dtree.getAllSubdirectoriesByID.called
+
+
+def test_findDirIDsByMetadata_missing(dbMock):
+    """The index does not know which directories miss a metadata"""
+    dbMock.dtree.getAllSubdirectoriesByID.return_value = S_OK([])
+    dmeta = moduleTested.DirectoryMetadata(dbMock)
+    assert dmeta.findDirIDsByMetadata({"Run": "Missing", "Type": "RAW"}, "/", credDict)["OK"]
+    assert not queries(dbMock, "FC_MetaIndex")
+
+
+def test_setAndRemoveMetadata(mocker, dbMock):
+    mocker.patch.object(moduleTested.Registry, "getGroupOption", return_value="vo")
+    mocker.patch.object(moduleTested, "Operations")
+    dmeta = moduleTested.DirectoryMetadata(dbMock)
+
+    assert dmeta.setMetadata("/vo/run", {"Run": 123}, credDict)["OK"]
+    (req,) = queries(dbMock, "FC_MetaIndex")
+    assert req.startswith("REPLACE INTO FC_MetaIndex_Run (DirID,MetaDirID,Value) SELECT S.*, M.DirID, M.Value")
+    assert "FROM ( SELECT DirID FROM FC_DirectoryLevelTree WHERE Level >= 2 ) AS S" in req
+    assert req.endswith("WHERE M.DirID=2")
+
+    assert dmeta.removeMetadata("/vo/run", ["Run"], credDict)["OK"]
+    assert queries(dbMock, "FC_MetaIndex")[-1] == "DELETE FROM FC_MetaIndex_Run WHERE MetaDirID=2"
+
+
+def test_indexNewDirectory(dbMock):
+    """A new directory inherits the index entries of its parent"""
+    dmeta = moduleTested.DirectoryMetadata(dbMock)
+    assert dmeta.indexNewDirectory(5, 2, credDict)["OK"]
+    assert queries(dbMock, "INSERT INTO FC_MetaIndex") == [
+        f"INSERT INTO FC_MetaIndex_{meta} (DirID,MetaDirID,Value) "
+        f"SELECT 5, MetaDirID, Value FROM FC_MetaIndex_{meta} WHERE DirID=2"
+        for meta in ("Run", "Type")
+    ]
+
+    # Nothing to do without the index
+    dbMock.reset_mock()
+    dbMock.metadataIndex = False
+    assert dmeta.indexNewDirectory(5, 2, credDict)["OK"]
+    assert not queries(dbMock, "FC_MetaIndex")
@@ -0,0 +1,55 @@
+""" Test the consistency check of the recursive directory usage
+"""
+# pylint: disable=protected-access
+
+from unittest.mock import MagicMock
+
+from DIRAC import S_OK
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.DirectoryManager.DirectoryLevelTree import DirectoryLevelTree
+
+
+def sizeDict(logicalSize, logicalFiles, physicalSize):
+    totalSize = sum(seDict["Size"] for seDict in physicalSize.values())
+    totalFiles = sum(seDict["Files"] for seDict in physicalSize.values())
+    return {
+        "LogicalSize": logicalSize,
+        "LogicalFiles": logicalFiles,
+        "LogicalDirectories": 1,
+        "PhysicalSize": dict(physicalSize, TotalSize=totalSize, TotalFiles=totalFiles),
+    }
+
+
+def test_checkDirectoryUsage():
+    """The usage is compared with the file tables, per SE"""
+    dtree = DirectoryLevelTree(MagicMock(directoryCacheSize=0, directoryCacheLifetime=0))
+    fromUsage = {
+        "/vo/good": sizeDict(10, 2, {"SE1": {"Size": 10, "Files": 2}}),
+        "/vo/bad": sizeDict(10, 2, {"SE1": {"Size": 10, "Files": 2}, "SE2": {"Size": 5, "Files": 1}}),
+    }
+    fromFileTables = {
+        "/vo/good": sizeDict(10, 2, {"SE1": {"Size": 10, "Files": 2}}),
+        "/vo/bad": sizeDict(15, 3, {"SE1": {"Size": 10, "Files": 2}, "SE3": {"Size": 5, "Files": 1}}),
+    }
+
+    def getDirectorySize(lfns, longOutput=False, rawFileTables=False, recursiveSum=True):
+        assert longOutput
+        sizes = fromFileTables if rawFileTables else fromUsage
+        return S_OK(
+            {
+                "Successful": {lfn: sizes[lfn] for lfn in lfns if lfn in sizes},
+                "Failed": {lfn: "Directory not found" for lfn in lfns if lfn not in sizes},
+            }
+        )
+
+    dtree.getDirectorySize = getDirectorySize
+    result = dtree.checkDirectoryUsage(["/vo/good", "/vo/bad", "/vo/none"])
+    assert result["OK"]
+    assert result["Value"]["Failed"] == {"/vo/none": "Directory not found"}
+    assert result["Value"]["Successful"] == {
+        "/vo/good": {},
+        "/vo/bad": {
+            "Logical": {"Usage": {"Size": 10, "Files": 2}, "FileTables": {"Size": 15, "Files": 3}},
+            "SE2": {"Usage": {"Size": 5, "Files": 1}, "FileTables": {"Size": 0, "Files": 0}},
+            "SE3": {"Usage": {"Size": 0, "Files": 0}, "FileTables": {"Size": 5, "Files": 1}},
+        },
+    }
@@ -0,0 +1,108 @@
+""" Test the bulk registration of the files and replicas of the FileManager
+"""
+# pylint: disable=protected-access
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from DIRAC import S_OK, S_ERROR
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.FileManager.FileManager import FileManager
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.FileManager.FileManagerPs import FileManagerPs
+
+
+@pytest.fixture
+def dbMock():
+    """Catalog where /vo/a has the ID 2 and /vo/b the ID 3, both below /vo (1)"""
+    db = MagicMock()
+    db.bulkInsertChunkSize = 2
+    db._update.return_value = S_OK()
+    db.transactionStart.return_value = S_OK()
+    db.transactionCommit.return_value = S_OK()
+    db.dtree.getPathIDsByID.side_effect = lambda dirID: S_OK([1, dirID])
+    return db
+
+
+def usageUpdates(db):
+    """Requests updating FC_DirectoryUsage"""
+    return [call.args[0] for call in db._update.call_args_list if "FC_DirectoryUsage" in call.args[0]]
+
+
+def test_updateDirectoryUsage(dbMock):
+    """The usage of all the directories and their parents is updated with one request"""
+    fileManager = FileManager(dbMock)
+    directorySEDict = {2: {5: {"Files": 2, "Size": 10}}, 3: {5: {"Files": 1, "Size": 3}, 6: {"Files": 1, "Size": 3}}}
+    assert fileManager._updateDirectoryUsage(directorySEDict, "-")["OK"]
+
+    (req,) = usageUpdates(dbMock)
+    assert "VALUES (1,5,13,3,UTC_TIMESTAMP()),(1,6,3,1,UTC_TIMESTAMP()),(2,5,10,2,UTC_TIMESTAMP())," in req
+    assert "SESize=SESize-VALUES(SESize), SEFiles=SEFiles-VALUES(SEFiles)" in req
+
+
+def test_addInBulk(mocker, dbMock):
+    """The files are added by chunks of files of the same directories, each in a transaction"""
+    fileManager = FileManager(dbMock)
+
+    def addFiles(lfns, credDict):
+        # The usage is only written at the end of the chunk
+        nbUpdates = len(usageUpdates(dbMock))
+        for lfn in lfns:
+            fileManager._updateDirectoryUsage({2 if "/a/" in lfn else 3: {0: {"Files": 1, "Size": 1}}}, "+")
+        assert len(usageUpdates(dbMock)) == nbUpdates
+        if "/vo/b/f2" in lfns:
+            return S_ERROR("Deadlock found when trying to get lock")
+        return S_OK({"Successful": dict.fromkeys(lfns, True), "Failed": {}})
+
+    addFiles = mocker.MagicMock(side_effect=addFiles)
+    lfns = {lfn: {} for lfn in ["/vo/b/f1", "/vo/a/f2", "/vo/b/f2", "/vo/a/f1"]}
+    result = fileManager._addInBulk("addFile", addFiles, lfns, {})
+    assert result["OK"]
+    assert result["Value"]["Successful"] == {"/vo/a/f1": True, "/vo/a/f2": True}
+    assert result["Value"]["Failed"] == dict.fromkeys(
+        ["/vo/b/f1", "/vo/b/f2"], "Deadlock found when trying to get lock"
+    )
+    assert [list(call.args[0]) for call in addFiles.call_args_list] == [
+        ["/vo/a/f1", "/vo/a/f2"],
+        ["/vo/b/f1", "/vo/b/f2"],
+    ]
+
+    # One usage update for the chunk which is committed, the other one is rolled back
+    (req,) = usageUpdates(dbMock)
+    assert "VALUES (1,0,2,2,UTC_TIMESTAMP()),(2,0,2,2,UTC_TIMESTAMP())" in req
+    assert dbMock.transactionCommit.call_count == 1
+    assert dbMock.transactionRollback.call_count == 1
+    dbMock.dtree.dirCache.clear.assert_called_once()
+    assert not hasattr(fileManager._bulkUsage, "usage")
+
+
+def test_addInBulkFileManagerPs(mocker, dbMock):
+    """The stored procedures of the FileManagerPs commit their own transactions: the files are not added by chunks"""
+    fileManager = FileManagerPs(dbMock)
+    addFiles = mocker.patch.object(
+        fileManager,
+        "_addFiles",
+        side_effect=lambda lfns, credDict, connection: S_OK({"Successful": lfns, "Failed": {}}),
+    )
+    lfns = {lfn: {"PFN": "", "SE": "SE1", "Size": 1, "Checksum": ""} for lfn in ["/vo/a/f1", "/vo/a/f2", "/vo/b/f1"]}
+    result = fileManager.addFile(dict(lfns), {})
+    assert result["OK"]
+    assert sorted(result["Value"]["Successful"]) == sorted(lfns)
+    assert addFiles.call_count == 1
+    dbMock.transactionStart.assert_not_called()
+
+
+def test_setReplicaHost(dbMock):
+    """The usage of the replica is moved from the old SE to the new one"""
+    fileManager = FileManager(dbMock)
+    dbMock.seManager.findSE.side_effect = lambda se: S_OK({"SE1": 5, "SE2": 6}[se])
+    # The replica 7 of the file 10 is at SE1, the file is 100 bytes in the directory 3
+    dbMock._query.side_effect = lambda req, conn=None: S_OK(
+        [(7, 10, 5)] if req.startswith("SELECT RepID") else [(3, 100)]
+    )
+    assert fileManager._setReplicaHost(10, "SE1", "SE2")["OK"]
+
+    removed, added = usageUpdates(dbMock)
+    assert "VALUES (1,5,100,1,UTC_TIMESTAMP()),(3,5,100,1,UTC_TIMESTAMP())" in removed
+    assert "SESize=SESize-VALUES(SESize)" in removed
+    assert "VALUES (1,6,100,1,UTC_TIMESTAMP()),(3,6,100,1,UTC_TIMESTAMP())" in added
+    assert "SESize=SESize+VALUES(SESize)" in added
@@ -0,0 +1,96 @@
+""" Test the in memory map between the IDs and the names of the SEs, users and groups
+"""
+from unittest.mock import MagicMock
+
+from DIRAC import S_OK
+from DIRAC.DataManagementSystem.DB.FileCatalogComponents.IDNameMap import IDNameMap
+
+
+def tableMock(rows):
+    """DB with a FC_StorageElements table holding rows {SEID: SEName}"""
+    db = MagicMock()
+
+    def query(req, conn=None):
+        if req.startswith("SELECT COUNT(*)"):
+            return S_OK([(len(rows), max(rows, default=0))])
+        minID = int(req.split(">")[-1]) if "WHERE" in req else 0
+        return S_OK([(seID, seName) for seID, seName in rows.items() if seID > minID])
+
+    db._query.side_effect = query
+    return db
+
+
+def test_translation():
+    seMap = IDNameMap("FC_StorageElements", "SEID", "SEName")
+    seMap.set(2, "SE2")
+    seMap.set(5, "SE5")
+    assert seMap.getNames([5, 2, 5, 3, 100, "x"], default="-") == ["SE5", "SE2", "SE5", "-", "-", "-"]
+    assert seMap.getIDs(["SE2", "SE3"]) == [2, None]
+    assert seMap.getUnknownIDs([2, 3, 5]) == {3}
+
+    version = seMap.version
+    seMap.set(2, "SE2bis")
+    assert seMap.getID("SE2") is None
+    assert seMap.getName(2) == "SE2bis"
+    seMap.remove("SE5")
+    assert seMap.getName(5) is None
+    assert seMap.version == version + 2
+
+
+def test_refresh():
+    """Only the new rows are read, unless some were removed"""
+    rows = {1: "SE1", 2: "SE2"}
+    db = tableMock(rows)
+    seMap = IDNameMap("FC_StorageElements", "SEID", "SEName")
+
+    assert seMap.refresh(db) == S_OK(True)
+    assert seMap.getNames([1, 2]) == ["SE1", "SE2"]
+
+    # Nothing changed: only the version of the table is read
+    db._query.reset_mock()
+    version = seMap.version
+    assert seMap.refresh(db) == S_OK(False)
+    assert db._query.call_count == 1
+    assert seMap.version == version
+
+    # New rows: only the IDs above the highest known one are read
+    rows[3] = "SE3"
+    assert seMap.refresh(db) == S_OK(True)
+    assert db._query.call_args.args[0].endswith("WHERE SEID > 2")
+    assert seMap.getName(3) == "SE3"
+
+    # A row removed and another one added: everything is reloaded
+    del rows[1]
+    rows[4] = "SE4"
+    assert seMap.refresh(db) == S_OK(True)
+    assert seMap.refresh(db) == S_OK(True)
+    assert not db._query.call_args.args[0].endswith("WHERE SEID > 4")
+    assert seMap.getNames([1, 2, 3, 4]) == [None, "SE2", "SE3", "SE4"]
+    assert seMap.refresh(db) == S_OK(False)
+
+
+def test_reloadSeenAtOnce():
+    """The readers never see a map being reloaded, and the map can be used as the name to ID dictionary"""
+    rows = {1: "SE1", 2: "SE2", 3: "SE3"}
+    db = tableMock(rows)
+    seMap = IDNameMap("FC_StorageElements", "SEID", "SEName")
+    assert seMap.refresh(db)["OK"]
+
+    def readWhileLoading(rows):
+        # Read by another thread while the rows are added to the map
+        for row in rows:
+            assert seMap.getNames([1, 2, 3]) == ["SE1", "SE2", "SE3"]
+            assert seMap.getName(3) == "SE3"
+            assert seMap.get("SE1") == 1
+            yield row
+
+    # A row removed: the whole table is reloaded
+    del rows[3]
+    query = db._query.side_effect
+    db._query.side_effect = lambda req, conn=None: (
+        query(req, conn) if req.startswith("SELECT COUNT(*)") else S_OK(readWhileLoading(query(req, conn)["Value"]))
+    )
+    assert seMap.refresh(db) == S_OK(True)
+    assert seMap.getNames([1, 2, 3]) == ["SE1", "SE2", None]
+    assert "SE2" in seMap and "SE3" not in seMap
+    assert seMap.get("SE3", -1) == -1
@@ -1,14 +1,86 @@
-""" DIRAC FileCatalog Database """
+""" DIRAC FileCatalog Database
+
+    When the database has read only replicas (ReadReplicas option of the database section),
+    the read methods are sent to them, and the write methods to the master. To read its own
+    writes, a user only reads from the replicas which replicated the last write it did through
+    this service, while the others may read data up to MaxReplicationLag seconds old.
+"""
+import contextlib
 import errno
+import functools
+import inspect
+import threading
+import time
 
 from DIRAC import gLogger, S_OK, S_ERROR
 from DIRAC.Core.Base.DB import DB
 from DIRAC.Resources.Catalog.Utilities import checkArgumentFormat
 from DIRAC.Core.Utilities.ObjectLoader import ObjectLoader
+from DIRAC.Core.Utilities.List import breakListIntoChunks
+from DIRAC.Core.Utilities.MySQL import STREAM_BATCH_SIZE
 
 #############################################################################
 
 
+def _getCredDictGetter(method):
+    """Get the function extracting the credDict argument from the arguments of a method call"""
+    parameters = list(inspect.signature(method).parameters)
+    index = parameters.index("credDict") if "credDict" in parameters else None
+
+    def getCredDict(args, kwargs):
+        if "credDict" in kwargs:
+            return kwargs["credDict"]
+        if index is not None and index < len(args):
+            return args[index]
+        return None
+
+    return getCredDict
+
+
+def readMethod(method):
+    """Decorator sending the queries of a read method to the read replicas, see FileCatalogDB.readSession"""
+    getCredDict = _getCredDictGetter(method)
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with args[0].readSession(getCredDict(args, kwargs)):
+            return method(*args, **kwargs)
+
+    return wrapper
+
+
+def readGenerator(method):
+    """Same as readMethod, for the methods returning a generator: the read section is entered
+    for the production of each item, as the consumer may write between them"""
+    getCredDict = _getCredDictGetter(method)
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        credDict = getCredDict(args, kwargs)
+        generator = method(*args, **kwargs)
+        while True:
+            with args[0].readSession(credDict):
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    return
+            yield item
+
+    return wrapper
+
+
+def writeMethod(method):
+    """Decorator recording the writes of a method, see FileCatalogDB.writeSession"""
+    getCredDict = _getCredDictGetter(method)
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        with args[0].writeSession(getCredDict(args, kwargs)):
+            return method(*args, **kwargs)
+
+    return wrapper
+
+
 class FileCatalogDB(DB):
     def __init__(self, databaseLocation="DataManagement/FileCatalogDB", parentLogger=None):
         # The database location can be specified in System/Database form or in just the Database name
@@ -28,15 +100,17 @@ class FileCatalogDB(DB):
         self.fmeta = None
         self.datasetManager = None
 
+        # Time stamp of the last write of each user, to read them back from the replicas
+        self.__lastWrites = {}
+        self.__lastWritesLock = threading.Lock()
+        self.__lastWritesPruning = time.time()
+
     def setConfig(self, databaseConfig):
         self.directories = {}
         # In memory storage of the various parameters
         self.users = {}
-        self.uids = {}
         self.groups = {}
-        self.gids = {}
         self.seNames = {}
-        self.seids = {}
 
         # Obtain some general configuration of the database
         self.uniqueGUID = databaseConfig["UniqueGUID"]
@@ -50,6 +124,13 @@ class FileCatalogDB(DB):
         self.validReplicaStatus = databaseConfig["ValidReplicaStatus"]
         self.visibleFileStatus = databaseConfig["VisibleFileStatus"]
         self.visibleReplicaStatus = databaseConfig["VisibleReplicaStatus"]
+        # Number of directories and lifetime of the cache of the directory manager
+        self.directoryCacheSize = databaseConfig.get("DirectoryCacheSize", 10000)
+        self.directoryCacheLifetime = databaseConfig.get("DirectoryCacheLifetime", 300)
+        # Keep the metadata inherited by each directory in FC_MetaIndex tables
+        self.metadataIndex = databaseConfig.get("MetadataIndex", False)
+        # Number of files added per transaction by addFile and addReplica, 0 to not use transactions
+        self.bulkInsertChunkSize = databaseConfig.get("BulkInsertChunkSize", 0)
 
         # Load the configured components
         for compAttribute, componentType in [
@@ -83,11 +164,54 @@ class FileCatalogDB(DB):
     def setUmask(self, umask):
         self.umask = umask
 
+    def readSession(self, credDict):
+        """Context manager sending the queries to a read replica having replicated the last write
+        of the user, or any replica in the replication lag limit for the anonymous calls
+
+        :param credDict: credential, or None
+        """
+        if not self.hasReadReplicas():
+            return contextlib.nullcontext()
+        userName = (credDict or {}).get("username")
+        return self._readFromReplicas(since=self.__lastWrites.get(userName, 0) if userName else 0)
+
+    @contextlib.contextmanager
+    def writeSession(self, credDict):
+        """Context manager sending all the queries to the master, and recording the time of the write
+        so that the next reads of the user only use the replicas which replicated it
+
+        :param credDict: credential, or None
+        """
+        if not self.hasReadReplicas():
+            yield
+            return
+        userName = (credDict or {}).get("username")
+        try:
+            with self._readFromReplicas(since=float("inf")):
+                yield
+        finally:
+            if userName:
+                self.__recordWrite(userName)
+
+    def __recordWrite(self, userName):
+        """Record the time of a write of a user, and forget the ones all the replicas are up to date with"""
+        now = time.time()
+        with self.__lastWritesLock:
+            self.__lastWrites[userName] = now
+            if now - self.__lastWritesPruning > self.maxReplicationLag:
+                self.__lastWrites = {
+                    name: lastWrite
+                    for name, lastWrite in self.__lastWrites.items()
+                    if now - lastWrite < self.maxReplicationLag
+                }
+                self.__lastWritesPruning = now
+
     ########################################################################
     #
     #  SE based write methods
     #
 
+    @writeMethod
     def addSE(self, seName, credDict):
         """
         Add a new StorageElement
@@ -102,6 +226,7 @@ class FileCatalogDB(DB):
             return S_ERROR(errno.EACCES, "Permission denied")
         return self.seManager.addSE(seName)
 
+    @writeMethod
     def deleteSE(self, seName, credDict):
         """
         Delete a StorageElement
@@ -121,6 +246,7 @@ class FileCatalogDB(DB):
     #  User/groups based write methods
     #
 
+    @writeMethod
     def addUser(self, userName, credDict):
         """
         Add a new user
@@ -135,6 +261,7 @@ class FileCatalogDB(DB):
             return S_ERROR(errno.EACCES, "Permission denied")
         return self.ugManager.addUser(userName)
 
+    @writeMethod
     def deleteUser(self, userName, credDict):
         """
         Delete a user
@@ -149,6 +276,7 @@ class FileCatalogDB(DB):
             return S_ERROR(errno.EACCES, "Permission denied")
         return self.ugManager.deleteUser(userName)
 
+    @writeMethod
     def addGroup(self, groupName, credDict):
         """
         Add a new group
@@ -163,6 +291,7 @@ class FileCatalogDB(DB):
             return S_ERROR(errno.EACCES, "Permission denied")
         return self.ugManager.addGroup(groupName)
 
+    @writeMethod
     def deleteGroup(self, groupName, credDict):
         """
         Delete a group
@@ -182,6 +311,7 @@ class FileCatalogDB(DB):
     #  User/groups based read methods
     #
 
+    @readMethod
     def getUsers(self, credDict):
         """
         Returns the list of users
@@ -196,6 +326,7 @@ class FileCatalogDB(DB):
             return S_ERROR(errno.EACCES, "Permission denied")
         return self.ugManager.getUsers()
 
+    @readMethod
     def getGroups(self, credDict):
         """
         Returns the list of groups
@@ -216,6 +347,7 @@ class FileCatalogDB(DB):
     #  Path based read methods
     #
 
+    @readMethod
     def exists(self, lfns, credDict):
         res = self._checkPathPermissions("exists", lfns, credDict)
         if not res["OK"]:
@@ -243,6 +375,7 @@ class FileCatalogDB(DB):
 
         return S_OK({"Successful": successful, "Failed": failed})
 
+    @readMethod
     def getPathPermissions(self, lfns, credDict):
         """Get permissions for the given user/group to manipulate the given lfns"""
         res = checkArgumentFormat(lfns)
@@ -252,6 +385,7 @@ class FileCatalogDB(DB):
 
         return self.securityManager.getPathPermissions(list(lfns), credDict)
 
+    @readMethod
     def hasAccess(self, opType, paths, credDict):
         """Get permissions for the given user/group to execute the given operation
         on the given paths
@@ -270,6 +404,7 @@ class FileCatalogDB(DB):
     #  Path based read methods
     #
 
+    @writeMethod
     def changePathOwner(self, paths, credDict, recursive=False):
         """Bulk method to change Owner for the given paths
 
@@ -294,6 +429,7 @@ class FileCatalogDB(DB):
             successful = result["Value"]["Successful"]
         return S_OK({"Successful": successful, "Failed": failed})
 
+    @writeMethod
     def changePathGroup(self, paths, credDict, recursive=False):
         """Bulk method to change Group for the given paths
 
@@ -318,6 +454,7 @@ class FileCatalogDB(DB):
             successful = result["Value"]["Successful"]
         return S_OK({"Successful": successful, "Failed": failed})
 
+    @writeMethod
     def changePathMode(self, paths, credDict, recursive=False):
         """Bulk method to change Mode for the given paths
 
@@ -400,6 +537,7 @@ class FileCatalogDB(DB):
     #  File based write methods
     #
 
+    @writeMethod
     def addFile(self, lfns, credDict):
         """
         Add a new File
@@ -425,6 +563,7 @@ class FileCatalogDB(DB):
         successful = res["Value"]["Successful"]
         return S_OK({"Successful": successful, "Failed": failed})
 
+    @writeMethod
     def setFileStatus(self, lfns, credDict):
         """
         Set the status of a File
@@ -451,6 +590,7 @@ class FileCatalogDB(DB):
         successful = res["Value"]["Successful"]
         return S_OK({"Successful": successful, "Failed": failed})
 
+    @writeMethod
     def removeFile(self, lfns, credDict):
         """
          Remove files
@@ -477,6 +617,7 @@ class FileCatalogDB(DB):
         successful = res["Value"]["Successful"]
         return S_OK({"Successful": successful, "Failed": failed})
 
+    @writeMethod
     def addReplica(self, lfns, credDict):
         """
          Add a replica to a File
@@ -504,6 +645,7 @@ class FileCatalogDB(DB):
         successful = res["Value"]["Successful"]
         return S_OK({"Successful": successful, "Failed": failed})
 
+    @writeMethod
     def removeReplica(self, lfns, credDict):
         """
          Remove replicas
@@ -531,6 +673,7 @@ class FileCatalogDB(DB):
         successful = res["Value"]["Successful"]
         return S_OK({"Successful": successful, "Failed": failed})
 
+    @writeMethod
     def setReplicaStatus(self, lfns, credDict):
         """
         Set the status of a Replicas
@@ -557,6 +700,7 @@ class FileCatalogDB(DB):
         successful = res["Value"]["Successful"]
         return S_OK({"Successful": successful, "Failed": failed})
 
+    @writeMethod
     def setReplicaHost(self, lfns, credDict):
         res = self._checkPathPermissions("setReplicaHost", lfns, credDict)
         if not res["OK"]:
@@ -574,6 +718,7 @@ class FileCatalogDB(DB):
         successful = res["Value"]["Successful"]
         return S_OK({"Successful": successful, "Failed": failed})
 
+    @writeMethod
     def addFileAncestors(self, lfns, credDict):
         """Add ancestor information for the given LFNs"""
         res = self._checkPathPermissions("addFileAncestors", lfns, credDict)
@@ -597,6 +742,7 @@ class FileCatalogDB(DB):
     #  File based read methods
     #
 
+    @readMethod
     def isFile(self, lfns, credDict):
         """
         Checks whether a list of LFNS are files or not
@@ -625,6 +771,7 @@ class FileCatalogDB(DB):
         successful = res["Value"]["Successful"]
         return S_OK({"Successful": successful, "Failed": failed})
 
+    @readMethod
     def getFileSize(self, lfns, credDict):
         """
         Gets the size of a list of lfns
@@ -652,6 +799,7 @@ class FileCatalogDB(DB):
         successful = res["Value"]["Successful"]
         return S_OK({"Successful": successful, "Failed": failed})
 
+    @readMethod
     def getFileMetadata(self, lfns, credDict):
         """
         Gets the metadata of a list of lfns
@@ -680,6 +828,7 @@ class FileCatalogDB(DB):
         successful = res["Value"]["Successful"]
         return S_OK({"Successful": successful, "Failed": failed})
 
+    @readMethod
     def getReplicas(self, lfns, allStatus, credDict):
         """
         Gets the list of replicas of a list of lfns
@@ -709,6 +858,27 @@ class FileCatalogDB(DB):
         successful = res["Value"]["Successful"]
         return S_OK({"Successful": successful, "Failed": failed})
 
+    @readGenerator
+    def iterReplicas(self, lfns, allStatus, credDict, chunkSize):
+        """
+        Same as :py:meth:`getReplicas`, but processing the lfns by chunks
+
+        :param lfns: list of LFN to check
+        :param allStatus: if all the status are visible, or only those defined in config['ValidReplicaStatus']
+        :param creDict: credential
+        :param int chunkSize: number of lfns per chunk
+
+        :return: generator of Successful/Failed dict, one per chunk
+        """
+        res = checkArgumentFormat(lfns)
+        if not res["OK"]:
+            yield res
+            return
+        lfns = res["Value"]
+        for lfnChunk in breakListIntoChunks(list(lfns), chunkSize):
+            yield self.getReplicas({lfn: lfns[lfn] for lfn in lfnChunk}, allStatus, credDict)
+
+    @readMethod
     def getReplicaStatus(self, lfns, credDict):
         """
         Gets the status of a list of replicas
@@ -735,6 +905,7 @@ class FileCatalogDB(DB):
         successful = res["Value"]["Successful"]
         return S_OK({"Successful": successful, "Failed": failed})
 
+    @readMethod
     def getFileAncestors(self, lfns, depths, credDict):
         res = self._checkPathPermissions("getFileAncestors", lfns, credDict)
         if not res["OK"]:
@@ -752,6 +923,7 @@ class FileCatalogDB(DB):
         successful = res["Value"]["Successful"]
         return S_OK({"Successful": successful, "Failed": failed})
 
+    @readMethod
     def getFileDescendents(self, lfns, depths, credDict):
         res = self._checkPathPermissions("getFileDescendents", lfns, credDict)
         if not res["OK"]:
@@ -769,6 +941,7 @@ class FileCatalogDB(DB):
         successful = res["Value"]["Successful"]
         return S_OK({"Successful": successful, "Failed": failed})
 
+    @readMethod
     def getFileDetailsPublic(self, lfns, credDict):
         """Return all the metadata, including user defined, for those lfns that exist.
 
@@ -786,6 +959,7 @@ class FileCatalogDB(DB):
 
         return self.getFileDetails(res["Value"]["Successful"], credDict)
 
+    @readMethod
     def getFileDetails(self, lfnList, credDict):
         """Get all the metadata for the given files"""
         connection = False
@@ -814,6 +988,7 @@ class FileCatalogDB(DB):
 
         return S_OK(resultDict)
 
+    @readMethod
     def getLFNForGUID(self, guids, credDict):
         """
         Gets the lfns that match a list of guids
@@ -831,6 +1006,7 @@ class FileCatalogDB(DB):
     #  Directory based Write methods
     #
 
+    @writeMethod
     def createDirectory(self, lfns, credDict):
         """
         Create new directories
@@ -857,6 +1033,7 @@ class FileCatalogDB(DB):
         successful = res["Value"]["Successful"]
         return S_OK({"Successful": successful, "Failed": failed})
 
+    @writeMethod
     def removeDirectory(self, lfns, credDict):
         """
         Remove directories
@@ -901,6 +1078,7 @@ class FileCatalogDB(DB):
     #  Directory based read methods
     #
 
+    @readMethod
     def listDirectory(self, lfns, credDict, verbose=False):
         """
         List directories
@@ -929,6 +1107,7 @@ class FileCatalogDB(DB):
         successful = res["Value"]["Successful"]
         return S_OK({"Successful": successful, "Failed": failed})
 
+    @readMethod
     def getDirectoryDump(self, lfns, credDict):
         """
         Get a dump of the directories
@@ -956,6 +1135,51 @@ class FileCatalogDB(DB):
         successful = res["Value"]["Successful"]
         return S_OK({"Successful": successful, "Failed": failed})
 
+    def iterListDirectory(self, lfns, credDict, verbose=False):
+        """
+        Same as :py:meth:`listDirectory`, but listing the directories one by one
+
+        :param lfns: list of directories
+        :param creDict: credential
+
+        :return: generator of Successful/Failed dict, one per directory
+        """
+        res = checkArgumentFormat(lfns)
+        if not res["OK"]:
+            yield res
+            return
+        for lfn, value in res["Value"].items():
+            yield self.listDirectory({lfn: value}, credDict, verbose=verbose)
+
+    @readGenerator
+    def iterDirectoryDump(self, lfns, credDict, chunkSize):
+        """
+        Same as :py:meth:`getDirectoryDump`, but the dump of each directory is split in chunks
+
+        :param list lfns: list of directories
+        :param creDict: credential
+        :param int chunkSize: approximate number of files per chunk
+
+        :return: generator of Successful/Failed dict. The dump of a directory is spread over several
+           Successful dicts, whose "Files" and "SubDirs" have to be merged
+        """
+
+        res = self._checkPathPermissions("getDirectoryDump", lfns, credDict)
+        if not res["OK"]:
+            yield res
+            return
+        failed = res["Value"]["Failed"]
+        if failed:
+            yield S_OK({"Successful": {}, "Failed": failed})
+
+        for path in res["Value"]["Successful"]:
+            for result in self.dtree.iterDirectoryDump(path, chunkSize):
+                if not result["OK"]:
+                    yield S_OK({"Successful": {}, "Failed": {path: result["Message"]}})
+                    break
+                yield S_OK({"Successful": {path: result["Value"]}, "Failed": {}})
+
+    @readMethod
     def isDirectory(self, lfns, credDict):
         """
         Checks whether a list of LFNS are directories or not
@@ -984,6 +1208,7 @@ class FileCatalogDB(DB):
         successful = res["Value"]["Successful"]
         return S_OK({"Successful": successful, "Failed": failed})
 
+    @readMethod
     def getDirectoryReplicas(self, lfns, allStatus, credDict):
         res = self._checkPathPermissions("getDirectoryReplicas", lfns, credDict)
         if not res["OK"]:
@@ -1001,6 +1226,7 @@ class FileCatalogDB(DB):
         successful = res["Value"]["Successful"]
         return S_OK({"Successful": successful, "Failed": failed})
 
+    @readMethod
     def getDirectorySize(self, lfns, longOutput, fromFiles, recursiveSum, credDict):
         """
         Get the sizes of a list of directories
@@ -1035,6 +1261,37 @@ class FileCatalogDB(DB):
         queryTime = res["Value"].get("QueryTime", -1.0)
         return S_OK({"Successful": successful, "Failed": failed, "QueryTime": queryTime})
 
+    @readMethod
+    def checkDirectoryUsage(self, lfns, credDict):
+        """
+        Compare the recursive usage of a list of directories, maintained when adding or removing
+        files and replicas, with the one computed from the file tables
+
+        :param lfns: list of directory paths
+        :type lfns: python:list
+        :param creDict: credential
+
+        :return: Successful/Failed dict.
+            The successful values are the differences indexed by "Logical" or by SE name,
+            with the "Usage" and "FileTables" sizes and numbers of files. They are empty for consistent directories
+        """
+
+        res = self._checkPathPermissions("getDirectorySize", lfns, credDict)
+        if not res["OK"]:
+            return res
+        failed = res["Value"]["Failed"]
+
+        # if no successful, just return
+        if not res["Value"]["Successful"]:
+            return S_OK({"Successful": {}, "Failed": failed})
+
+        res = self.dtree.checkDirectoryUsage(res["Value"]["Successful"])
+        if not res["OK"]:
+            return res
+        failed.update(res["Value"]["Failed"])
+        return S_OK({"Successful": res["Value"]["Successful"], "Failed": failed})
+
+    @readMethod
     def getDirectoryMetadata(self, lfns, credDict):
         """Get standard directory metadata
 
@@ -1057,12 +1314,28 @@ class FileCatalogDB(DB):
 
         return S_OK({"Successful": successful, "Failed": failed})
 
+    @writeMethod
     def rebuildDirectoryUsage(self):
         """Rebuild DirectoryUsage table from scratch"""
 
         result = self.dtree._rebuildDirectoryUsage()
         return result
 
+    @writeMethod
+    def rebuildMetadataIndex(self, credDict={}):
+        """Rebuild the index of the metadata inherited by each directory from scratch"""
+
+        result = self._checkAdminPermission(credDict)
+        if not result["OK"]:
+            return result
+        if not result["Value"]:
+            return S_ERROR(errno.EACCES, "Not authorized to rebuild the metadata index")
+        if not self.metadataIndex:
+            return S_ERROR("The MetadataIndex option is not set for this catalog")
+
+        return self.dmeta.rebuildMetadataIndex(credDict)
+
+    @writeMethod
     def repairCatalog(self, credDict={}):
         """Repair catalog inconsistencies"""
 
@@ -1074,6 +1347,8 @@ class FileCatalogDB(DB):
 
         resultDict = {}
         resultDict["RecoverOrphanDirectories"] = self.dtree.recoverOrphanDirectories(credDict)
+        # The IDs and owners of the recovered directories may have changed
+        self.dtree.dirCache.clear()
         resultDict["RepairFileTables"] = self.fileManager.repairFileTables()
 
         return S_OK(resultDict)
@@ -1083,6 +1358,7 @@ class FileCatalogDB(DB):
     #  Catalog metadata methods
     #
 
+    @writeMethod
     def setMetadata(self, path, metadataDict, credDict):
         """Add metadata to the given path"""
         res = self._checkPathPermissions("setMetadata", path, credDict)
@@ -1105,6 +1381,7 @@ class FileCatalogDB(DB):
             # This is a file
             return self.fmeta.setMetadata(path, metadataDict, credDict)
 
+    @writeMethod
     def setMetadataBulk(self, pathMetadataDict, credDict):
         """Add metadata for the given paths"""
         successful = {}
@@ -1118,6 +1395,7 @@ class FileCatalogDB(DB):
 
         return S_OK({"Successful": successful, "Failed": failed})
 
+    @writeMethod
     def removeMetadata(self, pathMetadataDict, credDict):
         """Remove metadata for the given paths"""
         successful = {}
@@ -1158,6 +1436,7 @@ class FileCatalogDB(DB):
     #  Catalog admin methods
     #
 
+    @readMethod
     def getCatalogCounters(self, credDict):
         counterDict = {}
         res = self._checkAdminPermission(credDict)
@@ -1181,6 +1460,8 @@ class FileCatalogDB(DB):
         if not res["OK"]:
             return res
         counterDict.update(res["Value"])
+        for key, value in self.dtree.dirCache.getStatistics().items():
+            counterDict[f"Directory cache {key}"] = value
         return S_OK(counterDict)
 
     ########################################################################
@@ -1213,6 +1494,7 @@ class FileCatalogDB(DB):
                 successful[lfn] = lfns[lfn]
         return S_OK({"Successful": successful, "Failed": failed})
 
+    @readMethod
     def getSEDump(self, seNames):
         """
          Return all the files at given SEs, together with checksum and size
@@ -1222,3 +1504,17 @@ class FileCatalogDB(DB):
         :returns: S_OK with list of tuples (SEName, lfn, checksum, size)
         """
         return self.fileManager.getSEDump(seNames)
+
+    @readGenerator
+    def iterSEDump(self, seNames, batchSize=STREAM_BATCH_SIZE):
+        """
+         Same as :py:meth:`getSEDump`, but the files are read from the database by batches,
+         so that the dump of large SEs does not have to be held in memory
+
+        :param seName: list of StorageElement names
+        :param int batchSize: maximum number of files per batch
+
+        :returns: generator of S_OK with tuples of (SEName, lfn, checksum, size).
+                  The last item is an S_ERROR in case of error
+        """
+        return self.fileManager.iterSEDump(seNames, batchSize)
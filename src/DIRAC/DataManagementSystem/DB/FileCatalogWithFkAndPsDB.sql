@@ -220,6 +220,25 @@ CREATE TABLE FC_DirectoryUsage(
 
 -- ------------------------------------------------------------------------------
 
+-- Usage of the directories including all their subdirectories.
+-- It is maintained by the triggers on FC_DirectoryUsage, which propagate
+-- each change of the usage of a directory to all its ancestors
+
+CREATE TABLE FC_DirectoryTreeUsage(
+   DirID INTEGER NOT NULL,
+   SEID INTEGER NOT NULL,
+   SESize BIGINT NOT NULL,
+   SEFiles BIGINT NOT NULL,
+   LastUpdate TIMESTAMP,
+
+   PRIMARY KEY (DirID,SEID),
+   FOREIGN KEY (SEID) REFERENCES FC_StorageElements(SEID) ON DELETE CASCADE,
+   FOREIGN KEY (DirID) REFERENCES FC_DirectoryList(DirID) ON DELETE CASCADE
+
+) ENGINE = INNODB;
+
+-- ------------------------------------------------------------------------------
+
 
 CREATE TABLE FC_DirMeta (
     DirID INTEGER NOT NULL,
@@ -597,6 +616,72 @@ END //
 DELIMITER ;
 
 
+-- update_directory_tree_usage : propagates a change of the usage of a directory
+--                               to the directory and all its ancestors
+--
+-- dir_id : the id of the dir whose usage changed
+-- se_id : the id of the SE
+-- size_diff : the change of the size
+-- file_diff : the change of the number of files
+
+DROP PROCEDURE IF EXISTS update_directory_tree_usage;
+DELIMITER //
+CREATE PROCEDURE update_directory_tree_usage
+(IN dir_id INT, IN se_id INT, IN size_diff BIGINT, IN file_diff BIGINT)
+BEGIN
+
+  -- The rebuild of the usage fills FC_DirectoryTreeUsage by itself
+  IF @skip_directory_tree_usage IS NULL AND (size_diff <> 0 OR file_diff <> 0) THEN
+    -- The closure has a row of depth 0 for the directory itself
+    INSERT INTO FC_DirectoryTreeUsage (DirID, SEID, SESize, SEFiles, LastUpdate)
+      SELECT SQL_NO_CACHE ParentID, se_id, size_diff, file_diff, UTC_TIMESTAMP()
+      FROM FC_DirectoryClosure
+      WHERE ChildID = dir_id
+      ORDER BY ParentID
+    ON DUPLICATE KEY UPDATE SESize = SESize + size_diff, SEFiles = SEFiles + file_diff, LastUpdate = UTC_TIMESTAMP();
+  END IF;
+
+END //
+DELIMITER ;
+
+
+DROP TRIGGER IF EXISTS trg_after_insert_directory_usage;
+DELIMITER //
+CREATE TRIGGER trg_after_insert_directory_usage AFTER INSERT ON FC_DirectoryUsage
+FOR EACH ROW
+BEGIN
+  call update_directory_tree_usage (new.DirID, new.SEID, new.SESize, new.SEFiles);
+END //
+DELIMITER ;
+
+
+DROP TRIGGER IF EXISTS trg_after_update_directory_usage;
+DELIMITER //
+CREATE TRIGGER trg_after_update_directory_usage AFTER UPDATE ON FC_DirectoryUsage
+FOR EACH ROW
+BEGIN
+  IF new.DirID = old.DirID AND new.SEID = old.SEID THEN
+    call update_directory_tree_usage (new.DirID, new.SEID, new.SESize - old.SESize, new.SEFiles - old.SEFiles);
+  ELSE
+    call update_directory_tree_usage (old.DirID, old.SEID, -old.SESize, -old.SEFiles);
+    call update_directory_tree_usage (new.DirID, new.SEID, new.SESize, new.SEFiles);
+  END IF;
+END //
+DELIMITER ;
+
+
+-- The rows deleted by the cascade of a directory removal do not fire it,
+-- but a directory can only be removed once it is empty
+DROP TRIGGER IF EXISTS trg_after_delete_directory_usage;
+DELIMITER //
+CREATE TRIGGER trg_after_delete_directory_usage AFTER DELETE ON FC_DirectoryUsage
+FOR EACH ROW
+BEGIN
+  call update_directory_tree_usage (old.DirID, old.SEID, -old.SESize, -old.SEFiles);
+END //
+DELIMITER ;
+
+
 DROP TRIGGER IF EXISTS trg_after_update_replica_move_size;
 DELIMITER //
 CREATE TRIGGER trg_after_update_replica_move_size AFTER UPDATE ON FC_Replicas
@@ -1652,7 +1737,7 @@ DELIMITER ;
 
 
 -- ps_get_dir_logical_size : returns the logical size of a directory (irrelevant of amount of replicas),
---                           as written in DirectoryUsage
+--                           as written in DirectoryUsage, or in DirectoryTreeUsage for the recursive sum
 --
 -- dir_id : id of the directory
 -- recursiveSum: take subdirectories into account
@@ -1668,11 +1753,12 @@ BEGIN
 
     IF recursiveSum THEN
 
-      SELECT SQL_NO_CACHE COALESCE(SUM(SESize), 0), COALESCE(SUM(SEFiles),0) FROM FC_DirectoryUsage u
-      JOIN FC_DirectoryClosure c on c.ChildID = u.DirID
+      SELECT SQL_NO_CACHE SESize, SEFiles INTO log_size, log_files FROM FC_DirectoryTreeUsage u
       JOIN FC_StorageElements s ON s.SEID = u.SEID
       WHERE s.SEName = 'FakeSE'
-      AND c.ParentID = dir_id;
+      AND u.DirID = dir_id;
+
+      SELECT COALESCE(log_size, 0), COALESCE(log_files,0);
 
     ELSE
 
@@ -1734,6 +1820,7 @@ DELIMITER ;
 
 
 -- ps_get_dir_physical_size : get the physical size of a directory on each SE from DirectoryUsage,
+--                           or from DirectoryTreeUsage for the recursive sum
 --                           It should be equal to ps_calculate_dir_physical_size
 --
 -- dir_id : id of the directory
@@ -1748,15 +1835,12 @@ CREATE PROCEDURE ps_get_dir_physical_size
 BEGIN
 
   IF recursiveSum THEN
-    SELECT SQL_NO_CACHE SEName, COALESCE(SUM(SESize), 0), COALESCE(SUM(SEFiles), 0)
-    FROM FC_DirectoryUsage u
-    JOIN FC_DirectoryClosure c on u.DirID = c.ChildID
+    SELECT SQL_NO_CACHE SEName, SESize, SEFiles
+    FROM FC_DirectoryTreeUsage u
     JOIN FC_StorageElements se ON se.SEID = u.SEID
-    WHERE c.ParentID = dir_id
+    WHERE u.DirID = dir_id
     AND SEName != 'FakeSE'
-    AND (SESize != 0 OR SEFiles != 0)
-    GROUP BY se.SEName
-    ORDER BY NULL;
+    AND (SESize != 0 OR SEFiles != 0);
 
   ELSE
 
@@ -1826,12 +1910,16 @@ BEGIN
 
   DECLARE exit handler for sqlexception
     BEGIN
+    SET @skip_directory_tree_usage = NULL;
     ROLLBACK;
     RESIGNAL;
   END;
 
   START TRANSACTION;
 
+  -- The recursive usage is recomputed at the end rather than propagated row by row
+  SET @skip_directory_tree_usage = 1;
+
   DELETE FROM FC_DirectoryUsage;
 
   INSERT INTO FC_DirectoryUsage (DirID, SEID, SESize, SEFiles)
@@ -1847,6 +1935,17 @@ BEGIN
     GROUP BY DirID, SEID
     ORDER BY NULL;
 
+  DELETE FROM FC_DirectoryTreeUsage;
+
+  INSERT INTO FC_DirectoryTreeUsage (DirID, SEID, SESize, SEFiles, LastUpdate)
+    SELECT SQL_NO_CACHE c.ParentID, u.SEID, sum(u.SESize), sum(u.SEFiles), UTC_TIMESTAMP()
+    FROM FC_DirectoryUsage u
+    JOIN FC_DirectoryClosure c ON c.ChildID = u.DirID
+    GROUP BY c.ParentID, u.SEID
+    ORDER BY NULL;
+
+  SET @skip_directory_tree_usage = NULL;
+
   COMMIT;
 END //
 DELIMITER ;
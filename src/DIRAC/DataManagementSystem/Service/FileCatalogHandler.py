@@ -6,6 +6,7 @@ in the DIRAC framework
 import csv
 import json
 import os
+import zlib
 from io import StringIO
 
 from DIRAC.Core.DISET.RequestHandler import RequestHandler, getServiceOption
@@ -13,6 +14,54 @@ from DIRAC import S_OK, S_ERROR
 from DIRAC.DataManagementSystem.DB.FileCatalogDB import FileCatalogDB
 
 
+class SEDumpReader:
+    """Read only file object giving an SE dump formatted as CSV with '|' separation,
+    optionally gzip compressed. The lines are formatted as the batches of files are read from the DB,
+    so that the dump is never held in memory.
+    """
+
+    def __init__(self, dump, compress=False):
+        """C'tor
+
+        :param dump: generator of S_OK with tuples of (SEName, lfn, checksum, size), as given by iterSEDump
+        :param bool compress: gzip the dump
+        """
+        self.__dump = dump
+        self.__compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if compress else None
+        self.__buffer = bytearray()
+        self.__exhausted = False
+
+    def __readBatch(self):
+        """Format the next batch of files of the dump
+
+        :raises: RuntimeError if the dump failed
+        """
+        result = next(self.__dump, None)
+        if result is None:
+            self.__exhausted = True
+            return self.__compressor.flush() if self.__compressor else b""
+        if not result["OK"]:
+            raise RuntimeError(result["Message"])
+        csvOutput = StringIO()
+        csv.writer(csvOutput, delimiter="|").writerows(result["Value"])
+        data = csvOutput.getvalue().encode()
+        return self.__compressor.compress(data) if self.__compressor else data
+
+    def read(self, size=-1):
+        """Read at most size bytes of the dump, all of it if size is negative"""
+        while (size < 0 or len(self.__buffer) < size) and not self.__exhausted:
+            self.__buffer += self.__readBatch()
+        if size < 0:
+            size = len(self.__buffer)
+        data = bytes(self.__buffer[:size])
+        del self.__buffer[:size]
+        return data
+
+    def close(self):
+        """Stop reading the dump from the DB"""
+        self.__dump.close()
+
+
 class FileCatalogHandlerMixin:
     """
     A simple Replica and Metadata Catalog service.
@@ -56,6 +105,10 @@ class FileCatalogHandlerMixin:
             "ValidReplicaStatus": ["AprioriGood", "Trash", "Removing", "Probing"],
             "VisibleFileStatus": ["AprioriGood"],
             "VisibleReplicaStatus": ["AprioriGood"],
+            "DirectoryCacheSize": 10000,
+            "DirectoryCacheLifetime": 300,
+            "MetadataIndex": False,
+            "BulkInsertChunkSize": 0,
         }
         for configKey in sorted(defaultConfig.keys()):
             defaultValue = defaultConfig[configKey]
@@ -64,6 +117,9 @@ class FileCatalogHandlerMixin:
             databaseConfig[configKey] = configValue
         res = cls.fileCatalogDB.setConfig(databaseConfig)
 
+        # Number of entries sent in each chunk of the streamed methods
+        cls.streamChunkSize = getServiceOption(serviceInfo, "StreamChunkSize", 10000)
+
         return res
 
     ########################################################################
@@ -273,6 +329,10 @@ class FileCatalogHandlerMixin:
         """Get replicas for supplied lfns"""
         return self.fileCatalogDB.getReplicas(lfns, allStatus, self.getRemoteCredentials())
 
+    def stream_getReplicas(self, lfns, allStatus=False):
+        """Get replicas for supplied lfns, streamed by chunks of lfns"""
+        yield from self.fileCatalogDB.iterReplicas(lfns, allStatus, self.getRemoteCredentials(), self.streamChunkSize)
+
     types_getReplicaStatus = [[list, dict, str]]
 
     def export_getReplicaStatus(self, lfns):
@@ -333,6 +393,10 @@ class FileCatalogHandlerMixin:
         """List the contents of supplied directories"""
         return self.fileCatalogDB.listDirectory(lfns, self.getRemoteCredentials(), verbose=verbose)
 
+    def stream_listDirectory(self, lfns, verbose):
+        """List the contents of supplied directories, streamed directory by directory"""
+        yield from self.fileCatalogDB.iterListDirectory(lfns, self.getRemoteCredentials(), verbose=verbose)
+
     types_isDirectory = [[list, dict, str]]
 
     def export_isDirectory(self, lfns):
@@ -351,6 +415,12 @@ class FileCatalogHandlerMixin:
         """Get the size of the supplied directory"""
         return self.fileCatalogDB.getDirectorySize(lfns, longOut, fromFiles, recursiveSum, self.getRemoteCredentials())
 
+    types_checkDirectoryUsage = [[list, dict, str]]
+
+    def export_checkDirectoryUsage(self, lfns):
+        """Compare the usage of the supplied directories with the one computed from the file tables"""
+        return self.fileCatalogDB.checkDirectoryUsage(lfns, self.getRemoteCredentials())
+
     types_getDirectoryReplicas = [[list, dict, str], bool]
 
     def export_getDirectoryReplicas(self, lfns, allStatus=False):
@@ -363,6 +433,10 @@ class FileCatalogHandlerMixin:
         """Recursively list the contents of supplied directories"""
         return self.fileCatalogDB.getDirectoryDump(lfns, self.getRemoteCredentials())
 
+    def stream_getDirectoryDump(self, lfns):
+        """Recursively list the contents of supplied directories, streamed by chunks of files"""
+        yield from self.fileCatalogDB.iterDirectoryDump(lfns, self.getRemoteCredentials(), self.streamChunkSize)
+
     ########################################################################
     #
     # Administrative database operations
@@ -380,6 +454,12 @@ class FileCatalogHandlerMixin:
         """Rebuild DirectoryUsage table from scratch"""
         return self.fileCatalogDB.rebuildDirectoryUsage()
 
+    types_rebuildMetadataIndex = []
+
+    def export_rebuildMetadataIndex(self):
+        """Rebuild the index of the metadata inherited by each directory from scratch"""
+        return self.fileCatalogDB.rebuildMetadataIndex(self.getRemoteCredentials())
+
     types_repairCatalog = []
 
     def export_repairCatalog(self):
@@ -394,40 +474,43 @@ class FileCatalogHandlerMixin:
 
     def export_addMetadataField(self, fieldName, fieldType, metaType="-d"):
         """Add a new metadata field of the given type"""
-        if metaType.lower() == "-d":
-            return self.fileCatalogDB.dmeta.addMetadataField(fieldName, fieldType, self.getRemoteCredentials())
-        elif metaType.lower() == "-f":
-            return self.fileCatalogDB.fmeta.addMetadataField(fieldName, fieldType, self.getRemoteCredentials())
-        else:
-            return S_ERROR(f"Unknown metadata type {metaType}")
+        with self.fileCatalogDB.writeSession(self.getRemoteCredentials()):
+            if metaType.lower() == "-d":
+                return self.fileCatalogDB.dmeta.addMetadataField(fieldName, fieldType, self.getRemoteCredentials())
+            elif metaType.lower() == "-f":
+                return self.fileCatalogDB.fmeta.addMetadataField(fieldName, fieldType, self.getRemoteCredentials())
+            else:
+                return S_ERROR(f"Unknown metadata type {metaType}")
 
     types_deleteMetadataField = [str]
 
     def export_deleteMetadataField(self, fieldName):
         """Delete the metadata field"""
-        result = self.fileCatalogDB.dmeta.deleteMetadataField(fieldName, self.getRemoteCredentials())
-        error = ""
-        if not result["OK"]:
-            error = result["Message"]
-        result = self.fileCatalogDB.fmeta.deleteMetadataField(fieldName, self.getRemoteCredentials())
-        if not result["OK"]:
-            if error:
-                result["Message"] = error + "; " + result["Message"]
+        with self.fileCatalogDB.writeSession(self.getRemoteCredentials()):
+            result = self.fileCatalogDB.dmeta.deleteMetadataField(fieldName, self.getRemoteCredentials())
+            error = ""
+            if not result["OK"]:
+                error = result["Message"]
+            result = self.fileCatalogDB.fmeta.deleteMetadataField(fieldName, self.getRemoteCredentials())
+            if not result["OK"]:
+                if error:
+                    result["Message"] = error + "; " + result["Message"]
 
-        return result
+            return result
 
     types_getMetadataFields = []
 
     def export_getMetadataFields(self):
         """Get all the metadata fields"""
-        resultDir = self.fileCatalogDB.dmeta.getMetadataFields(self.getRemoteCredentials())
-        if not resultDir["OK"]:
-            return resultDir
-        resultFile = self.fileCatalogDB.fmeta.getFileMetadataFields(self.getRemoteCredentials())
-        if not resultFile["OK"]:
-            return resultFile
+        with self.fileCatalogDB.readSession(self.getRemoteCredentials()):
+            resultDir = self.fileCatalogDB.dmeta.getMetadataFields(self.getRemoteCredentials())
+            if not resultDir["OK"]:
+                return resultDir
+            resultFile = self.fileCatalogDB.fmeta.getFileMetadataFields(self.getRemoteCredentials())
+            if not resultFile["OK"]:
+                return resultFile
 
-        return S_OK({"DirectoryMetaFields": resultDir["Value"], "FileMetaFields": resultFile["Value"]})
+            return S_OK({"DirectoryMetaFields": resultDir["Value"], "FileMetaFields": resultFile["Value"]})
 
     types_setMetadata = [str, dict]
 
@@ -451,74 +534,84 @@ class FileCatalogHandlerMixin:
 
     def export_getDirectoryUserMetadata(self, path):
         """Get all the metadata valid for the given directory path"""
-        return self.fileCatalogDB.dmeta.getDirectoryMetadata(path, self.getRemoteCredentials())
+        with self.fileCatalogDB.readSession(self.getRemoteCredentials()):
+            return self.fileCatalogDB.dmeta.getDirectoryMetadata(path, self.getRemoteCredentials())
 
     types_getFileUserMetadata = [str]
 
     def export_getFileUserMetadata(self, path):
         """Get all the metadata valid for the given file"""
-        return self.fileCatalogDB.fmeta.getFileUserMetadata(path, self.getRemoteCredentials())
+        with self.fileCatalogDB.readSession(self.getRemoteCredentials()):
+            return self.fileCatalogDB.fmeta.getFileUserMetadata(path, self.getRemoteCredentials())
 
     types_findDirectoriesByMetadata = [dict]
 
     def export_findDirectoriesByMetadata(self, metaDict, path="/"):
         """Find all the directories satisfying the given metadata set"""
-        return self.fileCatalogDB.dmeta.findDirectoriesByMetadata(metaDict, path, self.getRemoteCredentials())
+        with self.fileCatalogDB.readSession(self.getRemoteCredentials()):
+            return self.fileCatalogDB.dmeta.findDirectoriesByMetadata(metaDict, path, self.getRemoteCredentials())
 
     types_findFilesByMetadata = [dict, str]
 
-    def export_findFilesByMetadata(self, metaDict, path="/"):
-        """Find all the files satisfying the given metadata set"""
-        result = self.fileCatalogDB.fmeta.findFilesByMetadata(metaDict, path, self.getRemoteCredentials())
-        if not result["OK"]:
-            return result
-        lfns = list(result["Value"].values())
-        return S_OK(lfns)
+    def export_findFilesByMetadata(self, metaDict, path="/", since=None):
+        """Find all the files satisfying the given metadata set,
+        only the ones with a greater FileID than the since watermark if it is given"""
+        with self.fileCatalogDB.readSession(self.getRemoteCredentials()):
+            result = self.fileCatalogDB.fmeta.findFilesByMetadata(metaDict, path, self.getRemoteCredentials(), since)
+            if not result["OK"]:
+                return result
+            lfns = list(result["Value"].values())
+            if since is None:
+                return S_OK(lfns)
+            return S_OK({"LFNs": lfns, "Watermark": result["Watermark"]})
 
     types_getReplicasByMetadata = [dict, str, bool]
 
     def export_getReplicasByMetadata(self, metaDict, path="/", allStatus=False):
         """Find all the files satisfying the given metadata set"""
-        return self.fileCatalogDB.fileManager.getReplicasByMetadata(
-            metaDict, path, allStatus, self.getRemoteCredentials()
-        )
+        with self.fileCatalogDB.readSession(self.getRemoteCredentials()):
+            return self.fileCatalogDB.fileManager.getReplicasByMetadata(
+                metaDict, path, allStatus, self.getRemoteCredentials()
+            )
 
     types_findFilesByMetadataDetailed = [dict, str]
 
     def export_findFilesByMetadataDetailed(self, metaDict, path="/"):
         """Find all the files satisfying the given metadata set"""
-        result = self.fileCatalogDB.fmeta.findFilesByMetadata(metaDict, path, self.getRemoteCredentials())
-        if not result["OK"] or not result["Value"]:
-            return result
+        with self.fileCatalogDB.readSession(self.getRemoteCredentials()):
+            result = self.fileCatalogDB.fmeta.findFilesByMetadata(metaDict, path, self.getRemoteCredentials())
+            if not result["OK"] or not result["Value"]:
+                return result
 
-        lfns = list(result["Value"].values())
-        return self.fileCatalogDB.getFileDetails(lfns, self.getRemoteCredentials())
+            lfns = list(result["Value"].values())
+            return self.fileCatalogDB.getFileDetails(lfns, self.getRemoteCredentials())
 
     types_findFilesByMetadataWeb = [dict, str, int, int]
 
     def export_findFilesByMetadataWeb(self, metaDict, path, startItem, maxItems):
         """Find files satisfying the given metadata set"""
-        result = self.fileCatalogDB.dmeta.findFileIDsByMetadata(
-            metaDict, path, self.getRemoteCredentials(), startItem, maxItems
-        )
-        if not result["OK"] or not result["Value"]:
+        with self.fileCatalogDB.readSession(self.getRemoteCredentials()):
+            result = self.fileCatalogDB.dmeta.findFileIDsByMetadata(
+                metaDict, path, self.getRemoteCredentials(), startItem, maxItems
+            )
+            if not result["OK"] or not result["Value"]:
+                return result
+
+            fileIDs = result["Value"]
+            totalRecords = result["TotalRecords"]
+
+            result = self.fileCatalogDB.fileManager._getFileLFNs(fileIDs)
+            if not result["OK"]:
+                return result
+
+            lfnsResultList = list(result["Value"]["Successful"].values())
+            resultDetails = self.fileCatalogDB.getFileDetails(lfnsResultList, self.getRemoteCredentials())
+            if not resultDetails["OK"]:
+                return resultDetails
+
+            result = S_OK({"TotalRecords": totalRecords, "Records": resultDetails["Value"]})
             return result
 
-        fileIDs = result["Value"]
-        totalRecords = result["TotalRecords"]
-
-        result = self.fileCatalogDB.fileManager._getFileLFNs(fileIDs)
-        if not result["OK"]:
-            return result
-
-        lfnsResultList = list(result["Value"]["Successful"].values())
-        resultDetails = self.fileCatalogDB.getFileDetails(lfnsResultList, self.getRemoteCredentials())
-        if not resultDetails["OK"]:
-            return resultDetails
-
-        result = S_OK({"TotalRecords": totalRecords, "Records": resultDetails["Value"]})
-        return result
-
     def findFilesByMetadataWeb(self, metaDict, path, startItem, maxItems):
         """Find all the files satisfying the given metadata set"""
         result = self.fileCatalogDB.fmeta.findFilesByMetadata(metaDict, path, self.getRemoteCredentials())
@@ -550,19 +643,22 @@ class FileCatalogHandlerMixin:
 
     def export_getCompatibleMetadata(self, metaDict, path="/"):
         """Get metadata values compatible with the given metadata subset"""
-        return self.fileCatalogDB.dmeta.getCompatibleMetadata(metaDict, path, self.getRemoteCredentials())
+        with self.fileCatalogDB.readSession(self.getRemoteCredentials()):
+            return self.fileCatalogDB.dmeta.getCompatibleMetadata(metaDict, path, self.getRemoteCredentials())
 
     types_addMetadataSet = [str, dict]
 
     def export_addMetadataSet(self, setName, setDict):
         """Add a new metadata set"""
-        return self.fileCatalogDB.dmeta.addMetadataSet(setName, setDict, self.getRemoteCredentials())
+        with self.fileCatalogDB.writeSession(self.getRemoteCredentials()):
+            return self.fileCatalogDB.dmeta.addMetadataSet(setName, setDict, self.getRemoteCredentials())
 
     types_getMetadataSet = [str, bool]
 
     def export_getMetadataSet(self, setName, expandFlag):
         """Add a new metadata set"""
-        return self.fileCatalogDB.dmeta.getMetadataSet(setName, expandFlag, self.getRemoteCredentials())
+        with self.fileCatalogDB.readSession(self.getRemoteCredentials()):
+            return self.fileCatalogDB.dmeta.getMetadataSet(setName, expandFlag, self.getRemoteCredentials())
 
     #########################################################################################
     #
@@ -572,19 +668,22 @@ class FileCatalogHandlerMixin:
 
     def export_addDataset(self, datasets):
         """Add a new dynamic dataset defined by its meta query"""
-        return self.fileCatalogDB.datasetManager.addDataset(datasets, self.getRemoteCredentials())
+        with self.fileCatalogDB.writeSession(self.getRemoteCredentials()):
+            return self.fileCatalogDB.datasetManager.addDataset(datasets, self.getRemoteCredentials())
 
     types_addDatasetAnnotation = [dict]
 
     def export_addDatasetAnnotation(self, datasetDict):
         """Add annotation to an already created dataset"""
-        return self.fileCatalogDB.datasetManager.addDatasetAnnotation(datasetDict, self.getRemoteCredentials())
+        with self.fileCatalogDB.writeSession(self.getRemoteCredentials()):
+            return self.fileCatalogDB.datasetManager.addDatasetAnnotation(datasetDict, self.getRemoteCredentials())
 
     types_removeDataset = [dict]
 
     def export_removeDataset(self, datasets):
         """Check the given dynamic dataset for changes since its definition"""
-        return self.fileCatalogDB.datasetManager.removeDataset(datasets, self.getRemoteCredentials())
+        with self.fileCatalogDB.writeSession(self.getRemoteCredentials()):
+            return self.fileCatalogDB.datasetManager.removeDataset(datasets, self.getRemoteCredentials())
 
     types_checkDataset = [dict]
 
@@ -596,7 +695,8 @@ class FileCatalogHandlerMixin:
 
     def export_updateDataset(self, datasets):
         """Update the given dynamic dataset for changes since its definition"""
-        return self.fileCatalogDB.datasetManager.updateDataset(datasets, self.getRemoteCredentials())
+        with self.fileCatalogDB.writeSession(self.getRemoteCredentials()):
+            return self.fileCatalogDB.datasetManager.updateDataset(datasets, self.getRemoteCredentials())
 
     types_getDatasets = [dict]
 
@@ -620,19 +720,39 @@ class FileCatalogHandlerMixin:
 
     def export_freezeDataset(self, datasets):
         """Freeze the contents of the dataset making it effectively static"""
-        return self.fileCatalogDB.datasetManager.freezeDataset(datasets, self.getRemoteCredentials())
+        with self.fileCatalogDB.writeSession(self.getRemoteCredentials()):
+            return self.fileCatalogDB.datasetManager.freezeDataset(datasets, self.getRemoteCredentials())
 
     types_releaseDataset = [dict]
 
     def export_releaseDataset(self, datasets):
         """Release the contents of the frozen dataset allowing changes in its contents"""
-        return self.fileCatalogDB.datasetManager.releaseDataset(datasets, self.getRemoteCredentials())
+        with self.fileCatalogDB.writeSession(self.getRemoteCredentials()):
+            return self.fileCatalogDB.datasetManager.releaseDataset(datasets, self.getRemoteCredentials())
 
     types_getDatasetFiles = [dict]
 
-    def export_getDatasetFiles(self, datasets):
-        """Get lfns in the given dataset"""
-        return self.fileCatalogDB.datasetManager.getDatasetFiles(datasets, self.getRemoteCredentials())
+    def export_getDatasetFiles(self, datasets, offset=0, limit=0):
+        """Get lfns in the given dataset, or a page of limit of them starting at offset"""
+        return self.fileCatalogDB.datasetManager.getDatasetFiles(
+            datasets, self.getRemoteCredentials(), offset=offset, limit=limit
+        )
+
+    types_getDatasetFileMembership = [str, list]
+
+    def export_getDatasetFileMembership(self, datasetName, lfns):
+        """Check which of the given lfns belong to the dataset"""
+        return self.fileCatalogDB.datasetManager.getDatasetFileMembership(
+            datasetName, lfns, self.getRemoteCredentials()
+        )
+
+    types_combineDatasets = [list, str]
+
+    def export_combineDatasets(self, datasetNames, operation, offset=0, limit=0):
+        """Get the lfns of the union, intersection or difference of datasets"""
+        return self.fileCatalogDB.datasetManager.combineDatasets(
+            datasetNames, operation, self.getRemoteCredentials(), offset=offset, limit=limit
+        )
 
     def getSEDump(self, seNames):
         """
@@ -644,13 +764,46 @@ class FileCatalogHandlerMixin:
         """
         return self.fileCatalogDB.getSEDump(seNames)
 
+    def iterSEDump(self, seNames):
+        """
+         Same as :py:meth:`getSEDump`, but the files are read from the DB by batches
+
+        :param seNames: StorageElement names
+
+        :returns: generator of S_OK with tuples of (SEName, lfn, checksum, size), the last one is S_ERROR upon error
+        """
+        return self.fileCatalogDB.iterSEDump(seNames)
+
+    @staticmethod
+    def _startSEDump(dump):
+        """Read the first batch of an SE dump, so that errors like an unknown SE
+        can be reported before starting to send it
+
+        :param dump: generator returned by iterSEDump
+
+        :returns: S_OK(generator giving the whole dump)/S_ERROR
+        """
+        first = next(dump, None)
+        if first is None:
+            return S_OK(dump)
+        if not first["OK"]:
+            return first
+
+        def wholeDump():
+            yield first
+            yield from dump
+
+        return S_OK(wholeDump())
+
 
 class FileCatalogHandler(FileCatalogHandlerMixin, RequestHandler):
     def transfer_toClient(self, jsonSENames, token, fileHelper):
         """This method used to transfer the SEDump to the client,
-        formated as CSV with '|' separation
+        formated as CSV with '|' separation.
+        The dump is streamed from the DB, and gzip compressed if the token contains "Compressed".
 
         :param seName: name of the se to dump
+        :param token: "Compressed" to get the dump gzip compressed
 
         :returns: the result of the FileHelper
 
@@ -658,29 +811,15 @@ class FileCatalogHandler(FileCatalogHandlerMixin, RequestHandler):
         """
 
         seNames = json.loads(jsonSENames)
-        csvOutput = None
-        res = self.getSEDump(seNames)
+        res = self._startSEDump(self.iterSEDump(seNames))
+        if not res["OK"]:
+            return fileHelper.stringToNetwork(json.dumps(res))
 
+        dataSource = SEDumpReader(res["Value"], compress="Compressed" in (token or ""))
         try:
-            if not res["OK"]:
-                ret = fileHelper.stringToNetwork(json.dumps(res))
-                return ret
-
-            retVal = res["Value"]
-
-            csvOutput = StringIO()
-            writer = csv.writer(csvOutput, delimiter="|")
-            for lfn in retVal:
-                writer.writerow(lfn)
-
-            csvOutput.seek(0)
-
-            ret = fileHelper.DataSourceToNetwork(csvOutput)
-            return ret
-
+            return fileHelper.DataSourceToNetwork(dataSource)
         except Exception as e:
             self.log.exception("Exception while sending seDump", repr(e))
             return S_ERROR(f"Exception while sending seDump: {repr(e)}")
         finally:
-            if csvOutput is not None:
-                csvOutput.close()
+            dataSource.close()
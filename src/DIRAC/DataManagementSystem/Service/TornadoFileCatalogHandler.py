@@ -11,15 +11,12 @@
 """
 # imports
 import json
-import csv
-
-from io import StringIO
 
 # from DIRAC
 
 from DIRAC import S_ERROR
 from DIRAC.Core.Utilities.ReturnValues import returnValueOrRaise
-from DIRAC.DataManagementSystem.Service.FileCatalogHandler import FileCatalogHandlerMixin
+from DIRAC.DataManagementSystem.Service.FileCatalogHandler import FileCatalogHandlerMixin, SEDumpReader
 
 from DIRAC.Core.Tornado.Server.TornadoService import TornadoService
 
@@ -42,21 +39,16 @@ class TornadoFileCatalogHandler(FileCatalogHandlerMixin, TornadoService):
 
         """
         seNames = json.loads(jsonSENames)
-        csvOutput = None
+        dataSource = None
 
         try:
-            retVal = returnValueOrRaise(self.getSEDump(seNames))
-
-            csvOutput = StringIO()
-            writer = csv.writer(csvOutput, delimiter="|")
-            writer.writerows(retVal)
-
-            ret = csvOutput.getvalue()
-            return ret
+            # The files are read from the DB by batches, only the CSV output is held in memory
+            dataSource = SEDumpReader(returnValueOrRaise(self._startSEDump(self.iterSEDump(seNames))))
+            return dataSource.read().decode()
 
         except Exception as e:
             self.log.exception("Exception while sending seDump", repr(e))
             return S_ERROR(f"Exception while sendind seDump: {repr(e)}")
         finally:
-            if csvOutput is not None:
-                csvOutput.close()
+            if dataSource is not None:
+                dataSource.close()
@@ -0,0 +1,56 @@
+""" Test the streaming of the SE dumps from the FileCatalog service to the client
+"""
+# pylint: disable=protected-access
+
+import io
+
+import pytest
+
+from DIRAC import S_OK, S_ERROR
+from DIRAC.DataManagementSystem.Service.FileCatalogHandler import FileCatalogHandlerMixin, SEDumpReader
+from DIRAC.Resources.Catalog.FileCatalogClient import _SEDumpSink
+
+BATCHES = [
+    (("SE1", "/vo/file1", "0a1b2c3d", 123), ("SE1", "/vo/file2", "", 0)),
+    (("SE2", "/vo/file3", "4e5f6a7b", 456),),
+]
+EXPECTED = b"SE1|/vo/file1|0a1b2c3d|123\r\nSE1|/vo/file2||0\r\nSE2|/vo/file3|4e5f6a7b|456\r\n"
+
+
+def iterDump(error=None):
+    for batch in BATCHES:
+        yield S_OK(batch)
+    if error:
+        yield S_ERROR(error)
+
+
+@pytest.mark.parametrize("compress", [False, True])
+@pytest.mark.parametrize("packetSize", [1, 7, 1024])
+def test_transfer(compress, packetSize):
+    """The dump read by packets is received unchanged, whether it was compressed or not"""
+    dataSource = SEDumpReader(iterDump(), compress=compress)
+    output = io.BytesIO()
+    dataSink = _SEDumpSink(output)
+    while packet := dataSource.read(packetSize):
+        dataSink.write(packet)
+    dataSink.flush()
+    assert output.getvalue() == EXPECTED
+
+
+def test_readError():
+    dataSource = SEDumpReader(iterDump("Lost connection to MySQL server"))
+    with pytest.raises(RuntimeError, match="Lost connection"):
+        dataSource.read()
+
+
+def test_startSEDump():
+    """The errors happening before the first batch are returned, the dump is given whole otherwise"""
+    assert FileCatalogHandlerMixin._startSEDump(iter([S_ERROR("SE not found")]))["Message"] == "SE not found"
+
+    result = FileCatalogHandlerMixin._startSEDump(iterDump())
+    assert result["OK"]
+    assert SEDumpReader(result["Value"]).read() == EXPECTED
+
+    result = FileCatalogHandlerMixin._startSEDump(iter([]))
+    assert result["OK"]
+    assert SEDumpReader(result["Value"]).read() == b""
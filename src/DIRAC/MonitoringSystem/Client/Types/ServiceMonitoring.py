@@ -29,6 +29,11 @@ class ServiceMonitoring(BaseType):
             "RunningThreads",
             "MaxFD",
             "ResponseTime",
+            "DBConnections",
+            "DBCheckouts",
+            "DBWaitTime",
+            "DBReconnects",
+            "DBPoolExhausted",
         ]
 
         self.index = "service_monitoring-index"
@@ -48,6 +53,11 @@ class ServiceMonitoring(BaseType):
                 "RunningThreads": {"type": "long"},
                 "MaxFD": {"type": "long"},
                 "ResponseTime": {"type": "long"},
+                "DBConnections": {"type": "long"},
+                "DBCheckouts": {"type": "long"},
+                "DBWaitTime": {"type": "long"},
+                "DBReconnects": {"type": "long"},
+                "DBPoolExhausted": {"type": "long"},
             }
         )
 
@@ -18,6 +18,15 @@
     For the "read" methods plug-ins are called one by one, starting with the Master
     plug-in if declared, until getting a successful result.
 
+    If the ParallelExecution option is set in /Operations/<vo/setup>/Services/Catalogs,
+    the "read" methods are called on all the plug-ins at once, and the "write" methods
+    on all the non Master plug-ins at once, after the Master one. The results are merged
+    exactly as if the calls were done one by one, and a plug-in not answering within its
+    Timeout (180 seconds by default) is considered as failed. The Timeout counts from the time
+    the call starts to run in the thread pool: a call still waiting for a thread after its Timeout
+    is cancelled. A plug-in can only have MAX_PENDING_CALLS calls waiting or running in the pool,
+    so that the calls of a plug-in which hangs do not end up occupying all the threads.
+
     Most of the catalog plug-in methods are taking the first argument which represents
     the required LFNS. The LFNs argument can have one of the following forms:
 
@@ -43,9 +52,15 @@
     the documentation of the respective FileCatalog plug-ins ( client classes )
 
 """
+import errno
+import functools
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 
 from DIRAC import gLogger, gConfig, S_OK, S_ERROR
+from DIRAC.Core.DISET.ThreadConfig import ThreadConfig
 from DIRAC.Core.Utilities import DErrno
 from DIRAC.ConfigurationSystem.Client.Helpers.Operations import Operations
 from DIRAC.Core.Security.ProxyInfo import getVOfromProxyGroup
@@ -54,11 +69,28 @@ from DIRAC.Resources.Catalog.FileCatalogFactory import FileCatalogFactory
 from DIRAC.Resources.Catalog.FCConditionParser import FCConditionParser
 
 
+# Maximum number of catalog calls executed at the same time in parallel mode, for all the FileCatalog objects
+MAX_PARALLEL_CALLS = 20
+# Maximum number of calls to a catalog waiting or running in parallel mode, for all the FileCatalog objects
+MAX_PENDING_CALLS = 10
+
+
 class FileCatalog:
+    # Shared by all the FileCatalog objects, created when first needed
+    executor = None
+    executorLock = threading.Lock()
+    # Number of calls of each catalog waiting or running in the executor
+    pendingCalls = {}
+    pendingCallsLock = threading.Lock()
+    # Number of calls, total and maximum time, and number of timeouts of each catalog
+    latencyStats = {}
+    latencyStatsLock = threading.Lock()
+
     def __init__(self, catalogs=None, vo=None):
         """Default constructor"""
         self.valid = True
         self.timeout = 180
+        self.catalogTimeouts = {}
 
         self.ro_methods = set()
         self.write_methods = set()
@@ -71,6 +103,7 @@ class FileCatalog:
         self.log = gLogger.getSubLogger(self.__class__.__name__)
 
         self.opHelper = Operations(vo=self.vo)
+        self.parallelExecution = self.opHelper.getValue("/Services/Catalogs/ParallelExecution", False)
 
         catalogList = []
         if isinstance(catalogs, str):
@@ -142,6 +175,149 @@ class FileCatalog:
     def getWriteCatalogs(self):
         return self.writeCatalogs
 
+    @classmethod
+    def getLatencyStatistics(cls):
+        """Get the latency of the calls done to each catalog by all the FileCatalog objects
+
+        :return: dict {catalogName: {"Calls", "TotalTime", "MaxTime", "Timeouts"}}
+        """
+        with cls.latencyStatsLock:
+            return {catalogName: dict(stats) for catalogName, stats in cls.latencyStats.items()}
+
+    @classmethod
+    def __recordLatency(cls, catalogName, duration=None):
+        """Record the duration of a call to a catalog, or a timeout if no duration is given"""
+        with cls.latencyStatsLock:
+            stats = cls.latencyStats.setdefault(
+                catalogName, {"Calls": 0, "TotalTime": 0.0, "MaxTime": 0.0, "Timeouts": 0}
+            )
+            if duration is None:
+                stats["Timeouts"] += 1
+            else:
+                stats["Calls"] += 1
+                stats["TotalTime"] += duration
+                stats["MaxTime"] = max(stats["MaxTime"], duration)
+
+    @classmethod
+    def __getExecutor(cls):
+        with cls.executorLock:
+            if cls.executor is None:
+                cls.executor = ThreadPoolExecutor(max_workers=MAX_PARALLEL_CALLS, thread_name_prefix="FileCatalog")
+            return cls.executor
+
+    def __callCatalog(self, catalogName, method, args, kws):
+        """Call a method of a catalog and record its latency"""
+        start = time.time()
+        try:
+            return method(*args, **kws)
+        finally:
+            self.__recordLatency(catalogName, time.time() - start)
+
+    @classmethod
+    def __reserveCall(cls, catalogName):
+        """Count a call to a catalog about to be submitted to the executor, if it has not too many pending calls"""
+        with cls.pendingCallsLock:
+            if cls.pendingCalls.get(catalogName, 0) >= MAX_PENDING_CALLS:
+                return False
+            cls.pendingCalls[catalogName] = cls.pendingCalls.get(catalogName, 0) + 1
+            return True
+
+    @classmethod
+    def __releaseCall(cls, catalogName, _future):
+        """Stop counting a call to a catalog which is done or cancelled"""
+        with cls.pendingCallsLock:
+            cls.pendingCalls[catalogName] -= 1
+
+    def __callCatalogInThread(self, threadConfig, starts, index, catalogName, method, args, kws):
+        """Call a method of a catalog in a thread of the pool, on behalf of the same user as the calling thread"""
+        starts[index] = time.time()
+        tc = ThreadConfig()
+        tc.reset()
+        tc.load(threadConfig)
+        try:
+            return self.__callCatalog(catalogName, method, args, kws)
+        finally:
+            tc.reset()
+
+    @staticmethod
+    def __checkDeadlines(futures, starts, timedOut):
+        """Cancel the calls still waiting for a thread at their deadline, and add to timedOut
+        the indexes of the cancelled calls and of the calls running for longer than their timeout
+
+        :param list futures: tuples (catalogName, future, queueDeadline, timeout), see __iterCatalogCalls
+        :param dict starts: time at which the calls started to run, by index
+        :param set timedOut: indexes of the calls which timed out
+
+        :return: time of the next deadline of the calls still pending, or None
+        """
+        now = time.time()
+        nextDeadline = None
+        for index, (_catalogName, future, queueDeadline, timeout) in enumerate(futures):
+            if future is None or future.done() or index in timedOut:
+                continue
+            start = starts.get(index)
+            deadline = queueDeadline if start is None else start + timeout
+            if deadline <= now and (start is not None or future.cancel()):
+                timedOut.add(index)
+            elif nextDeadline is None or deadline < nextDeadline:
+                nextDeadline = deadline
+        return nextDeadline
+
+    def __iterCatalogCalls(self, call, catalogCalls, kws, parallel):
+        """Call a method on several catalogs, and yield the results in the order of the catalogs
+
+        :param str call: name of the method
+        :param list catalogCalls: list of tuples (catalogName, method, args)
+        :param dict kws: keyword arguments of the method
+        :param bool parallel: call all the catalogs at once, with their timeout. Otherwise, a catalog
+                              is only called when the result of the previous one has been consumed
+
+        :return: generator of tuples (catalogName, result)
+        """
+        if not parallel:
+            for catalogName, method, args in catalogCalls:
+                yield catalogName, self.__callCatalog(catalogName, method, args, kws)
+            return
+
+        threadConfig = ThreadConfig().dump()
+        executor = self.__getExecutor()
+        # Time at which each call started to run in the executor
+        starts = {}
+        futures = []
+        try:
+            for index, (catalogName, method, args) in enumerate(catalogCalls):
+                timeout = self.catalogTimeouts.get(catalogName, self.timeout)
+                future = None
+                if self.__reserveCall(catalogName):
+                    future = executor.submit(
+                        self.__callCatalogInThread, threadConfig, starts, index, catalogName, method, args, kws
+                    )
+                    future.add_done_callback(functools.partial(self.__releaseCall, catalogName))
+                futures.append((catalogName, future, time.time() + timeout, timeout))
+
+            # Indexes of the calls which timed out
+            timedOut = set()
+            for index, (catalogName, future, _queueDeadline, _timeout) in enumerate(futures):
+                if future is None:
+                    self.log.error("Too many calls pending on the catalog", f"{call} on {catalogName}")
+                    yield catalogName, S_ERROR(errno.EBUSY, f"{call} not done, too many calls pending on {catalogName}")
+                    continue
+                while not future.done() and index not in timedOut:
+                    nextDeadline = self.__checkDeadlines(futures, starts, timedOut)
+                    wait([future], timeout=max(0, nextDeadline - time.time()) if nextDeadline else 0)
+                if index in timedOut:
+                    self.log.error("Catalog call timed out", f"{call} on {catalogName}")
+                    self.__recordLatency(catalogName)
+                    result = S_ERROR(errno.ETIMEDOUT, f"{call} timed out on {catalogName}")
+                else:
+                    result = future.result()
+                yield catalogName, result
+        finally:
+            # The calls whose result is not wanted anymore are not done if they did not start
+            for _catalogName, future, _queueDeadline, _timeout in futures:
+                if future is not None:
+                    future.cancel()
+
     def getMasterCatalogNames(self):
         """Returns the list of names of the Master catalogs"""
 
@@ -181,13 +357,14 @@ class FileCatalog:
         failedCatalogs = {}
         successfulCatalogs = {}
 
+        call = self.call
         specialConditions = kws.pop("fcConditions") if "fcConditions" in kws else None
 
         allLfns = []
         lfnMapDict = {}
         masterResult = {}
         parms1 = []
-        if self.call not in self.no_lfn_methods:
+        if call not in self.no_lfn_methods:
             fileInfo = parms[0]
             result = checkArgumentFormat(fileInfo, generateMap=True)
             if not result["OK"]:
@@ -198,25 +375,60 @@ class FileCatalog:
             allLfns = list(fileInfo)
             parms1 = parms[1:]
 
+        def processResult(catalogName, master, result):
+            """Add the result of a catalog to the overall one, return it if it must stop the execution"""
+            nonlocal masterResult
+            if master:
+                masterResult = result
+
+            if not result["OK"]:
+                if master:
+                    # If this is the master catalog and it fails we don't want to continue with the other catalogs
+                    self.log.error(
+                        "Failed to execute call on master catalog",
+                        f"{call} on {catalogName}: {result['Message']}",
+                    )
+                    return result
+                else:
+                    # Otherwise we keep the failed catalogs so we can update their state later
+                    failedCatalogs[catalogName] = result["Message"]
+            else:
+                successfulCatalogs[catalogName] = result["Value"]
+
+            if allLfns:
+                if result["OK"]:
+                    for lfn, message in result["Value"]["Failed"].items():
+                        # Save the error message for the failed operations
+                        failed.setdefault(lfn, {})[catalogName] = message
+                        if master:
+                            # If this is the master catalog then we should not attempt the operation on other catalogs
+                            fileInfo.pop(lfn, None)
+                    for lfn, lfnResult in result["Value"]["Successful"].items():
+                        # Save the result return for each file for the successful operations
+                        successful.setdefault(lfn, {})[catalogName] = lfnResult
+            return None
+
+        # Calls to the non master catalogs, done at once after the master in parallel mode
+        delayedCalls = []
         for catalogName, oCatalog, master in self.writeCatalogs:
             # Skip if the method is not implemented in this catalog
             # NOTE: it is impossible for the master since the write method list is populated
             # only from the master catalog, and if the method is not there, __getattr__
             # would raise an exception
-            if not oCatalog.hasCatalogMethod(self.call):
+            if not oCatalog.hasCatalogMethod(call):
                 continue
 
-            method = getattr(oCatalog, self.call)
+            method = getattr(oCatalog, call)
 
-            if self.call in self.no_lfn_methods:
-                result = method(*parms, **kws)
+            if call in self.no_lfn_methods:
+                args = parms
             else:
                 if isinstance(specialConditions, dict):
                     condition = specialConditions.get(catalogName)
                 else:
                     condition = specialConditions
                 # Check whether this catalog should be used for this method
-                res = self.condParser(catalogName, self.call, fileInfo, condition=condition)
+                res = self.condParser(catalogName, call, fileInfo, condition=condition)
                 # condParser never returns S_ERROR
                 condEvals = res["Value"]["Successful"]
                 # For a master catalog, ALL the lfns should be valid
@@ -238,39 +450,22 @@ class FileCatalog:
                 if invalidLFNs:
                     gLogger.debug(
                         "Some LFNs are not valid for operation '%s' on catalog '%s' : %s"
-                        % (self.call, catalogName, invalidLFNs)
+                        % (call, catalogName, invalidLFNs)
                     )
 
-                result = method(validLFNs, *parms1, **kws)
+                args = (validLFNs,) + tuple(parms1)
 
-            if master:
-                masterResult = result
+            if self.parallelExecution and not master:
+                delayedCalls.append((catalogName, method, args))
+                continue
 
-            if not result["OK"]:
-                if master:
-                    # If this is the master catalog and it fails we don't want to continue with the other catalogs
-                    self.log.error(
-                        "Failed to execute call on master catalog",
-                        f"{self.call} on {catalogName}: {result['Message']}",
-                    )
-                    return result
-                else:
-                    # Otherwise we keep the failed catalogs so we can update their state later
-                    failedCatalogs[catalogName] = result["Message"]
-            else:
-                successfulCatalogs[catalogName] = result["Value"]
+            errorResult = processResult(catalogName, master, self.__callCatalog(catalogName, method, args, kws))
+            if errorResult:
+                return errorResult
 
-            if allLfns:
-                if result["OK"]:
-                    for lfn, message in result["Value"]["Failed"].items():
-                        # Save the error message for the failed operations
-                        failed.setdefault(lfn, {})[catalogName] = message
-                        if master:
-                            # If this is the master catalog then we should not attempt the operation on other catalogs
-                            fileInfo.pop(lfn, None)
-                    for lfn, result in result["Value"]["Successful"].items():
-                        # Save the result return for each file for the successful operations
-                        successful.setdefault(lfn, {})[catalogName] = result
+        # Only non master catalogs here, which never stop the execution
+        for catalogName, result in self.__iterCatalogCalls(call, delayedCalls, kws, True):
+            processResult(catalogName, False, result)
 
         if allLfns:
             # This recovers the states of the files that completely failed i.e. when S_ERROR is returned by a catalog
@@ -294,13 +489,14 @@ class FileCatalog:
         """Read method executor."""
         successful = {}
         failed = {}
-        for _catalogName, oCatalog, _master in self.readCatalogs:
+        call = self.call
+        catalogCalls = [
+            (catalogName, getattr(oCatalog, call), parms)
+            for catalogName, oCatalog, _master in self.readCatalogs
             # Skip if the method is not implemented in this catalog
-            if not oCatalog.hasCatalogMethod(self.call):
-                continue
-
-            method = getattr(oCatalog, self.call)
-            res = method(*parms, **kws)
+            if oCatalog.hasCatalogMethod(call)
+        ]
+        for _catalogName, res in self.__iterCatalogCalls(call, catalogCalls, kws, self.parallelExecution):
             if res["OK"]:
                 if "Successful" in res["Value"]:
                     for key, item in res["Value"]["Successful"].items():
@@ -312,7 +508,7 @@ class FileCatalog:
                 else:
                     return res
         if not successful and not failed:
-            return S_ERROR(DErrno.EFCERR, f"Failed to perform {self.call} from any catalog")
+            return S_ERROR(DErrno.EFCERR, f"Failed to perform {call} from any catalog")
         return S_OK({"Failed": failed, "Successful": successful})
 
     ###########################################################################################
@@ -370,6 +566,7 @@ class FileCatalog:
             if not result["OK"]:
                 return result
             oCatalog = result["Value"]
+            self.__setCatalogTimeout(catalogName, catalogConfig)
             if re.search("Read", catalogConfig["AccessType"]):
                 if catalogConfig["Master"]:
                     self.readCatalogs.insert(0, (catalogName, oCatalog, catalogConfig["Master"]))
@@ -423,6 +620,7 @@ class FileCatalog:
                 if not res["OK"]:
                     return res
                 oCatalog = res["Value"]
+                self.__setCatalogTimeout(catalogName, catalogConfig)
                 master = catalogConfig["Master"]
                 # If the catalog is read type
                 if re.search("Read", catalogConfig["AccessType"]):
@@ -438,6 +636,13 @@ class FileCatalog:
                         self.writeCatalogs.append((catalogName, oCatalog, master))
         return S_OK()
 
+    def __setCatalogTimeout(self, catalogName, catalogConfig):
+        """Set the time after which a catalog not answering is considered as failed in parallel mode"""
+        try:
+            self.catalogTimeouts[catalogName] = int(catalogConfig.get("Timeout", self.timeout))
+        except ValueError:
+            self.log.warn("Invalid catalog timeout", f"{catalogName}: {catalogConfig['Timeout']}")
+
     def _getCatalogConfigDetails(self, catalogName):
         # First obtain the options that are available
         catalogConfigPath = f"{self.rootConfigPath}/{catalogName}"
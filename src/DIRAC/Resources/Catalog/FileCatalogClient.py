@@ -1,16 +1,55 @@
 """ The FileCatalogClient is a class representing the client of the DIRAC File Catalog
 """
+import errno
 import json
 import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 
-from DIRAC import S_OK, S_ERROR
+from DIRAC import gLogger, S_OK, S_ERROR
+from DIRAC.Core.DISET.ThreadConfig import ThreadConfig
+from DIRAC.Core.Utilities.DErrno import cmpError
+from DIRAC.Core.Utilities.List import breakListIntoChunks
 from DIRAC.Core.Tornado.Client.ClientSelector import TransferClientSelector as TransferClient
+from DIRAC.Core.Tornado.Client.TornadoClient import TornadoClient
 
 from DIRAC.ConfigurationSystem.Client.Helpers.Registry import getVOMSAttributeForGroup, getDNForUsername
-from DIRAC.Resources.Catalog.Utilities import checkCatalogArguments
+from DIRAC.Resources.Catalog.Utilities import checkArgumentFormat, checkCatalogArguments
 from DIRAC.Resources.Catalog.FileCatalogClientBase import FileCatalogClientBase
 
 
+class _SEDumpSink:
+    """File object writing the SE dump received to a file, uncompressing it if it is gzipped.
+    Services which do not compress the dump send it as plain CSV.
+    """
+
+    def __init__(self, outputFile):
+        self.__outputFile = outputFile
+        self.__decompressor = None
+        # Beginning of the data, until it is long enough to tell whether it is gzipped
+        self.__header = b""
+
+    def write(self, data):
+        if self.__header is not None:
+            data = self.__header + data
+            if len(data) < 2:
+                self.__header = data
+                return
+            self.__header = None
+            if data[:2] == b"\x1f\x8b":
+                self.__decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        if self.__decompressor:
+            data = self.__decompressor.decompress(data)
+        self.__outputFile.write(data)
+
+    def flush(self):
+        if self.__header:
+            self.__outputFile.write(self.__header)
+        if self.__decompressor:
+            self.__outputFile.write(self.__decompressor.flush())
+        self.__outputFile.flush()
+
+
 class FileCatalogClient(FileCatalogClientBase):
     """Client code to the DIRAC File Catalogue"""
 
@@ -27,6 +66,7 @@ class FileCatalogClient(FileCatalogClientBase):
         "listDirectory",
         "getDirectoryMetadata",
         "getDirectorySize",
+        "checkDirectoryUsage",
         "getDirectoryContents",
         "getLFNForPFN",
         "getLFNForGUID",
@@ -47,6 +87,8 @@ class FileCatalogClient(FileCatalogClientBase):
         "getDatasetParameters",
         "getDatasetFiles",
         "getDatasetAnnotation",
+        "getDatasetFileMembership",
+        "combineDatasets",
         "getSEDump",
         "getDirectoryDump",
     ]
@@ -87,6 +129,7 @@ class FileCatalogClient(FileCatalogClientBase):
         "deleteGroup",
         "repairCatalog",
         "rebuildDirectoryUsage",
+        "rebuildMetadataIndex",
     ]
 
     NO_LFN_METHODS = [
@@ -107,12 +150,15 @@ class FileCatalogClient(FileCatalogClientBase):
         "getMetadataSet",
         "getFileUserMetadata",
         "getLFNForGUID",
+        "getDatasetFileMembership",
+        "combineDatasets",
         "addUser",
         "deleteUser",
         "addGroup",
         "deleteGroup",
         "repairCatalog",
         "rebuildDirectoryUsage",
+        "rebuildMetadataIndex",
     ]
 
     ADMIN_METHODS = [
@@ -125,31 +171,177 @@ class FileCatalogClient(FileCatalogClientBase):
         "getCatalogCounters",
         "repairCatalog",
         "rebuildDirectoryUsage",
+        "rebuildMetadataIndex",
     ]
 
+    # Above this number of lfns, getReplicas streams the answer of the server
+    STREAM_THRESHOLD = 10000
+
+    # Default values of the options of the catalog in /Resources/FileCatalogs controlling the bulk methods:
+    # maximum number of lfns sent in a single call (ChunkSize, 0 to send them all at once), number
+    # of chunks sent at the same time (ParallelChunks) and number of times a chunk of a read method
+    # is sent again if its call failed (ChunkRetries)
+    CHUNK_SIZE = 5000
+    PARALLEL_CHUNKS = 4
+    CHUNK_RETRIES = 2
+
     def __init__(self, url=None, **kwargs):
         """Constructor function."""
+        self.chunkSize = int(kwargs.pop("ChunkSize", self.CHUNK_SIZE))
+        self.parallelChunks = max(1, int(kwargs.pop("ParallelChunks", self.PARALLEL_CHUNKS)))
+        self.chunkRetries = max(0, int(kwargs.pop("ChunkRetries", self.CHUNK_RETRIES)))
         self.serverURL = "DataManagement/FileCatalog" if not url else url
         super().__init__(self.serverURL, **kwargs)
 
-    @checkCatalogArguments
-    def getReplicas(self, lfns, allStatus=False, timeout=120):
-        """Get the replicas of the given files"""
-        rpcClient = self._getRPC(timeout=timeout)
-        result = rpcClient.getReplicas(lfns, allStatus)
+    def _iterStreamRPC(self, method, lfns, *args, processValue=None, timeout=120):
+        """Call a method of the catalog with a streamed RPC, and yield the {Successful, Failed}
+        chunks of the result as the server sends them, with the original lfns restored.
+        If the server does not support streamed calls, the whole result is yielded as a single chunk.
 
+        :param str method: name of the method of the service
+        :param lfns: lfns argument of the method, in any form accepted by checkArgumentFormat
+        :param args: other arguments of the method
+        :param processValue: function modifying in place the value of each chunk, before the lfns are restored
+
+        :returns: generator of S_OK/S_ERROR
+        """
+        result = checkArgumentFormat(lfns, generateMap=True)
         if not result["OK"]:
+            yield result
+            return
+        checkedLFNDict, lfnMap = result["Value"]
+
+        rpcClient = self._getRPC(timeout=timeout)
+        streamed = False
+        for result in rpcClient.executeStreamRPC(method, checkedLFNDict, *args):
+            if not result["OK"] and not streamed and self.__isStreamingUnsupported(result):
+                result = getattr(rpcClient, method)(checkedLFNDict, *args)
+            streamed = True
+            if result["OK"] and processValue:
+                processValue(result["Value"])
+            if result["OK"] and lfnMap:
+                for key in ("Successful", "Failed"):
+                    result["Value"][key] = {lfnMap.get(lfn, lfn): value for lfn, value in result["Value"][key].items()}
+            yield result
+
+    def _executeBulkRPC(self, method, lfns, *args, timeout=120):
+        """Call a bulk method of the catalog. Above self.chunkSize lfns, the lfns are sent in chunks,
+        self.parallelChunks of them at the same time, and the {Successful, Failed} results are merged.
+
+        The chunk of a read method whose call failed is sent again, up to self.chunkRetries times,
+        so the lfns of the chunks already answered are never sent again. The lfns of a chunk which
+        still fails are put in Failed with the error, unless all the chunks failed.
+
+        :param str method: name of the method of the service
+        :param dict lfns: lfns argument of the method, as given by checkCatalogArguments
+        :param args: other arguments of the method
+
+        :returns: S_OK({"Successful": ..., "Failed": ...})/S_ERROR
+        """
+        if not self.chunkSize or len(lfns) <= self.chunkSize:
+            return getattr(self._getRPC(timeout=timeout), method)(lfns, *args)
+
+        chunks = [{lfn: lfns[lfn] for lfn in chunk} for chunk in breakListIntoChunks(lfns, self.chunkSize)]
+        retries = self.chunkRetries if method in self.READ_METHODS else 0
+        threadConfig = ThreadConfig().dump()
+        with ThreadPoolExecutor(max_workers=min(self.parallelChunks, len(chunks))) as executor:
+            futures = [
+                executor.submit(self.__callChunk, threadConfig, method, chunk, args, timeout, retries)
+                for chunk in chunks
+            ]
+            results = [future.result() for future in futures]
+
+        if not any(result["OK"] for result in results):
+            return results[0]
+        successful = {}
+        failed = {}
+        for chunk, result in zip(chunks, results):
+            if not result["OK"]:
+                failed.update(dict.fromkeys(chunk, result["Message"]))
+                continue
+            successful.update(result["Value"]["Successful"])
+            failed.update(result["Value"]["Failed"])
+        return S_OK({"Successful": successful, "Failed": failed})
+
+    def __callChunk(self, threadConfig, method, chunk, args, timeout, retries):
+        """Call a bulk method of the catalog for a chunk of lfns, on behalf of the same user as the calling thread"""
+        tc = ThreadConfig()
+        tc.reset()
+        tc.load(threadConfig)
+        try:
+            for attempt in range(retries + 1):
+                result = getattr(self._getRPC(timeout=timeout), method)(chunk, *args)
+                if result["OK"]:
+                    break
+                gLogger.warn(
+                    "Failed call to the catalog for a chunk of lfns",
+                    f"{method} (attempt {attempt + 1}/{retries + 1}): {result['Message']}",
+                )
             return result
+        finally:
+            tc.reset()
 
-        # If there is no PFN returned, just set the LFN instead
-        lfnDict = result["Value"]
+    @staticmethod
+    def __isStreamingUnsupported(result):
+        """Whether the error comes from a server which does not know streamed calls"""
+        return cmpError(result, errno.ENOSYS) or "is not a known action type" in result["Message"]
+
+    @staticmethod
+    def __mergeChunks(chunks, mergeSuccessful=None):
+        """Merge the {Successful, Failed} chunks of a streamed call into a single result
+
+        :param chunks: generator of S_OK/S_ERROR chunks
+        :param mergeSuccessful: function merging the value of a chunk for a given path into
+                                the one already received, if the path can come in several chunks
+
+        :returns: S_OK({"Successful": ..., "Failed": ...})/S_ERROR
+        """
+        successful = {}
+        failed = {}
+        for result in chunks:
+            if not result["OK"]:
+                chunks.close()
+                return result
+            failed.update(result["Value"]["Failed"])
+            for path, value in result["Value"]["Successful"].items():
+                if mergeSuccessful and path in successful:
+                    mergeSuccessful(successful[path], value)
+                else:
+                    successful[path] = value
+        return S_OK({"Successful": successful, "Failed": failed})
+
+    @staticmethod
+    def __setDefaultPFNs(lfnDict):
+        """If there is no PFN returned, just set the LFN instead"""
         for lfn in lfnDict["Successful"]:
             for se in lfnDict["Successful"][lfn]:
                 if not lfnDict["Successful"][lfn][se]:
                     lfnDict["Successful"][lfn][se] = lfn
 
+    @checkCatalogArguments
+    def getReplicas(self, lfns, allStatus=False, timeout=120):
+        """Get the replicas of the given files"""
+        if not self.chunkSize and len(lfns) > self.STREAM_THRESHOLD:
+            # Bound the memory used by the server for large requests
+            return self.__mergeChunks(self.iterReplicas(lfns, allStatus=allStatus, timeout=timeout))
+
+        result = self._executeBulkRPC("getReplicas", lfns, allStatus, timeout=timeout)
+
+        if not result["OK"]:
+            return result
+
+        lfnDict = result["Value"]
+        self.__setDefaultPFNs(lfnDict)
+
         return S_OK(lfnDict)
 
+    def iterReplicas(self, lfns, allStatus=False, timeout=120):
+        """Get the replicas of the given files, streamed by the server in chunks of files
+
+        :returns: generator of S_OK({"Successful": ..., "Failed": ...})/S_ERROR, one per chunk
+        """
+        return self._iterStreamRPC("getReplicas", lfns, allStatus, processValue=self.__setDefaultPFNs, timeout=timeout)
+
     @checkCatalogArguments
     def setReplicaProblematic(self, lfns, revert=False):
         """
@@ -221,6 +413,17 @@ class FileCatalogClient(FileCatalogClientBase):
 
         return S_OK({"Successful": successful, "Failed": failed})
 
+    @staticmethod
+    def __setEntriesAsLFNs(lfnDict):
+        """Force returned directory entries to be LFNs"""
+        for entryType in ["Files", "SubDirs", "Links"]:
+            for path in lfnDict["Successful"]:
+                entryDict = lfnDict["Successful"][path][entryType]
+                for fname in list(entryDict):
+                    detailsDict = entryDict.pop(fname)
+                    lfn = os.path.join(path, os.path.basename(fname))
+                    entryDict[lfn] = detailsDict
+
     @checkCatalogArguments
     def listDirectory(self, lfn, verbose=False, timeout=120):
         """List the given directory's contents"""
@@ -228,16 +431,18 @@ class FileCatalogClient(FileCatalogClientBase):
         result = rpcClient.listDirectory(lfn, verbose)
         if not result["OK"]:
             return result
-        # Force returned directory entries to be LFNs
-        for entryType in ["Files", "SubDirs", "Links"]:
-            for path in result["Value"]["Successful"]:
-                entryDict = result["Value"]["Successful"][path][entryType]
-                for fname in list(entryDict):
-                    detailsDict = entryDict.pop(fname)
-                    lfn = os.path.join(path, os.path.basename(fname))
-                    entryDict[lfn] = detailsDict
+        self.__setEntriesAsLFNs(result["Value"])
         return result
 
+    def iterListDirectory(self, lfns, verbose=False, timeout=120):
+        """List the given directories' contents, streamed by the server one directory at a time
+
+        :returns: generator of S_OK({"Successful": ..., "Failed": ...})/S_ERROR, one per chunk
+        """
+        return self._iterStreamRPC(
+            "listDirectory", lfns, verbose, processValue=self.__setEntriesAsLFNs, timeout=timeout
+        )
+
     @checkCatalogArguments
     def getDirectoryMetadata(self, lfns, timeout=120):
         """Get standard directory metadata"""
@@ -289,9 +494,24 @@ class FileCatalogClient(FileCatalogClientBase):
 
         return result
 
-    def findFilesByMetadata(self, metaDict, path="/", timeout=120):
-        """Find files given the meta data query and the path"""
+    def findFilesByMetadata(self, metaDict, path="/", timeout=120, since=None):
+        """Find files given the meta data query and the path
+
+        :param int since: watermark returned by a previous query, to get only the files with a greater FileID.
+                          If it is not None, the result contains the Watermark of this query, 0 getting all the files.
+                          The FileIDs are not committed in order: a file with a lower FileID than the Watermark
+                          may be committed afterwards, so the next query must start from an older Watermark
+
+        :return: S_OK(list of LFNs)/S_ERROR
+        """
         rpcClient = self._getRPC(timeout=timeout)
+        if since is not None:
+            result = rpcClient.findFilesByMetadata(metaDict, path, since)
+            if not result["OK"]:
+                return result
+            ret = S_OK(result["Value"]["LFNs"])
+            ret["Watermark"] = result["Value"]["Watermark"]
+            return ret
         result = rpcClient.findFilesByMetadata(metaDict, path)
         if not result["OK"]:
             return result
@@ -351,14 +571,14 @@ class FileCatalogClient(FileCatalogClientBase):
     @checkCatalogArguments
     def getPathPermissions(self, lfns, timeout=120):
         """Determine the ACL information for a supplied path"""
-        return self._getRPC(timeout=timeout).getPathPermissions(lfns)
+        return self._executeBulkRPC("getPathPermissions", lfns, timeout=timeout)
 
     @checkCatalogArguments
     def hasAccess(self, paths, opType, timeout=120):
         """Determine if the given op can be performed on the paths
         The OpType is all the operations exported
         """
-        return self._getRPC(timeout=timeout).hasAccess(paths, opType)
+        return self._executeBulkRPC("hasAccess", paths, opType, timeout=timeout)
 
     ###################################################################
     #
@@ -402,7 +622,7 @@ class FileCatalogClient(FileCatalogClientBase):
     @checkCatalogArguments
     def exists(self, lfns, timeout=120):
         """Check whether the supplied paths exists"""
-        return self._getRPC(timeout=timeout).exists(lfns)
+        return self._executeBulkRPC("exists", lfns, timeout=timeout)
 
     ########################################################################
     #
@@ -413,37 +633,37 @@ class FileCatalogClient(FileCatalogClientBase):
     def addFile(self, lfns, timeout=120):
         """Register supplied files"""
 
-        return self._getRPC(timeout=timeout).addFile(lfns)
+        return self._executeBulkRPC("addFile", lfns, timeout=timeout)
 
     @checkCatalogArguments
     def removeFile(self, lfns, timeout=120):
         """Remove the supplied lfns"""
-        return self._getRPC(timeout=timeout).removeFile(lfns)
+        return self._executeBulkRPC("removeFile", lfns, timeout=timeout)
 
     @checkCatalogArguments
     def setFileStatus(self, lfns, timeout=120):
         """Remove the supplied lfns"""
-        return self._getRPC(timeout=timeout).setFileStatus(lfns)
+        return self._executeBulkRPC("setFileStatus", lfns, timeout=timeout)
 
     @checkCatalogArguments
     def addReplica(self, lfns, timeout=120):
         """Register supplied replicas"""
-        return self._getRPC(timeout=timeout).addReplica(lfns)
+        return self._executeBulkRPC("addReplica", lfns, timeout=timeout)
 
     @checkCatalogArguments
     def removeReplica(self, lfns, timeout=120):
         """Remove the supplied replicas"""
-        return self._getRPC(timeout=timeout).removeReplica(lfns)
+        return self._executeBulkRPC("removeReplica", lfns, timeout=timeout)
 
     @checkCatalogArguments
     def setReplicaStatus(self, lfns, timeout=120):
         """Set the status for the supplied replicas"""
-        return self._getRPC(timeout=timeout).setReplicaStatus(lfns)
+        return self._executeBulkRPC("setReplicaStatus", lfns, timeout=timeout)
 
     @checkCatalogArguments
     def setReplicaHost(self, lfns, timeout=120):
         """Change the registered SE for the supplied replicas"""
-        return self._getRPC(timeout=timeout).setReplicaHost(lfns)
+        return self._executeBulkRPC("setReplicaHost", lfns, timeout=timeout)
 
     @checkCatalogArguments
     def addFileAncestors(self, lfns, timeout=120):
@@ -451,7 +671,7 @@ class FileCatalogClient(FileCatalogClientBase):
 
         :param dict lfns: {lfn1: {'Ancestor': [ancestorLFNs]}, lfn2: {'Ancestors': ...}}
         """
-        return self._getRPC(timeout=timeout).addFileAncestors(lfns)
+        return self._executeBulkRPC("addFileAncestors", lfns, timeout=timeout)
 
     ########################################################################
     #
@@ -461,37 +681,37 @@ class FileCatalogClient(FileCatalogClientBase):
     @checkCatalogArguments
     def isFile(self, lfns, timeout=120):
         """Check whether the supplied lfns are files"""
-        return self._getRPC(timeout=timeout).isFile(lfns)
+        return self._executeBulkRPC("isFile", lfns, timeout=timeout)
 
     @checkCatalogArguments
     def getFileSize(self, lfns, timeout=120):
         """Get the size associated to supplied lfns"""
-        return self._getRPC(timeout=timeout).getFileSize(lfns)
+        return self._executeBulkRPC("getFileSize", lfns, timeout=timeout)
 
     @checkCatalogArguments
     def getFileMetadata(self, lfns, timeout=120):
         """Get the metadata associated to supplied lfns"""
-        return self._getRPC(timeout=timeout).getFileMetadata(lfns)
+        return self._executeBulkRPC("getFileMetadata", lfns, timeout=timeout)
 
     @checkCatalogArguments
     def getFileDetails(self, lfns, timeout=120):
         """Get the (user) metadata associated to supplied lfns"""
-        return self._getRPC(timeout=timeout).getFileDetails(lfns)
+        return self._executeBulkRPC("getFileDetails", lfns, timeout=timeout)
 
     @checkCatalogArguments
     def getReplicaStatus(self, lfns, timeout=120):
         """Get the status for the supplied replicas"""
-        return self._getRPC(timeout=timeout).getReplicaStatus(lfns)
+        return self._executeBulkRPC("getReplicaStatus", lfns, timeout=timeout)
 
     @checkCatalogArguments
     def getFileAncestors(self, lfns, depths, timeout=120):
         """Get the status for the supplied replicas"""
-        return self._getRPC(timeout=timeout).getFileAncestors(lfns, depths)
+        return self._executeBulkRPC("getFileAncestors", lfns, depths, timeout=timeout)
 
     @checkCatalogArguments
     def getFileDescendents(self, lfns, depths, timeout=120):
         """Get the status for the supplied replicas"""
-        return self._getRPC(timeout=timeout).getFileDescendents(lfns, depths)
+        return self._executeBulkRPC("getFileDescendents", lfns, depths, timeout=timeout)
 
     def getLFNForGUID(self, guids, timeout=120):
         """Get the matching lfns for given guids"""
@@ -515,13 +735,18 @@ class FileCatalogClient(FileCatalogClientBase):
     @checkCatalogArguments
     def isDirectory(self, lfns, timeout=120):
         """Determine whether supplied path is a directory"""
-        return self._getRPC(timeout=timeout).isDirectory(lfns)
+        return self._executeBulkRPC("isDirectory", lfns, timeout=timeout)
 
     @checkCatalogArguments
     def getDirectorySize(self, lfns, longOut=False, fromFiles=False, timeout=120, recursiveSum=True):
         """Get the size of the supplied directory"""
         return self._getRPC(timeout=timeout).getDirectorySize(lfns, longOut, fromFiles, recursiveSum)
 
+    @checkCatalogArguments
+    def checkDirectoryUsage(self, lfns, timeout=120):
+        """Compare the usage of the supplied directories with the one computed from the file tables"""
+        return self._getRPC(timeout=timeout).checkDirectoryUsage(lfns)
+
     ########################################################################
     #
     # Administrative database operations
@@ -535,6 +760,10 @@ class FileCatalogClient(FileCatalogClientBase):
         """Rebuild DirectoryUsage table from scratch"""
         return self._getRPC(timeout=timeout).rebuildDirectoryUsage()
 
+    def rebuildMetadataIndex(self, timeout=120):
+        """Rebuild the index of the metadata inherited by each directory from scratch"""
+        return self._getRPC(timeout=timeout).rebuildMetadataIndex()
+
     def repairCatalog(self, timeout=120):
         """Repair the catalog inconsistencies"""
         return self._getRPC(timeout=timeout).repairCatalog()
@@ -655,12 +884,35 @@ class FileCatalogClient(FileCatalogClientBase):
         return self._getRPC(timeout=timeout).releaseDataset(datasets)
 
     @checkCatalogArguments
-    def getDatasetFiles(self, datasets, timeout=120):
+    def getDatasetFiles(self, datasets, timeout=120, offset=0, limit=0):
         """Get lfns in the given dataset
-        two lines !
+
+        :param int offset: index of the first file to get, the files being sorted by FileID
+        :param int limit: if not 0, get a page of at most limit files, for large datasets
         """
+        if offset or limit:
+            return self._getRPC(timeout=timeout).getDatasetFiles(datasets, offset, limit)
         return self._getRPC(timeout=timeout).getDatasetFiles(datasets)
 
+    def getDatasetFileMembership(self, datasetName, lfns, timeout=120):
+        """Check which of the given lfns belong to the dataset
+
+        :return: S_OK with Successful dict {lfn: bool}, Failed for the files which do not exist
+        """
+        return self._getRPC(timeout=timeout).getDatasetFileMembership(datasetName, list(lfns))
+
+    def combineDatasets(self, datasetNames, operation, offset=0, limit=0, timeout=120):
+        """Get the lfns of the union, intersection or difference of datasets
+
+        :param list datasetNames: datasets, the difference being the files of the first one not in the others
+        :param str operation: "union", "intersection" or "difference"
+        :param int offset: index of the first file to get, the files being sorted by FileID
+        :param int limit: if not 0, get a page of at most limit files
+
+        :return: S_OK with a dict with the LFNs and the NumberOfFiles of the whole combination
+        """
+        return self._getRPC(timeout=timeout).combineDatasets(list(datasetNames), operation, offset, limit)
+
     #############################################################################
 
     def getSEDump(self, seNames, outputFilename):
@@ -680,9 +932,31 @@ class FileCatalogClient(FileCatalogClientBase):
         seNames = json.dumps(seNames)
 
         dfc = TransferClient(self.serverURL, timeout=20000)
-        return dfc.receiveFile(outputFilename, seNames)
+        if isinstance(dfc, TornadoClient):
+            return dfc.receiveFile(outputFilename, seNames)
+
+        # The dump is compressed by the service, and uncompressed as it is received
+        with open(outputFilename, "wb") as outputFile:
+            dataSink = _SEDumpSink(outputFile)
+            result = dfc.receiveFile(dataSink, seNames, "Compressed")
+            dataSink.flush()
+        return result
+
+    @staticmethod
+    def __mergeDirectoryDumps(dump, part):
+        """Add a part of the dump of a directory to the one already received"""
+        dump["Files"].update(part["Files"])
+        dump["SubDirs"].extend(part["SubDirs"])
 
     @checkCatalogArguments
     def getDirectoryDump(self, lfns, timeout=120):
         """Get the content of a directory recursively"""
-        return self._getRPC(timeout=timeout).getDirectoryDump(lfns)
+        return self.__mergeChunks(self.iterDirectoryDump(lfns, timeout=timeout), self.__mergeDirectoryDumps)
+
+    def iterDirectoryDump(self, lfns, timeout=120):
+        """Get the content of a directory recursively, streamed by the server in chunks of files.
+        The dump of a single directory can be split over several chunks.
+
+        :returns: generator of S_OK({"Successful": {path: {"Files": ..., "SubDirs": ...}}, "Failed": ...})/S_ERROR
+        """
+        return self._iterStreamRPC("getDirectoryDump", lfns, timeout=timeout)
@@ -2,7 +2,9 @@
    Testing the FileCatalog logic
 """
 import sys
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from unittest import mock
 
 import DIRAC
@@ -80,6 +82,9 @@ class GenericCatalog:
                     return S_ERROR(f"{self.name}.{self.call} did not go well")
                 elif retType == "Failed":
                     failed[lfn] = f"{self.name}.{self.call} failed for {lfn}"
+                elif retType == "Slow":
+                    time.sleep(1)
+                    successful[lfn] = "slowly"
             except ValueError:
                 successful[lfn] = "yeah"
 
@@ -423,9 +428,121 @@ class TestRead(unittest.TestCase):
         self.assertEqual(["c2"], sorted(res["Value"]["Failed"][lfn]))
 
 
+class TestParallel(unittest.TestCase):
+    """Tests of the parallel execution of the read and write methods"""
+
+    @mock.patch.object(
+        DIRAC.Resources.Catalog.FileCatalog.FileCatalog,
+        "_getSelectedCatalogs",
+        side_effect=mock_fc_getSelectedCatalogs,
+        autospec=True,
+    )  # autospec is for the binding of the method...
+    @mock.patch.object(
+        DIRAC.Resources.Catalog.FileCatalog.FileCatalog,
+        "_getEligibleCatalogs",
+        side_effect=mock_fc_getEligibleCatalogs,
+        autospec=True,
+    )  # autospec is for the binding of the method...
+    def test_01_sameResults(self, mk_getSelectedCatalogs, mk_getEligibleCatalogs):
+        """The results are the same as with the sequential execution"""
+
+        catalogs = ["c1_True_True_True_2_0_2_0", "c2_False_True_True_3_0_1_0", "c3_False_True_True_3_0_1_0"]
+        sequentialFc = FileCatalog(catalogs=catalogs)
+        parallelFc = FileCatalog(catalogs=catalogs)
+        parallelFc.parallelExecution = True
+
+        lfnLists = [
+            ["/lhcb/toto", "/lhcb/c1/Failed", "/lhcb/c2/Failed/c3/Failed"],
+            ["/lhcb/c1/Error"],
+            ["/lhcb/c2/Error", "/lhcb/c3/Failed"],
+            ["/lhcb/c2/Failed", "/lhcb/c1/Failed/c2/Failed/c3/Failed"],
+        ]
+        for methodName in ("read1", "read3", "write1"):
+            for lfns in lfnLists:
+                self.assertEqual(getattr(sequentialFc, methodName)(lfns), getattr(parallelFc, methodName)(lfns))
+
+    @mock.patch.object(
+        DIRAC.Resources.Catalog.FileCatalog.FileCatalog,
+        "_getSelectedCatalogs",
+        side_effect=mock_fc_getSelectedCatalogs,
+        autospec=True,
+    )  # autospec is for the binding of the method...
+    @mock.patch.object(
+        DIRAC.Resources.Catalog.FileCatalog.FileCatalog,
+        "_getEligibleCatalogs",
+        side_effect=mock_fc_getEligibleCatalogs,
+        autospec=True,
+    )  # autospec is for the binding of the method...
+    def test_02_timeout(self, mk_getSelectedCatalogs, mk_getEligibleCatalogs):
+        """A catalog not answering in time is considered as failed"""
+
+        fc = FileCatalog(catalogs=["c1_True_True_True_2_0_2_0", "c2_False_True_True_3_0_1_0"])
+        fc.parallelExecution = True
+        fc.catalogTimeouts["c2"] = 0.1
+        timeouts = FileCatalog.getLatencyStatistics().get("c2", {}).get("Timeouts", 0)
+
+        # The slow catalog is ignored for a read
+        lfn = "/lhcb/c1/Failed/c2/Slow"
+        res = fc.read1([lfn])
+        self.assertTrue(res["OK"])
+        self.assertEqual([lfn], list(res["Value"]["Failed"]))
+
+        # And failed for a write
+        lfn = "/lhcb/c2/Slow"
+        res = fc.write1(lfn)
+        self.assertTrue(res["OK"])
+        self.assertEqual(["c1"], list(res["Value"]["Successful"][lfn]))
+        self.assertIn("timed out", res["Value"]["Failed"][lfn]["c2"])
+
+        stats = FileCatalog.getLatencyStatistics()
+        self.assertEqual(stats["c2"]["Timeouts"], timeouts + 2)
+        self.assertGreater(stats["c1"]["Calls"], 0)
+
+    @mock.patch.object(
+        DIRAC.Resources.Catalog.FileCatalog.FileCatalog,
+        "_getSelectedCatalogs",
+        side_effect=mock_fc_getSelectedCatalogs,
+        autospec=True,
+    )  # autospec is for the binding of the method...
+    @mock.patch.object(
+        DIRAC.Resources.Catalog.FileCatalog.FileCatalog,
+        "_getEligibleCatalogs",
+        side_effect=mock_fc_getEligibleCatalogs,
+        autospec=True,
+    )  # autospec is for the binding of the method...
+    def test_03_queueTime(self, mk_getSelectedCatalogs, mk_getEligibleCatalogs):
+        """The timeout counts from the start of the call, the calls not started in time are cancelled,
+        and the calls to a catalog with too many pending calls fail immediately"""
+
+        fc = FileCatalog(
+            catalogs=["c1_True_True_True_2_0_2_0", "c2_False_True_True_3_0_1_0", "c3_False_True_True_3_0_1_0"]
+        )
+        fc.parallelExecution = True
+        fc.catalogTimeouts.update({"c2": 1.5, "c3": 1.5})
+
+        # A single thread, busy for a while: c2 runs after it and c3 after c2, too late
+        with mock.patch.object(FileCatalog, "executor", ThreadPoolExecutor(max_workers=1)):
+            FileCatalog.executor.submit(time.sleep, 0.8)
+            lfn = "/lhcb/c2/Slow"
+            res = fc.write1(lfn)
+            FileCatalog.executor.shutdown()
+        self.assertTrue(res["OK"])
+        self.assertEqual(["c1", "c2"], sorted(res["Value"]["Successful"][lfn]))
+        self.assertIn("timed out", res["Value"]["Failed"][lfn]["c3"])
+        self.assertEqual(FileCatalog.pendingCalls["c3"], 0)
+
+        with mock.patch.dict(FileCatalog.pendingCalls, {"c3": DIRAC.Resources.Catalog.FileCatalog.MAX_PENDING_CALLS}):
+            lfn = "/lhcb/toto"
+            res = fc.write1(lfn)
+        self.assertTrue(res["OK"])
+        self.assertEqual(["c1", "c2"], sorted(res["Value"]["Successful"][lfn]))
+        self.assertIn("too many calls pending", res["Value"]["Failed"][lfn]["c3"])
+
+
 if __name__ == "__main__":
     suite = unittest.defaultTestLoader.loadTestsFromTestCase(TestInitialization)
     suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestWrite))
     suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestRead))
+    suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(TestParallel))
 
     unittest.TextTestRunner(verbosity=2).run(suite)
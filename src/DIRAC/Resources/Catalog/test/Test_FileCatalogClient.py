@@ -0,0 +1,148 @@
+"""Test the streamed and the chunked calls of the FileCatalogClient"""
+
+import pytest
+
+from DIRAC import S_OK, S_ERROR
+from DIRAC.Resources.Catalog.FileCatalogClient import FileCatalogClient
+
+
+class FakeRPCClient:
+    """Answers the calls with the given chunks, or with the given plain result"""
+
+    def __init__(self, chunks=None, result=None):
+        self.chunks = chunks
+        self.result = result
+        self.calls = []
+
+    def executeStreamRPC(self, method, *args):
+        self.calls.append(("StreamRPC", method, args))
+        if self.chunks is None:
+            yield S_ERROR("StreamRPC is not a known action type")
+            return
+        yield from self.chunks
+
+    def __getattr__(self, method):
+        def call(*args):
+            self.calls.append(("RPC", method, args))
+            return self.result
+
+        return call
+
+
+@pytest.fixture
+def fcClient(mocker):
+    client = FileCatalogClient()
+    mocker.patch.object(client, "_getRPC")
+    return client
+
+
+def test_getDirectoryDump_mergesChunks(fcClient):
+    rpcClient = FakeRPCClient(
+        chunks=[
+            S_OK({"Successful": {}, "Failed": {"/vo/forbidden": "Permission denied"}}),
+            S_OK({"Successful": {"/vo/dir": {"Files": {"/vo/dir/f1": {}}, "SubDirs": ["/vo/dir/sub"]}}, "Failed": {}}),
+            S_OK({"Successful": {"/vo/dir": {"Files": {"/vo/dir/sub/f2": {}}, "SubDirs": []}}, "Failed": {}}),
+        ]
+    )
+    fcClient._getRPC.return_value = rpcClient
+
+    res = fcClient.getDirectoryDump(["/vo/dir", "/vo/forbidden"])
+    assert res["OK"], res
+    assert res["Value"]["Failed"] == {"/vo/forbidden": "Permission denied"}
+    assert res["Value"]["Successful"] == {
+        "/vo/dir": {"Files": {"/vo/dir/f1": {}, "/vo/dir/sub/f2": {}}, "SubDirs": ["/vo/dir/sub"]}
+    }
+    assert [call[0] for call in rpcClient.calls] == ["StreamRPC"]
+
+
+def test_getDirectoryDump_error(fcClient):
+    fcClient._getRPC.return_value = FakeRPCClient(
+        chunks=[
+            S_OK({"Successful": {"/vo/dir": {"Files": {}, "SubDirs": []}}, "Failed": {}}),
+            S_ERROR("Server error"),
+        ]
+    )
+
+    res = fcClient.getDirectoryDump("/vo/dir")
+    assert not res["OK"]
+    assert res["Message"] == "Server error"
+
+
+def test_iterReplicas_oldServer(fcClient):
+    """A server which does not know streamed calls answers the plain RPC"""
+    rpcClient = FakeRPCClient(result=S_OK({"Successful": {"/vo/f1": {"SE1": ""}}, "Failed": {}}))
+    fcClient._getRPC.return_value = rpcClient
+
+    chunks = list(fcClient.iterReplicas("LFN:/vo/f1"))
+    assert chunks == [S_OK({"Successful": {"LFN:/vo/f1": {"SE1": "/vo/f1"}}, "Failed": {}})]
+    assert [call[:2] for call in rpcClient.calls] == [("StreamRPC", "getReplicas"), ("RPC", "getReplicas")]
+
+
+class ChunkRPCClient:
+    """Answers getReplicas for each lfn, and fails the first call containing one of the given lfns"""
+
+    def __init__(self, failingLFNs=(), alwaysFailingLFNs=()):
+        self.failingLFNs = set(failingLFNs)
+        self.alwaysFailingLFNs = set(alwaysFailingLFNs)
+        self.calls = []
+
+    def getReplicas(self, lfns, allStatus):
+        self.calls.append(sorted(lfns))
+        if self.alwaysFailingLFNs.intersection(lfns):
+            return S_ERROR("Server error")
+        if self.failingLFNs.intersection(lfns):
+            self.failingLFNs.difference_update(lfns)
+            return S_ERROR("Timeout")
+        return S_OK(
+            {"Successful": {lfn: {"SE1": ""} for lfn in lfns if lfn != "/vo/f0"}, "Failed": {"/vo/f0": "No such file"}}
+        )
+
+
+@pytest.fixture
+def chunkedClient(mocker):
+    client = FileCatalogClient(ChunkSize="3", ParallelChunks="2")
+    mocker.patch.object(client, "_getRPC")
+    return client
+
+
+def test_getReplicas_chunks(chunkedClient):
+    rpcClient = ChunkRPCClient(failingLFNs=["/vo/f4"])
+    chunkedClient._getRPC.return_value = rpcClient
+    lfns = [f"/vo/f{i}" for i in range(8)]
+
+    res = chunkedClient.getReplicas(lfns)
+    assert res["OK"], res
+    assert res["Value"]["Failed"] == {"/vo/f0": "No such file"}
+    assert res["Value"]["Successful"] == {lfn: {"SE1": lfn} for lfn in lfns[1:]}
+    # Only the chunk which failed is sent again
+    assert sorted(rpcClient.calls) == [lfns[0:3], lfns[3:6], lfns[3:6], lfns[6:8]]
+
+
+def test_getReplicas_chunkFailure(chunkedClient):
+    chunkedClient._getRPC.return_value = ChunkRPCClient(alwaysFailingLFNs=["/vo/f4"])
+    lfns = [f"/vo/f{i}" for i in range(8)]
+
+    res = chunkedClient.getReplicas(lfns)
+    assert res["OK"], res
+    assert res["Value"]["Failed"] == {
+        "/vo/f0": "No such file",
+        "/vo/f3": "Server error",
+        "/vo/f4": "Server error",
+        "/vo/f5": "Server error",
+    }
+    assert sorted(res["Value"]["Successful"]) == ["/vo/f1", "/vo/f2", "/vo/f6", "/vo/f7"]
+
+    # When all the chunks fail, so does the call
+    chunkedClient._getRPC.return_value = ChunkRPCClient(alwaysFailingLFNs=lfns)
+    res = chunkedClient.getReplicas(lfns)
+    assert not res["OK"]
+    assert res["Message"] == "Server error"
+
+
+def test_writeChunks_notRetried(chunkedClient):
+    rpcClient = FakeRPCClient(result=S_ERROR("Timeout"))
+    chunkedClient._getRPC.return_value = rpcClient
+
+    res = chunkedClient.removeFile([f"/vo/f{i}" for i in range(4)])
+    assert not res["OK"]
+    assert len(rpcClient.calls) == 2
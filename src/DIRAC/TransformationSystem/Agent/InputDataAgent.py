@@ -5,6 +5,13 @@ given an InputDataQuery fetched from the Transformation Service.
 Possibility to speedup the query time by only fetching files that were added since the last iteration.
 Use the CS option RefreshOnly (False by default) and set the DateKey (empty by default) to the meta data
 key set in the DIRAC FileCatalog.
+Alternatively, with the CS option IncrementalQuery (False by default), the FileCatalog only returns the files
+registered since a watermark, which is kept for each transformation in the work directory of the agent.
+The FileIDs used as watermarks are not committed in order, so each query starts from the watermark returned
+by the query of the previous cycle, and not of the last one: the files committed up to one cycle after their
+FileID was allocated are still found, the ones found twice being already in the transformation.
+In both cases, a full query is done every FullUpdatePeriod seconds, to also get the files whose metadata
+were set after they were registered.
 
 The following options can be set for the InputDataAgent.
 
@@ -14,8 +21,10 @@ The following options can be set for the InputDataAgent.
   :dedent: 2
   :caption: InputDataAgent options
 """
-import time
 import datetime
+import json
+import os
+import time
 
 from errno import ENOENT
 
@@ -42,6 +51,10 @@ class InputDataAgent(AgentModule):
         self.fullUpdatePeriod = self.am_getOption("FullUpdatePeriod", 86400)
         self.refreshonly = self.am_getOption("RefreshOnly", False)
         self.dateKey = self.am_getOption("DateKey", None)
+        self.incrementalQuery = self.am_getOption("IncrementalQuery", False)
+        # Last two watermarks returned by the FileCatalog for each transformation, persisted in watermarkFile
+        self.watermarks = {}
+        self.watermarkFile = ""
 
         self.transClient = TransformationClient()
         self.metadataClient = FileCatalogClient()
@@ -67,8 +80,44 @@ class InputDataAgent(AgentModule):
 
         self.multiVO = self.am_getOption("MultiVO", self.multiVO)
 
+        if self.incrementalQuery:
+            self.watermarkFile = os.path.join(self.am_getWorkDirectory(), "InputDataWatermarks.json")
+            self.__loadWatermarks()
+
         return S_OK()
 
+    def __loadWatermarks(self):
+        """Read the watermarks saved by the previous run of the agent"""
+        if not os.path.exists(self.watermarkFile):
+            return
+        try:
+            with open(self.watermarkFile) as watermarkFile:
+                self.watermarks = {int(transID): watermark for transID, watermark in json.load(watermarkFile).items()}
+        except Exception as x:
+            self.log.warn("Failed to read the watermarks, doing full queries", f"{self.watermarkFile}: {x!r}")
+            self.watermarks = {}
+
+    def __saveWatermarks(self):
+        """Save the watermarks, so that the agent does not start with full queries after a restart"""
+        tmpFile = self.watermarkFile + ".tmp"
+        try:
+            with open(tmpFile, "w") as watermarkFile:
+                json.dump(self.watermarks, watermarkFile)
+            os.replace(tmpFile, self.watermarkFile)
+        except Exception as x:
+            self.log.warn("Failed to save the watermarks", f"{self.watermarkFile}: {x!r}")
+
+    def __getWatermark(self, transID):
+        """Get the watermark to query the files of a transformation: the one returned by the query before
+        the last one, or 0 to get all the files if there is none or if it is time for a full query"""
+        now = datetime.datetime.utcnow()
+        # The watermarks read at startup are used for a full period
+        lastFullQuery = self.fullTimeLog.setdefault(transID, now)
+        if transID not in self.watermarks or now - lastFullQuery >= datetime.timedelta(seconds=self.fullUpdatePeriod):
+            self.fullTimeLog[transID] = now
+            return 0
+        return self.watermarks[transID][0]
+
     ##############################################################################
     def execute(self):
         """Main execution method"""
@@ -80,6 +129,7 @@ class InputDataAgent(AgentModule):
             return S_OK()
 
         # Process each transformation
+        watermarks = {}
         for transDict in result["Value"]:
             transID = int(transDict["TransformationID"])
             # res = self.transClient.getTransformationInputDataQuery( transID )
@@ -95,7 +145,10 @@ class InputDataAgent(AgentModule):
                 continue
             inputDataQuery = res["Value"]
 
-            if self.refreshonly:
+            since = None
+            if self.incrementalQuery:
+                since = self.__getWatermark(transID)
+            elif self.refreshonly:
                 # Determine the correct time stamp to use for this transformation
                 if transID in self.timeLog:
                     if transID in self.fullTimeLog:
@@ -125,15 +178,25 @@ class InputDataAgent(AgentModule):
                 ownerGroup = transDict["AuthorGroup"]
                 self.log.debug(f"Querying file catalog as {ownerDN}, {ownerGroup}")
                 mdc = FileCatalogClient(useCertificates=True, delegatedDN=ownerDN, delegatedGroup=ownerGroup)
-            result = mdc.findFilesByMetadata(inputDataQuery)
+            if since is None:
+                result = mdc.findFilesByMetadata(inputDataQuery)
+            else:
+                self.log.verbose("Querying the files registered after watermark", since)
+                result = mdc.findFilesByMetadata(inputDataQuery, since=since)
             rtime = time.time() - start
             self.log.verbose("Metadata catalog query time", f": {rtime:.2f} seconds.")
             if not result["OK"]:
                 self.log.error(
                     "InputDataAgent.execute: Failed to get response from the metadata catalog", result["Message"]
                 )
+                if transID in self.watermarks:
+                    watermarks[transID] = self.watermarks[transID]
                 continue
             lfnList = result["Value"]
+            # Only moved forward once the files are in the transformation
+            watermarks[transID] = None
+            if since is not None:
+                watermarks[transID] = [self.watermarks.get(transID, [0, 0])[1], result["Watermark"]]
 
             # Check if the number of files has changed since the last cycle
             nlfns = len(lfnList)
@@ -154,6 +217,7 @@ class InputDataAgent(AgentModule):
                 if not result["OK"]:
                     self.log.warn("InputDataAgent.execute: failed to add lfns to transformation", result["Message"])
                     self.fileLog[transID] = 0
+                    watermarks[transID] = self.watermarks.get(transID)
                 else:
                     if result["Value"]["Failed"]:
                         for lfn, error in res["Value"]["Failed"].items():
@@ -164,4 +228,11 @@ class InputDataAgent(AgentModule):
                                 addedLfns.append(lfn)
                         self.log.info("InputDataAgent.execute: Added files to transformation", f"({len(addedLfns)})")
 
+        if self.incrementalQuery:
+            # Forget the transformations which are not active anymore
+            watermarks = {transID: watermark for transID, watermark in watermarks.items() if watermark is not None}
+            if watermarks != self.watermarks:
+                self.watermarks = watermarks
+                self.__saveWatermarks()
+
         return S_OK()
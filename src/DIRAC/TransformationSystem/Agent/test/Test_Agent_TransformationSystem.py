@@ -13,6 +13,7 @@ from DIRAC.TransformationSystem.Client import TransformationFilesStatus
 # sut
 from DIRAC.TransformationSystem.Agent.TaskManagerAgentBase import TaskManagerAgentBase
 from DIRAC.TransformationSystem.Agent.TransformationAgent import TransformationAgent
+from DIRAC.TransformationSystem.Agent.InputDataAgent import InputDataAgent
 
 mockAM = MagicMock()
 
@@ -245,3 +246,102 @@ def test__getTransformationFiles(mocker, transDict, getTFiles, expected):
     tc_mock.getTransformationFiles.return_value = getTFiles
     res = TransformationAgent()._getTransformationFiles(transDict, {"TransformationClient": tc_mock})
     assert res["OK"] == expected
+
+
+# InputDataAgent
+
+
+def test_inputDataIncrementalQuery(mocker, tmp_path):
+    """Only the files registered since the last watermark are queried, and the watermark is kept across restarts"""
+    mocker.patch("DIRAC.TransformationSystem.Agent.InputDataAgent.AgentModule.__init__", return_value=None)
+    mocker.patch("DIRAC.TransformationSystem.Agent.InputDataAgent.TransformationClient")
+    mocker.patch("DIRAC.TransformationSystem.Agent.InputDataAgent.FileCatalogClient")
+    mocker.patch("DIRAC.TransformationSystem.Agent.InputDataAgent.Operations")
+    options = {"IncrementalQuery": True, "TransformationTypes": ["Replication"]}
+    mocker.patch.object(
+        InputDataAgent, "am_getOption", side_effect=lambda name, default=None: options.get(name, default)
+    )
+    mocker.patch.object(InputDataAgent, "am_getWorkDirectory", return_value=str(tmp_path))
+    mocker.patch.object(InputDataAgent, "log", create=True)
+
+    def newAgent():
+        agent = InputDataAgent()
+        assert agent.initialize()["OK"]
+        agent.transClient.getTransformations.return_value = {"OK": True, "Value": [{"TransformationID": 5}]}
+        agent.transClient.getTransformationMetaQuery.return_value = {"OK": True, "Value": {"Run": 123}}
+        agent.transClient.addFilesToTransformation.return_value = {
+            "OK": True,
+            "Value": {"Successful": {}, "Failed": {}},
+        }
+        return agent
+
+    def findFiles(agent, watermark, lfns=("/vo/file",)):
+        findFilesByMetadata = agent.metadataClient.findFilesByMetadata
+        findFilesByMetadata.return_value = {"OK": True, "Value": list(lfns), "Watermark": watermark}
+        assert agent.execute()["OK"]
+        return findFilesByMetadata.call_args.kwargs["since"]
+
+    agent = newAgent()
+    # Full queries the first two times, then from the watermark of the query before the last one
+    assert findFiles(agent, 10) == 0
+    assert findFiles(agent, 12) == 0
+    assert findFiles(agent, 14) == 10
+    # The watermarks do not move if the files could not be added
+    agent.transClient.addFilesToTransformation.return_value = {"OK": False, "Message": "a mess"}
+    assert findFiles(agent, 15) == 12
+    agent.transClient.addFilesToTransformation.return_value = {"OK": True, "Value": {"Successful": {}, "Failed": {}}}
+    assert findFiles(agent, 15, lfns=()) == 12
+
+    # The watermarks are read again after a restart, until the next full query
+    agent = newAgent()
+    assert findFiles(agent, 20) == 14
+    agent.fullTimeLog[5] -= datetime.timedelta(days=2)
+    assert findFiles(agent, 20) == 0
+    assert findFiles(agent, 20) == 20
+
+
+def test_inputDataIncrementalQueryLateCommit(mocker, tmp_path):
+    """A file whose FileID is lower than the watermark, but which is committed after the query, is not missed"""
+    mocker.patch("DIRAC.TransformationSystem.Agent.InputDataAgent.AgentModule.__init__", return_value=None)
+    mocker.patch("DIRAC.TransformationSystem.Agent.InputDataAgent.TransformationClient")
+    mocker.patch("DIRAC.TransformationSystem.Agent.InputDataAgent.FileCatalogClient")
+    mocker.patch("DIRAC.TransformationSystem.Agent.InputDataAgent.Operations")
+    options = {"IncrementalQuery": True, "TransformationTypes": ["Replication"]}
+    mocker.patch.object(
+        InputDataAgent, "am_getOption", side_effect=lambda name, default=None: options.get(name, default)
+    )
+    mocker.patch.object(InputDataAgent, "am_getWorkDirectory", return_value=str(tmp_path))
+    mocker.patch.object(InputDataAgent, "log", create=True)
+    agent = InputDataAgent()
+    assert agent.initialize()["OK"]
+    agent.transClient.getTransformations.return_value = {"OK": True, "Value": [{"TransformationID": 5}]}
+    agent.transClient.getTransformationMetaQuery.return_value = {"OK": True, "Value": {"Run": 123}}
+    added = set()
+
+    def addFiles(transID, lfns):
+        added.update(lfns)
+        return {"OK": True, "Value": {"Successful": {lfn: "Added" for lfn in lfns}, "Failed": {}}}
+
+    agent.transClient.addFilesToTransformation.side_effect = addFiles
+
+    # FileIDs allocated, and the ones committed: the watermark is the greatest allocated FileID
+    allocated = 0
+    committed = set()
+
+    def findFilesByMetadata(metaDict, since=None):
+        result = {"OK": True, "Value": [f"/vo/file{fileID}" for fileID in committed if fileID > since]}
+        result["Watermark"] = allocated
+        return result
+
+    agent.metadataClient.findFilesByMetadata.side_effect = findFilesByMetadata
+
+    for _ in range(3):
+        assert agent.execute()["OK"]
+    # File 2 is committed after file 3, and after the query which returned 3 as watermark
+    allocated = 3
+    committed.update([1, 3])
+    assert agent.execute()["OK"]
+    assert added == {"/vo/file1", "/vo/file3"}
+    committed.add(2)
+    assert agent.execute()["OK"]
+    assert added == {"/vo/file1", "/vo/file2", "/vo/file3"}
@@ -9,9 +9,11 @@
 """
 import datetime
 import os
+import threading
+import time
 from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Any
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable
 
 import DIRAC
 from DIRAC import S_ERROR, S_OK, gConfig
@@ -85,6 +87,18 @@ class SiteDirector(AgentModule):
         self.workingDirectory = None
         self.maxQueueLength = 86400 * 3
 
+        # The queues are treated concurrently by a bounded pool of threads
+        self.maxNumberOfThreads = 30
+        self.threadPoolExecutor = None
+        # Number of seconds after which the operation on a queue is not waited for anymore
+        self.queueTimeout = 600
+        # Queues with an ongoing operation, and the time at which it started (None if not started yet)
+        self.busyQueues = {}
+        # Duration in seconds of the last operations on each queue: {queue: {operation: latency}}
+        self.queueLatencies = defaultdict(dict)
+        # Protects busyQueues and queueLatencies, which are written by the threads of the pool
+        self.busyQueuesLock = threading.Lock()
+
     def initialize(self):
         """Initial settings"""
 
@@ -132,6 +146,13 @@ class SiteDirector(AgentModule):
         self.pilotSubmissionCycleFactor = self.am_getOption(
             "PilotSubmissionCycleFactor", self.pilotSubmissionCycleFactor
         )
+        self.queueTimeout = self.am_getOption("QueueTimeout", self.queueTimeout)
+        maxNumberOfThreads = self.am_getOption("MaxNumberOfThreads", self.maxNumberOfThreads)
+        if self.threadPoolExecutor and maxNumberOfThreads != self.maxNumberOfThreads:
+            # The ongoing operations go on in the threads of the previous pool
+            self.threadPoolExecutor.shutdown(wait=False)
+            self.threadPoolExecutor = None
+        self.maxNumberOfThreads = maxNumberOfThreads
 
         # Flags
         self.sendAccounting = self.am_getOption("SendPilotAccounting", self.sendAccounting)
@@ -163,6 +184,8 @@ class SiteDirector(AgentModule):
             self.log.always("Pilot submission monitoring sending requested")
 
         self.log.always("MaxPilotsToSubmit:", self.maxPilotsToSubmit)
+        self.log.always("MaxNumberOfThreads:", self.maxNumberOfThreads)
+        self.log.always("QueueTimeout:", self.queueTimeout)
 
         # Build the dictionary of queues that are going to be used: self.queueDict
         if not (result := self._buildQueueDict(siteNames, ceTypes, ces, tags))["OK"]:
@@ -241,6 +264,14 @@ class SiteDirector(AgentModule):
 
     #####################################################################################
 
+    def finalize(self):
+        """Stop the pool of threads, without waiting for the ongoing operations"""
+        if self.threadPoolExecutor:
+            self.threadPoolExecutor.shutdown(wait=False)
+        return S_OK()
+
+    #####################################################################################
+
     def execute(self):
         """Main execution method (what is called at each agent cycle).
 
@@ -260,22 +291,16 @@ class SiteDirector(AgentModule):
     def submitPilots(self):
         """Go through defined computing elements and submit pilots if necessary and possible"""
         # Getting the status of pilots in a queue implies the use of remote CEs and may lead to network latency
-        # Threads aim at overcoming such issues and thus 1 thread per queue is created to submit pilots
+        # Threads aim at overcoming such issues: the queues are treated concurrently by the pool of threads
         self.log.verbose("Submission: Queues treated are", ",".join(self.queueDict))
 
         errors = []
         totalSubmittedPilots = 0
-        with ThreadPoolExecutor(max_workers=len(self.queueDict)) as executor:
-            futures = []
-            for queue in self.queueDict:
-                futures.append(executor.submit(self._submitPilotsPerQueue, queue))
-
-            for future in as_completed(futures):
-                result = future.result()
-                if not result["OK"]:
-                    errors.append(result["Message"])
-                else:
-                    totalSubmittedPilots += result["Value"]
+        for result in self._executeForQueues("Submission", self._submitPilotsPerQueue).values():
+            if not result["OK"]:
+                errors.append(result["Message"])
+            else:
+                totalSubmittedPilots += result["Value"]
 
         self.log.info("Total number of pilots submitted", f"to all queues: {totalSubmittedPilots}")
 
@@ -285,6 +310,86 @@ class SiteDirector(AgentModule):
 
         return S_OK()
 
+    def _executeForQueues(self, operation: str, function: Callable[[str], dict]) -> dict[str, dict]:
+        """Call a function for all the queues, concurrently in the pool of threads
+
+        The operation on a queue lasting more than the timeout of the queue is not waited for:
+        the queue is counted as failed, and it is skipped by the next operations until the current one ends,
+        so that a slow CE does not hold up the cycle, and the slots of a queue are not counted twice.
+
+        :param operation: name of the operation, used in the logs and in self.queueLatencies
+        :param function: method taking a queue name, and returning S_OK/S_ERROR
+        :return: dictionary {queue: S_OK/S_ERROR} of the queues treated
+        """
+        if self.threadPoolExecutor is None:
+            self.threadPoolExecutor = ThreadPoolExecutor(max_workers=self.maxNumberOfThreads)
+
+        futures = {}
+        for queue in self.queueDict:
+            with self.busyQueuesLock:
+                if queue in self.busyQueues:
+                    self.log.warn("Queue still busy with a previous operation, skipping", f"{operation}: {queue}")
+                    continue
+                self.busyQueues[queue] = None
+            futures[self.threadPoolExecutor.submit(self._executeForQueue, operation, function, queue)] = queue
+
+        results = {}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=1, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[futures[future]] = future.result()
+
+            # The operations not started yet are waiting for a thread, they are not timed out
+            now = time.time()
+            for future in list(pending):
+                queue = futures[future]
+                with self.busyQueuesLock:
+                    startTime = self.busyQueues.get(queue)
+                timeout = self._getQueueTimeout(queue)
+                if startTime is not None and now - startTime > timeout:
+                    self.log.error(f"{operation} timed out, not waiting for the queue", f"{queue}: {timeout} s")
+                    self.failedQueues[queue] += 1
+                    results[queue] = S_ERROR(f"{operation} timed out for queue {queue}")
+                    pending.discard(future)
+
+        # The operations timed out may still be recording their latencies
+        with self.busyQueuesLock:
+            slowestQueues = sorted(
+                (latencies[operation], queue)
+                for queue, latencies in self.queueLatencies.items()
+                if queue in results and operation in latencies
+            )[-5:]
+        if slowestQueues:
+            self.log.info(
+                f"{operation}: slowest queues",
+                ", ".join(f"{queue} ({latency:.1f} s)" for latency, queue in reversed(slowestQueues)),
+            )
+        return results
+
+    def _executeForQueue(self, operation: str, function: Callable[[str], dict], queue: str):
+        """Call a function for a queue in a thread of the pool, and record its latency"""
+        startTime = time.time()
+        with self.busyQueuesLock:
+            self.busyQueues[queue] = startTime
+        try:
+            return function(queue)
+        except Exception as e:  # pylint: disable=broad-except
+            self.log.exception(f"{operation} failed", queue, lException=e)
+            return S_ERROR(f"{operation} failed for queue {queue}: {repr(e)}")
+        finally:
+            latency = time.time() - startTime
+            self.log.verbose(f"{operation} latency", f"{queue}: {latency:.2f} s")
+            with self.busyQueuesLock:
+                self.queueLatencies[queue][operation] = latency
+                self.busyQueues.pop(queue, None)
+
+    def _getQueueTimeout(self, queue: str) -> float:
+        """Timeout of the operations on a queue: QueueTimeout option of the queue or of its CE in the CS,
+        or QueueTimeout option of the agent
+        """
+        return float(self.queueDict[queue]["ParametersDict"].get("QueueTimeout", self.queueTimeout))
+
     def _submitPilotsPerQueue(self, queueName: str):
         """Submit pilots within a given computing elements
 
@@ -713,18 +818,12 @@ class SiteDirector(AgentModule):
         self.log.verbose("Monitoring: Queues treated are", ",".join(self.queueDict))
 
         # Getting the status of pilots in a queue implies the use of remote CEs and may lead to network latency
-        # Threads aim at overcoming such issues and thus 1 thread per queue is created to
-        # update the status of pilots in transient states
+        # Threads aim at overcoming such issues: the status of the pilots in transient states
+        # is updated concurrently for the queues by the pool of threads
         errors = []
-        with ThreadPoolExecutor(max_workers=len(self.queueDict)) as executor:
-            futures = []
-            for queue in self.queueDict:
-                futures.append(executor.submit(self._monitorPilotsPerQueue, queue))
-
-            for future in as_completed(futures):
-                result = future.result()
-                if not result["OK"]:
-                    errors.append(result["Message"])
+        for result in self._executeForQueues("Monitoring", self._monitorPilotsPerQueue).values():
+            if not result["OK"]:
+                errors.append(result["Message"])
 
         if errors:
             self.log.error("The following errors occurred during the pilot monitoring operation", "\n".join(errors))
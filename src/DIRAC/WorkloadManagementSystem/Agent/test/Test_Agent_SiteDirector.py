@@ -4,6 +4,8 @@
 
 import datetime
 import os
+import threading
+import time
 from unittest.mock import MagicMock
 
 import pytest
@@ -348,3 +350,41 @@ def test_updatePilotStatus(sd):
 
     res = sd._getAbortedPilots(res)
     assert res == ["pilotRef1"]
+
+
+def test_executeForQueues(sd):
+    """Treating the queues concurrently, with a timeout"""
+    queues = list(sd.queueDict)
+    slowQueue = queues[0]
+    released = threading.Event()
+    sd.maxNumberOfThreads = 2
+    sd.queueTimeout = 0.5
+
+    def operation(queue):
+        if queue == slowQueue:
+            released.wait(10)
+            return S_OK(1)
+        if queue == queues[1]:
+            raise RuntimeError("Unexpected")
+        return S_OK(2)
+
+    # The slow queue is not waited for, and counted as failed
+    results = sd._executeForQueues("Submission", operation)
+    assert sorted(results) == sorted(queues)
+    assert not results[slowQueue]["OK"]
+    assert not results[queues[1]]["OK"]
+    assert all(results[queue] == S_OK(2) for queue in queues[2:])
+    assert sd.failedQueues[slowQueue] == 1
+    assert set(sd.queueLatencies) == set(queues) - {slowQueue}
+
+    # It is skipped as long as its operation goes on
+    results = sd._executeForQueues("Monitoring", operation)
+    assert slowQueue not in results
+    released.set()
+    for _ in range(100):
+        if not sd.busyQueues:
+            break
+        time.sleep(0.1)
+    assert slowQueue in sd._executeForQueues("Monitoring", operation)
+    assert sd.queueLatencies[slowQueue]["Submission"] >= 0.5
+    sd.finalize()
@@ -21,6 +21,35 @@ class CachedJobState:
         self.__jobState = JobState(jid)
         self.cleanState(skipInitState=skipInitState)
 
+    @classmethod
+    def bulkLoad(cls, jids):
+        """Create the cached states of several jobs, reading their initial states and
+        their optimizer chains for all the jobs at once
+
+        :param list jids: job IDs
+        :return: S_OK({jid: CachedJobState})
+        """
+        result = JobState.getJobsAttributes(jids, ["Status", "MinorStatus", "LastUpdateTime"])
+        if not result["OK"]:
+            return result
+        jobsAttributes = result["Value"]
+        result = JobState.getJobsOptParameters(jids, ["OptimizerChain"])
+        if not result["OK"]:
+            return result
+        jobsOptParameters = result["Value"]
+
+        cachedJobStates = {}
+        for jid in jids:
+            cjs = cls(jid, skipInitState=True)
+            jobAttributes = jobsAttributes.get(jid, {})
+            for key, value in jobAttributes.items():
+                cjs.__cache[f"att.{key}"] = value
+            for key, value in jobsOptParameters.get(jid, {}).items():
+                cjs.__cache[f"optp.{key}"] = value
+            cjs.__initState = dict(jobAttributes)
+            cachedJobStates[jid] = cjs
+        return S_OK(cachedJobStates)
+
     def cleanState(self, skipInitState=False):
         self.__cache = {}
         self.__jobLog = []
@@ -63,14 +92,53 @@ class CachedJobState:
     def commitChanges(self):
         if self.__initState is None:
             return S_ERROR("CachedJobState( %d ) is not valid" % self.__jid)
-        changes = {}
-        for k in self.__dirtyKeys:
-            changes[k] = self.__cache[k]
-        result = self.__jobState.commitCache(self.__initState, changes, self.__jobLog)
+        result = self.__jobState.commitCache(self.__initState, self.__getChanges(), self.__jobLog)
         try:
             result.pop("rpcStub")
         except KeyError:
             pass
+        return self.__commitDone(result)
+
+    @classmethod
+    def bulkCommitChanges(cls, cachedJobStates):
+        """Commit the changes of several jobs, with grouped DB statements for their traces
+
+        :param list cachedJobStates: CachedJobState objects
+        :return: S_OK({"Successful": [jids], "Failed": {jid: error message}})
+        """
+        committed = {"Successful": [], "Failed": {}}
+        jobCaches = {}
+        for cjs in cachedJobStates:
+            if cjs.__initState is None:
+                committed["Failed"][cjs.jid] = "CachedJobState( %d ) is not valid" % cjs.jid
+            else:
+                jobCaches[cjs.jid] = (cjs.__initState, cjs.__getChanges(), cjs.__jobLog)
+        result = JobState.commitCaches(jobCaches)
+        if not result["OK"]:
+            failed = dict.fromkeys(jobCaches, result)
+        else:
+            failed = {jid: S_ERROR(errorMessage) for jid, errorMessage in result["Value"]["Failed"].items()}
+        for cjs in cachedJobStates:
+            if cjs.jid not in jobCaches:
+                continue
+            if cjs.jid in failed:
+                jobResult = cjs.__commitDone(failed[cjs.jid])
+            else:
+                jobResult = cjs.__commitDone(S_OK(result["Value"]["Successful"][cjs.jid]))
+            if jobResult["OK"]:
+                committed["Successful"].append(cjs.jid)
+            else:
+                committed["Failed"][cjs.jid] = jobResult["Message"]
+        return S_OK(committed)
+
+    def __getChanges(self):
+        changes = {}
+        for k in self.__dirtyKeys:
+            changes[k] = self.__cache[k]
+        return changes
+
+    def __commitDone(self, result):
+        """Save the manifest and insert into the TQ once the trace of the job is executed"""
         if not result["OK"]:
             self.cleanState()
             return result
@@ -261,6 +329,48 @@ class CachedJobState:
     # Manifest
     #
 
+    @classmethod
+    def preload(cls, cachedJobStates, attributes=None, manifest=False, inputData=False):
+        """Read at once for several jobs the data they do not have in their cache yet
+
+        :param list cachedJobStates: CachedJobState objects
+        :param list attributes: names of the job attributes to read
+        :param bool manifest: read the manifests
+        :param bool inputData: read the input data
+        """
+        cachedJobStates = {cjs.jid: cjs for cjs in cachedJobStates}
+        if attributes:
+            jids = [
+                jid
+                for jid, cjs in cachedJobStates.items()
+                if not cjs.__cacheExists([f"att.{name}" for name in attributes])
+            ]
+            if jids:
+                result = JobState.getJobsAttributes(jids, attributes)
+                if not result["OK"]:
+                    return result
+                for jid, jobAttributes in result["Value"].items():
+                    for name, value in jobAttributes.items():
+                        # Do not overwrite the values the user may have already modified
+                        cachedJobStates[jid].__cache.setdefault(f"att.{name}", value)
+        if manifest:
+            jids = [jid for jid, cjs in cachedJobStates.items() if not cjs.__manifest]
+            if jids:
+                result = JobState.getJobsManifests(jids)
+                if not result["OK"]:
+                    return result
+                for jid, jobManifest in result["Value"].items():
+                    cachedJobStates[jid].__manifest = jobManifest
+        if inputData:
+            jids = [jid for jid, cjs in cachedJobStates.items() if not cjs.__cacheExists("inputData")]
+            if jids:
+                result = JobState.getJobsInputData(jids)
+                if not result["OK"]:
+                    return result
+                for jid, lfns in result["Value"].items():
+                    cachedJobStates[jid].__cache["inputData"] = lfns
+        return S_OK()
+
     def getManifest(self):
         if not self.__manifest:
             result = self.__jobState.getManifest()
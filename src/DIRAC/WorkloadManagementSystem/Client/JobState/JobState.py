@@ -69,7 +69,8 @@ class JobState:
 
     # Execute traces
 
-    def __retryFunction(self, retries, functor, args=False, kwargs=False):
+    @staticmethod
+    def __retryFunction(retries, functor, args=False, kwargs=False):
         retries = max(1, retries)
         if not args:
             args = tuple()
@@ -138,11 +139,106 @@ class JobState:
         # We return a new initial state
         return self.getAttributes(list(initialState))
 
+    @classmethod
+    def commitCaches(cls, jobCaches):
+        """Execute the traces of several jobs as commitCache does, with grouped statements:
+        the jobs getting the same attributes are updated together, and the optimizer parameters
+        and the logging records of all the jobs are written at once
+
+        :param dict jobCaches: { jid: (initialState, cache, jobLog) }
+        :return: S_OK({"Successful": {jid: new initial state, or False if the initial state was different},
+                       "Failed": {jid: error message}})
+        """
+        cls.checkDBAccess()
+        jobDB = JobState.__db.jobDB
+        committed = {"Successful": {}, "Failed": {}}
+        toCommit = {}
+        for jid, (initialState, cache, jobLog) in jobCaches.items():
+            try:
+                cls.__checkType(initialState, dict)
+                cls.__checkType(cache, dict)
+                cls.__checkType(jobLog, (list, tuple))
+            except TypeError as excp:
+                committed["Failed"][jid] = str(excp)
+                continue
+            toCommit[jid] = (initialState, cache, jobLog)
+        if not toCommit:
+            return S_OK(committed)
+
+        stateNames = sorted(set().union(*(initialState for initialState, _cache, _jobLog in toCommit.values())))
+        result = jobDB.getJobsAttributes(list(toCommit), list(stateNames))
+        if not result["OK"]:
+            return result
+        currentStates = result["Value"]
+
+        attributeGroups = {}
+        optParameters = {}
+        records = []
+        for jid, (initialState, cache, jobLog) in list(toCommit.items()):
+            currentState = currentStates.get(jid, {})
+            if {name: currentState.get(name) for name in initialState} != initialState:
+                committed["Successful"][jid] = False
+                toCommit.pop(jid)
+                continue
+            attributes = {}
+            for key, value in cache.items():
+                if key.startswith("att."):
+                    attributes[key[len("att.") :]] = value
+                elif key.startswith("optp."):
+                    optParameters.setdefault(jid, {})[key[len("optp.") :]] = value
+            if attributes:
+                attributeGroups.setdefault(tuple(sorted(attributes.items())), []).append(jid)
+            for record, updateTime, source in jobLog:
+                records.append(dict(record, jobID=jid, date=updateTime, source=source))
+        gLogger.verbose(f"About to execute the traces of {len(toCommit)} jobs")
+
+        def fail(jids, errorMessage):
+            for jid in jids:
+                if toCommit.pop(jid, None):
+                    committed["Failed"][jid] = errorMessage
+
+        for attributes, jids in attributeGroups.items():
+            attN = [name for name, _value in attributes]
+            attV = [value for _name, value in attributes]
+            result = cls.__retryFunction(5, jobDB.setJobAttributes, (jids, attN, attV), {"update": True})
+            if not result["OK"]:
+                fail(jids, result["Message"])
+
+        optParameters = {jid: parameters for jid, parameters in optParameters.items() if jid in toCommit}
+        if optParameters:
+            result = cls.__retryFunction(5, jobDB.setJobsOptParameters, (optParameters,))
+            if not result["OK"]:
+                fail(optParameters, result["Message"])
+
+        for jid, (_initialState, cache, _jobLog) in list(toCommit.items()):
+            if "inputData" in cache:
+                result = cls.__retryFunction(5, jobDB.setInputData, (jid, cache["inputData"]))
+                if not result["OK"]:
+                    fail([jid], result["Message"])
+
+        records = [record for record in records if record["jobID"] in toCommit]
+        if records:
+            result = cls.__retryFunction(5, JobState.__db.logDB.addLoggingRecords, (records,))
+            if not result["OK"]:
+                fail({record["jobID"] for record in records}, result["Message"])
+
+        gLogger.info(f"Ended trace execution of {len(toCommit)} jobs")
+        # We return the new initial states
+        result = jobDB.getJobsAttributes(list(toCommit), list(stateNames))
+        if not result["OK"]:
+            fail(list(toCommit), result["Message"])
+            return S_OK(committed)
+        for jid, (initialState, _cache, _jobLog) in toCommit.items():
+            newState = result["Value"].get(jid, {})
+            committed["Successful"][jid] = {name: value for name, value in newState.items() if name in initialState}
+        return S_OK(committed)
+
     #
     # Status
     #
 
-    def __checkType(self, value, tList, canBeNone=False):
+    @staticmethod
+    def __checkType(value, tList, canBeNone=False):
         """Raise TypeError if the value does not have one of the expected types
 
         :param value: the value to test
@@ -279,6 +375,56 @@ class JobState:
             return S_ERROR(str(excp))
         return JobState.__db.jobDB.getJobOptParameters(self.__jid, nameList)
 
+    # Several jobs at once
+
+    @classmethod
+    def getJobsAttributes(cls, jids, nameList):
+        """Get the attributes of several jobs with one query
+
+        :return: S_OK({jid: {name: value}})
+        """
+        cls.checkDBAccess()
+        return JobState.__db.jobDB.getJobsAttributes(list(jids), list(nameList))
+
+    @classmethod
+    def getJobsOptParameters(cls, jids, nameList=None):
+        """Get the optimizer parameters of several jobs with one query
+
+        :return: S_OK({jid: {name: value}})
+        """
+        cls.checkDBAccess()
+        return JobState.__db.jobDB.getJobsOptParameters(list(jids), nameList)
+
+    @classmethod
+    def getJobsInputData(cls, jids):
+        """Get the input data of several jobs with one query
+
+        :return: S_OK({jid: [LFNs]})
+        """
+        cls.checkDBAccess()
+        return JobState.__db.jobDB.getJobsInputData(list(jids))
+
+    @classmethod
+    def getJobsManifests(cls, jids):
+        """Get the manifests of several jobs with one query
+
+        :return: S_OK({jid: JobManifest}), without the jobs having no manifest
+        """
+        cls.checkDBAccess()
+        result = JobState.__db.jobDB.getJobsJDL(list(jids))
+        if not result["OK"]:
+            return result
+        manifests = {}
+        for jid, jdl in result["Value"].items():
+            if not jdl:
+                continue
+            manifest = JobManifest()
+            result = manifest.loadJDL(jdl)
+            if not result["OK"]:
+                return result
+            manifests[jid] = manifest
+        return S_OK(manifests)
+
     # Other
 
     right_resetJob = RIGHT_RESCHEDULE
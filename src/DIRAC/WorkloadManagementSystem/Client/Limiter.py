@@ -1,7 +1,16 @@
 """ Encapsulate here the logic for limiting the matching of jobs
 
     Utilities and classes here are used by the Matcher
+
+    The numbers of running jobs per site and attribute, needed to check the running limits,
+    are cached and shared between all the instances. A cached entry is used for at most
+    JobScheduling/RunningCountersMaxAge seconds, it is refreshed in the background once half of
+    that time has passed, and it is incremented for every job matched in between.
 """
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from DIRAC import S_OK, S_ERROR
 from DIRAC import gLogger
 
@@ -17,6 +26,11 @@ class Limiter:
     csDictCache = DictCache()
     condCache = DictCache()
     delayMem = {}
+    # (siteName, attName) -> { "Counts": { attValue: number of running jobs }, "Time": ..., "Refreshing": ... }
+    runningCounters = {}
+    runningCountersLock = threading.Lock()
+    runningCountersRefresher = ThreadPoolExecutor(max_workers=1)
+    cacheStats = {"Hits": 0, "Misses": 0, "Refreshes": 0, "Increments": 0}
 
     def __init__(self, jobDB=None, opsHelper=None, pilotRef=None):
         """Constructor"""
@@ -177,19 +191,10 @@ class Limiter:
             if attName not in self.jobDB.jobAttributeNames:
                 self.log.error("Attribute does not exist", f"({attName}). Check the job limits")
                 continue
-            cK = f"Running:{siteName}:{attName}"
-            data = self.condCache.get(cK)
-            if not data:
-                result = self.jobDB.getCounters(
-                    "Jobs",
-                    [attName],
-                    {"Site": siteName, "Status": [JobStatus.RUNNING, JobStatus.MATCHED, JobStatus.STALLED]},
-                )
-                if not result["OK"]:
-                    return result
-                data = result["Value"]
-                data = {k[0][attName]: k[1] for k in data}
-                self.condCache.add(cK, 10, data)
+            result = self.__getRunningCounters(siteName, attName)
+            if not result["OK"]:
+                return result
+            data = result["Value"]
             for attValue in limitsDict[attName]:
                 limit = limitsDict[attName][attValue]
                 running = data.get(attValue, 0)
@@ -204,38 +209,105 @@ class Limiter:
         # negCond is something like : {'JobType': ['Merge']}
         return S_OK(negCond)
 
+    @classmethod
+    def getCacheStatistics(cls):
+        """Get the statistics of the cache of running counters since the start of the process
+
+        :return: dict with the number of Hits, Misses, background Refreshes, Increments and Entries
+        """
+        with cls.runningCountersLock:
+            return dict(cls.cacheStats, Entries=len(cls.runningCounters))
+
+    def __getRunningCounters(self, siteName, attName):
+        """Get the number of running jobs per value of the attribute at the site, from the cache if fresh enough"""
+        maxAge = self.__opsHelper.getValue("JobScheduling/RunningCountersMaxAge", 10)
+        with self.runningCountersLock:
+            entry = self.runningCounters.get((siteName, attName))
+            if not entry or time.time() - entry["Time"] >= maxAge:
+                self.cacheStats["Misses"] += 1
+                entry = None
+            else:
+                self.cacheStats["Hits"] += 1
+                counts = dict(entry["Counts"])
+                refresh = not entry["Refreshing"] and time.time() - entry["Time"] >= maxAge / 2
+                if refresh:
+                    entry["Refreshing"] = True
+        if not entry:
+            return self.__refreshRunningCounters(siteName, attName)
+        if refresh:
+            self.runningCountersRefresher.submit(self.__refreshRunningCounters, siteName, attName, True)
+        return S_OK(counts)
+
+    def __refreshRunningCounters(self, siteName, attName, background=False):
+        """Count the running jobs per value of the attribute at the site, and cache the result"""
+        startTime = time.time()
+        result = self.jobDB.getCounters(
+            "Jobs",
+            [attName],
+            {"Site": siteName, "Status": [JobStatus.RUNNING, JobStatus.MATCHED, JobStatus.STALLED]},
+        )
+        with self.runningCountersLock:
+            if not result["OK"]:
+                entry = self.runningCounters.get((siteName, attName))
+                if entry:
+                    entry["Refreshing"] = False
+                self.log.error("Cannot count the running jobs", f"at {siteName} per {attName}: {result['Message']}")
+                return result
+            counts = {k[0][attName]: k[1] for k in result["Value"]}
+            self.runningCounters[(siteName, attName)] = {"Counts": counts, "Time": startTime, "Refreshing": False}
+            if background:
+                self.cacheStats["Refreshes"] += 1
+        return S_OK(dict(counts))
+
     def updateDelayCounters(self, siteName, jid):
-        # Get the info from the CS
+        """Add the matched job(s) to the delay counters of the site, and to its cached
+        running counters so that the running limits apply before the next refresh
+
+        :param str siteName: site of the match
+        :param jid: job ID, or list of job IDs
+        """
+        delayDict = {}
         siteSection = f"{self.__matchingDelaySection}/{siteName}"
-        result = self.__extractCSData(siteSection)
-        if not result["OK"]:
-            return result
-        delayDict = result["Value"]
-        # limitsDict is something like { 'JobType' : { 'Merge' : 20, 'MCGen' : 1000 } }
-        if not delayDict:
-            return S_OK()
-        attNames = []
+        if self.__opsHelper.getValue("JobScheduling/CheckMatchingDelay", True):
+            # Get the info from the CS
+            result = self.__extractCSData(siteSection)
+            if not result["OK"]:
+                return result
+            delayDict = result["Value"]
+        # delayDict is something like { 'JobType' : { 'Merge' : 20, 'MCGen' : 1000 } }
+        with self.runningCountersLock:
+            attNames = {attName for site, attName in self.runningCounters if site == siteName}
         for attName in delayDict:
             if attName not in self.jobDB.jobAttributeNames:
                 self.log.error("Attribute does not exist in the JobDB. Please fix it!", f"({attName})")
             else:
-                attNames.append(attName)
-        result = self.jobDB.getJobAttributes(jid, attNames)
+                attNames.add(attName)
+        if not attNames:
+            return S_OK()
+        result = self.jobDB.getJobsAttributes(jid if isinstance(jid, list) else [jid], sorted(attNames))
         if not result["OK"]:
             self.log.error("Error while retrieving attributes", f"coming from {siteSection}: {result['Message']}")
             return result
-        atts = result["Value"]
+        jobsAttributes = list(result["Value"].values())
         # Create the DictCache if not there
         if siteName not in self.delayMem:
             self.delayMem[siteName] = DictCache()
         # Update the counters
         delayCounter = self.delayMem[siteName]
-        for attName in atts:
-            attValue = atts[attName]
-            if attValue in delayDict[attName]:
-                delayTime = delayDict[attName][attValue]
-                self.log.notice(f"Adding delay for {siteName}/{attName}={attValue} of {delayTime} secs")
-                delayCounter.add((attName, attValue), delayTime)
+        for atts in jobsAttributes:
+            for attName in atts:
+                attValue = atts[attName]
+                if attValue in delayDict.get(attName, {}):
+                    delayTime = delayDict[attName][attValue]
+                    self.log.notice(f"Adding delay for {siteName}/{attName}={attValue} of {delayTime} secs")
+                    delayCounter.add((attName, attValue), delayTime)
+        with self.runningCountersLock:
+            for atts in jobsAttributes:
+                for attName, attValue in atts.items():
+                    entry = self.runningCounters.get((siteName, attName))
+                    if entry:
+                        entry["Counts"][attValue] = entry["Counts"].get(attValue, 0) + 1
+                        self.cacheStats["Increments"] += 1
         return S_OK()
 
     def __getDelayCondition(self, siteName):
@@ -68,21 +68,7 @@ class Matcher:
         startTime = time.time()
 
         resourceDict = self._getResourceDict(resourceDescription, credDict)
-
-        # Make a nice print of the resource matching parameters
-        toPrintDict = dict(resourceDict)
-        if "MaxRAM" in resourceDescription:
-            toPrintDict["MaxRAM"] = resourceDescription["MaxRAM"]
-        if "NumberOfProcessors" in resourceDescription:
-            toPrintDict["NumberOfProcessors"] = resourceDescription["NumberOfProcessors"]
-        toPrintDict["Tag"] = []
-        if "Tag" in resourceDict:
-            for tag in resourceDict["Tag"]:
-                if not tag.endswith("GB") and not tag.endswith("Processors"):
-                    toPrintDict["Tag"].append(tag)
-        if not toPrintDict["Tag"]:
-            toPrintDict.pop("Tag")
-        self.log.info("Resource description for matching", printDict(toPrintDict))
+        self._printResourceDict(resourceDescription, resourceDict)
 
         negativeCond = self.limiter.getNegativeCondForSite(resourceDict["Site"], resourceDict.get("GridCE"))
         result = self.tqDB.matchAndGetJob(resourceDict, negativeCond=negativeCond)
@@ -131,8 +117,7 @@ class Matcher:
         if not resAtt["Value"]:
             raise RuntimeError("No attributes returned for job")
 
-        if self.opsHelper.getValue("JobScheduling/CheckMatchingDelay", True):
-            self.limiter.updateDelayCounters(resourceDict["Site"], jobID)
+        self.limiter.updateDelayCounters(resourceDict["Site"], jobID)
 
         pilotInfoReportedFlag = resourceDict.get("PilotInfoReportedFlag", False)
         if not pilotInfoReportedFlag:
@@ -145,6 +130,92 @@ class Matcher:
 
         return resultDict
 
+    def selectJobs(self, resourceDescription, credDict, numJobs):
+        """Select up to numJobs jobs matching the resource capacity, e.g. for the free slots of a pilot.
+        The jobs are taken out of the task queues in one transaction, and their information
+        is retrieved and updated with bulk queries.
+
+        :return: list of dicts like the one returned by selectJob, empty if no job matched
+        """
+
+        startTime = time.time()
+
+        resourceDict = self._getResourceDict(resourceDescription, credDict)
+        self._printResourceDict(resourceDescription, resourceDict)
+
+        negativeCond = self.limiter.getNegativeCondForSite(resourceDict["Site"], resourceDict.get("GridCE"))
+        result = self.tqDB.matchAndGetJobs(resourceDict, numJobs, negativeCond=negativeCond)
+
+        if not result["OK"]:
+            raise RuntimeError(result["Message"])
+        result = result["Value"]
+        if not result["matchFound"]:
+            self.log.info("No match found")
+            return []
+
+        jobIDs = [jobID for jobID, _tqID in result["jobs"]]
+        resAtt = self.jobDB.getJobsAttributes(jobIDs, ["Status", "Owner", "OwnerGroup"])
+        if not resAtt["OK"]:
+            raise RuntimeError("Could not retrieve job attributes")
+        jobsAttributes = resAtt["Value"]
+        # The jobs are already out of the task queues
+        waitingJobIDs = []
+        for jobID in jobIDs:
+            if jobsAttributes.get(jobID, {}).get("Status") != JobStatus.WAITING:
+                self.log.error("Job matched by the TQ is not in Waiting state", str(jobID))
+            else:
+                waitingJobIDs.append(jobID)
+        if not waitingJobIDs:
+            return []
+
+        self._reportStatus(resourceDict, waitingJobIDs)
+
+        result = self.jobDB.getJobsJDL(waitingJobIDs)
+        if not result["OK"]:
+            raise RuntimeError("Failed to get the job JDLs")
+        jdls = result["Value"]
+
+        matchTime = time.time() - startTime
+        self.log.verbose("Match time", f"[{str(matchTime)}] for {len(waitingJobIDs)} jobs")
+
+        # Get some extra stuff into the response returned
+        resOpt = self.jobDB.getJobsOptParameters(waitingJobIDs)
+        jobsOptParameters = resOpt["Value"] if resOpt["OK"] else {}
+
+        self.limiter.updateDelayCounters(resourceDict["Site"], waitingJobIDs)
+
+        pilotInfoReportedFlag = resourceDict.get("PilotInfoReportedFlag", False)
+        if not pilotInfoReportedFlag:
+            self._updatePilotInfo(resourceDict)
+        self._updatePilotJobMapping(resourceDict, waitingJobIDs)
+
+        resultList = []
+        for jobID in waitingJobIDs:
+            resultDict = {"JDL": jdls.get(jobID, ""), "JobID": jobID}
+            resultDict.update(jobsOptParameters.get(jobID, {}))
+            resultDict["Owner"] = jobsAttributes[jobID]["Owner"]
+            resultDict["Group"] = jobsAttributes[jobID]["OwnerGroup"]
+            resultDict["PilotInfoReportedFlag"] = True
+            resultList.append(resultDict)
+
+        return resultList
+
+    def _printResourceDict(self, resourceDescription, resourceDict):
+        """Make a nice print of the resource matching parameters"""
+        toPrintDict = dict(resourceDict)
+        if "MaxRAM" in resourceDescription:
+            toPrintDict["MaxRAM"] = resourceDescription["MaxRAM"]
+        if "NumberOfProcessors" in resourceDescription:
+            toPrintDict["NumberOfProcessors"] = resourceDescription["NumberOfProcessors"]
+        toPrintDict["Tag"] = []
+        if "Tag" in resourceDict:
+            for tag in resourceDict["Tag"]:
+                if not tag.endswith("GB") and not tag.endswith("Processors"):
+                    toPrintDict["Tag"].append(tag)
+        if not toPrintDict["Tag"]:
+            toPrintDict.pop("Tag")
+        self.log.info("Resource description for matching", printDict(toPrintDict))
+
     def _getResourceDict(self, resourceDescription, credDict):
         """from resourceDescription to resourceDict (just various mods)"""
         resourceDict = self._processResourceDescription(resourceDescription)
@@ -242,7 +313,7 @@ class Matcher:
         return resourceDict
 
     def _reportStatus(self, resourceDict, jobID):
-        """Reports the status of the matched job in jobDB and jobLoggingDB
+        """Reports the status of the matched job(s) in jobDB and jobLoggingDB
 
         Do not fail if errors happen here
         """
@@ -302,10 +373,11 @@ class Matcher:
                 )
 
     def _updatePilotJobMapping(self, resourceDict, jobID):
-        """Update pilot to job mapping information"""
+        """Update pilot to job(s) mapping information"""
         pilotReference = resourceDict.get("PilotReference", "")
         if pilotReference and pilotReference != "Unknown":
-            result = self.pilotAgentsDB.setCurrentJobID(pilotReference, jobID)
+            currentJobID = jobID[-1] if isinstance(jobID, list) else jobID
+            result = self.pilotAgentsDB.setCurrentJobID(pilotReference, currentJobID)
             if not result["OK"]:
                 self.log.error(
                     "Problem updating pilot information",
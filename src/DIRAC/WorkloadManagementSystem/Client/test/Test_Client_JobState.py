@@ -0,0 +1,98 @@
+""" pytest(s) for the commits of the changes of several jobs at once
+"""
+# pylint: disable=protected-access, missing-docstring
+import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from DIRAC import S_ERROR, S_OK
+from DIRAC.WorkloadManagementSystem.Client import JobStatus
+
+# sut
+from DIRAC.WorkloadManagementSystem.Client.JobState.CachedJobState import CachedJobState
+from DIRAC.WorkloadManagementSystem.Client.JobState.JobState import JobState
+
+lastUpdate = datetime.datetime(2024, 1, 1)
+
+
+@pytest.fixture
+def jobDB(mocker):
+    """JobDB with the jobs 1 to 5 in Checking/JobSanity"""
+    jobDB = MagicMock()
+    states = {jid: {"Status": JobStatus.CHECKING, "MinorStatus": "JobSanity"} for jid in range(1, 6)}
+    jobDB.states = states
+
+    def getJobsAttributes(jids, attrList):
+        return S_OK(
+            {
+                jid: {name: dict(states[jid], LastUpdateTime=lastUpdate)[name] for name in attrList}
+                for jid in jids
+                if jid in states
+            }
+        )
+
+    jobDB.getJobsAttributes.side_effect = getJobsAttributes
+    jobDB.getJobsOptParameters.return_value = S_OK({1: {"OptimizerChain": "JobPath,JobSanity"}, 2: {}})
+    jobDB.setJobAttributes.return_value = S_OK()
+    jobDB.setJobsOptParameters.return_value = S_OK()
+    logDB = MagicMock()
+    logDB.addLoggingRecords.return_value = S_OK()
+
+    mocker.patch.object(JobState._JobState__db, "checked", True)
+    mocker.patch.object(JobState._JobState__db, "jobDB", jobDB)
+    mocker.patch.object(JobState._JobState__db, "logDB", logDB)
+    mocker.patch.object(JobState._JobState__db, "tqDB", MagicMock())
+    return jobDB
+
+
+def test_bulkLoad(jobDB):
+    result = CachedJobState.bulkLoad([1, 2])
+    assert result["OK"]
+    assert jobDB.getJobsAttributes.call_count == 1
+    cjs = result["Value"][1]
+    assert cjs.valid
+    # The states and the optimizer chains are in the cache, nothing is dirty
+    assert cjs.getStatus() == S_OK((JobStatus.CHECKING, "JobSanity"))
+    assert cjs.getOptParameter("OptimizerChain") == S_OK("JobPath,JobSanity")
+    assert not cjs.getDirtyKeys()
+    assert jobDB.getJobsAttributes.call_count == 1
+    assert not jobDB.getJobOptParameter.called
+
+
+def test_bulkCommitChanges(jobDB):
+    cachedJobStates = list(CachedJobState.bulkLoad([1, 2, 3, 4, 5])["Value"].values())
+    # The job 5 is modified by someone else
+    jobDB.states[5] = {"Status": JobStatus.KILLED, "MinorStatus": "Marked for termination"}
+    for cjs in cachedJobStates:
+        cjs.setStatus(JobStatus.CHECKING, "InputData", source="JobSanity")
+        cjs.setOptParameter("Sanity", str(cjs.jid))
+    cachedJobStates[3].setAttribute("UserPriority", 2)
+
+    result = CachedJobState.bulkCommitChanges(cachedJobStates)
+    assert result["OK"]
+    assert sorted(result["Value"]["Successful"]) == [1, 2, 3, 4]
+    assert result["Value"]["Failed"] == {5: "Initial state was different"}
+
+    # One update for the jobs changing the same attributes, one for the job 4
+    assert jobDB.setJobAttributes.call_count == 2
+    jids, names, values = jobDB.setJobAttributes.call_args_list[0].args
+    assert (jids, names, values) == ([1, 2, 3], ["MinorStatus", "Status"], ["InputData", JobStatus.CHECKING])
+    assert jobDB.setJobsOptParameters.call_count == 1
+    assert jobDB.setJobsOptParameters.call_args.args[0] == {jid: {"Sanity": str(jid)} for jid in range(1, 5)}
+    records = JobState._JobState__db.logDB.addLoggingRecords.call_args.args[0]
+    assert [record["jobID"] for record in records] == [1, 2, 3, 4]
+    assert records[0]["minorStatus"] == "InputData"
+    assert records[0]["source"] == "JobSanity"
+
+
+def test_bulkCommitChangesFailure(jobDB):
+    cachedJobStates = list(CachedJobState.bulkLoad([1, 2])["Value"].values())
+    cachedJobStates[0].setAttribute("Site", "Site1")
+    cachedJobStates[1].setAttribute("Site", "Site2")
+    jobDB.setJobAttributes.side_effect = lambda jids, *args, **kwargs: S_ERROR("Failed") if 1 in jids else S_OK()
+
+    result = CachedJobState.bulkCommitChanges(cachedJobStates)
+    assert result["OK"]
+    assert result["Value"]["Successful"] == [2]
+    assert result["Value"]["Failed"] == {1: "Failed"}
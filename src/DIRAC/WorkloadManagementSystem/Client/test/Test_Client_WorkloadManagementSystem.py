@@ -8,7 +8,7 @@ from io import BytesIO
 import pytest
 from unittest.mock import MagicMock
 
-from DIRAC import gLogger
+from DIRAC import S_OK, gLogger
 
 gLogger.setLevel("DEBUG")
 
@@ -79,6 +79,58 @@ def test__processResourceDescription(setUp):
     assert res == resExpected
 
 
+def test_selectJobs(mocker):
+    mocker.patch.object(
+        matcher,
+        "_getResourceDict",
+        return_value={"Site": "DIRAC.Jenkins.ch", "CPUTime": 1080000, "PilotReference": "somePilotReference"},
+    )
+    mocker.patch.object(matcher.limiter, "getNegativeCondForSite", return_value={})
+    mocker.patch.object(opsHelperMock, "getValue", return_value=False)
+    tqDBMock.matchAndGetJobs.return_value = S_OK({"matchFound": True, "jobs": [(1, 10), (2, 10), (3, 11)]})
+    jobDBMock.getJobsAttributes.return_value = S_OK(
+        {
+            1: {"Status": "Waiting", "Owner": "user", "OwnerGroup": "user_group"},
+            2: {"Status": "Killed", "Owner": "user", "OwnerGroup": "user_group"},
+            3: {"Status": "Waiting", "Owner": "prod", "OwnerGroup": "prod_group"},
+        }
+    )
+    jobDBMock.getJobsJDL.return_value = S_OK({1: "[Executable = test1;]", 3: "[Executable = test3;]"})
+    jobDBMock.getJobsOptParameters.return_value = S_OK({1: {"CPUNormalizationFactor": "10.0"}, 3: {}})
+
+    res = matcher.selectJobs({}, {}, 3)
+    assert res == [
+        {
+            "JDL": "[Executable = test1;]",
+            "JobID": 1,
+            "CPUNormalizationFactor": "10.0",
+            "Owner": "user",
+            "Group": "user_group",
+            "PilotInfoReportedFlag": True,
+        },
+        {
+            "JDL": "[Executable = test3;]",
+            "JobID": 3,
+            "Owner": "prod",
+            "Group": "prod_group",
+            "PilotInfoReportedFlag": True,
+        },
+    ]
+    tqDBMock.matchAndGetJobs.assert_called_once()
+    jobDBMock.setJobAttributes.assert_called_once()
+    assert jobDBMock.setJobAttributes.call_args[0][0] == [1, 3]
+    jlDBMock.addLoggingRecord.assert_called_once()
+    pilotAgentsDBMock.setJobForPilot.assert_called_once_with([1, 3], "somePilotReference", updateStatus=False)
+
+
+def test_selectJobs_noMatch(mocker):
+    mocker.patch.object(matcher, "_getResourceDict", return_value={"Site": "DIRAC.Jenkins.ch", "CPUTime": 1080000})
+    mocker.patch.object(matcher.limiter, "getNegativeCondForSite", return_value={})
+    mocker.patch.object(tqDBMock, "matchAndGetJobs", return_value=S_OK({"matchFound": False, "jobs": []}))
+
+    assert matcher.selectJobs({}, {}, 3) == []
+
+
 def test_uploadFilesAsSandbox(mocker, setUp):
     mocker.patch("DIRAC.WorkloadManagementSystem.Client.SandboxStoreClient.TransferClient", return_value=MagicMock())
     ssc = SandboxStoreClient()
@@ -0,0 +1,72 @@
+""" Test the cache of running counters of the Limiter
+"""
+# pylint: disable=protected-access, missing-docstring, invalid-name
+
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from DIRAC import S_OK
+from DIRAC.WorkloadManagementSystem.Client.Limiter import Limiter
+
+RUNNING_LIMITS = {"JobScheduling/RunningLimit/Site_1": {"JobType": {"Merge": 2, "MCSimulation": 100}}}
+
+
+@pytest.fixture
+def limiter(mocker):
+    mocker.patch.object(Limiter, "runningCounters", {})
+    mocker.patch.object(Limiter, "cacheStats", {"Hits": 0, "Misses": 0, "Refreshes": 0, "Increments": 0})
+    mocker.patch.object(Limiter, "delayMem", {})
+    mocker.patch.object(Limiter, "csDictCache", MagicMock(get=MagicMock(return_value=None)))
+
+    jobDB = MagicMock()
+    jobDB.jobAttributeNames = ["JobType", "Site", "Status"]
+    jobDB.getCounters.return_value = S_OK([({"JobType": "Merge"}, 1)])
+    jobDB.getJobsAttributes.return_value = S_OK({1: {"JobType": "Merge"}})
+
+    opsHelper = MagicMock()
+    opsHelper.getValue.side_effect = lambda option, default: default
+    opsHelper.getSections.side_effect = lambda section: S_OK(list(RUNNING_LIMITS.get(section, {})))
+    opsHelper.getOptionsDict.side_effect = lambda path: S_OK(
+        RUNNING_LIMITS.get(path.rsplit("/", 1)[0], {}).get(path.rsplit("/", 1)[1], {})
+    )
+    return Limiter(jobDB=jobDB, opsHelper=opsHelper)
+
+
+def test_getNegativeCondForSite_cached(limiter):
+    assert limiter.getNegativeCondForSite("Site_1") == {}
+    assert limiter.getNegativeCondForSite("Site_1") == {}
+    assert limiter.jobDB.getCounters.call_count == 1
+    assert Limiter.getCacheStatistics() == {"Hits": 1, "Misses": 1, "Refreshes": 0, "Increments": 0, "Entries": 1}
+
+
+def test_updateDelayCounters_increments(limiter):
+    assert limiter.getNegativeCondForSite("Site_1") == {}
+
+    # The matched job reaches the limit without waiting for the next count
+    assert limiter.updateDelayCounters("Site_1", [1])["OK"]
+    assert limiter.getNegativeCondForSite("Site_1") == {"JobType": ["Merge"]}
+    assert limiter.jobDB.getCounters.call_count == 1
+    assert Limiter.getCacheStatistics()["Increments"] == 1
+
+
+def test_staleness(limiter):
+    assert limiter.getNegativeCondForSite("Site_1") == {}
+
+    # Too old: counted again before answering
+    Limiter.runningCounters[("Site_1", "JobType")]["Time"] -= 10
+    limiter.jobDB.getCounters.return_value = S_OK([({"JobType": "Merge"}, 2)])
+    assert limiter.getNegativeCondForSite("Site_1") == {"JobType": ["Merge"]}
+    assert limiter.jobDB.getCounters.call_count == 2
+
+    # Half way: the cached value is used, and counted again in the background
+    Limiter.runningCounters[("Site_1", "JobType")]["Time"] -= 6
+    limiter.jobDB.getCounters.return_value = S_OK([])
+    assert limiter.getNegativeCondForSite("Site_1") == {"JobType": ["Merge"]}
+    for _ in range(100):
+        if Limiter.getCacheStatistics()["Refreshes"]:
+            break
+        time.sleep(0.01)
+    assert limiter.jobDB.getCounters.call_count == 3
+    assert limiter.getNegativeCondForSite("Site_1") == {}
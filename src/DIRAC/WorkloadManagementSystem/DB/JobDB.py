@@ -13,13 +13,16 @@ The following options can be set in ``Systems/WorkloadManagement/<Setup>/Databas
 """
 import datetime
 import operator
+import uuid
 
 from DIRAC.ConfigurationSystem.Client.Helpers.Registry import getVOForGroup
 from DIRAC.ConfigurationSystem.Client.Helpers.Resources import getSiteTier
 from DIRAC.Core.Base.DB import DB
 from DIRAC.Core.Utilities.ClassAd.ClassAdLight import ClassAd
+from DIRAC.Core.Utilities.MySQL import _quotedList
 from DIRAC.Core.Utilities.Decorators import deprecated
 from DIRAC.Core.Utilities.DErrno import EWMSJMAN, EWMSSUBM, cmpError
+from DIRAC.Core.Utilities.List import breakListIntoChunks
 from DIRAC.Core.Utilities.ReturnValues import S_ERROR, S_OK
 from DIRAC.ResourceStatusSystem.Client.SiteStatus import SiteStatus
 from DIRAC.WorkloadManagementSystem.Client import JobMinorStatus, JobStatus
@@ -317,6 +320,33 @@ class JobDB(DB):
             jobOptParameters = {name: value for name, value in result.get("Value", {})}
         return S_OK(jobOptParameters)
 
+    #############################################################################
+    def getJobsOptParameters(self, jobIDs, paramList=None):
+        """Get optimizer parameters for the given jobs. If the list of parameter names is
+        empty, get all the parameters then
+
+        :return: S_OK({jobID: {name: value}})
+        """
+        if not jobIDs:
+            return S_OK({})
+        jobIDList = ",".join(str(int(jobID)) for jobID in jobIDs)
+
+        cmd = f"SELECT JobID, Name, Value from OptimizerParameters WHERE JobID in ({jobIDList})"
+        if paramList:
+            ret = self._escapeValues(paramList)
+            if not ret["OK"]:
+                return ret
+            cmd += f" and Name in ({','.join(ret['Value'])})"
+
+        result = self._query(cmd)
+        if not result["OK"]:
+            return S_ERROR("JobDB.getJobsOptParameters: failed to retrieve parameters")
+        jobsOptParameters = {int(jobID): {} for jobID in jobIDs}
+        for jobID, name, value in result["Value"]:
+            # account for BLOBs
+            jobsOptParameters[int(jobID)][name] = value.decode() if isinstance(value, bytes) else value
+        return S_OK(jobsOptParameters)
+
     #############################################################################
 
     def getInputData(self, jobID):
@@ -337,6 +367,29 @@ class JobDB(DB):
 
         return S_OK(inputData)
 
+    #############################################################################
+    def getJobsInputData(self, jobIDs):
+        """Get the input data of the given jobs
+
+        :return: S_OK({jobID: [LFNs]})
+        """
+        if not jobIDs:
+            return S_OK({})
+        jobIDList = ",".join(str(int(jobID)) for jobID in jobIDs)
+        cmd = f"SELECT JobID, LFN FROM InputData WHERE JobID in ({jobIDList})"
+        res = self._query(cmd)
+        if not res["OK"]:
+            return res
+
+        inputData = {int(jobID): [] for jobID in jobIDs}
+        for jobID, lfn in res["Value"]:
+            if not lfn.strip():
+                continue
+            if lfn.lower().startswith("lfn:"):
+                lfn = lfn[4:]
+            inputData[int(jobID)].append(lfn)
+        return S_OK(inputData)
+
     #############################################################################
     def setInputData(self, jobID, inputData):
         """Inserts input data for the given job"""
@@ -551,12 +604,13 @@ class JobDB(DB):
 
         return self._update(cmd)
 
-    def setJobsMajorStatus(self, jIDList, candidateStatus, force=False):
+    def setJobsMajorStatus(self, jIDList, candidateStatus, force=False, update=False):
         """
         Sets jobs major status, considering the JobStateMachine result
 
         :param list jIDList: list of one or more job IDs
         :param str candidateStatus: candidate major Status
+        :param bool update: optional flag to update the jobs LastUpdateTime stamp
         """
 
         # get the current statuses of the jobs
@@ -598,6 +652,8 @@ class JobDB(DB):
         cmd += ",".join(ns)
 
         cmd += " ON DUPLICATE KEY UPDATE Status=VALUES(Status)"
+        if update:
+            cmd += ", LastUpdateTime=UTC_TIMESTAMP()"
 
         return self._update(cmd)
 
@@ -689,6 +745,32 @@ class JobDB(DB):
 
         return self.insertFields("OptimizerParameters", ["JobID", "Name", "Value"], [jobID, name, value])
 
+    #############################################################################
+    def setJobsOptParameters(self, jobsOptParameters, chunkSize=1000):
+        """Set the optimizer parameters of many jobs at once, replacing the existing ones
+
+        :param dict jobsOptParameters: { jobID: { name: value } }
+        :param int chunkSize: maximum number of rows written per query
+
+        :return: S_OK/S_ERROR
+        """
+        valueList = []
+        for jobID, optParameters in jobsOptParameters.items():
+            for name, value in optParameters.items():
+                result = self._escapeValues([name, value])
+                if not result["OK"]:
+                    return result
+                e_name, e_value = result["Value"]
+                valueList.append(f"({int(jobID)}, {e_name}, {e_value})")
+
+        for valueChunk in breakListIntoChunks(valueList, chunkSize):
+            req = "INSERT INTO OptimizerParameters (JobID, Name, Value) VALUES " + ",".join(valueChunk)
+            req += " ON DUPLICATE KEY UPDATE Value=VALUES(Value)"
+            result = self._update(req)
+            if not result["OK"]:
+                return result
+        return S_OK()
+
     #############################################################################
     def removeJobOptParameter(self, jobID, name):
         """Remove the specified optimizer parameter for jobID"""
@@ -823,6 +905,27 @@ class JobDB(DB):
             return S_OK(extractJDL(jdl[0][0]))
         return result
 
+    #############################################################################
+    def getJobsJDL(self, jobIDs, original=False):
+        """Get the JDLs of the jobs specified by their jobIDs. By default the current job JDLs
+        are returned. If 'original' argument is True, original JDLs are returned
+
+        :return: S_OK({jobID: JDL}), without the jobs having no JDL
+        """
+        if not jobIDs:
+            return S_OK({})
+        jobIDList = ",".join(str(int(jobID)) for jobID in jobIDs)
+
+        if original:
+            cmd = f"SELECT JobID, OriginalJDL FROM JobJDLs WHERE JobID in ({jobIDList})"
+        else:
+            cmd = f"SELECT JobID, JDL FROM JobJDLs WHERE JobID in ({jobIDList})"
+
+        result = self._query(cmd)
+        if not result["OK"]:
+            return result
+        return S_OK({int(jobID): extractJDL(jdl) for jobID, jdl in result["Value"]})
+
     #############################################################################
     def insertNewJobIntoDB(
         self,
@@ -950,6 +1053,185 @@ class JobDB(DB):
 
         return retVal
 
+    def insertNewJobsIntoDB(
+        self,
+        jdlList,
+        owner,
+        ownerGroup,
+        initialStatus=JobStatus.RECEIVED,
+        initialMinorStatus="Job accepted",
+        vo=None,
+        chunkSize=1000,
+    ):
+        """Insert many jobs at once, e.g. the jobs of a parametric job, as insertNewJobIntoDB does for one job.
+        The JobIDs of each chunk of jobs are allocated together, and the JDLs, attributes and input data
+        of a chunk are written with multi-row inserts in a single transaction.
+
+        :param list jdlList: job description JDLs
+        :param str owner: job owner user name
+        :param str ownerGroup: job owner group
+        :param str initialStatus: optional initial job status (Received by default)
+        :param str initialMinorStatus: optional initial minor job status
+        :param int chunkSize: number of jobs inserted per transaction
+
+        :return: S_OK(list) of dictionaries with the JobID, Status, MinorStatus and TimeStamp of each job,
+                 in the order of the JDLs. Upon error, the jobs of the previous chunks stay in the DB
+        """
+        if not vo:
+            vo = getVOForGroup(ownerGroup)
+
+        # Check all the descriptions before inserting any job
+        jobManifests = []
+        for jdl in jdlList:
+            result = checkAndAddOwner(jdl, owner, ownerGroup)
+            if not result["OK"]:
+                return result
+            jobManifests.append(result["Value"])
+
+        jobs = []
+        for jdlChunk, manifestChunk in zip(
+            breakListIntoChunks(jdlList, chunkSize), breakListIntoChunks(jobManifests, chunkSize)
+        ):
+            result = self.transactionStart()
+            if not result["OK"]:
+                return result
+            result = self.__insertNewJobsChunk(
+                [fixJDL(jdl) for jdl in jdlChunk],
+                manifestChunk,
+                owner,
+                ownerGroup,
+                initialStatus,
+                initialMinorStatus,
+                vo,
+            )
+            if not result["OK"]:
+                self.transactionRollback()
+                return result
+            commit = self.transactionCommit()
+            if not commit["OK"]:
+                return commit
+            jobs.extend(result["Value"])
+
+        self.log.info("JobDB: New JobIDs served", f"{len(jobs)} jobs from {jobs[0]['JobID'] if jobs else None}")
+        return S_OK(jobs)
+
+    def __insertNewJobsChunk(self, jdlList, jobManifests, owner, ownerGroup, initialStatus, initialMinorStatus, vo):
+        """Insert a chunk of jobs, in the transaction of the thread, see insertNewJobsIntoDB"""
+        # 1.- Insert the original JDLs to get new JobIDs. The IDs of a multi-row insert may not be consecutive,
+        # depending on the auto-increment lock mode: the rows are tagged to read them back
+        tag = f"Submission {uuid.uuid4()}"
+        result = self._escapeValues([tag] + [compressJDL(jdl) for jdl in jdlList])
+        if not result["OK"]:
+            return result
+        e_tag = result["Value"][0]
+        values = ",".join(f"('', {e_tag}, {e_jdl})" for e_jdl in result["Value"][1:])
+        result = self._update(f"INSERT INTO JobJDLs (JDL, JobRequirements, OriginalJDL) VALUES {values}")
+        if not result["OK"]:
+            self.log.error("Can not insert New JDLs", result["Message"])
+            return S_ERROR(EWMSSUBM, "Failed to insert JDL in to DB")
+        if "lastRowId" not in result:
+            return S_ERROR(EWMSSUBM, "JobDB.__insertNewJobsChunk: Failed to retrieve the new Ids")
+        result = self._query(
+            f"SELECT JobID FROM JobJDLs WHERE JobID >= {int(result['lastRowId'])} AND JobRequirements = {e_tag} "
+            "ORDER BY JobID"
+        )
+        if not result["OK"]:
+            return result
+        jobIDs = [int(row[0]) for row in result["Value"]]
+        if len(jobIDs) != len(jdlList):
+            return S_ERROR(EWMSSUBM, "JobDB.__insertNewJobsChunk: Failed to retrieve the new Ids")
+
+        # 2.- Check JDLs and Prepare DIRAC JDLs
+        jobs = []
+        jobJDLs = []
+        jobsAttrs = []
+        inputData = []
+        for jobID, jobManifest in zip(jobIDs, jobManifests):
+            now = str(datetime.datetime.utcnow())
+            jobAttrs = {
+                "JobID": jobID,
+                "LastUpdateTime": now,
+                "SubmissionTime": now,
+                "Owner": owner,
+                "OwnerGroup": ownerGroup,
+                "VO": vo,
+            }
+            jobManifest.setOption("JobID", jobID)
+            jobJDL = jobManifest.dumpAsJDL()
+            # Replace the JobID placeholder if any
+            if jobJDL.find("%j") != -1:
+                jobJDL = jobJDL.replace("%j", str(jobID))
+
+            classAdJob = ClassAd(jobJDL)
+            classAdReq = ClassAd("[]")
+            if not classAdJob.isOK():
+                jobAttrs["Status"] = JobStatus.FAILED
+                jobAttrs["MinorStatus"] = "Error in JDL syntax"
+                jobJDLs.append((jobID, ""))
+            else:
+                classAdJob.insertAttributeInt("JobID", jobID)
+                result = checkAndPrepareJob(jobID, classAdJob, classAdReq, owner, ownerGroup, jobAttrs, vo)
+                if not result["OK"]:
+                    return result
+                jobJDL = createJDLWithInitialStatus(
+                    classAdJob, classAdReq, self.jdl2DBParameters, jobAttrs, initialStatus, initialMinorStatus
+                )
+                jobJDLs.append((jobID, compressJDL(jobJDL)))
+                # Looking for the Input Data, some jobs are setting empty string as InputData
+                if classAdJob.lookupAttribute("InputData"):
+                    inputData.extend(
+                        (jobID, lfn.strip()) for lfn in classAdJob.getListFromExpression("InputData") if lfn
+                    )
+            jobsAttrs.append(jobAttrs)
+            jobs.append(
+                {
+                    "JobID": jobID,
+                    "Status": jobAttrs["Status"],
+                    "MinorStatus": jobAttrs["MinorStatus"],
+                    "TimeStamp": str(datetime.datetime.utcnow()),
+                }
+            )
+
+        # 3.- Store the JDLs, removing the tags
+        result = self._escapeValues([jdl for _jobID, jdl in jobJDLs])
+        if not result["OK"]:
+            return result
+        values = ",".join(f"({jobID}, {e_jdl})" for (jobID, _jdl), e_jdl in zip(jobJDLs, result["Value"]))
+        result = self._update(
+            f"INSERT INTO JobJDLs (JobID, JDL) VALUES {values} "
+            "ON DUPLICATE KEY UPDATE JDL=VALUES(JDL), JobRequirements=''"
+        )
+        if not result["OK"]:
+            return result
+
+        # 4.- Add the jobs in the Jobs table, the attributes not set by a job get their default value
+        attrNames = sorted({attrName for jobAttrs in jobsAttrs for attrName in jobAttrs})
+        result = self._escapeValues(
+            [jobAttrs[name] for jobAttrs in jobsAttrs for name in attrNames if name in jobAttrs]
+        )
+        if not result["OK"]:
+            return result
+        e_values = iter(result["Value"])
+        rows = [
+            "(" + ", ".join(next(e_values) if name in jobAttrs else "DEFAULT" for name in attrNames) + ")"
+            for jobAttrs in jobsAttrs
+        ]
+        result = self._update(f"INSERT INTO Jobs ({_quotedList(attrNames)}) VALUES {','.join(rows)}")
+        if not result["OK"]:
+            return result
+
+        # 5.- Add the input data
+        if inputData:
+            result = self._escapeValues([lfn for _jobID, lfn in inputData])
+            if not result["OK"]:
+                return result
+            values = ", ".join(f"({jobID}, {e_lfn})" for (jobID, _lfn), e_lfn in zip(inputData, result["Value"]))
+            result = self._update(f"INSERT INTO InputData (JobID,LFN) VALUES {values}")
+            if not result["OK"]:
+                return result
+
+        return S_OK(jobs)
+
     def __checkAndPrepareJob(self, jobID, classAdJob, classAdReq, owner, ownerGroup, jobAttrs, vo):
         """
         Check Consistency of Submitted JDL and set some defaults
@@ -1416,6 +1698,59 @@ class JobDB(DB):
 
         return S_OK() if ok else S_ERROR("Failed to store some or all the parameters")
 
+    #####################################################################################
+    def setHeartBeatsData(self, heartBeats, chunkSize=1000):
+        """Add the heart beat data of many jobs to the database at once
+
+        :param dict heartBeats: { jobID: [ (heartBeatTime, dynamicDataDict) ] }, the UTC heart beat times
+                                as "YYYY-mm-dd HH:MM:SS" strings, in chronological order
+        :param int chunkSize: maximum number of rows inserted per query
+
+        :return: S_OK/S_ERROR
+        """
+        if not heartBeats:
+            return S_OK()
+
+        jobIDs = [int(jobID) for jobID in heartBeats]
+        cases = []
+        valueList = []
+        for jobID, jobHeartBeats in heartBeats.items():
+            for heartBeatTime, dynamicDataDict in jobHeartBeats:
+                result = self._escapeString(heartBeatTime)
+                if not result["OK"]:
+                    return result
+                e_heartBeatTime = result["Value"]
+                for key, value in dynamicDataDict.items():
+                    result = self._escapeString(key)
+                    if not result["OK"]:
+                        self.log.warn("Failed to escape string", key)
+                        continue
+                    e_key = result["Value"]
+                    result = self._escapeString(value)
+                    if not result["OK"]:
+                        self.log.warn("Failed to escape string", value)
+                        continue
+                    valueList.append(f"({int(jobID)}, {e_key}, {result['Value']}, {e_heartBeatTime})")
+            # The last heart beat is the most recent one
+            cases.append(f"WHEN {int(jobID)} THEN {e_heartBeatTime}")
+
+        for jobIDChunk, caseChunk in zip(breakListIntoChunks(jobIDs, chunkSize), breakListIntoChunks(cases, chunkSize)):
+            req = f"UPDATE Jobs SET HeartBeatTime = CASE JobID {' '.join(caseChunk)} END "
+            req += f"WHERE JobID IN ({','.join(str(jobID) for jobID in jobIDChunk)})"
+            result = self._update(req)
+            if not result["OK"]:
+                return S_ERROR(f"Failed to set the heart beat times: {result['Message']}")
+
+        ok = True
+        for valueChunk in breakListIntoChunks(valueList, chunkSize):
+            req = "INSERT INTO HeartBeatLoggingInfo (JobID,Name,Value,HeartBeatTime) VALUES " + ",".join(valueChunk)
+            result = self._update(req)
+            if not result["OK"]:
+                ok = False
+                self.log.warn("Error storing heart beat data", result["Message"])
+
+        return S_OK() if ok else S_ERROR("Failed to store some or all the parameters")
+
     #####################################################################################
     def getHeartBeatData(self, jobID):
         """Retrieve the job's heart beat data"""
@@ -1506,6 +1841,52 @@ class JobDB(DB):
 
         return self._update(f"UPDATE JobCommands SET Status={status} WHERE JobID={jobID} AND Command={command}")
 
+    #####################################################################################
+    def getJobsCommands(self, status=JobStatus.RECEIVED):
+        """Get the commands of all the jobs to be passed to them together with their next heart beat
+
+        :return: S_OK({jobID: {command: arguments}})
+        """
+        ret = self._escapeString(status)
+        if not ret["OK"]:
+            return ret
+        status = ret["Value"]
+
+        result = self._query(f"SELECT JobID, Command, Arguments FROM JobCommands WHERE Status={status}")
+        if not result["OK"]:
+            return result
+
+        commands = {}
+        for jobID, command, arguments in result["Value"]:
+            commands.setdefault(int(jobID), {})[command] = arguments
+        return S_OK(commands)
+
+    #####################################################################################
+    def setJobsCommandsStatus(self, jobCommands, status):
+        """Set the status of commands of many jobs at once
+
+        :param list jobCommands: (jobID, command) tuples
+        :param str status: new status of the commands
+        """
+        if not jobCommands:
+            return S_OK()
+
+        ret = self._escapeString(status)
+        if not ret["OK"]:
+            return ret
+        status = ret["Value"]
+
+        conditions = []
+        for jobID, command in jobCommands:
+            ret = self._escapeString(command)
+            if not ret["OK"]:
+                return ret
+            conditions.append(f"({int(jobID)}, {ret['Value']})")
+
+        return self._update(
+            f"UPDATE JobCommands SET Status={status} WHERE (JobID, Command) IN ({','.join(conditions)})"
+        )
+
     #####################################################################################
     def getSummarySnapshot(self, requestedFields=False):
         """Get the summary snapshot for a given combination"""
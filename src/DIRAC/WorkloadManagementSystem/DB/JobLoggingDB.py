@@ -2,6 +2,7 @@
     The following methods are provided
 
     addLoggingRecord()
+    addLoggingRecords()
     getJobLoggingInfo()
     deleteJob()
     getWMSTimeStamps()
@@ -40,12 +41,54 @@ class JobLoggingDB(DB):
         Optionally the time stamp of the status can
         be provided in a form of a string in a format '%Y-%m-%d %H:%M:%S' or
         as datetime.datetime object. If the time stamp is not provided the current
-        UTC time is used.
+        UTC time is used. A list of jobIDs can be given to add the same entry for all of them.
         """
 
         event = f"status/minor/app={status}/{minorStatus}/{applicationStatus}"
         self.log.info("Adding record for job ", str(jobID) + ": '" + event + "' from " + source)
 
+        _date = self.__getDate(date)
+        jobIDList = jobID if isinstance(jobID, (list, tuple)) else [jobID]
+        values = [self.__loggingValues(jID, status, minorStatus, applicationStatus, _date, source) for jID in jobIDList]
+        cmd = (
+            "INSERT INTO LoggingInfo (JobId, Status, MinorStatus, ApplicationStatus, "
+            + "StatusTime, StatusTimeOrder, StatusSource) VALUES %s" % ",".join(values)
+        )
+
+        return self._update(cmd)
+
+    #############################################################################
+    def addLoggingRecords(self, records):
+        """Add the logging records of many jobs with one query
+
+        :param list records: dictionaries with the jobID key and the optional status, minorStatus,
+                             applicationStatus, date and source keys of addLoggingRecord
+
+        :return: S_OK/S_ERROR
+        """
+        if not records:
+            return S_OK()
+        values = [
+            self.__loggingValues(
+                record["jobID"],
+                record.get("status", "idem"),
+                record.get("minorStatus", "idem"),
+                record.get("applicationStatus", "idem"),
+                self.__getDate(record.get("date")),
+                record.get("source", "Unknown"),
+            )
+            for record in records
+        ]
+        self.log.info("Adding logging records", f"for {len({record['jobID'] for record in records})} jobs")
+        cmd = (
+            "INSERT INTO LoggingInfo (JobId, Status, MinorStatus, ApplicationStatus, "
+            + "StatusTime, StatusTimeOrder, StatusSource) VALUES %s" % ",".join(values)
+        )
+
+        return self._update(cmd)
+
+    def __getDate(self, date):
+        """UTC datetime of a logging record, given as a string, a datetime or None for now"""
         try:
             if not date:
                 # Make the UTC datetime string and float
@@ -61,19 +104,24 @@ class JobLoggingDB(DB):
         except Exception:
             self.log.exception("Exception while date evaluation")
             _date = datetime.datetime.utcnow()
+        return _date
 
+    def __loggingValues(self, jobID, status, minorStatus, applicationStatus, _date, source):
+        """Values of a LoggingInfo row"""
         # We need to specify that timezone is UTC because otherwise timestamp
         # assumes local time while we mean UTC.
         epoc = _date.replace(tzinfo=datetime.timezone.utc).timestamp() - MAGIC_EPOC_NUMBER
 
-        cmd = (
-            "INSERT INTO LoggingInfo (JobId, Status, MinorStatus, ApplicationStatus, "
-            + "StatusTime, StatusTimeOrder, StatusSource) VALUES (%d,'%s','%s','%s','%s',%f,'%s')"
-            % (int(jobID), status, minorStatus, applicationStatus[:255], str(_date), epoc, source[:32])
+        return "(%d,'%s','%s','%s','%s',%f,'%s')" % (
+            int(jobID),
+            status,
+            minorStatus,
+            applicationStatus[:255],
+            str(_date),
+            epoc,
+            source[:32],
         )
 
-        return self._update(cmd)
-
     #############################################################################
     def getJobLoggingInfo(self, jobID):
         """Returns a Status,MinorStatus,ApplicationStatus,StatusTime,StatusSource tuple
@@ -4,6 +4,7 @@
     The following class methods are provided for public usage
       - getJobParameters()
       - setJobParameter()
+      - setJobsParameters()
       - deleteJobParameters()
 """
 
@@ -151,6 +152,31 @@ class JobParametersDB(ElasticDB):
             self.log.error("Couldn't insert or update data", result["Message"])
         return result
 
+    def setJobsParameters(self, jobsParameters: dict, vo: str) -> dict:
+        """
+        Inserts the parameters of many jobs into JobParametersDB indexes with a single bulk request
+
+        :param self: self reference
+        :param jobsParameters: { jobID: { name: value } }
+        :returns: S_OK/S_ERROR as result of the bulk update
+        """
+        if not jobsParameters:
+            return S_OK()
+        self.log.debug("Inserting parameters", f"of {len(jobsParameters)} jobs")
+
+        timestamp = int(TimeUtilities.toEpochMilliSeconds())
+        docs = [
+            (self._indexName(jobID, vo), str(jobID), dict(parameters, JobID=jobID, timestamp=timestamp))
+            for jobID, parameters in jobsParameters.items()
+        ]
+        for indexName in {doc[0] for doc in docs}:
+            self._createIndex(indexName)
+
+        result = self.bulk_update(docs)
+        if not result["OK"]:
+            self.log.error("Couldn't insert or update data", result["Message"])
+        return result
+
     def deleteJobParameters(self, jobID: int, paramList=None, vo: str = "") -> dict:
         """Deletes Job Parameters defined for jobID.
           Returns a dictionary with the Job Parameters.
@@ -402,7 +402,9 @@ AND SubmissionTime < DATE_SUB(UTC_TIMESTAMP(),INTERVAL %d DAY)"
 
     ##########################################################################################
     def setJobForPilot(self, jobID, pilotRef, site=None, updateStatus=True):
-        """Store the jobID of the job executed by the pilot with reference pilotRef"""
+        """Store the jobID of the job executed by the pilot with reference pilotRef,
+        jobID can also be a list of the jobs executed by the pilot
+        """
 
         pilotID = self.__getPilotID(pilotRef)
         if pilotID:
@@ -411,7 +413,9 @@ AND SubmissionTime < DATE_SUB(UTC_TIMESTAMP(),INTERVAL %d DAY)"
                 result = self.setPilotStatus(pilotRef, status=PilotStatus.RUNNING, statusReason=reason, gridSite=site)
                 if not result["OK"]:
                     return result
-            req = f"INSERT INTO JobToPilotMapping (PilotID,JobID,StartTime) VALUES ({int(pilotID)}, {int(jobID)}, UTC_TIMESTAMP())"
+            jobIDList = jobID if isinstance(jobID, (list, tuple)) else [jobID]
+            values = ", ".join(f"({int(pilotID)}, {int(jID)}, UTC_TIMESTAMP())" for jID in jobIDList)
+            req = f"INSERT INTO JobToPilotMapping (PilotID,JobID,StartTime) VALUES {values}"
             return self._update(req)
         return S_ERROR(f"PilotJobReference {pilotRef} not found")
 
@@ -61,6 +61,7 @@ class TaskQueueDB(DB):
         self.__deleteTQWithDelay = DictCache(self.__deleteTQIfEmpty)
         self.__opsHelper = Operations()
         self.__sharesCorrector = SharesCorrector(self.__opsHelper)
+        self.__matchIndex = None
         result = self.__initializeDB()
         if not result["OK"]:
             raise Exception(f"Can't create tables: {result['Message']}")
@@ -76,6 +77,15 @@ class TaskQueueDB(DB):
             return result
         return S_OK([row[0] for row in result["Value"]])
 
+    def enableMatchIndex(self, refreshPeriod=10):
+        """Match the task queues against an in-memory index instead of querying the DB
+
+        :param int refreshPeriod: seconds after which the index is refreshed from the DB
+        """
+        from DIRAC.WorkloadManagementSystem.private.TaskQueueIndex import TaskQueueIndex
+
+        self.__matchIndex = TaskQueueIndex(self, refreshPeriod=refreshPeriod)
+
     def isSharesCorrectionEnabled(self):
         return self.__getCSOption("EnableSharesCorrection", False)
 
@@ -320,6 +330,8 @@ class TaskQueueDB(DB):
         result = self._update(f"DELETE FROM `tq_TaskQueues` WHERE TQId in ( {','.join(orphanedTQs)} )", conn=connObj)
         if not result["OK"]:
             return result
+        if self.__matchIndex:
+            self.__matchIndex.discard([int(tqId) for tqId in orphanedTQs])
         return S_OK()
 
     def __setTaskQueueEnabled(self, tqId, enabled=True, connObj=False):
@@ -395,6 +407,8 @@ class TaskQueueDB(DB):
                 self.recalculateTQSharesForEntity(tqDefDict["Owner"], tqDefDict["OwnerGroup"], connObj=connObj)
         finally:
             self.__setTaskQueueEnabled(tqId, True)
+            if newTQ and self.__matchIndex:
+                self.__matchIndex.expire()
         return S_OK()
 
     def __insertJobInTaskQueue(self, jobId, tqId, jobPriority, checkTQExists=True, connObj=False):
@@ -521,6 +535,8 @@ ORDER BY COUNT( `tq_Jobs`.JobID ) ASC"
         """
         if negativeCond is None:
             negativeCond = {}
+        # The index matches the original values, the DB the escaped ones
+        rawMatchDict = tqMatchDict
         # Make a copy to avoid modification of original if escaping needs to be done
         tqMatchDict = dict(tqMatchDict)
         retVal = self._checkMatchDefinition(tqMatchDict)
@@ -540,17 +556,11 @@ WHERE `tq_Jobs`.TQId = %s ORDER BY RAND() / `tq_Jobs`.RealPriority ASC LIMIT 1"
             noJobsFound = False
             if "JobID" in tqMatchDict:
                 # A certain JobID is required by the resource, so all TQ are to be considered
-                retVal = self.matchAndGetTaskQueue(
-                    tqMatchDict, numQueuesToGet=0, skipMatchDictDef=True, connObj=connObj
-                )
+                retVal = self.__matchTaskQueues(rawMatchDict, tqMatchDict, 0, connObj=connObj)
                 preJobSQL = f"{preJobSQL} AND `tq_Jobs`.JobId = {tqMatchDict['JobID']} "
             else:
-                retVal = self.matchAndGetTaskQueue(
-                    tqMatchDict,
-                    numQueuesToGet=numQueuesPerTry,
-                    skipMatchDictDef=True,
-                    negativeCond=negativeCond,
-                    connObj=connObj,
+                retVal = self.__matchTaskQueues(
+                    rawMatchDict, tqMatchDict, numQueuesPerTry, negativeCond=negativeCond, connObj=connObj
                 )
             if not retVal["OK"]:
                 return retVal
@@ -565,6 +575,9 @@ WHERE `tq_Jobs`.TQId = %s ORDER BY RAND() / `tq_Jobs`.RealPriority ASC LIMIT 1"
                     return S_ERROR(f"Can't retrieve winning priority for matching job: {retVal['Message']}")
                 if not retVal["Value"]:
                     noJobsFound = True
+                    if self.__matchIndex:
+                        # The TQ is empty, it will be loaded again if it gets new jobs
+                        self.__matchIndex.discard([tqId])
                     continue
                 prio = retVal["Value"][0][0]
                 retVal = self._query(f"{preJobSQL % (tqId, prio)} {postJobSQL}", conn=connObj)
@@ -593,18 +606,129 @@ WHERE `tq_Jobs`.TQId = %s ORDER BY RAND() / `tq_Jobs`.RealPriority ASC LIMIT 1"
         self.log.info(f"Could not find a match after {self.__maxMatchRetry} match retries")
         return S_ERROR(f"Could not find a match after {self.__maxMatchRetry} match retries")
 
+    def matchAndGetJobs(self, tqMatchDict, numJobs, numQueuesPerTry=10, negativeCond=None):
+        """Match and reserve up to numJobs jobs based on requirements, in one transaction
+
+        :param dict tqMatchDict: dict for TQ match
+        :param int numJobs: maximum number of jobs to reserve
+        :returns: S_OK({"matchFound": bool, "jobs": [(jobId, tqId)], "tqMatch": dict}) / S_ERROR
+        """
+        if "JobID" in tqMatchDict:
+            # A certain JobID is required by the resource, there is at most one job to match
+            retVal = self.matchAndGetJob(tqMatchDict, numQueuesPerTry=numQueuesPerTry, negativeCond=negativeCond)
+            if not retVal["OK"]:
+                return retVal
+            jobs = [(retVal["Value"]["jobId"], retVal["Value"]["taskQueueId"])] if retVal["Value"]["matchFound"] else []
+            return S_OK({"matchFound": bool(jobs), "jobs": jobs, "tqMatch": retVal["Value"]["tqMatch"]})
+        if negativeCond is None:
+            negativeCond = {}
+        rawMatchDict = tqMatchDict
+        # Make a copy to avoid modification of original if escaping needs to be done
+        tqMatchDict = dict(tqMatchDict)
+        retVal = self._checkMatchDefinition(tqMatchDict)
+        if not retVal["OK"]:
+            self.log.error("TQ match request check failed", retVal["Message"])
+            return retVal
+        # All the queries of the thread use the connection of the transaction
+        retVal = self.transactionStart()
+        if not retVal["OK"]:
+            return S_ERROR(f"Can't begin transaction for matching jobs: {retVal['Message']}")
+        retVal = self.__reserveJobs(rawMatchDict, tqMatchDict, numJobs, numQueuesPerTry, negativeCond)
+        if not retVal["OK"]:
+            self.transactionRollback()
+            return retVal
+        jobs = retVal["Value"]
+        retVal = self.transactionCommit()
+        if not retVal["OK"]:
+            return S_ERROR(f"Can't commit transaction for matching jobs: {retVal['Message']}")
+        for tqId, tqOwner, tqOwnerGroup in {job[1:] for job in jobs}:
+            self.__deleteTQWithDelay.add(tqId, 300, (tqId, tqOwner, tqOwnerGroup))
+        self.log.info("Extracted jobs from TQs", f"({len(jobs)} out of {numJobs})")
+        return S_OK({"matchFound": bool(jobs), "jobs": [job[:2] for job in jobs], "tqMatch": tqMatchDict})
+
+    def __reserveJobs(self, rawMatchDict, tqMatchDict, numJobs, numQueuesPerTry, negativeCond):
+        """Take up to numJobs jobs out of the matching TQs, inside a transaction
+
+        :returns: S_OK([(jobId, tqId, tqOwner, tqOwnerGroup)]) / S_ERROR
+        """
+        prioSQL = "SELECT `tq_Jobs`.Priority FROM `tq_Jobs` \
+WHERE `tq_Jobs`.TQId = %s ORDER BY RAND() / `tq_Jobs`.RealPriority ASC LIMIT 1"
+        preJobSQL = "SELECT `tq_Jobs`.JobId FROM `tq_Jobs` WHERE `tq_Jobs`.TQId = %s AND `tq_Jobs`.Priority = %s \
+ORDER BY `tq_Jobs`.JobId ASC LIMIT %s"
+        jobs = []
+        for _ in range(self.__maxMatchRetry):
+            retVal = self.__matchTaskQueues(rawMatchDict, tqMatchDict, numQueuesPerTry, negativeCond=negativeCond)
+            if not retVal["OK"]:
+                return retVal
+            tqList = retVal["Value"]
+            if not tqList:
+                self.log.info("No TQ matches requirements")
+                break
+            numReserved = len(jobs)
+            for tqId, tqOwner, tqOwnerGroup in tqList:
+                retVal = self._query(prioSQL % tqId)
+                if not retVal["OK"]:
+                    return S_ERROR(f"Can't retrieve winning priority for matching jobs: {retVal['Message']}")
+                if not retVal["Value"]:
+                    if self.__matchIndex:
+                        # The TQ is empty, it will be loaded again if it gets new jobs
+                        self.__matchIndex.discard([tqId])
+                    continue
+                prio = retVal["Value"][0][0]
+                retVal = self._query(preJobSQL % (tqId, prio, numJobs - len(jobs)))
+                if not retVal["OK"]:
+                    return S_ERROR(f"Can't select jobs to match: {retVal['Message']}")
+                if not retVal["Value"]:
+                    continue
+                # Lock the jobs that are still there: the ones already taken by a concurrent match are not returned
+                jobIdList = ", ".join(str(row[0]) for row in retVal["Value"])
+                retVal = self._query(f"SELECT JobId FROM `tq_Jobs` WHERE JobId IN ( {jobIdList} ) FOR UPDATE")
+                if not retVal["OK"]:
+                    return S_ERROR(f"Can't lock jobs to match: {retVal['Message']}")
+                if not retVal["Value"]:
+                    continue
+                jobIds = [row[0] for row in retVal["Value"]]
+                retVal = self._update(
+                    f"DELETE FROM `tq_Jobs` WHERE JobId IN ( {', '.join(str(jobId) for jobId in jobIds)} )"
+                )
+                if not retVal["OK"]:
+                    return S_ERROR(f"Could not take jobs out from the TQ {tqId}: {retVal['Message']}")
+                self.log.verbose("Extracted jobs with prio from TQ", f"({jobIds} : {prio} : {tqId})")
+                jobs.extend((jobId, tqId, tqOwner, tqOwnerGroup) for jobId in jobIds)
+                if len(jobs) >= numJobs:
+                    return S_OK(jobs)
+            if len(jobs) == numReserved:
+                # No job could be taken out of the matching TQs
+                break
+        return S_OK(jobs)
+
+    def __matchTaskQueues(self, rawMatchDict, tqMatchDict, numQueuesToGet, negativeCond=None, connObj=False):
+        """Get the TQs matching an already checked match dict, from the index if enabled"""
+        if self.__matchIndex:
+            return self.__matchIndex.match(rawMatchDict, numQueuesToGet=numQueuesToGet, negativeCond=negativeCond)
+        return self.matchAndGetTaskQueue(
+            tqMatchDict,
+            numQueuesToGet=numQueuesToGet,
+            skipMatchDictDef=True,
+            negativeCond=negativeCond,
+            connObj=connObj,
+        )
+
     def matchAndGetTaskQueue(
         self, tqMatchDict, numQueuesToGet=1, skipMatchDictDef=False, negativeCond=None, connObj=False
     ):
         """Get a queue that matches the requirements"""
         if negativeCond is None:
             negativeCond = {}
+        rawMatchDict = tqMatchDict
         # Make a copy to avoid modification of original if escaping needs to be done
         tqMatchDict = dict(tqMatchDict)
         if not skipMatchDictDef:
             retVal = self._checkMatchDefinition(tqMatchDict)
             if not retVal["OK"]:
                 return retVal
+            if self.__matchIndex:
+                return self.__matchIndex.match(rawMatchDict, numQueuesToGet=numQueuesToGet, negativeCond=negativeCond)
         retVal = self.__generateTQMatchSQL(tqMatchDict, numQueuesToGet=numQueuesToGet, negativeCond=negativeCond)
         if not retVal["OK"]:
             return retVal
@@ -987,6 +1111,8 @@ WHERE j.JobId = %s AND t.TQId = j.TQId"
             retVal = self._update(f"DELETE FROM `tq_TaskQueues` WHERE TQId = {tqId}", conn=connObj)
             if not retVal["OK"]:
                 return retVal
+            if self.__matchIndex:
+                self.__matchIndex.discard([tqId])
             self.recalculateTQSharesForEntity(tqOwner, tqOwnerGroup, connObj=connObj)
             self.log.info("Deleted empty and enabled TQ", tqId)
             return S_OK()
@@ -1059,6 +1185,35 @@ WHERE j.JobId = %s AND t.TQId = j.TQId"
             self.cleanOrphanedTaskQueues()
         return S_OK(tqData)
 
+    def retrieveTaskQueueHeaders(self):
+        """
+        Get the single value fields, the priority and the state of all the task queues
+        """
+        sqlFields = ["TQId", "Priority", "Enabled"] + list(singleValueDefFields)
+        retVal = self._query(f"SELECT {', '.join(sqlFields)} FROM `tq_TaskQueues`")
+        if not retVal["OK"]:
+            self.log.error("Can't retrieve task queues headers", retVal["Message"])
+            return retVal
+        return S_OK({record[0]: dict(zip(sqlFields[1:], record[1:])) for record in retVal["Value"]})
+
+    def retrieveTaskQueueValues(self, tqIdList, chunkSize=1000):
+        """
+        Get the multi value fields of the given task queues
+        """
+        tqData = defaultdict(dict)
+        for tqIdChunk in List.breakListIntoChunks(tqIdList, chunkSize):
+            for field in multiValueDefFields:
+                table = f"`tq_TQTo{field}`"
+                sqlCmd = f"SELECT {table}.TQId, {table}.Value FROM {table} \
+WHERE {table}.TQId in ( {', '.join([str(id_) for id_ in tqIdChunk])} )"
+                retVal = self._query(sqlCmd)
+                if not retVal["OK"]:
+                    self.log.error("Can't retrieve task queues field", f"{field} info: {retVal['Message']}")
+                    return retVal
+                for tqId, value in retVal["Value"]:
+                    tqData[tqId].setdefault(field, []).append(value)
+        return S_OK(dict(tqData))
+
     def __updateGlobalShares(self):
         """
         Update internal structure for shares
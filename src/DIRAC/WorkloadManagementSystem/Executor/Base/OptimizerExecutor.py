@@ -67,6 +67,10 @@ class OptimizerExecutor(ExecutorModule):
             self.__jobData.jobState = None
             self.__jobData.jobLog = None
 
+    def beginBatch(self, jobStates):
+        """Load the manifests of all the jobs of the batch at once"""
+        return CachedJobState.preload(list(jobStates.values()), manifest=True)
+
     def optimizeJob(self, jid, jobState):
         raise Exception("You need to overwrite this method to optimize the job!")
 
@@ -2,6 +2,7 @@
   The InputData Optimizer Executor queries the file catalog for specified job input data and adds the
   relevant information to the job optimizer parameters to be used during the scheduling decision.
 """
+import copy
 import pprint
 import time
 
@@ -13,6 +14,7 @@ from DIRAC.DataManagementSystem.Utilities.DMSHelpers import DMSHelpers
 from DIRAC.Resources.Catalog.FileCatalog import FileCatalog
 from DIRAC.Resources.Storage.StorageElement import StorageElement
 from DIRAC.WorkloadManagementSystem.Client import JobMinorStatus
+from DIRAC.WorkloadManagementSystem.Client.JobState.CachedJobState import CachedJobState
 from DIRAC.WorkloadManagementSystem.Executor.Base.OptimizerExecutor import OptimizerExecutor
 
 
@@ -26,6 +28,9 @@ class InputData(OptimizerExecutor):
     def __init__(self) -> None:
         self.__lastCacheUpdate = 0
         self.__cacheLifeTime = 600
+        # jid -> result of the replicas and metadata lookups of the batch including the job
+        self.__batchReplicas = {}
+        self.__batchMetadata = {}
         super().__init__()
 
     @classmethod
@@ -76,6 +81,77 @@ class InputData(OptimizerExecutor):
             return None
         return self.__fcDict[vo]
 
+    def beginBatch(self, jobStates):
+        """Look up the replicas of the LFNs of all the jobs of the batch at once: one catalog query
+        per VO, or per VO and owner if CheckWithUserProxy is set. The jobs whose LFNs could not be
+        resolved this way are resolved one by one when they are optimized.
+        """
+        self.__batchReplicas = {}
+        self.__batchMetadata = {}
+        cachedJobStates = list(jobStates.values())
+        result = CachedJobState.preload(
+            cachedJobStates, attributes=["JobType", "Owner", "OwnerGroup"], manifest=True, inputData=True
+        )
+        if not result["OK"]:
+            return result
+
+        productionTypes = Operations().getValue("Transformations/DataProcessing", [])
+        # (vo, owner, ownerGroup) -> [jids, LFNs, LFNs of input data]
+        lookups = {}
+        for jobState in cachedJobStates:
+            result = jobState.getAttributes(["JobType", "Owner", "OwnerGroup"])
+            if not result["OK"] or result["Value"].get("JobType") in productionTypes:
+                continue
+            attributes = result["Value"]
+            result = jobState.getInputData()
+            if not result["OK"]:
+                continue
+            inputData = result["Value"]
+            result = self._getInputSandbox(jobState)
+            if not result["OK"]:
+                continue
+            inputSandbox = result["Value"]
+            if not inputData and not inputSandbox:
+                continue
+            result = jobState.getManifest()
+            if not result["OK"]:
+                continue
+            vo = result["Value"].getOption("VirtualOrganization")
+            if self.checkWithUserProxy:
+                key = (vo, attributes.get("Owner"), attributes.get("OwnerGroup"))
+            else:
+                key = (vo, None, None)
+            jids, lfns, inputDataLFNs = lookups.setdefault(key, ([], set(), set()))
+            jids.append(jobState.jid)
+            lfns.update(inputData)
+            lfns.update(inputSandbox)
+            inputDataLFNs.update(inputData)
+
+        for (vo, owner, ownerGroup), (jids, lfns, inputDataLFNs) in lookups.items():
+            if self.checkWithUserProxy:
+                result = self._getBatchReplicas(  # pylint: disable=unexpected-keyword-arg
+                    vo,
+                    sorted(lfns),
+                    sorted(inputDataLFNs),
+                    proxyUserName=owner,
+                    proxyUserGroup=ownerGroup,
+                    executionLock=True,
+                )
+            else:
+                result = self._getBatchReplicas(vo, sorted(lfns), sorted(inputDataLFNs))
+            if not result["OK"]:
+                self.log.warn("Failed to look up the replicas of the batch", result["Message"])
+                continue
+            replicaDict, metadataDict = result["Value"]
+            for jid in jids:
+                self.__batchReplicas[jid] = replicaDict
+                self.__batchMetadata[jid] = metadataDict
+        return S_OK()
+
+    def endBatch(self):
+        self.__batchReplicas = {}
+        self.__batchMetadata = {}
+
     def optimizeJob(self, jid, jobState):
         """This is the method that needs to be implemented by each and every Executor
 
@@ -182,6 +258,59 @@ class InputData(OptimizerExecutor):
                 inputSandbox.append(li.replace("LFN:", ""))
         return S_OK(inputSandbox)
 
+    @executeWithUserProxy
+    def _getBatchReplicas(self, vo, lfns, inputDataLFNs):
+        """Look up the replicas of the LFNs of a batch of jobs, and the metadata of their input data
+
+        :param str vo: VO of the jobs
+        :param list lfns: LFNs of the input data and of the input sandboxes of the jobs
+        :param list inputDataLFNs: LFNs of the input data of the jobs
+
+        :returns: S_OK/S_ERROR structure with (replica dict, metadata dict or None)
+        """
+        startTime = time.time()
+        dm = self.__getDataManager(vo)
+        if dm is None:
+            return S_ERROR(f"Failed to instantiate DataManager for vo {vo}")
+        result = dm.getReplicasForJobs(lfns)
+        if not result["OK"]:
+            return result
+        replicaDict = result["Value"]
+        self.log.verbose("Catalog replicas lookup time", f"{len(lfns)} LFNs: {time.time() - startTime:.2f} seconds")
+
+        metadataDict = None
+        if inputDataLFNs and self.ex_getOption("CheckFileMetadata", True):
+            fc = self.__getFileCatalog(vo)
+            if fc is None:
+                return S_ERROR(f"Failed to instantiate FileCatalog for vo {vo}")
+            result = fc.getFileMetadata(inputDataLFNs)
+            if not result["OK"]:
+                return result
+            metadataDict = result["Value"]
+            self.log.verbose(
+                "Catalog metadata lookup time", f"{len(inputDataLFNs)} LFNs: {time.time() - startTime:.2f} seconds"
+            )
+        return S_OK((replicaDict, metadataDict))
+
+    @staticmethod
+    def __getBatchResult(batchResult, lfns):
+        """The part of the result of a batch lookup concerning the LFNs of a job
+
+        :returns: dict with the Successful and Failed LFNs, or None if some LFNs are not in the batch result
+        """
+        if not batchResult:
+            return None
+        jobResult = {"Successful": {}, "Failed": {}}
+        for lfn in lfns:
+            if lfn in batchResult["Successful"]:
+                # The job may modify it
+                jobResult["Successful"][lfn] = copy.deepcopy(batchResult["Successful"][lfn])
+            elif lfn in batchResult["Failed"]:
+                jobResult["Failed"][lfn] = batchResult["Failed"][lfn]
+            else:
+                return None
+        return jobResult
+
     @executeWithUserProxy
     def _resolveInputData(self, jobState, inputData):
         """This method checks the file catalog for replica information.
@@ -201,7 +330,10 @@ class InputData(OptimizerExecutor):
         vo = manifest.getOption("VirtualOrganization")
         startTime = time.time()
         dm = self.__getDataManager(vo)
-        if dm is None:
+        batchReplicas = self.__getBatchResult(self.__batchReplicas.get(jobState.jid), lfns)
+        if batchReplicas is not None:
+            result = S_OK(batchReplicas)
+        elif dm is None:
             return S_ERROR(f"Failed to instantiate DataManager for vo {vo}")
         else:
             # This will return already active replicas, excluding banned SEs, and
@@ -236,7 +368,10 @@ class InputData(OptimizerExecutor):
             manifest = result["Value"]
             vo = manifest.getOption("VirtualOrganization")
             fc = self.__getFileCatalog(vo)
-            if fc is None:
+            batchMetadata = self.__getBatchResult(self.__batchMetadata.get(jobState.jid), lfns)
+            if batchMetadata is not None:
+                guidDict = S_OK(batchMetadata)
+            elif fc is None:
                 return S_ERROR(f"Failed to instantiate FileCatalog for vo {vo}")
             else:
                 guidDict = fc.getFileMetadata(lfns)
@@ -410,13 +545,15 @@ class InputData(OptimizerExecutor):
         vo = manifest.getOption("VirtualOrganization")
         startTime = time.time()
         dm = self.__getDataManager(vo)
-        if dm is None:
+        batchReplicas = self.__getBatchResult(self.__batchReplicas.get(jobState.jid), inputSandbox)
+        if batchReplicas is not None:
+            result = S_OK(batchReplicas)
+        elif dm is None:
             return S_ERROR(f"Failed to instantiate DataManager for vo {vo}")
-
-        # This will return already active replicas, excluding banned SEs, and
-        # removing tape replicas if there are disk replicas
-
-        result = dm.getReplicasForJobs(inputSandbox)
+        else:
+            # This will return already active replicas, excluding banned SEs, and
+            # removing tape replicas if there are disk replicas
+            result = dm.getReplicasForJobs(inputSandbox)
         self.jobLog.verbose("Catalog replicas lookup time", f"{time.time() - startTime:.2f} seconds ")
         if not result["OK"]:
             self.log.warn(result["Message"])
@@ -6,6 +6,7 @@
   optimizer chain.
 """
 from DIRAC import S_OK
+from DIRAC.WorkloadManagementSystem.Client.JobState.CachedJobState import CachedJobState
 from DIRAC.WorkloadManagementSystem.Executor.Base.OptimizerExecutor import OptimizerExecutor
 
 
@@ -21,6 +22,10 @@ class JobPath(OptimizerExecutor):
     def initializeOptimizer(cls):
         return S_OK()
 
+    def beginBatch(self, jobStates):
+        """Load the manifests and the input data of all the jobs of the batch at once"""
+        return CachedJobState.preload(list(jobStates.values()), manifest=True, inputData=True)
+
     def __setOptimizerChain(self, jobState, opChain):
         if not isinstance(opChain, str):
             opChain = ",".join(opChain)
@@ -5,10 +5,11 @@
 from unittest.mock import MagicMock
 import pytest
 
-from DIRAC import gLogger
+from DIRAC import S_OK, gLogger
 
 from DIRAC.WorkloadManagementSystem.Client.JobState.CachedJobState import CachedJobState
 from DIRAC.WorkloadManagementSystem.Client.JobState.JobManifest import JobManifest
+from DIRAC.WorkloadManagementSystem.Client.JobState.JobState import JobState
 
 # sut
 from DIRAC.WorkloadManagementSystem.Executor.JobScheduling import JobScheduling
@@ -190,3 +191,59 @@ def test__getSiteCandidates(mocker, okReplicas, getSitesForSE_RV, storageGetStat
     assert res["OK"] is expectedRes
     if res["OK"]:
         assert res["Value"] == expectedValue
+
+
+def test__beginBatch(mocker):
+    jobDB = MagicMock()
+    jobDB.getJobsAttributes.return_value = S_OK({})
+    jobDB.getJobsInputData.return_value = S_OK({1: ["/vo/data/1", "/vo/data/2"], 2: ["/vo/data/2"], 3: []})
+    jobDB.getJobsJDL.return_value = S_OK({})
+    mocker.patch.object(JobState._JobState__db, "checked", True)
+    mocker.patch.object(JobState._JobState__db, "jobDB", jobDB)
+    mocker.patch("DIRAC.WorkloadManagementSystem.Executor.InputData.Operations")
+    dm = MagicMock()
+    dm.getReplicasForJobs.return_value = S_OK(
+        {
+            "Successful": {"/vo/data/1": {"SE_1": "pfn1"}, "/vo/sandbox/1": {"SE_2": "pfn2"}},
+            "Failed": {"/vo/data/2": "No such file"},
+        }
+    )
+    fc = MagicMock()
+    fc.getFileMetadata.return_value = S_OK(
+        {"Successful": {"/vo/data/1": {"GUID": "1"}}, "Failed": {"/vo/data/2": "No such file"}}
+    )
+    mocker.patch.object(InputData, "_InputData__getDataManager", return_value=dm)
+    mocker.patch.object(InputData, "_InputData__getFileCatalog", return_value=fc)
+    mocker.patch.object(InputData, "ex_getOption", side_effect=lambda _name, defaultValue=None: defaultValue)
+    mocker.patch.object(InputData, "checkWithUserProxy", False, create=True)
+
+    jobStates = {}
+    for jid, inputSandbox in ((1, []), (2, ["LFN:/vo/sandbox/1"]), (3, [])):
+        jobState = CachedJobState(jid, skipInitState=True)
+        jobState.setAttribute("JobType", "User")
+        jobState.setAttribute("Owner", "user")
+        jobState.setAttribute("OwnerGroup", "vo_user")
+        manifest = JobManifest()
+        manifest.setOption("VirtualOrganization", "vo")
+        manifest.setOption("InputSandbox", inputSandbox)
+        jobState.setManifest(manifest)
+        jobStates[jid] = jobState
+
+    inputData = InputData()
+    inputData.log = gLogger
+    assert inputData.beginBatch(jobStates)["OK"]
+
+    # One catalog query for all the jobs, none for the job without input
+    dm.getReplicasForJobs.assert_called_once_with(["/vo/data/1", "/vo/data/2", "/vo/sandbox/1"])
+    fc.getFileMetadata.assert_called_once_with(["/vo/data/1", "/vo/data/2"])
+    batchReplicas = inputData._InputData__batchReplicas
+    assert sorted(batchReplicas) == [1, 2]
+    assert InputData._InputData__getBatchResult(batchReplicas[2], ["/vo/data/2", "/vo/sandbox/1"]) == {
+        "Successful": {"/vo/sandbox/1": {"SE_2": "pfn2"}},
+        "Failed": {"/vo/data/2": "No such file"},
+    }
+    # Not looked up in the batch
+    assert InputData._InputData__getBatchResult(batchReplicas[2], ["/vo/data/3"]) is None
+
+    inputData.endBatch()
+    assert not inputData._InputData__batchReplicas
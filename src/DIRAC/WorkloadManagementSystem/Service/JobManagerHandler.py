@@ -193,9 +193,34 @@ class JobManagerHandlerMixin:
             except ValidationError as e:
                 return S_ERROR(str(e))
 
-        for jobDescription in jobDescList:  # jobDescList because there might be a list generated by a parametric job
+        if parametricJob:
+            # The jobs of a parametric job are inserted and logged by bulk
+            result = self.jobDB.insertNewJobsIntoDB(
+                jobDescList,
+                self.owner,
+                self.ownerGroup,
+                initialStatus=initialStatus,
+                initialMinorStatus=initialMinorStatus,
+                vo=getVOForGroup(self.ownerGroup),
+            )
+            if not result["OK"]:
+                return result
+            jobs = result["Value"]
+            jobIDList = [job["JobID"] for job in jobs]
+            self.log.info(
+                "Jobs added to the JobDB", f"{jobIDList[0]}-{jobIDList[-1]} for {self.owner}/{self.ownerGroup}"
+            )
+
+            loggingRecords = {}
+            for job in jobs:
+                loggingRecords.setdefault((job["Status"], job["MinorStatus"]), []).append(job["JobID"])
+            for (status, minorStatus), jobIDs in loggingRecords.items():
+                self.jobLoggingDB.addLoggingRecord(
+                    jobIDs, status, minorStatus, date=jobs[-1]["TimeStamp"], source="JobManager"
+                )
+        else:
             result = self.jobDB.insertNewJobIntoDB(
-                jobDescription,
+                jobDescList[0],
                 self.owner,
                 self.ownerGroup,
                 initialStatus=initialStatus,
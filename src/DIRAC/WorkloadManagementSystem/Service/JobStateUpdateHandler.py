@@ -15,6 +15,7 @@ from DIRAC.Core.DISET.RequestHandler import RequestHandler
 from DIRAC.Core.Utilities.DEncode import ignoreEncodeWarning
 from DIRAC.Core.Utilities.ObjectLoader import ObjectLoader
 from DIRAC.WorkloadManagementSystem.Client import JobStatus
+from DIRAC.WorkloadManagementSystem.private.HeartBeatBuffer import HeartBeatBuffer
 from DIRAC.WorkloadManagementSystem.Utilities.JobStatusUtility import JobStatusUtility
 
 
@@ -45,6 +46,13 @@ class JobStateUpdateHandlerMixin:
 
         cls.jsu = JobStatusUtility(cls.jobDB, cls.jobLoggingDB)
 
+        cls.heartBeatBuffer = None
+        if cls.srv_getCSOption("BufferHeartBeats", False):
+            cls.heartBeatBuffer = HeartBeatBuffer(
+                cls.jobDB, cls.elasticJobParametersDB, flushPeriod=cls.srv_getCSOption("HeartBeatFlushPeriod", 10)
+            )
+            cls.heartBeatBuffer.start()
+
         return S_OK()
 
     def initializeRequest(self):
@@ -207,6 +215,9 @@ class JobStateUpdateHandlerMixin:
     def export_sendHeartBeat(self, jobID, dynamicData, staticData):
         """Send a heart beat sign of life for a job jobID"""
 
+        if self.heartBeatBuffer:
+            return self.heartBeatBuffer.add(int(jobID), dynamicData, staticData, self.vo)
+
         result = self.jobDB.setHeartBeatData(int(jobID), dynamicData)
         if not result["OK"]:
             self.log.warn("Failed to set the heart beat data", f"for job {jobID} ")
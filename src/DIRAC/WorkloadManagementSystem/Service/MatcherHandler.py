@@ -31,6 +31,8 @@ class MatcherHandlerMixin:
             if not result["OK"]:
                 return result
             cls.taskQueueDB = result["Value"](parentLogger=cls.log)
+            if cls.srv_getCSOption("UseTaskQueueIndex", False):
+                cls.taskQueueDB.enableMatchIndex(refreshPeriod=cls.srv_getCSOption("TaskQueueIndexRefreshPeriod", 10))
 
             result = ObjectLoader().loadObject("WorkloadManagementSystem.DB.PilotAgentsDB", "PilotAgentsDB")
             if not result["OK"]:
@@ -78,6 +80,41 @@ class MatcherHandlerMixin:
             return S_OK(result)
         return S_ERROR(DErrno.EWMSNOMATCH, callStack=[])
 
+    ##############################################################################
+    types_requestJobs = [[str, dict], int]
+
+    def export_requestJobs(self, resourceDescription, numJobs):
+        """Serve up to numJobs jobs to the request of an agent with several free slots,
+        the highest priority ones matching the agent's site capacity
+        """
+
+        credDict = self.getRemoteCredentials()
+        pilotRef = resourceDescription.get("PilotReference", "Unknown")
+        numJobs = min(numJobs, self.srv_getCSOption("MaxJobsPerRequest", 100))
+
+        try:
+            opsHelper = Operations(group=credDict["group"])
+            matcher = Matcher(
+                pilotAgentsDB=self.pilotAgentsDB,
+                jobDB=self.jobDB,
+                tqDB=self.taskQueueDB,
+                jlDB=self.jobLoggingDB,
+                opsHelper=opsHelper,
+                pilotRef=pilotRef,
+            )
+            result = matcher.selectJobs(resourceDescription, credDict, numJobs)
+        except RuntimeError as rte:
+            self.log.error("Error requesting jobs for pilot", f"[{pilotRef}] {rte}")
+            return S_ERROR("Error requesting jobs")
+        except PilotVersionError as pve:
+            self.log.warn("Pilot version error for pilot", f"[{pilotRef}] {pve}")
+            return S_ERROR(DErrno.EWMSPLTVER, callStack=[])
+
+        # result can be empty, meaning that no job matched
+        if result:
+            return S_OK(result)
+        return S_ERROR(DErrno.EWMSNOMATCH, callStack=[])
+
     ##############################################################################
     types_getActiveTaskQueues = []
 
@@ -45,22 +45,36 @@ class OptimizationMindHandler(ExecutorMindHandler):
     auth_msg_OptimizeJobs = ["all"]
 
     def msg_OptimizeJobs(self, msgObj):
-        jids = msgObj.jids
-        for jid in jids:
+        jids = []
+        for jid in msgObj.jids:
             try:
-                jid = int(jid)
+                jids.append(int(jid))
             except ValueError:
                 self.log.error(f"Job ID {jid} has to be an integer")
-                continue
-            # Forget and add task to ensure state is reset
+        # Forget and add tasks to ensure state is reset
+        for jid in jids:
             self.forgetTask(jid)
-            result = self.executeTask(jid, CachedJobState(jid))
-            if not result["OK"]:
-                self.log.error("Could not add job to optimization:", f"{jid} {result!r}")
-            else:
-                self.log.info("Received new job", str(jid))
+        result = self.__executeJobs(jids)
+        if not result["OK"]:
+            self.log.error("Could not add jobs to optimization:", result["Message"])
+            return S_OK()
+        for jid in result["Value"]["Successful"]:
+            self.log.info("Received new job", str(jid))
         return S_OK()
 
+    @classmethod
+    def __executeJobs(cls, jids):
+        """Add the jobs to optimize, reading their states at once"""
+        result = CachedJobState.bulkLoad(jids)
+        if not result["OK"]:
+            return result
+        result = cls.executeTasks(result["Value"])
+        if not result["OK"]:
+            return result
+        for jid, errorMessage in result["Value"]["Failed"].items():
+            cls.log.error("Could not add job to optimization:", f"{jid} {errorMessage}")
+        return result
+
     @classmethod
     def __loadJobs(cls, eTypes=None):
         jobCond = {}
@@ -95,15 +109,13 @@ class OptimizationMindHandler(ExecutorMindHandler):
             if not result["OK"]:
                 return result
             jidList = result["Value"]
-            knownJids = cls.getTaskIds()
-            added = 0
-            for jid in jidList:
-                jid = int(jid)
-                if jid not in knownJids:
-                    # Same as before. Check that the state is ok.
-                    cls.executeTask(jid, CachedJobState(jid))
-                    added += 1
-            log.info(f"Added {added}/{len(jidList)} jobs for {opState} state")
+            knownJids = set(cls.getTaskIds())
+            newJids = [int(jid) for jid in jidList if int(jid) not in knownJids]
+            # Same as before. Check that the state is ok.
+            result = cls.__executeJobs(newJids)
+            if not result["OK"]:
+                return result
+            log.info(f"Added {len(newJids)}/{len(jidList)} jobs for {opState} state")
         return S_OK()
 
     @classmethod
@@ -138,6 +150,17 @@ class OptimizationMindHandler(ExecutorMindHandler):
             cls.log.error("Could not save changes for job", f"{jid}: {result['Message']}")
         return result
 
+    @classmethod
+    def exec_tasksProcessed(cls, jobStates, eType):
+        cls.log.info("Saving changes for jobs", f"{list(jobStates)} after {eType}")
+        result = CachedJobState.bulkCommitChanges(list(jobStates.values()))
+        if not result["OK"]:
+            cls.log.error("Could not save changes for jobs", result["Message"])
+            return result
+        for jid, errorMessage in result["Value"]["Failed"].items():
+            cls.log.error("Could not save changes for job", f"{jid}: {errorMessage}")
+        return result
+
     @classmethod
     def exec_taskFreeze(cls, jid, jobState, eType):
         cls.log.info("Saving changes for job", f" {jid} before freezing from {eType}")
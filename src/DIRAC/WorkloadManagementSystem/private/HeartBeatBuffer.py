@@ -0,0 +1,197 @@
+""" In-memory buffer of the job heart beats, used by the JobStateUpdate service to write them by bulk
+
+    Instead of writing every heart beat to the JobDB and to the JobParametersDB when it is received,
+    the heart beats are kept in memory and flushed periodically by a thread of the service:
+
+    - one multi-row insert of the dynamic data into HeartBeatLoggingInfo, and one update of HeartBeatTime
+    - one status query restoring the Running status of the Stalled and Matched jobs, and their LastUpdateTime
+    - one bulk request to the JobParametersDB per VO for the static parameters
+
+    The commands waiting for the jobs (e.g. Kill) are kept in a map refreshed by each flush, so that a heart beat
+    does not query the JobDB: the commands served are marked as Sent by the next flush.
+    Likewise, the jobs found in the JobDB are remembered: only the first heart beat of a job queries the JobDB,
+    and the heart beats of the jobs which are not in the JobDB are rejected. A job deleted from the JobDB
+    is forgotten by the next flush.
+"""
+import datetime
+import threading
+import time
+
+from DIRAC import S_ERROR, S_OK, gLogger
+from DIRAC.WorkloadManagementSystem.Client import JobStatus
+
+# Seconds after which a job which did not send heart beats is looked up in the JobDB again
+KNOWN_JOBS_TTL = 3600
+
+
+class HeartBeatBuffer:
+    """Heart beats received since the last flush, and commands pending for the jobs"""
+
+    def __init__(self, jobDB, jobParametersDB, flushPeriod=10, maxHeartBeats=10000):
+        """
+        :param jobDB: JobDB instance
+        :param jobParametersDB: JobParametersDB instance
+        :param int flushPeriod: seconds between two flushes
+        :param int maxHeartBeats: number of buffered heart beats triggering a flush before the end of the period
+        """
+        self.__jobDB = jobDB
+        self.__jobParametersDB = jobParametersDB
+        self.__flushPeriod = flushPeriod
+        self.__maxHeartBeats = maxHeartBeats
+        self.log = gLogger.getSubLogger(self.__class__.__name__)
+        # The data lock protects the content, the flush lock ensures that only one thread flushes it
+        self.__dataLock = threading.Lock()
+        self.__flushLock = threading.Lock()
+        self.__flushEvent = threading.Event()
+        self.__thread = None
+        # jobID -> [ (heartBeatTime, dynamicData) ]
+        self.__heartBeats = {}
+        self.__nbHeartBeats = 0
+        # VO -> jobID -> { name: value }
+        self.__parameters = {}
+        # jobID -> { command: arguments }, for the commands in the Received status
+        self.__commands = {}
+        # (jobID, command) served to the jobs, but not marked as Sent in the DB yet
+        self.__sentCommands = set()
+        # jobID -> time at which the job was last found in the JobDB
+        self.__knownJobs = {}
+
+    def __len__(self):
+        return self.__nbHeartBeats
+
+    def start(self):
+        """Load the pending commands, and start the thread flushing the buffer"""
+        self.__refreshCommands(set())
+        self.__thread = threading.Thread(target=self.__flushLoop, name="HeartBeatBuffer", daemon=True)
+        self.__thread.start()
+
+    def __flushLoop(self):
+        while True:
+            self.__flushEvent.wait(self.__flushPeriod)
+            self.__flushEvent.clear()
+            try:
+                self.flush()
+            except Exception:
+                self.log.exception("Failed to flush the heart beats")
+
+    def add(self, jobID, dynamicData, staticData, vo):
+        """Buffer a heart beat
+
+        :param int jobID: job ID
+        :param dict dynamicData: data logged in HeartBeatLoggingInfo, and HeartBeatTime if it is given
+        :param dict staticData: job parameters
+        :param str vo: VO of the job
+
+        :return: S_OK(dict { command: arguments } of the commands for the job)/S_ERROR if the job is not found
+        """
+        with self.__dataLock:
+            known = jobID in self.__knownJobs
+        if not known:
+            result = self.__jobDB.getJobsAttributes([jobID], ["Status"])
+            if not result["OK"]:
+                return result
+            if not result["Value"]:
+                return S_ERROR(f"Job {jobID} not found")
+
+        dynamicData = dict(dynamicData)
+        heartBeatTime = dynamicData.pop("HeartBeatTime", None)
+        if not heartBeatTime:
+            heartBeatTime = datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+
+        with self.__dataLock:
+            if not known:
+                self.__knownJobs[jobID] = time.time()
+            self.__heartBeats.setdefault(jobID, []).append((heartBeatTime, dynamicData))
+            self.__nbHeartBeats += 1
+            if staticData:
+                self.__parameters.setdefault(vo, {}).setdefault(jobID, {}).update(staticData)
+            commands = self.__commands.pop(jobID, {})
+            self.__sentCommands.update((jobID, command) for command in commands)
+
+        if self.__nbHeartBeats >= self.__maxHeartBeats:
+            self.__flushEvent.set()
+        return S_OK(commands)
+
+    def flush(self):
+        """Write the buffered heart beats to the DBs, and refresh the pending commands"""
+        with self.__flushLock:
+            start = time.time()
+            with self.__dataLock:
+                heartBeats, self.__heartBeats = self.__heartBeats, {}
+                parameters, self.__parameters = self.__parameters, {}
+                nbHeartBeats, self.__nbHeartBeats = self.__nbHeartBeats, 0
+                sentCommands = set(self.__sentCommands)
+
+            if heartBeats:
+                result = self.__jobDB.setHeartBeatsData(heartBeats)
+                if not result["OK"]:
+                    self.log.error("Failed to set the heart beat data", result["Message"])
+                self.__restoreRunningStatus(list(heartBeats))
+
+            for vo, jobsParameters in parameters.items():
+                result = self.__jobParametersDB.setJobsParameters(jobsParameters, vo=vo)
+                if not result["OK"]:
+                    self.log.error("Failed to add Job Parameters to ElasticSearch", result["Message"])
+
+            self.__refreshCommands(sentCommands)
+            if heartBeats:
+                self.log.verbose(
+                    "Heart beats flushed",
+                    f"{nbHeartBeats} heart beats of {len(heartBeats)} jobs in {time.time() - start:.3f} s",
+                )
+
+    def __restoreRunningStatus(self, jobIDs):
+        """Jobs sending heart beats are running, and the ones not in the JobDB anymore are forgotten"""
+        result = self.__jobDB.getJobsAttributes(jobIDs, ["Status"])
+        if not result["OK"]:
+            self.log.error("Failed to get the status of the jobs", result["Message"])
+            return
+        now = time.time()
+        with self.__dataLock:
+            for jobID in jobIDs:
+                if jobID in result["Value"]:
+                    self.__knownJobs[jobID] = now
+                else:
+                    self.__knownJobs.pop(jobID, None)
+            self.__knownJobs = {
+                jobID: lastSeen for jobID, lastSeen in self.__knownJobs.items() if now - lastSeen < KNOWN_JOBS_TTL
+            }
+        toRestore = [
+            jobID
+            for jobID, attributes in result["Value"].items()
+            if attributes["Status"] in (JobStatus.STALLED, JobStatus.MATCHED)
+        ]
+        if toRestore:
+            result = self.__jobDB.setJobsMajorStatus(toRestore, JobStatus.RUNNING, update=True)
+            if not result["OK"]:
+                self.log.warn("Failed to restore the job status to Running", result["Message"])
+
+    def __refreshCommands(self, sentCommands):
+        """Mark the commands served as Sent, and reload the pending ones
+
+        :param set sentCommands: (jobID, command) served to the jobs
+        """
+        if sentCommands:
+            result = self.__jobDB.setJobsCommandsStatus(list(sentCommands), "Sent")
+            if not result["OK"]:
+                # They are marked as Sent by the next flush
+                self.log.error("Failed to set the status of the job commands", result["Message"])
+                return
+        result = self.__jobDB.getJobsCommands()
+        if not result["OK"]:
+            self.log.error("Failed to get the job commands", result["Message"])
+            return
+
+        with self.__dataLock:
+            self.__sentCommands -= sentCommands
+            # Commands served since the beginning of the flush are still Received in the DB
+            commands = {}
+            for jobID, jobCommands in result["Value"].items():
+                jobCommands = {
+                    command: arguments
+                    for command, arguments in jobCommands.items()
+                    if (jobID, command) not in self.__sentCommands
+                }
+                if jobCommands:
+                    commands[jobID] = jobCommands
+            self.__commands = commands
@@ -0,0 +1,328 @@
+""" In-memory index of the task queues, used by the TaskQueueDB to match resources without querying the DB
+
+    The index keeps the definition of every task queue, plus one inverted index (value -> TQIds)
+    per multi value field and per owner/group. Matching a resource description is then a sequence
+    of set operations giving the same result as the SQL query built by the TaskQueueDB.
+
+    The index is refreshed incrementally: the tq_TaskQueues table is scanned to find the new and the
+    deleted task queues and to update the priorities, and only the multi value fields of the new
+    task queues are loaded. Task queues are loaded once they are enabled, i.e. once they are complete.
+"""
+import heapq
+import random
+import threading
+import time
+from collections import defaultdict
+
+from DIRAC import S_ERROR, S_OK, gLogger
+from DIRAC.ConfigurationSystem.Client.Helpers import Registry
+from DIRAC.Core.Security import Properties
+from DIRAC.WorkloadManagementSystem.DB.TaskQueueDB import (
+    _lowerAndRemovePunctuation,
+    bannedJobMatchFields,
+    multiValueDefFields,
+    multiValueMatchFields,
+    singleValueDefFields,
+)
+
+
+def _normalize(value):
+    """Values are compared as MySQL does: case insensitive and ignoring trailing spaces"""
+    return str(value).rstrip().lower()
+
+
+def _asList(value):
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+def _isAny(values):
+    return any(_lowerAndRemovePunctuation(value) == "any" for value in values)
+
+
+class TaskQueueIndex:
+    """In-memory copy of the task queues definitions"""
+
+    def __init__(self, tqDB, refreshPeriod=10):
+        """
+        :param tqDB: TaskQueueDB instance used to load the task queues
+        :param int refreshPeriod: seconds after which the index is refreshed from the DB
+        """
+        self.__tqDB = tqDB
+        self.__refreshPeriod = refreshPeriod
+        self.log = gLogger.getSubLogger(self.__class__.__name__)
+        # The data lock protects the content, the refresh lock ensures that only one thread refreshes it
+        self.__dataLock = threading.Lock()
+        self.__refreshLock = threading.Lock()
+        self.__lastRefresh = 0
+        self.__loaded = False
+        # TQId -> { "Owner", "OwnerGroup", "CPUTime" }
+        self.__tqs = {}
+        # TQId -> Priority
+        self.__priorities = {}
+        # TQId -> multi value field -> set of values
+        self.__values = {}
+        # Owner/OwnerGroup -> value -> set of TQIds
+        self.__bySingle = {field: defaultdict(set) for field in ("Owner", "OwnerGroup")}
+        # Multi value field -> value -> set of TQIds
+        self.__byValue = {field: defaultdict(set) for field in multiValueDefFields}
+        # Multi value field -> set of TQIds without any value for it
+        self.__noValues = {field: set() for field in multiValueDefFields}
+
+    def __len__(self):
+        return len(self.__tqs)
+
+    def expire(self):
+        """Force a refresh at the next match"""
+        self.__lastRefresh = 0
+
+    def discard(self, tqIdList):
+        """Remove task queues from the index, they are loaded again if they still exist at the next refresh
+
+        :param list tqIdList: TQIds to remove
+        """
+        with self.__dataLock:
+            for tqId in tqIdList:
+                self.__remove(tqId)
+
+    def __add(self, tqId, owner, ownerGroup, cpuTime, priority, multiValues):
+        self.__tqs[tqId] = {"Owner": owner, "OwnerGroup": ownerGroup, "CPUTime": cpuTime}
+        self.__priorities[tqId] = priority
+        self.__bySingle["Owner"][_normalize(owner)].add(tqId)
+        self.__bySingle["OwnerGroup"][_normalize(ownerGroup)].add(tqId)
+        self.__values[tqId] = {}
+        for field in multiValueDefFields:
+            values = {_normalize(value) for value in multiValues.get(field, [])}
+            self.__values[tqId][field] = values
+            if not values:
+                self.__noValues[field].add(tqId)
+            for value in values:
+                self.__byValue[field][value].add(tqId)
+
+    def __remove(self, tqId):
+        tqDef = self.__tqs.pop(tqId, None)
+        if tqDef is None:
+            return
+        del self.__priorities[tqId]
+        for field in ("Owner", "OwnerGroup"):
+            self.__discardFromIndex(self.__bySingle[field], _normalize(tqDef[field]), tqId)
+        for field, values in self.__values.pop(tqId).items():
+            self.__noValues[field].discard(tqId)
+            for value in values:
+                self.__discardFromIndex(self.__byValue[field], value, tqId)
+
+    @staticmethod
+    def __discardFromIndex(index, value, tqId):
+        tqIds = index.get(value)
+        if tqIds is None:
+            return
+        tqIds.discard(tqId)
+        if not tqIds:
+            del index[value]
+
+    def refresh(self):
+        """Synchronize the index with the DB
+
+        :returns: S_OK(number of task queues in the index) / S_ERROR
+        """
+        result = self.__tqDB.retrieveTaskQueueHeaders()
+        if not result["OK"]:
+            return result
+        headers = result["Value"]
+        with self.__dataLock:
+            knownTQs = set(self.__tqs)
+        # Disabled task queues may still be being created
+        newTQs = {tqId for tqId, header in headers.items() if tqId not in knownTQs and header["Enabled"] >= 1}
+        multiValues = {}
+        if newTQs:
+            result = self.__tqDB.retrieveTaskQueueValues(list(newTQs))
+            if not result["OK"]:
+                return result
+            multiValues = result["Value"]
+
+        with self.__dataLock:
+            deletedTQs = set(self.__tqs) - set(headers)
+            for tqId in deletedTQs:
+                self.__remove(tqId)
+            for tqId, header in headers.items():
+                if tqId in self.__tqs:
+                    self.__priorities[tqId] = header["Priority"]
+                elif tqId in newTQs:
+                    self.__add(
+                        tqId,
+                        header["Owner"],
+                        header["OwnerGroup"],
+                        header["CPUTime"],
+                        header["Priority"],
+                        multiValues.get(tqId, {}),
+                    )
+            self.__lastRefresh = time.time()
+            self.__loaded = True
+            numTQs = len(self.__tqs)
+        self.log.verbose("Task queue index refreshed", f"{numTQs} TQs, {len(newTQs)} added, {len(deletedTQs)} removed")
+        return S_OK(numTQs)
+
+    def __checkFreshness(self):
+        if time.time() - self.__lastRefresh < self.__refreshPeriod:
+            return S_OK()
+        # Only one thread refreshes, the others keep on using the current content unless nothing is loaded yet
+        if not self.__refreshLock.acquire(blocking=not self.__loaded):
+            return S_OK()
+        try:
+            if time.time() - self.__lastRefresh < self.__refreshPeriod:
+                return S_OK()
+            result = self.refresh()
+            if not result["OK"]:
+                self.log.error("Cannot refresh the task queue index", result["Message"])
+                if not self.__loaded:
+                    return result
+            return S_OK()
+        finally:
+            self.__refreshLock.release()
+
+    def match(self, tqMatchDict, numQueuesToGet=1, negativeCond=None):
+        """Get the task queues matching a resource, like TaskQueueDB.matchAndGetTaskQueue does
+
+        :param dict tqMatchDict: match definition, with non escaped values
+        :param int numQueuesToGet: maximum number of task queues to return, 0 means all of them
+        :param negativeCond: negative conditions (dict or list of dicts) as generated by the Limiter
+
+        :returns: S_OK([(TQId, Owner, OwnerGroup)]) sorted by random priority / S_ERROR
+        """
+        result = self.__checkFreshness()
+        if not result["OK"]:
+            return result
+        with self.__dataLock:
+            result = self.__getMatchingTQs(tqMatchDict, negativeCond)
+            if not result["OK"]:
+                return result
+            tqIds = result["Value"]
+            # Same as ORDER BY RAND() / Priority, where a null priority gives a NULL sorted first
+            randomKeys = {
+                tqId: random.random() / self.__priorities[tqId] if self.__priorities[tqId] else float("-inf")
+                for tqId in tqIds
+            }
+            if numQueuesToGet:
+                tqIds = heapq.nsmallest(numQueuesToGet, randomKeys, key=randomKeys.get)
+            else:
+                tqIds = sorted(randomKeys, key=randomKeys.get)
+            return S_OK([(tqId, self.__tqs[tqId]["Owner"], self.__tqs[tqId]["OwnerGroup"]) for tqId in tqIds])
+
+    def __getValues(self, field, values):
+        """Union of the TQIds having any of the values for the field"""
+        return set().union(*[self.__byValue[field].get(_normalize(value), ()) for value in values])
+
+    def __getMatchingTQs(self, tqMatchDict, negativeCond):
+        """Apply the conditions of TaskQueueDB.__generateTQMatchSQL"""
+        tqIds = set(self.__tqs)
+
+        # If Owner and OwnerGroup are defined only use those combinations that make sense
+        if "Owner" in tqMatchDict and "OwnerGroup" in tqMatchDict:
+            ownerTQs = self.__bySingle["Owner"].get(_normalize(tqMatchDict["Owner"]), set())
+            selected = set()
+            for group in _asList(tqMatchDict["OwnerGroup"]):
+                groupTQs = self.__bySingle["OwnerGroup"].get(_normalize(group), set())
+                if Properties.JOB_SHARING in Registry.getPropertiesForGroup(group):
+                    selected |= groupTQs
+                else:
+                    selected |= groupTQs & ownerTQs
+            tqIds &= selected
+        else:
+            for field in ("OwnerGroup", "Owner"):
+                if field in tqMatchDict:
+                    tqIds &= set().union(
+                        *[self.__bySingle[field].get(_normalize(value), ()) for value in _asList(tqMatchDict[field])]
+                    )
+
+        # Just treating the (not so) special case of no Tag, No RequiredTag
+        if "Tag" not in tqMatchDict and "RequiredTag" not in tqMatchDict:
+            tqMatchDict = dict(tqMatchDict, Tag=[])
+
+        tagValues = []
+        for field in multiValueMatchFields:
+            if field not in tqMatchDict:
+                continue
+            tqField = f"{field}s"
+            values = _asList(tqMatchDict[field])
+            if field == "Tag":
+                tagValues = values
+                if _isAny(values):
+                    continue
+                # All the tags of the task queue have to be provided by the resource
+                resourceTags = {_normalize(value) for value in values}
+                for tag, tagTQs in self.__byValue[tqField].items():
+                    if tag not in resourceTags:
+                        tqIds -= tagTQs
+                continue
+            if not tqMatchDict[field] or _isAny(values):
+                continue
+            # The task queue does not require any value, or one of the values of the resource
+            tqIds = (tqIds & self.__noValues[tqField]) | (tqIds & self.__getValues(tqField, values))
+            # In case of Site, check it's not banned by the task queue
+            if field in bannedJobMatchFields:
+                bannedTQs = [self.__byValue[f"Banned{tqField}"].get(_normalize(value), set()) for value in values]
+                tqIds -= set.intersection(*bannedTQs)
+
+        # Add possibly RequiredTag conditions
+        requiredTags = tqMatchDict.get("RequiredTag", [])
+        if requiredTags and not _isAny(_asList(requiredTags)):
+            requiredTags = _asList(requiredTags)
+            if not set(requiredTags).issubset(set(tagValues)):
+                return S_ERROR("Wrong conditions")
+            normalizedTags = {_normalize(tag) for tag in requiredTags}
+            # Duplicated tags can never be counted, as in the SQL condition
+            if len(normalizedTags) < len(requiredTags):
+                tqIds = set()
+            for tag in normalizedTags:
+                tqIds &= self.__byValue["Tags"].get(tag, set())
+
+        # Add possibly Resource banning conditions: exclude the task queues having all the banned values
+        for field in multiValueMatchFields:
+            bannedValues = tqMatchDict.get(f"Banned{field}")
+            if not bannedValues or _isAny(_asList(bannedValues)):
+                continue
+            tqIds -= set.intersection(
+                *[self.__byValue[f"{field}s"].get(_normalize(value), set()) for value in _asList(bannedValues)]
+            )
+
+        if "CPUTime" in tqMatchDict:
+            maxCPUTime = max(_asList(tqMatchDict["CPUTime"]))
+            tqIds = {tqId for tqId in tqIds if self.__tqs[tqId]["CPUTime"] <= maxCPUTime}
+
+        # Add extra negative conditions
+        if negativeCond:
+            if isinstance(negativeCond, dict):
+                negativeCond = [negativeCond]
+            if not isinstance(negativeCond, (list, tuple)):
+                return S_ERROR(
+                    f"negativeCond has to be either a list or a dict or a tuple, and it's {type(negativeCond)}"
+                )
+            # A task queue is excluded if it is excluded by all the conditions
+            tqIds -= set.intersection(*[self.__getExcludedTQs(condDict) for condDict in negativeCond])
+
+        return S_OK(tqIds)
+
+    def __getExcludedTQs(self, condDict):
+        """Get the TQIds not satisfying any of the negative conditions of the dict"""
+        excludedTQs = None
+        for field, values in condDict.items():
+            if field in multiValueMatchFields:
+                # Excluded if it has any of the values
+                fieldExcluded = [self.__getValues(f"{field}s", _asList(values))]
+            elif field in singleValueDefFields:
+                # Excluded if it has the value
+                if field == "CPUTime":
+                    fieldExcluded = [
+                        {tqId for tqId, tqDef in self.__tqs.items() if tqDef["CPUTime"] == value}
+                        for value in _asList(values)
+                    ]
+                else:
+                    fieldExcluded = [self.__bySingle[field].get(_normalize(value), set()) for value in _asList(values)]
+            else:
+                continue
+            for excluded in fieldExcluded:
+                excludedTQs = set(excluded) if excludedTQs is None else excludedTQs & excluded
+        if excludedTQs is None:
+            return set()
+        return excludedTQs
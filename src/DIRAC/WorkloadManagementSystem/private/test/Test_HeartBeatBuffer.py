@@ -0,0 +1,130 @@
+""" Test the buffering of the job heart beats and of the job commands
+"""
+import pytest
+
+from DIRAC import S_OK
+from DIRAC.WorkloadManagementSystem.Client import JobStatus
+from DIRAC.WorkloadManagementSystem.private.HeartBeatBuffer import HeartBeatBuffer
+
+
+class FakeJobDB:
+    def __init__(self):
+        self.statuses = {1: JobStatus.RUNNING, 2: JobStatus.STALLED, 3: JobStatus.RUNNING}
+        self.commands = {3: {"Kill": ""}}
+        self.commandStatus = {}
+        self.heartBeats = {}
+        self.restored = []
+
+    def setHeartBeatsData(self, heartBeats):
+        for jobID, jobHeartBeats in heartBeats.items():
+            self.heartBeats.setdefault(jobID, []).extend(jobHeartBeats)
+        return S_OK()
+
+    def getJobsAttributes(self, jobIDs, attrList):
+        return S_OK({jobID: {"Status": self.statuses[jobID]} for jobID in jobIDs if jobID in self.statuses})
+
+    def setJobsMajorStatus(self, jobIDs, status, update=False):
+        self.restored.extend(jobIDs)
+        self.statuses.update(dict.fromkeys(jobIDs, status))
+        return S_OK()
+
+    def getJobsCommands(self):
+        return S_OK({jobID: dict(commands) for jobID, commands in self.commands.items()})
+
+    def setJobsCommandsStatus(self, jobCommands, status):
+        for jobID, command in jobCommands:
+            self.commands[jobID].pop(command)
+            self.commandStatus[(jobID, command)] = status
+        return S_OK()
+
+
+class FakeJobParametersDB:
+    def __init__(self):
+        self.parameters = {}
+        self.calls = 0
+
+    def setJobsParameters(self, jobsParameters, vo):
+        self.calls += 1
+        for jobID, parameters in jobsParameters.items():
+            self.parameters.setdefault((vo, jobID), {}).update(parameters)
+        return S_OK()
+
+
+@pytest.fixture
+def heartBeatBuffer():
+    heartBeatBuffer = HeartBeatBuffer(FakeJobDB(), FakeJobParametersDB())
+    # Load the commands without starting the flushing thread
+    heartBeatBuffer._HeartBeatBuffer__refreshCommands(set())
+    return heartBeatBuffer
+
+
+def test_flush(heartBeatBuffer):
+    jobDB = heartBeatBuffer._HeartBeatBuffer__jobDB
+    jobParametersDB = heartBeatBuffer._HeartBeatBuffer__jobParametersDB
+
+    assert heartBeatBuffer.add(1, {"CPUConsumed": 10}, {"HostName": "node1"}, "vo")["Value"] == {}
+    assert heartBeatBuffer.add(1, {"CPUConsumed": 20, "HeartBeatTime": "2024-01-01 10:00:00"}, {}, "vo")["Value"] == {}
+    assert heartBeatBuffer.add(2, {"CPUConsumed": 5}, {"HostName": "node2", "Memory": 1}, "vo")["Value"] == {}
+    assert len(heartBeatBuffer) == 3
+    # Nothing is written before the flush
+    assert not jobDB.heartBeats
+
+    heartBeatBuffer.flush()
+    assert len(heartBeatBuffer) == 0
+    assert [dynamicData for _time, dynamicData in jobDB.heartBeats[1]] == [{"CPUConsumed": 10}, {"CPUConsumed": 20}]
+    assert jobDB.heartBeats[1][-1][0] == "2024-01-01 10:00:00"
+    assert jobParametersDB.calls == 1
+    assert jobParametersDB.parameters == {
+        ("vo", 1): {"HostName": "node1"},
+        ("vo", 2): {"HostName": "node2", "Memory": 1},
+    }
+    # The stalled job is running again
+    assert jobDB.restored == [2]
+    assert jobDB.statuses[2] == JobStatus.RUNNING
+
+    # Nothing to write
+    heartBeatBuffer.flush()
+    assert jobParametersDB.calls == 1
+
+
+def test_commands(heartBeatBuffer):
+    jobDB = heartBeatBuffer._HeartBeatBuffer__jobDB
+
+    # The command is served once, and marked as Sent by the next flush
+    assert heartBeatBuffer.add(3, {}, {}, "vo")["Value"] == {"Kill": ""}
+    assert heartBeatBuffer.add(3, {}, {}, "vo")["Value"] == {}
+    assert not jobDB.commandStatus
+    heartBeatBuffer.flush()
+    assert jobDB.commandStatus == {(3, "Kill"): "Sent"}
+    assert heartBeatBuffer.add(3, {}, {}, "vo")["Value"] == {}
+
+    # New commands are served after the next flush
+    jobDB.commands[1] = {"Kill": "now"}
+    assert heartBeatBuffer.add(1, {}, {}, "vo")["Value"] == {}
+    heartBeatBuffer.flush()
+    assert heartBeatBuffer.add(1, {}, {}, "vo")["Value"] == {"Kill": "now"}
+
+    # A command served while the commands are reloaded is not served again
+    heartBeatBuffer._HeartBeatBuffer__refreshCommands(set())
+    assert heartBeatBuffer.add(1, {}, {}, "vo")["Value"] == {}
+    heartBeatBuffer.flush()
+    assert jobDB.commandStatus[(1, "Kill")] == "Sent"
+
+
+def test_unknownJobs(heartBeatBuffer):
+    jobDB = heartBeatBuffer._HeartBeatBuffer__jobDB
+
+    # The heart beats of the jobs which are not in the JobDB are rejected
+    result = heartBeatBuffer.add(4, {"CPUConsumed": 10}, {}, "vo")
+    assert not result["OK"]
+    assert result["Message"] == "Job 4 not found"
+    assert len(heartBeatBuffer) == 0
+
+    # A job deleted from the JobDB is rejected once its heart beats are flushed
+    assert heartBeatBuffer.add(1, {}, {}, "vo")["OK"]
+    del jobDB.statuses[1]
+    assert heartBeatBuffer.add(1, {}, {}, "vo")["OK"]
+    heartBeatBuffer.flush()
+    result = heartBeatBuffer.add(1, {}, {}, "vo")
+    assert not result["OK"]
+    assert result["Message"] == "Job 1 not found"
@@ -0,0 +1,118 @@
+""" Test the in-memory task queue index against the semantics of the TaskQueueDB matching
+"""
+import pytest
+
+from DIRAC import S_OK
+from DIRAC.WorkloadManagementSystem.private.TaskQueueIndex import TaskQueueIndex
+
+TASK_QUEUES = {
+    1: {"Owner": "user", "OwnerGroup": "user_group", "CPUTime": 3600, "Priority": 1.0},
+    2: {"Owner": "prod", "OwnerGroup": "prod_group", "CPUTime": 86400, "Priority": 2.0},
+    3: {"Owner": "user", "OwnerGroup": "user_group", "CPUTime": 21600, "Priority": 1.0},
+    4: {"Owner": "other", "OwnerGroup": "user_group", "CPUTime": 3600, "Priority": 0.5},
+}
+TASK_QUEUE_VALUES = {
+    1: {"Sites": ["Site_1"], "Platforms": ["centos7"]},
+    2: {"Sites": ["Site_1", "Site_2"], "Tags": ["GPU"], "JobTypes": ["MCSimulation"]},
+    3: {"BannedSites": ["Site_1"], "Tags": ["MultiProcessor", "GPU"]},
+    4: {},
+}
+
+
+class FakeTaskQueueDB:
+    def __init__(self):
+        self.taskQueues = {tqId: dict(tqDef, Enabled=1) for tqId, tqDef in TASK_QUEUES.items()}
+        self.values = dict(TASK_QUEUE_VALUES)
+        self.loaded = []
+
+    def retrieveTaskQueueHeaders(self):
+        return S_OK({tqId: dict(tqDef) for tqId, tqDef in self.taskQueues.items()})
+
+    def retrieveTaskQueueValues(self, tqIdList):
+        self.loaded.extend(tqIdList)
+        return S_OK({tqId: self.values[tqId] for tqId in tqIdList if self.values.get(tqId)})
+
+
+@pytest.fixture
+def tqIndex(mocker):
+    mocker.patch(
+        "DIRAC.WorkloadManagementSystem.private.TaskQueueIndex.Registry.getPropertiesForGroup",
+        side_effect=lambda group: ["JobSharing"] if group == "prod_group" else [],
+    )
+    return TaskQueueIndex(FakeTaskQueueDB(), refreshPeriod=3600)
+
+
+def matchIds(tqIndex, tqMatchDict, negativeCond=None):
+    result = tqIndex.match(tqMatchDict, numQueuesToGet=0, negativeCond=negativeCond)
+    assert result["OK"], result
+    return {tqId for tqId, _owner, _ownerGroup in result["Value"]}
+
+
+@pytest.mark.parametrize(
+    "tqMatchDict, expected",
+    [
+        ({"CPUTime": 100000}, {1, 4}),
+        ({"CPUTime": 5000, "Tag": "any"}, {1, 4}),
+        ({"CPUTime": 100000, "Tag": ["gpu"]}, {1, 2, 4}),
+        ({"CPUTime": 100000, "Tag": ["GPU", "MultiProcessor"]}, {1, 2, 3, 4}),
+        ({"CPUTime": 100000, "Tag": ["GPU"], "RequiredTag": "GPU"}, {2}),
+        ({"CPUTime": 100000, "Tag": "ANY", "Site": "Site_1"}, {1, 2, 4}),
+        ({"CPUTime": 100000, "Tag": "ANY", "Site": ["Site_2", "Site_3"]}, {2, 3, 4}),
+        ({"CPUTime": 100000, "Tag": "ANY", "Site": "Any", "Platform": "slc6"}, {2, 3, 4}),
+        ({"CPUTime": 100000, "Tag": "ANY", "BannedSite": ["Site_1", "Site_2"]}, {1, 3, 4}),
+        ({"CPUTime": 100000, "Tag": "ANY", "JobType": "User"}, {1, 3, 4}),
+        ({"CPUTime": 100000, "Tag": "ANY", "OwnerGroup": "user_group"}, {1, 3, 4}),
+        ({"CPUTime": 100000, "Tag": "ANY", "Owner": "user", "OwnerGroup": "user_group"}, {1, 3}),
+        ({"CPUTime": 100000, "Tag": "ANY", "Owner": "user", "OwnerGroup": ["user_group", "prod_group"]}, {1, 2, 3}),
+    ],
+)
+def test_match(tqIndex, tqMatchDict, expected):
+    assert matchIds(tqIndex, tqMatchDict) == expected
+
+
+def test_match_wrongRequiredTag(tqIndex):
+    result = tqIndex.match({"CPUTime": 100000, "Tag": ["GPU"], "RequiredTag": ["MultiProcessor"]})
+    assert not result["OK"]
+    assert result["Message"] == "Wrong conditions"
+
+
+@pytest.mark.parametrize(
+    "negativeCond, expected",
+    [
+        ({"Site": "Site_1"}, {3, 4}),
+        ([{"Site": "Site_1", "JobType": ["MCSimulation"]}], {1, 3, 4}),
+        ([{"Site": "Site_1"}, {"Site": "Site_2"}], {1, 3, 4}),
+        ({"Owner": ["user"]}, {2, 4}),
+    ],
+)
+def test_match_negativeCond(tqIndex, negativeCond, expected):
+    assert matchIds(tqIndex, {"CPUTime": 100000, "Tag": "ANY"}, negativeCond=negativeCond) == expected
+
+
+def test_match_limit(tqIndex):
+    result = tqIndex.match({"CPUTime": 100000, "Tag": "ANY"}, numQueuesToGet=2)
+    assert result["OK"]
+    assert len(result["Value"]) == 2
+    assert {row[0] for row in result["Value"]} <= {1, 2, 3, 4}
+    assert all(row[1:] == (TASK_QUEUES[row[0]]["Owner"], TASK_QUEUES[row[0]]["OwnerGroup"]) for row in result["Value"])
+
+
+def test_refresh(tqIndex):
+    tqDB = tqIndex._TaskQueueIndex__tqDB
+    assert tqIndex.refresh()["Value"] == 4
+    assert sorted(tqDB.loaded) == [1, 2, 3, 4]
+
+    # A new TQ is only loaded once enabled, a deleted one disappears, and the others are not loaded again
+    tqDB.taskQueues[5] = dict(TASK_QUEUES[1], Enabled=0)
+    tqDB.values[5] = {"Sites": ["Site_3"]}
+    del tqDB.taskQueues[1]
+    tqDB.loaded = []
+    assert tqIndex.refresh()["Value"] == 3
+    assert tqDB.loaded == []
+    tqDB.taskQueues[5]["Enabled"] = 1
+    assert tqIndex.refresh()["Value"] == 4
+    assert tqDB.loaded == [5]
+    assert matchIds(tqIndex, {"CPUTime": 100000, "Tag": "ANY", "Site": "Site_3"}) == {3, 4, 5}
+
+    tqIndex.discard([5])
+    assert matchIds(tqIndex, {"CPUTime": 100000, "Tag": "ANY", "Site": "Site_3"}) == {3, 4}
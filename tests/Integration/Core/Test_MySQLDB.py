@@ -1,6 +1,7 @@
 """
 This is used to test the MySQLDB module.
 """
+import gc
 import time
 import pytest
 
@@ -294,3 +295,123 @@ def test_deleteEntries(name, fields, requiredFields, values, table, cond, expect
     result = mysqlDB.getCounters(name, fields, {})
     assert result["OK"], result["Message"]
     assert result["Value"] == []
+
+
+def test_connectionRelease():
+    """The connections go back to the pool as soon as the queries are done, also when they fail"""
+    mysqlDB = setupDBCreateTableInsertFields(table, allFields, genVal2())
+    pool = mysqlDB._MySQL__connectionPool
+
+    # Keep the tracebacks of the errors, which would keep the connections referenced
+    gc.disable()
+    try:
+        assert mysqlDB._query(f"SELECT * FROM {name}")["OK"]
+        assert not pool.isHeld()
+        assert not mysqlDB._query("SELECT * FROM NoSuchTable")["OK"]
+        assert not pool.isHeld()
+        assert not mysqlDB._update("DELETE FROM NoSuchTable")["OK"]
+        assert not pool.isHeld()
+        assert not mysqlDB._transaction(["DELETE FROM NoSuchTable"])["OK"]
+        assert not pool.isHeld()
+
+        result = mysqlDB._getConnection()
+        assert result["OK"], result["Message"]
+        with result["Value"]:
+            assert pool.isHeld()
+        assert not pool.isHeld()
+    finally:
+        gc.enable()
+
+
+def test_iterQuery():
+    """Read the rows by batches, and stop reading them before the end"""
+    mysqlDB = setupDBCreateTableInsertFields(table, reqFields, genVal1())
+    pool = mysqlDB._MySQL__connectionPool
+
+    results = list(mysqlDB._iterQuery(f"SELECT Count FROM {name} ORDER BY Count", batchSize=30))
+    assert all(result["OK"] for result in results), results
+    assert [len(result["Value"]) for result in results] == [30, 30, 30, 10]
+    assert results[-1]["Value"][-1] == (99,)
+
+    # The rows left are not read: the connection is closed instead of going back to the pool
+    rows = mysqlDB._iterQuery(f"SELECT Count FROM {name}", batchSize=10)
+    result = next(rows)
+    assert result["OK"], result["Message"]
+    assert len(result["Value"]) == 10
+    connections = pool.getMetrics()["Connections"]
+    rows.close()
+    assert pool.getMetrics()["Connections"] == connections - 1
+    assert mysqlDB._query(f"SELECT COUNT(*) FROM {name}") == {"OK": True, "Value": ((100,),)}
+
+    """Return a MySQL object using the DB server of mysqlDB as a read replica of itself"""
+    host, port = mysqlDB._MySQL__hostName, mysqlDB._MySQL__port
+    return MySQL(
+        host,
+        mysqlDB._MySQL__userName,
+        mysqlDB._MySQL__passwd,
+        mysqlDB._MySQL__dbName,
+        port,
+        readReplicas=[f"{host}:{port}"],
+    )
+
+
+def test_readReplicas(monkeypatch):
+    """Use the DB server as a read replica of itself, which is only used when it is up to date"""
+    mysqlDB = setupDBCreateTableInsertFields(table, reqFields, genVal1())
+
+    # The server does not replicate anything: the queries go to the master
+    replicaDB = getReplicatedDB(mysqlDB)
+    assert replicaDB.hasReadReplicas()
+    with replicaDB._readFromReplicas():
+        result = replicaDB.getCounters(name, fields, cond10)
+    assert result["OK"], result["Message"]
+    assert result["Value"] == [({"Surname": "Surn1", "Name": "name1"}, 10)]
+    status = replicaDB.getReadReplicasStatus()["Value"]
+    assert [replica["Available"] for replica in status.values()] == [False]
+
+    # A replica without lag serves the read sections, but not the queries following a write
+    def checkLag(self, replica, conn):
+        replica["CheckTime"] = replica["SyncTime"] = time.time()
+
+    monkeypatch.setattr(DIRAC.Core.Utilities.MySQL.ReadReplicas, "_ReadReplicas__checkLag", checkLag)
+    replicaDB = getReplicatedDB(mysqlDB)
+    with replicaDB._readFromReplicas():
+        result = replicaDB._getConnection()
+        assert result["OK"], result["Message"]
+        assert result["Value"].pool.readOnly
+        del result
+        result = replicaDB.deleteEntries(name, cond10)
+        assert result["OK"], result["Message"]
+        result = replicaDB._getConnection()
+        assert result["OK"], result["Message"]
+        assert not result["Value"].pool.readOnly
+    status = replicaDB.getReadReplicasStatus()["Value"]
+    assert [replica["Available"] for replica in status.values()] == [True]
+
+    # A query which fails on the replica for another reason than the connection is not retried on the master
+    with replicaDB._readFromReplicas():
+        result = replicaDB._query(f"SELECT NoSuchColumn FROM {name}")
+        assert not result["OK"]
+        result = replicaDB._getConnection()
+        assert result["OK"], result["Message"]
+        assert result["Value"].pool.readOnly
+        result["Value"].release()
+    status = replicaDB.getReadReplicasStatus()["Value"]
+    assert [replica["Available"] for replica in status.values()] == [True]
+
+    # Writes not replicated yet are not read from the replica
+    with replicaDB._readFromReplicas(since=time.time() + 10):
+        result = replicaDB._getConnection()
+        assert result["OK"], result["Message"]
+        assert not result["Value"].pool.readOnly
+
+    # The queries kept in a cache are read from the master, also in a read section
+    with replicaDB._readFromReplicas():
+        with replicaDB._readFromMaster():
+            result = replicaDB._getConnection()
+            assert result["OK"], result["Message"]
+            assert not result["Value"].pool.readOnly
+            del result
+        result = replicaDB._getConnection()
+        assert result["OK"], result["Message"]
+        assert result["Value"].pool.readOnly
@@ -17,6 +17,9 @@ DIRAC.initialize()  # Initialize configuration
 from DIRAC import S_OK, gLogger
 from DIRAC.WorkloadManagementSystem.Client import JobMinorStatus, JobStatus
 
+from DIRAC.Core.Utilities.ClassAd.ClassAdLight import ClassAd
+from DIRAC.WorkloadManagementSystem.Utilities.ParametricJob import generateParametricJobs
+
 # sut
 from DIRAC.WorkloadManagementSystem.DB.JobDB import JobDB
 
@@ -104,6 +107,49 @@ def test_insertNewJobIntoDB(jobDB: JobDB):
     assert res["Value"] == {}
 
 
+def test_insertNewJobsIntoDB(jobDB: JobDB):
+    """Insert the jobs of a parametric job by bulk"""
+    parametricJDL = jdl.replace('JobName = "helloWorld";', 'JobName = "helloWorld_%n";').replace(
+        'InputData = "";', 'InputData = "/vo/data/%s"; Parameters = { "file1", "file2", "file3" };'
+    )
+    res = generateParametricJobs(ClassAd(parametricJDL))
+    assert res["OK"], res["Message"]
+    jdlList = res["Value"]
+
+    res = jobDB.insertNewJobsIntoDB(
+        jdlList,
+        "owner",
+        "ownerGroup",
+        initialStatus=JobStatus.SUBMITTING,
+        initialMinorStatus="Bulk transaction confirmation",
+        chunkSize=2,
+    )
+    assert res["OK"], res["Message"]
+    jobs = res["Value"]
+    assert [job["Status"] for job in jobs] == [JobStatus.SUBMITTING] * 3
+    jobIDs = [job["JobID"] for job in jobs]
+    assert jobIDs == sorted(jobIDs)
+
+    res = jobDB.getJobsAttributes(jobIDs, ["JobName", "Status", "Owner", "UserPriority"])
+    assert res["OK"], res["Message"]
+    for n, jobID in enumerate(jobIDs):
+        assert res["Value"][jobID] == {
+            "JobName": f"helloWorld_{n}",
+            "Status": JobStatus.SUBMITTING,
+            "Owner": "owner",
+            "UserPriority": 1,
+        }
+        result = jobDB.getInputData(jobID)
+        assert result["OK"], result["Message"]
+        assert result["Value"] == [f"/vo/data/file{n + 1}"]
+        result = jobDB.getJobJDL(jobID)
+        assert result["OK"], result["Message"]
+        assert ClassAd(result["Value"]).getAttributeInt("JobID") == jobID
+        result = jobDB.getJobJDL(jobID, original=True)
+        assert result["OK"], result["Message"]
+        assert ClassAd(result["Value"]).getAttributeInt("ParameterNumber") == n
+
+
 def test_removeJobFromDB(jobDB: JobDB):
     # Arrange
     res = jobDB.insertNewJobIntoDB(jdl, "owner", "ownerGroup", vo="vo")
@@ -302,6 +348,51 @@ def test_heartBeatLogging(jobDB):
     assert not res["Value"], str(res)
 
 
+def test_heartBeatsBulk(jobDB):
+    jobIDs = []
+    for _ in range(2):
+        res = jobDB.insertNewJobIntoDB(jdl, "owner", "ownerGroup", vo="vo")
+        assert res["OK"], res["Message"]
+        jobIDs.append(res["JobID"])
+
+    res = jobDB.setHeartBeatsData(
+        {
+            jobIDs[0]: [("2024-01-01 10:00:00", {"CPU": 1}), ("2024-01-01 10:05:00", {"CPU": 2, "Memory": 3})],
+            jobIDs[1]: [("2024-01-01 11:00:00", {"CPU": 4})],
+        },
+        chunkSize=2,
+    )
+    assert res["OK"], res["Message"]
+    res = jobDB.getHeartBeatData(jobIDs[0])
+    assert res["OK"], res["Message"]
+    assert sorted(res["Value"]) == [
+        ("CPU", "1.0", "2024-01-01 10:00:00"),
+        ("CPU", "2.0", "2024-01-01 10:05:00"),
+        ("Memory", "3.0", "2024-01-01 10:05:00"),
+    ]
+    res = jobDB.getJobsAttributes(jobIDs, ["HeartBeatTime"])
+    assert res["OK"], res["Message"]
+    assert [str(res["Value"][jobID]["HeartBeatTime"]) for jobID in jobIDs] == [
+        "2024-01-01 10:05:00",
+        "2024-01-01 11:00:00",
+    ]
+
+    res = jobDB.setJobCommand(jobIDs[0], "Kill")
+    assert res["OK"], res["Message"]
+    res = jobDB.getJobsCommands()
+    assert res["OK"], res["Message"]
+    assert res["Value"][jobIDs[0]] == {"Kill": ""}
+    res = jobDB.setJobsCommandsStatus([(jobIDs[0], "Kill")], "Sent")
+    assert res["OK"], res["Message"]
+    res = jobDB.getJobsCommands()
+    assert res["OK"], res["Message"]
+    assert jobIDs[0] not in res["Value"]
+
+    for jobID in jobIDs:
+        res = jobDB.removeJobFromDB(jobID)
+        assert res["OK"], res["Message"]
+
+
 def test_setJobsMajorStatus(jobDB):
     res = jobDB.insertNewJobIntoDB(jdl, "owner", "ownerGroup", vo="vo")
     assert res["OK"], res["Message"]
@@ -442,3 +533,34 @@ def test_attributes(jobDB):
     res = jobDB.getJobsAttributes([jobID_1, jobID_2], ["Status"])
     assert res["OK"], res["Message"]
     assert res["Value"] == {jobID_1: {"Status": JobStatus.DONE}, jobID_2: {"Status": JobStatus.RUNNING}}
+
+
+def test_jobsOptParametersAndInputData(jobDB):
+    res = jobDB.insertNewJobIntoDB(jdl, "owner", "ownerGroup", vo="vo")
+    assert res["OK"], res["Message"]
+    jobID_1 = int(res["JobID"])
+    res = jobDB.insertNewJobIntoDB(jdl, "owner", "ownerGroup", vo="vo")
+    assert res["OK"], res["Message"]
+    jobID_2 = int(res["JobID"])
+
+    res = jobDB.setJobOptParameter(jobID_1, "OptimizerChain", "JobPath,JobSanity")
+    assert res["OK"], res["Message"]
+    res = jobDB.setJobsOptParameters(
+        {jobID_1: {"OptimizerChain": "JobPath,InputData", "Sanity": "ok"}, jobID_2: {"Sanity": "it's ok"}}
+    )
+    assert res["OK"], res["Message"]
+    res = jobDB.getJobsOptParameters([jobID_1, jobID_2])
+    assert res["OK"], res["Message"]
+    assert res["Value"] == {
+        jobID_1: {"OptimizerChain": "JobPath,InputData", "Sanity": "ok"},
+        jobID_2: {"Sanity": "it's ok"},
+    }
+
+    res = jobDB.setInputData(jobID_1, ["/vo/data/1", "LFN:/vo/data/2"])
+    assert res["OK"], res["Message"]
+    res = jobDB.getJobsInputData([jobID_1, jobID_2])
+    assert res["OK"], res["Message"]
+    assert {jobID: sorted(lfns) for jobID, lfns in res["Value"].items()} == {
+        jobID_1: ["/vo/data/1", "/vo/data/2"],
+        jobID_2: [],
+    }
@@ -47,3 +47,29 @@ def test_JobStatus(jobLoggingDB: JobLoggingDB):
     assert result["OK"] is True, result["Message"]
 
     jobLoggingDB.deleteJob(1)
+
+
+def test_addLoggingRecords(jobLoggingDB: JobLoggingDB):
+    result = jobLoggingDB.addLoggingRecords(
+        [
+            {
+                "jobID": 2,
+                "status": "testing",
+                "minorStatus": "Bulk 1",
+                "date": "2006-04-25 14:20:17",
+                "source": "Unittest",
+            },
+            {"jobID": 3, "status": "testing", "minorStatus": "Bulk 1", "source": "Unittest"},
+            {"jobID": 2, "minorStatus": "Bulk 2", "date": "2006-04-25 14:20:18", "source": "Unittest"},
+        ]
+    )
+    assert result["OK"] is True, result["Message"]
+
+    result = jobLoggingDB.getJobLoggingInfo(2)
+    assert result["OK"] is True, result["Message"]
+    assert [record[1] for record in result["Value"]] == ["Bulk 1", "Bulk 2"]
+    result = jobLoggingDB.getJobLoggingInfo(3)
+    assert result["OK"] is True, result["Message"]
+    assert len(result["Value"]) == 1
+
+    jobLoggingDB.deleteJob([2, 3])
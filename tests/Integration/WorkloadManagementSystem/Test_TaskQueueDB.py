@@ -1122,3 +1122,75 @@ def test_TQ():
 
     result = tqDB.deleteTaskQueueIfEmpty(tq)
     assert result["OK"]
+
+
+def test_matchIndex():
+    """the in-memory index matches the same task queues as the DB"""
+    indexedDB = TaskQueueDB()
+    indexedDB.enableMatchIndex()
+
+    tqDefDicts = [
+        {"Owner": "userName", "OwnerGroup": "admin", "CPUTime": 5000, "Sites": ["Site_1", "Site_2"]},
+        {"Owner": "userName", "OwnerGroup": "prod", "CPUTime": 5000, "Platforms": ["slc6", "centos7"]},
+        {"Owner": "userName", "OwnerGroup": "user", "CPUTime": 50000, "BannedSites": ["Site_1"], "Tags": ["GPU"]},
+        {"Owner": "otherUser", "OwnerGroup": "user", "CPUTime": 5000, "Tags": ["MultiProcessor", "GPU"]},
+        {"Owner": "otherUser", "OwnerGroup": "user", "CPUTime": 5000, "JobTypes": ["MCSimulation"]},
+    ]
+    for jobId, tqDefDict in enumerate(tqDefDicts, start=1):
+        result = tqDB.insertJob(jobId, tqDefDict, 10)
+        assert result["OK"]
+
+    for tqMatchDict, negativeCond in [
+        ({"CPUTime": 9999999}, None),
+        ({"CPUTime": 6000, "Tag": "ANY"}, None),
+        ({"CPUTime": 9999999, "Site": "Site_1", "Tag": ["gpu"]}, None),
+        ({"CPUTime": 9999999, "Site": ["Site_2", "Site_3"], "Platform": "slc6", "Tag": "ANY"}, None),
+        ({"CPUTime": 9999999, "Tag": ["GPU", "MultiProcessor"], "RequiredTag": "MultiProcessor"}, None),
+        ({"CPUTime": 9999999, "Owner": "userName", "OwnerGroup": ["admin", "user"], "Tag": "ANY"}, None),
+        ({"CPUTime": 9999999, "BannedSite": ["Site_1", "Site_2"], "JobType": "User"}, None),
+        ({"CPUTime": 9999999, "Tag": "ANY"}, [{"Site": "Site_1"}, {"JobType": ["MCSimulation"]}]),
+        ({"CPUTime": 9999999, "Tag": "ANY"}, {"Site": "Site_2", "Owner": ["userName"]}),
+    ]:
+        result = tqDB.matchAndGetTaskQueue(tqMatchDict, numQueuesToGet=0, negativeCond=negativeCond)
+        assert result["OK"]
+        expected = {int(row[0]) for row in result["Value"]}
+        result = indexedDB.matchAndGetTaskQueue(tqMatchDict, numQueuesToGet=0, negativeCond=negativeCond)
+        assert result["OK"]
+        assert {int(row[0]) for row in result["Value"]} == expected, tqMatchDict
+
+    # this will also remove the jobs
+    for jobId in range(1, len(tqDefDicts) + 1):
+        result = indexedDB.matchAndGetJob({"CPUTime": 9999999, "Tag": "ANY", "JobID": jobId})
+        assert result["OK"]
+        assert result["Value"]["matchFound"] is True
+        assert result["Value"]["jobId"] == jobId
+
+    result = tqDB.cleanOrphanedTaskQueues()
+    assert result["OK"]
+
+
+def test_matchAndGetJobs():
+    """reserve several jobs in one go"""
+    tqDefDict = {"Owner": "userName", "OwnerGroup": "myGroup", "CPUTime": 5000, "Sites": ["Site_batch"]}
+    for jobId in range(201, 206):
+        result = tqDB.insertJob(jobId, tqDefDict, 10)
+        assert result["OK"]
+
+    result = tqDB.matchAndGetJobs({"CPUTime": 9999999, "Site": "Site_batch", "Tag": "ANY"}, 3)
+    assert result["OK"]
+    assert result["Value"]["matchFound"] is True
+    jobIds = [jobId for jobId, _tqId in result["Value"]["jobs"]]
+    assert len(jobIds) == 3
+    assert set(jobIds) <= set(range(201, 206))
+
+    result = tqDB.matchAndGetJobs({"CPUTime": 9999999, "Site": "Site_batch", "Tag": "ANY"}, 10)
+    assert result["OK"]
+    remainingIds = [jobId for jobId, _tqId in result["Value"]["jobs"]]
+    assert sorted(jobIds + remainingIds) == list(range(201, 206))
+
+    result = tqDB.matchAndGetJobs({"CPUTime": 9999999, "Site": "Site_batch", "Tag": "ANY"}, 10)
+    assert result["OK"]
+    assert result["Value"]["matchFound"] is False
+
+    result = tqDB.cleanOrphanedTaskQueues()
+    assert result["OK"]
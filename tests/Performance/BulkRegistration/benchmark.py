@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+""" This script compares the registration of files in the FileCatalogDB with and without
+    the bulk registration by chunks (BulkInsertChunkSize option).
+
+    It needs a configured FileCatalogDB, and must not be run against a production one:
+    it registers synthetic files under /benchmark, and removes them at the end.
+    For each way, it prints the number of files registered per second.
+
+    Tunable parameters:
+      * nbFiles: number of files registered by each way
+      * nbDirectories: number of directories the files are spread over
+      * chunkSize: value of BulkInsertChunkSize for the bulk registration
+"""
+import sys
+import time
+
+import DIRAC
+
+DIRAC.initialize()  # Initialize configuration
+
+from DIRAC.Core.Utilities.File import makeGuid
+from DIRAC.DataManagementSystem.DB.FileCatalogDB import FileCatalogDB
+
+nbFiles = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+nbDirectories = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+chunkSize = int(sys.argv[3]) if len(sys.argv) > 3 else 5000
+
+credDict = {"username": "dirac", "group": "dirac_admin", "properties": ["FileCatalogManagement"]}
+databaseConfig = {
+    "UniqueGUID": False,
+    "GlobalReadAccess": True,
+    "LFNPFNConvention": "Strong",
+    "ResolvePFN": True,
+    "DefaultUmask": 0o775,
+    "ValidFileStatus": ["AprioriGood"],
+    "ValidReplicaStatus": ["AprioriGood"],
+    "VisibleFileStatus": ["AprioriGood"],
+    "VisibleReplicaStatus": ["AprioriGood"],
+    "UserGroupManager": "UserAndGroupManagerDB",
+    "SEManager": "SEManagerDB",
+    "SecurityManager": "NoSecurityManager",
+    "DirectoryManager": "DirectoryLevelTree",
+    "FileManager": "FileManager",
+    "DirectoryMetadata": "DirectoryMetadata",
+    "FileMetadata": "FileMetadata",
+    "DatasetManager": "DatasetManager",
+}
+
+db = FileCatalogDB()
+result = db.setConfig(databaseConfig)
+if not result["OK"]:
+    raise RuntimeError(result["Message"])
+
+
+def check(result):
+    if not result["OK"]:
+        raise RuntimeError(result["Message"])
+    return result["Value"]
+
+
+check(db.addSE("BENCH-SE", credDict))
+
+
+def benchmark(name, bulkInsertChunkSize):
+    lfns = {
+        f"/benchmark/{name}/dir{i % nbDirectories}/file{i}": {
+            "PFN": "",
+            "SE": "BENCH-SE",
+            "Size": 1000 + i,
+            "GUID": makeGuid(),
+            "Checksum": "0a1b2c3d",
+        }
+        for i in range(nbFiles)
+    }
+    db.bulkInsertChunkSize = bulkInsertChunkSize
+    start = time.time()
+    result = check(db.addFile(dict(lfns), credDict))
+    elapsed = time.time() - start
+    print(f"{name:10} {len(result['Successful']):10} {len(result['Failed']):8} {nbFiles / elapsed:14.1f}")
+    return list(lfns)
+
+
+print(f"{'way':10} {'registered':>10} {'failed':>8} {'files/s':>14}")
+registered = []
+try:
+    registered += benchmark("single", 0)
+    registered += benchmark("bulk", chunkSize)
+finally:
+    db.bulkInsertChunkSize = 0
+    db.removeFile(registered, credDict)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+""" This script compares the reads of the configuration through gConfig
+    with the flattened snapshot of the merged configuration, and with the walk
+    of the CFG tree that is done when there is no snapshot.
+
+    A synthetic /Resources/Sites section is added to the local configuration,
+    and the number of getValue, getSections and getOptionsDict calls per second
+    is printed, for one thread and for several concurrent threads.
+
+    Tunable parameters:
+      * nbSites: number of sites in the synthetic configuration
+      * nbCalls: number of calls done by each thread
+      * nbThreads: number of concurrent threads
+"""
+import random
+import sys
+import threading
+import time
+
+from diraccfg import CFG
+
+import DIRAC
+
+DIRAC.initialize(require_auth=False)  # Initialize configuration, the servers are not needed
+
+from DIRAC import gConfig
+from DIRAC.ConfigurationSystem.Client.ConfigurationData import gConfigurationData
+
+nbSites = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+nbCalls = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+nbThreads = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+sites = {}
+for i in range(nbSites):
+    sites[f"LCG.Site{i}.org"] = {
+        "Name": f"Site{i}",
+        "CE": f"ce{i}.site{i}.org",
+        "MaxCPUTime": "3600",
+        "CEs": {f"ce{i}.site{i}.org": {"Queues": {"long": {"maxCPUTime": "86400"}}}},
+    }
+cfg = CFG()
+cfg.loadFromDict({"Resources": {"Sites": {"LCG": sites}}})
+gConfig.loadCFG(cfg)
+assert gConfig.getValue(f"/Resources/Sites/LCG/LCG.Site0.org/MaxCPUTime") == "3600"
+
+sitePaths = [f"/Resources/Sites/LCG/LCG.Site{i}.org" for i in range(nbSites)]
+calls = {
+    "getValue": lambda: gConfig.getValue(f"{random.choice(sitePaths)}/MaxCPUTime", 0),
+    "getValue (missing)": lambda: gConfig.getValue(f"{random.choice(sitePaths)}/Unknown", "default"),
+    "getSections": lambda: gConfig.getSections("/Resources/Sites/LCG"),
+    "getOptionsDict": lambda: gConfig.getOptionsDict(random.choice(sitePaths)),
+}
+
+
+def runCalls(call, nb):
+    for _ in range(nb):
+        call()
+
+
+def measure(call, threads):
+    workers = [threading.Thread(target=runCalls, args=(call, nbCalls // threads)) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (nbCalls // threads) * threads / (time.perf_counter() - start)
+
+
+def benchmark(title):
+    print(f"\n{title}")
+    for name, call in calls.items():
+        print(
+            f"  {name:20} {measure(call, 1):12.0f} calls/s (1 thread) "
+            f"{measure(call, nbThreads):12.0f} calls/s ({nbThreads} threads)"
+        )
+
+
+assert gConfigurationData.getSnapshot() is not None
+benchmark("With the snapshot")
+
+# The snapshot is only used for the CFG it was built from: replacing the merged CFG
+# by a copy, without a sync, gives the walk of the tree
+gConfigurationData.mergedCFG = gConfigurationData.mergedCFG.clone()
+assert gConfigurationData.getSnapshot() is None
+benchmark("Walking the CFG tree")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+""" This script compares the fast and the legacy DEncode engines on payloads
+    shaped like the typical results of DIRAC RPC calls.
+
+    It does not need any DIRAC installation or configuration, only the DIRAC sources.
+    For each payload, it checks that both engines produce the same bytes,
+    and prints the best time of a few repetitions for encoding and decoding.
+
+    Tunable parameters:
+      * nbItems: number of LFNs / jobs / rows in each payload
+      * repeat: number of repetitions of each measurement
+"""
+import datetime
+import sys
+import timeit
+
+from DIRAC.Core.Utilities import DEncode
+
+nbItems = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+repeat = 3
+
+
+def getReplicasPayload(nb):
+    """Result of FileCatalog.getReplicas"""
+    successful = {}
+    for i in range(nb):
+        lfn = f"/vo/prod/data/2024/RAW/{i // 1000:06d}/file_{i:08d}.raw"
+        successful[lfn] = {
+            "CERN-DST": f"root://eos.cern.ch//eos{lfn}",
+            "RAL-DST": f"srm://srm.ral.ac.uk:8443/srm/managerv2?SFN=/castor{lfn}",
+        }
+    return {"OK": True, "Value": {"Successful": successful, "Failed": {}}}
+
+
+def getJobsAttributesPayload(nb):
+    """Result of JobMonitoring.getJobsAttributes"""
+    now = datetime.datetime.utcnow().replace(microsecond=0)
+    attributes = {}
+    for jobID in range(nb):
+        attributes[jobID] = {
+            "Status": "Running",
+            "MinorStatus": "Application",
+            "Site": "LCG.CERN.cern",
+            "Owner": "someuser",
+            "OwnerGroup": "vo_user",
+            "JobGroup": "00001234",
+            "LastUpdateTime": now,
+            "RescheduleCounter": 0,
+            "CPUTime": 1234.5,
+            "VerifiedFlag": True,
+        }
+    return {"OK": True, "Value": attributes}
+
+
+def dbRowsPayload(nb):
+    """Result of a SELECT returned as a list of tuples"""
+    now = datetime.datetime.utcnow().replace(microsecond=0)
+    return {
+        "OK": True,
+        "Value": [(i, f"LFN{i}", 1024 * i, "ad1234ef", now, None, "AprioriGood") for i in range(nb)],
+    }
+
+
+payloads = {
+    "getReplicas": getReplicasPayload(nbItems),
+    "getJobsAttributes": getJobsAttributesPayload(nbItems),
+    "dbRows": dbRowsPayload(nbItems),
+}
+
+print(f"{'payload':<20}{'size (MB)':>10}{'enc legacy':>12}{'enc fast':>10}{'dec legacy':>12}{'dec fast':>10}")
+for name, payload in payloads.items():
+    encoded = DEncode.legacyEncode(payload)
+    if DEncode.fastEncode(payload) != encoded:
+        raise RuntimeError(f"{name}: fast and legacy encodings differ")
+    if DEncode.fastDecode(encoded) != DEncode.legacyDecode(encoded):
+        raise RuntimeError(f"{name}: fast and legacy decodings differ")
+
+    timings = [
+        min(timeit.repeat(lambda: func(arg), number=1, repeat=repeat))
+        for func, arg in (
+            (DEncode.legacyEncode, payload),
+            (DEncode.fastEncode, payload),
+            (DEncode.legacyDecode, encoded),
+            (DEncode.fastDecode, encoded),
+        )
+    ]
+    print(f"{name:<20}{len(encoded) / 1e6:>10.1f}" + "".join(f"{t:>11.3f}s" for t in timings))
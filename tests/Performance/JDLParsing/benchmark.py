@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+""" This script measures the parsing of large JDLs, as done by the ClassAd class and by loadJDLAsCFG.
+
+    It does not need any DIRAC installation or configuration, only the DIRAC sources.
+    The JDLs are shaped like the parametric jobs and the jobs with a lot of input data,
+    with nbItems and 10 times nbItems parameters or LFNs, to show that the parsing time is linear with the size.
+    For each JDL, it prints the best time of a few repetitions for:
+      * parse: parsing the JDL, without the cache of parseJDL
+      * cached: parsing the same JDL again, which is only cached if it is shorter than MAX_CACHED_JDL_LENGTH
+      * ClassAd: building a ClassAd, with the cache
+      * list: getting the list of the parameters or LFNs from the ClassAd
+      * CFG: loading the JDL as CFG, as done by the JobManifest, with the cache
+
+    Tunable parameters:
+      * nbItems: number of parameters / LFNs in the smallest JDLs
+      * repeat: number of repetitions of each measurement
+"""
+import sys
+import timeit
+
+from DIRAC.Core.Utilities.ClassAd.ClassAdLight import ClassAd, _parseJDL, parseJDL
+from DIRAC.Core.Utilities.JDL import loadJDLAsCFG
+
+nbItems = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+COMMON = """
+    Executable = "dirac-jobexec";
+    Arguments = "jobDescription.xml -o LogLevel=INFO";
+    JobName = "benchmark";
+    JobType = "User";
+    Owner = "someuser";
+    OwnerGroup = "vo_user";
+    VirtualOrganization = "vo";
+    CPUTime = 86400;
+    Priority = 1;
+    StdOutput = "std.out";
+    StdError = "std.err";
+    OutputSandbox = {"std.out", "std.err", "*.log"};
+    InputSandbox = {"jobDescription.xml", "LFN:/vo/user/s/someuser/sandbox.tar.gz"};
+    Tags = {"MultiProcessor", "8Processors"};
+    Site = {"LCG.CERN.cern", "LCG.IN2P3.fr", "LCG.RAL.uk"};
+    JobRequirements = [ OwnerGroup = "vo_user"; CPUTime = 86400; VirtualOrganization = "vo"; ];
+"""
+
+
+def parametricJDL(nb):
+    """Parametric job with 3 sequences of parameters"""
+    return (
+        f"[{COMMON}"
+        f"    Parameters = {nb};\n"
+        f"    Parameters.Run = {{{', '.join(str(i) for i in range(nb))}}};\n"
+        f"    Parameters.Seed = {{{', '.join(str(i * 7919) for i in range(nb))}}};\n"
+        f"    Parameters.Name = {{{', '.join(f'{chr(34)}run_{i:08d}{chr(34)}' for i in range(nb))}}};\n"
+        f'    Run = "%(Run)s";\n'
+        "]"
+    )
+
+
+def inputDataJDL(nb):
+    """Job with a lot of input data"""
+    lfns = ",\n        ".join(f'"LFN:/vo/prod/data/2024/RAW/{i // 1000:06d}/file_{i:08d}.raw"' for i in range(nb))
+    return f'[{COMMON}    InputData =\n    {{\n        {lfns}\n    }};\n    InputDataPolicy = "Download";\n]'
+
+
+jdls = {}
+for nb in (nbItems, 10 * nbItems):
+    jdls[f"parametric {nb}"] = (parametricJDL(nb), "Parameters.Name")
+    jdls[f"inputData {nb}"] = (inputDataJDL(nb), "InputData")
+
+print(f"{'JDL':<20}{'size (kB)':>10}{'parse':>10}{'cached':>10}{'ClassAd':>10}{'list':>10}{'CFG':>10}")
+for name, (jdl, listName) in jdls.items():
+    classAd = ClassAd(jdl)
+    nbListItems = int(name.split()[-1])
+    if len(classAd.getListFromExpression(listName)) != nbListItems:
+        raise RuntimeError(f"{name}: {listName} should have {nbListItems} items")
+    if not loadJDLAsCFG(jdl)["OK"]:
+        raise RuntimeError(f"{name}: failed to load the JDL as CFG")
+
+    timings = [
+        min(timeit.repeat(func, number=1, repeat=repeat))
+        for func in (
+            lambda: _parseJDL(jdl),
+            lambda: parseJDL(jdl),
+            lambda: ClassAd(jdl),
+            lambda: classAd.getListFromExpression(listName),
+            lambda: loadJDLAsCFG(jdl),
+        )
+    ]
+    print(f"{name:<20}{len(jdl) / 1024:>10.1f}" + "".join(f"{timing * 1000:>9.2f}m" for timing in timings))
+print("Times are in milliseconds (m)")
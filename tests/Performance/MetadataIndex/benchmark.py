@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+""" This script compares findDirIDsByMetadata of the FileCatalogDB with and without
+    the index of the metadata inherited by the directories (MetadataIndex option).
+
+    It needs a configured FileCatalogDB, and must not be run against a production one:
+    it creates a synthetic tree of directories under /benchmark, with metadata
+    defined at several levels, and removes the metadata fields at the end.
+    Creating the default tree of about a million directories takes a while: the tree
+    is kept, and is reused by the following runs with the same parameters.
+    For a set of queries, it checks that both ways give the same directories,
+    and prints the time taken by each query.
+
+    Tunable parameters:
+      * fanout: number of subdirectories of each directory
+      * depth: number of levels of the tree, there are about fanout ** depth directories
+      * nbQueries: number of random queries done with and without the index
+"""
+import random
+import sys
+import time
+
+import DIRAC
+
+DIRAC.initialize()  # Initialize configuration
+
+from DIRAC.DataManagementSystem.DB.FileCatalogDB import FileCatalogDB
+
+fanout = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+depth = int(sys.argv[2]) if len(sys.argv) > 2 else 6
+nbQueries = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+credDict = {"username": "dirac", "group": "dirac_admin", "properties": ["FileCatalogManagement"]}
+databaseConfig = {
+    "UniqueGUID": False,
+    "GlobalReadAccess": True,
+    "LFNPFNConvention": "Strong",
+    "ResolvePFN": True,
+    "DefaultUmask": 0o775,
+    "ValidFileStatus": ["AprioriGood"],
+    "ValidReplicaStatus": ["AprioriGood"],
+    "VisibleFileStatus": ["AprioriGood"],
+    "VisibleReplicaStatus": ["AprioriGood"],
+    "UserGroupManager": "UserAndGroupManagerDB",
+    "SEManager": "SEManagerDB",
+    "SecurityManager": "NoSecurityManager",
+    "DirectoryManager": "DirectoryLevelTree",
+    "FileManager": "FileManager",
+    "DirectoryMetadata": "DirectoryMetadata",
+    "FileMetadata": "FileMetadata",
+    "DatasetManager": "DatasetManager",
+    "MetadataIndex": True,
+}
+
+# Metadata defined at each level of the tree, with their possible values
+metaLevels = {
+    1: ("BenchYear", "INT", list(range(2015, 2015 + fanout))),
+    2: ("BenchType", "String", [f"type{i}" for i in range(fanout)]),
+    4: ("BenchRun", "INT", list(range(fanout))),
+}
+
+db = FileCatalogDB()
+result = db.setConfig(databaseConfig)
+if not result["OK"]:
+    raise RuntimeError(result["Message"])
+
+
+def check(result):
+    if not result["OK"]:
+        raise RuntimeError(result["Message"])
+    return result["Value"]
+
+
+print(f"Creating the tree of {sum(fanout ** level for level in range(1, depth + 1))} directories")
+start = time.time()
+levelDirs = [["/benchmark"]]
+check(db.createDirectory("/benchmark", credDict))
+for level in range(1, depth + 1):
+    levelDirs.append([f"{parent}/d{i}" for parent in levelDirs[-1] for i in range(fanout)])
+    for path in levelDirs[level]:
+        if not check(db.dtree.findDir(path)):
+            check(db.dtree.makeDirectory(path, credDict))
+print(f"  done in {time.time() - start:.1f} s")
+
+print("Setting the metadata")
+for level, (metaName, metaType, values) in metaLevels.items():
+    check(db.dmeta.addMetadataField(metaName, metaType, credDict))
+    for index, path in enumerate(levelDirs[level]):
+        check(db.dmeta.setMetadata(path, {metaName: values[index % fanout]}, credDict))
+print(f"  {check(db.rebuildMetadataIndex(credDict))} directories define metadata")
+
+
+def randomQuery():
+    query = {}
+    for metaName, _metaType, values in random.sample(list(metaLevels.values()), random.randint(1, len(metaLevels))):
+        if random.random() < 0.5:
+            query[metaName] = random.choice(values)
+        else:
+            query[metaName] = random.sample(values, 2)
+    return query
+
+
+def benchmark(query):
+    start = time.time()
+    dirIDs = check(db.dmeta.findDirIDsByMetadata(query, "/benchmark", credDict))
+    return set(dirIDs), time.time() - start
+
+
+try:
+    print(f"{'query':60} {'directories':>12} {'no index (s)':>14} {'index (s)':>10}")
+    for query in (randomQuery() for _ in range(nbQueries)):
+        db.metadataIndex = False
+        expected, withoutIndex = benchmark(query)
+        db.metadataIndex = True
+        found, withIndex = benchmark(query)
+        assert found == expected, query
+        print(f"{str(query):60} {len(found):12} {withoutIndex:14.3f} {withIndex:10.3f}")
+finally:
+    for metaName, _metaType, _values in metaLevels.values():
+        db.dmeta.deleteMetadataField(metaName, credDict)
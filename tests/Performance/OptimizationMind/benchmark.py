@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+""" This script compares the optimization of jobs one by one with the optimization by batches,
+    as done by the executors having a BatchSize option greater than 1.
+
+    It does not need any DB: the JobDB, the JobLoggingDB and the file catalog are replaced by
+    in-memory stand-ins adding a fixed latency to each statement, to mimic the round trips to the servers.
+    Each job goes through an InputData-like step: its manifest and its input data are loaded,
+    the replicas of its LFNs are looked up, and its status, an optimizer parameter and a logging record are written.
+    It prints the number of jobs optimized per second, and the number of statements per job, for both ways.
+
+    Tunable parameters:
+      * nbJobs: number of jobs to optimize
+      * batchSize: number of jobs per batch
+      * latency: latency of each statement, in milliseconds
+"""
+import sys
+import time
+
+from DIRAC import S_OK
+from DIRAC.WorkloadManagementSystem.Client import JobStatus
+from DIRAC.WorkloadManagementSystem.Client.JobState.CachedJobState import CachedJobState
+from DIRAC.WorkloadManagementSystem.Client.JobState.JobState import JobState
+
+nbJobs = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+batchSize = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+latency = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.0005
+
+JDL = """[
+    Executable = "my.sh";
+    JobType = "User";
+    VirtualOrganization = "vo";
+    InputData = {"/vo/data/%(jid)s", "/vo/data/common"};
+]"""
+
+
+class StandIn:
+    """Count the statements, and wait for the latency of each of them"""
+
+    statements = 0
+
+    @classmethod
+    def _statement(cls):
+        StandIn.statements += 1
+        time.sleep(latency)
+
+
+class StandInJobDB(StandIn):
+    def __init__(self, jids):
+        self.attributes = {
+            jid: {"Status": JobStatus.CHECKING, "MinorStatus": "InputData", "LastUpdateTime": "2024-01-01 00:00:00"}
+            for jid in jids
+        }
+        self.optParameters = {jid: {"OptimizerChain": "JobPath,JobSanity,InputData,JobScheduling"} for jid in jids}
+        self.jdls = {jid: JDL % {"jid": jid} for jid in jids}
+        self.inputData = {jid: [f"/vo/data/{jid}", "/vo/data/common"] for jid in jids}
+
+    def getJobAttributes(self, jid, attrList=None):
+        self._statement()
+        return S_OK({name: self.attributes[jid][name] for name in attrList or self.attributes[jid]})
+
+    def getJobsAttributes(self, jids, attrList=None):
+        self._statement()
+        return S_OK({jid: {name: self.attributes[jid][name] for name in attrList} for jid in jids})
+
+    def setJobAttributes(self, jids, attrNames, attrValues, update=False):
+        self._statement()
+        for jid in jids if isinstance(jids, list) else [jids]:
+            self.attributes[jid].update(zip(attrNames, attrValues))
+        return S_OK()
+
+    def getJobOptParameter(self, jid, name):
+        self._statement()
+        return S_OK(self.optParameters[jid].get(name))
+
+    def getJobsOptParameters(self, jids, nameList=None):
+        self._statement()
+        return S_OK({jid: {name: self.optParameters[jid][name] for name in nameList} for jid in jids})
+
+    def setJobOptParameter(self, jid, name, value):
+        self._statement()
+        self.optParameters[jid][name] = value
+        return S_OK()
+
+    def setJobsOptParameters(self, jobsOptParameters):
+        self._statement()
+        for jid, parameters in jobsOptParameters.items():
+            self.optParameters[jid].update(parameters)
+        return S_OK()
+
+    def getJobJDL(self, jid, original=False):
+        self._statement()
+        return S_OK(self.jdls[jid])
+
+    def getJobsJDL(self, jids, original=False):
+        self._statement()
+        return S_OK({jid: self.jdls[jid] for jid in jids})
+
+    def getInputData(self, jid):
+        self._statement()
+        return S_OK(list(self.inputData[jid]))
+
+    def getJobsInputData(self, jids):
+        self._statement()
+        return S_OK({jid: list(self.inputData[jid]) for jid in jids})
+
+
+class StandInJobLoggingDB(StandIn):
+    def __init__(self):
+        self.records = []
+
+    def addLoggingRecord(self, jobID, **record):
+        self._statement()
+        self.records.append(dict(record, jobID=jobID))
+        return S_OK()
+
+    def addLoggingRecords(self, records):
+        self._statement()
+        self.records.extend(records)
+        return S_OK()
+
+
+class StandInDataManager(StandIn):
+    def getReplicasForJobs(self, lfns):
+        self._statement()
+        return S_OK({"Successful": {lfn: {"SE_1": lfn} for lfn in lfns}, "Failed": {}})
+
+
+jids = list(range(1, nbJobs + 1))
+jobDB = StandInJobDB(jids)
+logDB = StandInJobLoggingDB()
+dm = StandInDataManager()
+db = JobState._JobState__db
+db.jobDB, db.logDB, db.tqDB, db.checked = jobDB, logDB, None, True
+
+
+def check(result):
+    if not result["OK"]:
+        raise RuntimeError(result["Message"])
+    return result["Value"]
+
+
+def optimizeJob(jobState, replicas=None):
+    """The InputData step of a job, with the replicas already looked up or not"""
+    manifest = check(jobState.getManifest())
+    lfns = check(jobState.getInputData())
+    if replicas is None:
+        replicas = check(dm.getReplicasForJobs(lfns))["Successful"]
+    jobState.setOptParameter("DataSites", ",".join(sorted({se for lfn in lfns for se in replicas[lfn]})))
+    jobState.setStatus(JobStatus.CHECKING, "JobScheduling", source=manifest.getOption("JobType"))
+
+
+def oneByOne(jids):
+    for jid in jids:
+        jobState = CachedJobState(jid)
+        optimizeJob(jobState)
+        check(jobState.commitChanges())
+
+
+def byBatches(jids):
+    for first in range(0, len(jids), batchSize):
+        jobStates = list(check(CachedJobState.bulkLoad(jids[first : first + batchSize])).values())
+        check(CachedJobState.preload(jobStates, manifest=True, inputData=True))
+        lfns = sorted({lfn for jobState in jobStates for lfn in check(jobState.getInputData())})
+        replicas = check(dm.getReplicasForJobs(lfns))["Successful"]
+        for jobState in jobStates:
+            optimizeJob(jobState, replicas)
+        result = check(CachedJobState.bulkCommitChanges(jobStates))
+        if result["Failed"]:
+            raise RuntimeError(f"Jobs not committed: {result['Failed']}")
+
+
+print(f"Optimizing {nbJobs} jobs, {latency * 1000:.2f} ms per statement")
+print(f"{'':>12}{'jobs/s':>10}{'statements/job':>16}")
+for name, function in (("one by one", oneByOne), (f"batch {batchSize}", byBatches)):
+    StandIn.statements = 0
+    logDB.records = []
+    start = time.time()
+    function(jids)
+    elapsed = time.time() - start
+    if len(logDB.records) != nbJobs:
+        raise RuntimeError(f"{len(logDB.records)} logging records for {nbJobs} jobs")
+    print(f"{name:>12}{nbJobs / elapsed:>10.1f}{StandIn.statements / nbJobs:>16.2f}")
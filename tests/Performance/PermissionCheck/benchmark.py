@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+""" This script compares the permission checks of the VOMSSecurityManager of the FileCatalogDB
+    done path per path with the bulk evaluation of all the paths of a request.
+
+    It needs a configured FileCatalogDB, and must not be run against a production one:
+    it registers synthetic files under /benchmark, and removes them at the end.
+    For each operation and each way, it prints the number of paths checked per second,
+    and whether both ways gave the same decisions.
+
+    Tunable parameters:
+      * nbFiles: number of files whose permissions are checked in each request
+      * nbDirectories: number of directories the files are spread over
+      * group: DIRAC group of the user whose permissions are checked
+"""
+import sys
+import time
+
+import DIRAC
+
+DIRAC.initialize()  # Initialize configuration
+
+from DIRAC.Core.Utilities.File import makeGuid
+from DIRAC.DataManagementSystem.DB.FileCatalogDB import FileCatalogDB
+
+nbFiles = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+nbDirectories = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+group = sys.argv[3] if len(sys.argv) > 3 else "dirac_user"
+
+adminCredDict = {"username": "dirac", "group": "dirac_admin", "properties": ["FileCatalogManagement"]}
+userCredDict = {"username": "benchuser", "group": group, "properties": []}
+databaseConfig = {
+    "UniqueGUID": False,
+    "GlobalReadAccess": False,
+    "LFNPFNConvention": "Strong",
+    "ResolvePFN": True,
+    "DefaultUmask": 0o775,
+    "ValidFileStatus": ["AprioriGood"],
+    "ValidReplicaStatus": ["AprioriGood"],
+    "VisibleFileStatus": ["AprioriGood"],
+    "VisibleReplicaStatus": ["AprioriGood"],
+    "UserGroupManager": "UserAndGroupManagerDB",
+    "SEManager": "SEManagerDB",
+    "SecurityManager": "VOMSSecurityManager",
+    "DirectoryManager": "DirectoryLevelTree",
+    "FileManager": "FileManager",
+    "DirectoryMetadata": "DirectoryMetadata",
+    "FileMetadata": "FileMetadata",
+    "DatasetManager": "DatasetManager",
+}
+
+db = FileCatalogDB()
+result = db.setConfig(databaseConfig)
+if not result["OK"]:
+    raise RuntimeError(result["Message"])
+
+
+def check(result):
+    if not result["OK"]:
+        raise RuntimeError(result["Message"])
+    return result["Value"]
+
+
+check(db.addSE("BENCH-SE", adminCredDict))
+
+lfns = {
+    f"/benchmark/permissions/dir{i % nbDirectories}/file{i}": {
+        "PFN": "",
+        "SE": "BENCH-SE",
+        "Size": 1000 + i,
+        "GUID": makeGuid(),
+        "Checksum": "0a1b2c3d",
+    }
+    for i in range(nbFiles)
+}
+# Half of the paths checked do not exist, in directories which do not exist either
+paths = list(lfns) + [f"/benchmark/permissions/new{i % nbDirectories}/file{i}" for i in range(nbFiles)]
+
+
+def benchmark(opType, bulkPermissions):
+    db.securityManager.bulkPermissions = bulkPermissions
+    start = time.time()
+    result = check(db.securityManager.hasAccess(opType, paths, userCredDict))
+    elapsed = time.time() - start
+    return result, len(paths) / elapsed
+
+
+print(f"{'operation':15} {'per path/s':>14} {'bulk/s':>14} {'speedup':>8} {'same':>5}")
+try:
+    check(db.addFile(dict(lfns), adminCredDict))
+    for opType in ["addFile", "removeFile", "getReplicas", "addReplica", "listDirectory", "changePathMode"]:
+        perPathResult, perPathRate = benchmark(opType, False)
+        bulkResult, bulkRate = benchmark(opType, True)
+        print(
+            f"{opType:15} {perPathRate:14.1f} {bulkRate:14.1f} {bulkRate / perPathRate:8.1f} "
+            f"{str(perPathResult == bulkResult):>5}"
+        )
+finally:
+    db.securityManager.bulkPermissions = True
+    db.removeFile(list(lfns), adminCredDict)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+""" This script compares the matching of resources against the TaskQueueDB
+    with and without the in-memory task queue index.
+
+    It needs a configured TaskQueueDB, and must not be run against a production one:
+    it inserts jobs with IDs starting at firstJobID, and removes them at the end.
+    For a set of resource descriptions, it checks that both ways give the same task queues,
+    and prints the number of matches per second done by one thread.
+
+    Tunable parameters:
+      * nbTQs: number of task queues to create
+      * nbMatches: number of matches done with and without the index
+"""
+import random
+import sys
+import time
+
+import DIRAC
+
+DIRAC.initialize()  # Initialize configuration
+
+from DIRAC.WorkloadManagementSystem.DB.TaskQueueDB import TaskQueueDB
+
+nbTQs = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+nbMatches = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+firstJobID = 900000000
+
+sites = [f"Site_{i}" for i in range(50)]
+platforms = ["slc6", "centos7", "el9", "ubuntu"]
+tags = ["GPU", "MultiProcessor", "WholeNode", "8Processors", "2GB"]
+groups = ["prod", "user", "admin"]
+
+sqlDB = TaskQueueDB()
+indexedDB = TaskQueueDB()
+indexedDB.enableMatchIndex(refreshPeriod=3600)
+
+
+def randomTQDefinition():
+    tqDef = {
+        "Owner": f"user_{random.randint(0, 50)}",
+        "OwnerGroup": random.choice(groups),
+        "CPUTime": random.choice([3600, 86400, 172800]),
+    }
+    if random.random() < 0.7:
+        tqDef["Sites"] = random.sample(sites, random.randint(1, 5))
+    if random.random() < 0.2:
+        tqDef["BannedSites"] = random.sample(sites, random.randint(1, 3))
+    if random.random() < 0.5:
+        tqDef["Platforms"] = random.sample(platforms, random.randint(1, 2))
+    if random.random() < 0.3:
+        tqDef["Tags"] = random.sample(tags, random.randint(1, 2))
+    return tqDef
+
+
+def randomResource():
+    return {
+        "CPUTime": random.choice([3600, 86400, 172800]),
+        "OwnerGroup": groups,
+        "Site": random.choice(sites),
+        "Platform": random.sample(platforms, 2),
+        "Tag": random.sample(tags, random.randint(0, 3)),
+    }
+
+
+def benchmark(tqDB, resources):
+    start = time.time()
+    for resource in resources:
+        result = tqDB.matchAndGetTaskQueue(resource, numQueuesToGet=10)
+        if not result["OK"]:
+            raise RuntimeError(result["Message"])
+    return len(resources) / (time.time() - start)
+
+
+print(f"Creating {nbTQs} task queues")
+jobIDs = range(firstJobID, firstJobID + nbTQs)
+for jobID in jobIDs:
+    result = sqlDB.insertJob(jobID, randomTQDefinition(), 1)
+    if not result["OK"]:
+        raise RuntimeError(result["Message"])
+
+try:
+    start = time.time()
+    result = indexedDB.matchAndGetTaskQueue({"CPUTime": 0})
+    if not result["OK"]:
+        raise RuntimeError(result["Message"])
+    print(f"Initial load of the index: {time.time() - start:.3f}s")
+
+    resources = [randomResource() for _ in range(nbMatches)]
+    for resource in resources[:100]:
+        sqlTQs = {row[0] for row in sqlDB.matchAndGetTaskQueue(resource, numQueuesToGet=0)["Value"]}
+        indexTQs = {row[0] for row in indexedDB.matchAndGetTaskQueue(resource, numQueuesToGet=0)["Value"]}
+        if sqlTQs != indexTQs:
+            raise RuntimeError(f"Different task queues for {resource}: {sqlTQs ^ indexTQs}")
+
+    print(f"{'matches/s SQL':>15}{'matches/s index':>17}")
+    print(f"{benchmark(sqlDB, resources):>15.1f}{benchmark(indexedDB, resources):>17.1f}")
+finally:
+    for jobID in jobIDs:
+        sqlDB.deleteJob(jobID)
+    sqlDB.cleanOrphanedTaskQueues()